@@ -79,6 +79,12 @@ try:
     from js_builtins import register_builtins
 except Exception:
     import functions as funcs  # fallback if running as script
+import syntax_lexer
+import piece_table
+import large_file
+import http_cache
+import syntax_presets
+import render_jobs
 
 # Optional: Import rAthena tools if available (for SimpleEdit plugins or external use)
 try:
@@ -181,11 +187,162 @@ def clear_recent_files():
     return funcs.clear_recent_files(config, INI_PATH,
                                       on_update=lambda: refresh_recent_menu())
 
+# -------------------------
+# Large-file mode: memory-mapped, read-only, a sliding window of lines in the widget
+# -------------------------
+LARGE_FILE_WINDOW = 3000    # lines held in the Text widget at a time
+LARGE_FILE_EDGE = 0.1       # page when the view comes this close (fraction) to a window edge
+
+
+def _large_file_threshold():
+    """Size in bytes from which files open in large-file mode (0 disables it)."""
+    try:
+        return max(0, int(float(config.get("Section1", "largeFileThresholdMB", fallback="64")) * 1024 * 1024))
+    except Exception:
+        return 64 * 1024 * 1024
+
+
+def _large_file_frame(frame=None):
+    """The current (or given) tab frame when it shows a large file, else None."""
+    try:
+        if frame is None:
+            sel = editorNotebook.select()
+            frame = root.nametowidget(sel) if sel else None
+        return frame if getattr(frame, '_large_file', None) is not None else None
+    except Exception:
+        return None
+
+
+def _large_file_show(frame, tx, first, top=None):
+    """Load lines [first, first + LARGE_FILE_WINDOW) into the widget; top = absolute line to scroll to."""
+    mf = frame._large_file
+    total = mf.line_count
+    first = max(0, min(first, total - LARGE_FILE_WINDOW))
+    last = min(total, first + LARGE_FILE_WINDOW)
+    frame._large_paging = True
+    try:
+        tx.config(state='normal')
+        tx.delete('1.0', 'end')
+        tx.insert('1.0', mf.text(first, last))
+        tx.config(state='disabled')
+        tx.edit_modified(False)
+        frame._large_first, frame._large_last = first, last
+        frame._is_modified = False
+        if top is not None:
+            tx.yview_moveto(max(0, top - first) / max(1, last - first))
+    finally:
+        frame._large_paging = False
+
+
+def _large_file_goto(frame, tx, line):
+    """Show absolute 0-based line, paging the window around it when needed."""
+    first, last = frame._large_first, frame._large_last
+    margin = int(LARGE_FILE_WINDOW * LARGE_FILE_EDGE)
+    near_edge = (line < first + margin and first > 0) or \
+                (line >= last - margin and last < frame._large_file.line_count)
+    if not (first <= line < last) or near_edge:
+        _large_file_show(frame, tx, line - LARGE_FILE_WINDOW // 3)
+    rel = f"{line - frame._large_first + 1}.0"
+    tx.mark_set('insert', rel)
+    tx.see(rel)
+
+
+def _large_file_yscroll(frame, tx, lo, hi):
+    """yscrollcommand of a large-file tab: page near the window edges, scale the scrollbar to the file."""
+    try:
+        mf = frame._large_file
+        total = max(1, mf.line_count)
+        first, last = frame._large_first, frame._large_last
+        span = max(1, last - first)
+        lo, hi = float(lo), float(hi)
+        tx._vscroll.set((first + lo * span) / total, (first + hi * span) / total)
+        if getattr(frame, '_large_paging', False):
+            return
+        if getattr(frame, '_large_pending', False):
+            return
+        if (lo < LARGE_FILE_EDGE and first > 0) or (hi > 1 - LARGE_FILE_EDGE and last < total):
+            # re-centre the window on the view, keeping the top line where it is
+            def page():
+                frame._large_pending = False
+                top = frame._large_first + int(tx.index('@0,0').split('.')[0]) - 1
+                _large_file_show(frame, tx, top - LARGE_FILE_WINDOW // 2, top=top)
+                safe_highlight_event(None)
+            frame._large_pending = True
+            root.after_idle(page)
+    except Exception:
+        pass
+
+
+def _large_file_scroll(frame, tx, *args):
+    """Scrollbar command of a large-file tab: 'moveto' addresses the whole file."""
+    try:
+        if args and args[0] == 'moveto':
+            top = int(float(args[1]) * frame._large_file.line_count)
+            _large_file_show(frame, tx, top - LARGE_FILE_WINDOW // 2, top=top)
+        else:
+            tx.yview(*args)
+        safe_highlight_event(None)
+    except Exception:
+        pass
+
+
+def _open_large_file(path):
+    """Open `path` memory-mapped and read-only in a new tab, indexing its lines in the background.
+
+    Always a new tab: the tab's scrollbar and modified tracking are rewired for paging.
+    """
+    mf = large_file.MappedFile(path)
+    tx, frame = create_editor_tab(f"{os.path.basename(path) or path} [read-only]", '', filename=path)
+    frame._large_file = mf
+    frame._large_first = frame._large_last = 0
+    frame._view_raw = True
+    tx.config(yscrollcommand=lambda lo, hi: _large_file_yscroll(frame, tx, lo, hi))
+    tx._vscroll.config(command=lambda *a: _large_file_scroll(frame, tx, *a))
+    root.fileName = path
+    size_mb = mf.size / (1024 * 1024)
+
+    def progress(done, size, lines):
+        root.after(0, lambda: statusBar.config(
+            text=f"Indexing '{os.path.basename(path)}': {done * 100 // max(1, size)}% ({lines:,} lines)"))
+
+    def first_window():
+        if getattr(frame, '_large_file', None) is not mf:
+            return
+        if mf.line_count < LARGE_FILE_WINDOW and not mf.done.is_set():
+            root.after(50, first_window)
+            return
+        _large_file_show(frame, tx, 0)
+        if mf.done.is_set():
+            statusBar['text'] = f"'{path}' opened read-only ({size_mb:.0f} MB, {mf.line_count:,} lines)"
+        else:
+            root.after(250, indexed)
+
+    def indexed():
+        if getattr(frame, '_large_file', None) is not mf:
+            return
+        if not mf.done.is_set():
+            root.after(250, indexed)
+            return
+        _large_file_yscroll(frame, tx, *tx.yview())
+        statusBar['text'] = f"'{path}' opened read-only ({size_mb:.0f} MB, {mf.line_count:,} lines)"
+
+    mf.start_indexing(progress)
+    first_window()
+    add_recent_file(path)
+    refresh_recent_menu()
+
+
 def _open_path(path: str, open_in_new_tab: bool = True):
     """Core logic to open `path` either in a new tab or in the current tab."""
     try:
+        threshold = _large_file_threshold()
+        if threshold and os.path.getsize(path) >= threshold:
+            _open_large_file(path)
+            return
+        read_started = time.perf_counter()
         with open(path, 'r', errors='replace', encoding='utf-8') as fh:
             raw = fh.read()
+        read_seconds = time.perf_counter() - read_started
 
         # First try to extract SIMPLEEDIT meta (preferred)
         
@@ -342,118 +499,137 @@ def _open_path(path: str, open_in_new_tab: bool = True):
                     root.after(0, highlightPythonInit)
                 return
 
-            plain, tags_meta = funcs._parse_html_and_apply(raw)
-            # IMPORTANT: extract scripts from the original raw HTML (plain is the stripped/parsed text)
-            scripts = funcs.extract_script_tags(raw)
-            # debug: show how many scripts we found so it's easy to verify when opening a file
-            try:
-                cnt = len(scripts) if isinstance(scripts, (list, tuple)) else 0
-                statusBar['text'] = f"Found {cnt} script(s) in document"
-                print(f"[debug] Found {cnt} script(s) when opening {path}")
-                if cnt:
-                    print("[debug] first script preview:", str(scripts[0])[:200])
-            except Exception:
-                pass
-            if open_in_new_tab:
-                tx, fr = create_editor_tab(os.path.basename(path) or "Untitled", plain, filename=path)
-                _apply_tag_configs_to_widget(tx)
-                # keep original raw HTML and parsed meta on the tab so we can toggle view later
+            target = None if open_in_new_tab else editorNotebook.select()
+
+            def _show_parsed(plain, tags_meta):
+                # the tab may have been switched while the page was parsing: render into the tab it
+                # was opened in (tw) without selecting it; only the selected tab updates root/highlighting
+                tw = textArea
+                showing = True
+                if target:
+                    showing = editorNotebook.select() == target
+                    try:
+                        frame = root.nametowidget(target)
+                        tw = next(c for c in frame.winfo_children() if isinstance(c, Text))
+                    except Exception:
+                        return
+                # IMPORTANT: extract scripts from the original raw HTML (plain is the stripped/parsed text)
+                scripts = funcs.extract_script_tags(raw)
+                # debug: show how many scripts we found so it's easy to verify when opening a file
                 try:
-                    fr._raw_html = raw
-                    fr._raw_html_plain = plain
-                    fr._raw_html_tags_meta = tags_meta
-                    fr._view_raw = False
+                    cnt = len(scripts) if isinstance(scripts, (list, tuple)) else 0
+                    statusBar['text'] = f"Found {cnt} script(s) in document"
+                    print(f"[debug] Found {cnt} script(s) when opening {path}")
+                    if cnt:
+                        print("[debug] first script preview:", str(scripts[0])[:200])
+                except Exception:
+                    pass
+                if open_in_new_tab:
+                    tx, fr = create_editor_tab(os.path.basename(path) or "Untitled", plain, filename=path)
+                    tw = tx
+                    _apply_tag_configs_to_widget(tx)
+                    # keep original raw HTML and parsed meta on the tab so we can toggle view later
+                    try:
+                        fr._raw_html = raw
+                        fr._raw_html_plain = plain
+                        fr._raw_html_tags_meta = tags_meta
+                        fr._view_raw = False
 
-                    # callback exposed to scripts: when JS calls setRaw(newHtml) this updates the tab's raw buffer
-                    # and reparses/re-renders it on the UI thread.
-                    def _host_update_from_script(new_raw):
-                        try:
-                            if new_raw is None:
-                            # force re-render of current stored raw
-                                src_raw = getattr(fr, '_raw_html', None)
-                            else:
-                                src_raw = new_raw
-                            if not src_raw:
-                                return
-                            # re-parse and update stored metadata
-                            plain2, tags_meta2 = funcs._parse_html_and_apply(src_raw)
-                            fr._raw_html = src_raw
-                            fr._raw_html_plain = plain2
-                            fr._raw_html_tags_meta = tags_meta2
-                            fr._view_raw = False
-                            # replace editor content and reapply tag configs
-                            tx.delete('0.0', 'end')
-                            tx.tag_remove('0.0', 'end')
-                            tx.insert('1.0', plain2)
-                            tx.tag_remove('0.0', 'end')
-                            _apply_tag_configs_to_widget(tx)
-                            # apply formatting meta and refresh highlighting on UI thread
+                        # callback exposed to scripts: when JS calls setRaw(newHtml) this updates the tab's raw buffer
+                        # and reparses/re-renders it on the UI thread.
+                        def _host_update_from_script(new_raw):
                             try:
-                                root.after(0, lambda: _apply_formatting_from_meta(tags_meta2))
-                                root.after(0, highlightPythonInit)
+                                if new_raw is None:
+                                # force re-render of current stored raw
+                                    src_raw = getattr(fr, '_raw_html', None)
+                                else:
+                                    src_raw = new_raw
+                                if not src_raw:
+                                    return
+                                # re-parse and update stored metadata
+                                plain2, tags_meta2 = funcs._parse_html_and_apply(src_raw)
+                                fr._raw_html = src_raw
+                                fr._raw_html_plain = plain2
+                                fr._raw_html_tags_meta = tags_meta2
+                                fr._view_raw = False
+                                # replace editor content and reapply tag configs
+                                tx.delete('0.0', 'end')
+                                tx.tag_remove('0.0', 'end')
+                                tx.insert('1.0', plain2)
+                                tx.tag_remove('0.0', 'end')
+                                _apply_tag_configs_to_widget(tx)
+                                # apply formatting meta and refresh highlighting on UI thread
+                                try:
+                                    root.after(0, lambda: _apply_formatting_from_meta(tags_meta2))
+                                    root.after(0, highlightPythonInit)
+                                except Exception:
+                                    pass
                             except Exception:
                                 pass
-                        except Exception:
-                            pass
-                    host_cb = _make_host_update_cb_for_frame(fr, tx)
-                    scripts_to_run = funcs.extract_script_tags(fr._raw_html or '')
-                    # run scripts with host callback available in JS context as setRaw(...) and host.setRaw(...)
-                    run_results = funcs.run_scripts(scripts_to_run, base_url=path, log_fn=lambda s: (print(s), statusBar.config(text=s)), host_update_cb=host_cb, return_dom=True, collect_dom_changes=True, dom_log_verbose=True, html_source=fr._raw_html)
+                        host_cb = _make_host_update_cb_for_frame(fr, tx)
+                        scripts_to_run = funcs.extract_script_tags(fr._raw_html or '')
+                        # run scripts with host callback available in JS context as setRaw(...) and host.setRaw(...)
+                        run_results = funcs.run_scripts(scripts_to_run, base_url=path, log_fn=lambda s: (print(s), statusBar.config(text=s)), host_update_cb=host_cb, return_dom=True, collect_dom_changes=True, dom_log_verbose=True, html_source=fr._raw_html)
 
-                except Exception:
-                    pass
-                try:
-                    fr._opened_as_source = False
-                except Exception:
-                    pass
-            else:
+                    except Exception:
+                        pass
+                    try:
+                        fr._opened_as_source = False
+                    except Exception:
+                        pass
+                else:
 
-                textArea.delete('1.0', 'end')
-                textArea.tag_remove('0.0', 'end')
-                textArea.insert('1.0', plain)
+                    tw.delete('1.0', 'end')
+                    tw.tag_remove('0.0', 'end')
+                    tw.insert('1.0', plain)
                 
-                _apply_tag_configs_to_widget(textArea)
-                try:
-                    sel = editorNotebook.select()
-                    if sel:
-                        frame = root.nametowidget(sel)
+                    _apply_tag_configs_to_widget(tw)
+                    try:
                         frame._raw_html = raw
                         frame._raw_html_plain = plain
                         frame._raw_html_tags_meta = tags_meta
                         frame._view_raw = False
+                        frame._opened_as_source = False
+                        frame.fileName = path
                         # update tab title for in-place open
                         try:
-                            editorNotebook.tab(sel, text=os.path.basename(path) or path)
+                            editorNotebook.tab(target, text=os.path.basename(path) or path)
                         except Exception:
                             pass
-                except Exception:
-                    pass
+                    except Exception:
+                        pass
+                statusBar['text'] = f"'{path}' opened (HTML/MD parsed)!"
+                add_recent_file(path)
+                refresh_recent_menu()
+                if tags_meta and tags_meta.get('tags'):
+                    def _format_target():
+                        prev_ta = globals().get('textArea', None)
+                        try:
+                            globals()['textArea'] = tw
+                            _apply_formatting_from_meta(tags_meta)
+                        finally:
+                            if prev_ta is not None:
+                                globals()['textArea'] = prev_ta
+                    root.after(0, _format_target)
+                if not showing:
+                    return
+                root.fileName = path
+                # schedule one-shot autodetect after replacing current tab content
                 try:
-                    sel = editorNotebook.select()
-                    if sel:
-                        frame = root.nametowidget(sel)
-                        frame._opened_as_source = False
+                    prev = getattr(root, '_manual_detect_after_id', None)
+                    if prev:
+                        try:
+                            root.after_cancel(manual_detect_after_id)
+                        except Exception:
+                            pass
+                    manual_detect_after_id = root.after(1000, lambda: manual_detect_syntax(force=False))
                 except Exception:
                     pass
-            statusBar['text'] = f"'{path}' opened (HTML/MD parsed)!"
-            root.fileName = path
-            add_recent_file(path)
-            refresh_recent_menu()
-            # schedule one-shot autodetect after replacing current tab content
-            try:
-                prev = getattr(root, '_manual_detect_after_id', None)
-                if prev:
-                    try:
-                        root.after_cancel(manual_detect_after_id)
-                    except Exception:
-                        pass
-                manual_detect_after_id = root.after(1000, lambda: manual_detect_syntax(force=False))
-            except Exception:
-                pass
-            if tags_meta and tags_meta.get('tags'):
-                root.after(0, lambda: _apply_formatting_from_meta(tags_meta))
-            if updateSyntaxHighlighting.get():
-                root.after(0, highlightPythonInit)
+                if updateSyntaxHighlighting.get():
+                    root.after(0, highlightPythonInit)
+
+            statusBar['text'] = f"Rendering '{path}'..."
+            _submit_render(target or ('open', path), raw, _show_parsed, fetch_seconds=read_seconds)
             return
 
         # Fallback: raw
@@ -1491,6 +1667,85 @@ url_history = funcs.load_url_history(config)  # most-recent-first
 _url_history_max = 50
 # stack of opened locations for back behavior (push on open)
 url_back_stack = []
+# fetched pages (body, charset, validators) for Back/Refresh, over pooled keep-alive connections
+page_cache = http_cache.PageCache(max_entries=32)
+page_pool = http_cache.ConnectionPool()
+_PAGE_SOURCE_TEXT = {'cache': 'Page: cache hit', 'revalidated': 'Page: revalidated', 'network': 'Page: miss'}
+# HTML parsing off the Tk thread, one job per tab (keyed by the tab's widget name).
+# Started by _render_pool() on first use, so importing this module starts no workers.
+render_pool = None
+
+
+def _render_pool() -> render_jobs.RenderPool:
+    """render_pool, started with renderProcesses workers if it is not running yet."""
+    global render_pool
+    if render_pool is None:
+        render_pool = render_jobs.RenderPool(processes=config.getint("Section1", "renderProcesses", fallback=1))
+    return render_pool
+
+
+def _reset_render_pool():
+    """Shut render_pool down (its pending renders are dropped); the next render starts a new one."""
+    global render_pool
+    pool, render_pool = render_pool, None
+    if pool is not None:
+        # shutdown joins the workers: keep that off the Tk thread
+        threading.Thread(target=pool.shutdown, daemon=True).start()
+
+
+def _cancel_render(key) -> bool:
+    """Cancel key's pending render, if a render pool is running."""
+    return render_pool is not None and render_pool.cancel(key)
+
+
+def _submit_render(key, raw: str, show, fetch_seconds=None) -> render_jobs.RenderJob:
+    """Parse raw on render_pool and call show(plain, tags_meta) on the Tk thread.
+
+    A newer job for the same key, or _cancel_render(key), drops this one before show runs.
+    If parsing fails show gets raw without tags. The job's 'apply' stage runs from show until
+    the Tk queue is past the callbacks show scheduled (tag application).
+    """
+    pool = _render_pool()
+
+    def apply(job, plain, tags_meta):
+        if not pool.is_current(job):
+            return
+        started = time.perf_counter()
+        try:
+            show(plain, tags_meta)
+        finally:
+            root.after(0, lambda: _finish_render_job(job, started))
+
+    return pool.submit(
+        key, raw,
+        lambda job, plain, tags_meta: root.after(0, lambda: apply(job, plain, tags_meta)),
+        lambda job, exc: root.after(0, lambda: apply(job, raw, None)),
+        fetch_seconds=fetch_seconds)
+
+
+def _finish_render_job(job: render_jobs.RenderJob, started: float):
+    """Record job's 'apply' stage (started until now); render_pool.recent keeps its timings."""
+    job.record('apply', time.perf_counter() - started)
+    if render_pool is not None:
+        render_pool.finished(job)
+
+
+def _fetch_page(url: str, cache_mode: str = 'normal', on_data=None) -> http_cache.Fetched:
+    """Fetch a page through page_cache (worker thread); cache_mode is 'normal', 'history' or 'refresh'.
+
+    'history' (Back) shows the stored copy without a request, 'refresh' always revalidates it,
+    'normal' reuses it only while fresh. on_data(chunk, charset) sees the body as it arrives.
+    The outcome is shown in the status bar.
+    """
+    got = http_cache.fetch(url, page_cache, timeout=15, headers={"User-Agent": "SimpleEdit/1.0"},
+                           opener=page_pool, revalidate=(cache_mode == 'refresh'),
+                           prefer_cache=(cache_mode == 'history'), on_data=on_data)
+    try:
+        root.after(0, lambda: pageCacheLabel.config(text=_PAGE_SOURCE_TEXT.get(got.source, 'Page: —')))
+    except Exception:
+        pass
+    return got
+
 brainless_mode_var = BooleanVar(value=False)
 def _is_likely_url(s: str) -> bool:
     try:
@@ -1632,10 +1887,10 @@ def _back_action():
         prev = url_back_stack[-1]
         try:
             # Open the previous location WITHOUT recording it again on the back-stack
-            _open_maybe_url(prev, open_in_new_tab=False, record_history=False)
+            _open_maybe_url(prev, open_in_new_tab=False, record_history=False, cache_mode='history')
         except Exception:
             try:
-                fetch_and_open_url(prev, open_in_new_tab=False, record_history=False)
+                fetch_and_open_url(prev, open_in_new_tab=False, record_history=False, cache_mode='history')
             except Exception:
                 try:
                     _open_path(prev, open_in_new_tab=False)
@@ -1666,10 +1921,10 @@ def _refresh_action():
         # if URL -> fetch; if file-like -> open path
         if _is_likely_url(fn) or fn.lower().startswith('http') or fn.lower().startswith('file:///') or fn.lower().startswith('www.'):
             try:
-                fetch_and_open_url(fn, open_in_new_tab=False)
+                fetch_and_open_url(fn, open_in_new_tab=False, cache_mode='refresh')
             except Exception:
                 try:
-                    _open_maybe_url(fn, open_in_new_tab=False)
+                    _open_maybe_url(fn, open_in_new_tab=False, cache_mode='refresh')
                 except Exception:
                     pass
         else:
@@ -3413,11 +3668,14 @@ def create_editor_tab(title='Untitled', content='', filename=''):
     scr = Scrollbar(frame, command=_scroll_cmd)    
     tx.configure(yscrollcommand=scr.set)
     scr.pack(side=RIGHT, fill=Y)
+    tx._vscroll = scr
 
     # apply per-widget configuration and insert content
     _configure_text_widget(tx)
     tx.tag_remove('0.0', 'end')
     _apply_tag_configs_to_widget(tx)
+    # the tab's PieceTable sees every edit from here on; reads go to it instead of Tk
+    piece_table.attach(tx)
     tx.insert('1.0', content)
     # color literal hex codes in this new widget (so #rrggbb/#rgb are shown)
     try:
@@ -3452,11 +3710,24 @@ def create_editor_tab(title='Untitled', content='', filename=''):
 
 def _on_tab_content_modified(text_widget, frame):
     """Track when tab content is modified."""
+    if _large_file_frame(frame) is not None:
+        # window paging replaces the text of a read-only view
+        frame._is_modified = False
+        text_widget.edit_modified(False)
+        return
+    try:
+        # the next highlight pass re-lexes the edited lines (see _incremental_lex)
+        text_widget._lex_dirty = True
+    except Exception:
+        pass
     try:
         if text_widget.edit_modified():
-            current_content = text_widget.get('1.0', 'end-1c')
             initial_content = getattr(frame, '_initial_content', '')
-            frame._is_modified = (current_content != initial_content)
+            doc = piece_table.widget_document(text_widget)
+            if doc is not None and len(doc) != len(initial_content):
+                frame._is_modified = True
+            else:
+                frame._is_modified = (piece_table.widget_text(text_widget) != initial_content)
             text_widget.edit_modified(False)
     except Exception:
         pass
@@ -3820,6 +4091,10 @@ def _close_tab_immediate(frame):
             # Create new blank tab before closing
             create_editor_tab('Untitled', content='', filename='')
         
+        mf = getattr(frame, '_large_file', None)
+        if mf is not None:
+            mf.close()
+        _cancel_render(str(frame))
         # Destroy the frame (removes the tab)
         frame.destroy()
         
@@ -3984,11 +4259,11 @@ KEYWORDS = [
     'and', 'or', 'yield', 'raise', 'global', 'nonlocal', 'assert', 'del',
     'async', 'await', 'pass', 'break', 'continue', 'match', 'case'
 ]
-KEYWORD_RE = re.compile(r'\b(' + r'|'.join(map(re.escape, KEYWORDS)) + r')\b')
+KEYWORD_RE = syntax_presets.word_regex(KEYWORDS)
 
 # short list of builtins you want highlighted (extend as needed)
 BUILTINS = ['len', 'range', 'print', 'open', 'isinstance', 'int', 'str', 'list', 'dict', 'set', 'True', 'False', 'None']
-BUILTIN_RE = re.compile(r'\b(' + r'|'.join(map(re.escape, BUILTINS)) + r')\b')
+BUILTIN_RE = syntax_presets.word_regex(BUILTINS)
 URL_RE = re.compile(
     r'(?i)(?:(?<=^)|(?<=\s)|(?<=[\(\[\{>]))'  # must be at start, after whitespace or after an opening bracket/'">'
     r'(?:https?://[^\s<>"\)\]\}]+|file:///[^\s<>"\)\]\}]+|www\.[^\s<>"\)\]\}]+)'
@@ -4074,7 +4349,6 @@ def open_url_action():
             def worker(url, open_in_new_tab):
                 try:
                     # lazy import to avoid changing top-of-file imports
-                    import urllib.request as urr
                     import urllib.parse as up
                     # ensure scheme
                     parsed = up.urlsplit(url)
@@ -4082,41 +4356,33 @@ def open_url_action():
                         url2 = 'http://' + url
                     else:
                         url2 = url
-                    req = urr.Request(url2, headers={"User-Agent": "SimpleEdit/1.0"})
-                    with urr.urlopen(req, timeout=15) as resp:
-                        # attempt to get charset from headers; fallback to utf-8
-                        charset = None
+                    got = _fetch_page(url2)
+                    charset = got.charset
+                    raw_bytes = got.body
+                    enc = charset or 'utf-8'
+                    try:
+                        raw = raw_bytes.decode(enc, errors='replace')
+                        scripts = funcs.extract_script_tags(raw)
                         try:
-                            ct = resp.headers.get_content_charset()
-                            if ct:
-                                charset = ct
+                                cnt = len(scripts) if isinstance(scripts, (list, tuple)) else 0
+                                statusBar['text'] = f"Found {cnt} script(s) in document"
+                                print(f"[debug] Found {cnt} script(s) when opening {url2}")
+                                if cnt:
+                                    print("[debug] first script preview:", str(scripts[0])[:200])
                         except Exception:
-                            pass
-                        raw_bytes = resp.read()
-                        enc = charset or 'utf-8'
-                        try:
-                            raw = raw_bytes.decode(enc, errors='replace')
-                            scripts = funcs.extract_script_tags(raw)
-                            try:
-                                    cnt = len(scripts) if isinstance(scripts, (list, tuple)) else 0
-                                    statusBar['text'] = f"Found {cnt} script(s) in document"
-                                    print(f"[debug] Found {cnt} script(s) when opening {url2}")
-                                    if cnt:
-                                        print("[debug] first script preview:", str(scripts[0])[:200])
-                            except Exception:
-                               pass
+                           pass
 
+                    except Exception:
+                        raw = raw_bytes.decode('utf-8', errors='replace')
+                        scripts = funcs.extract_script_tags(raw)
+                        try:
+                                cnt = len(scripts) if isinstance(scripts, (list, tuple)) else 0
+                                statusBar['text'] = f"Found {cnt} script(s) in document"
+                                print(f"[debug] Found {cnt} script(s) when opening {url2}")
+                                if cnt:
+                                    print("[debug] first script preview:", str(scripts[0])[:200])
                         except Exception:
-                            raw = raw_bytes.decode('utf-8', errors='replace')
-                            scripts = funcs.extract_script_tags(raw)
-                            try:
-                                    cnt = len(scripts) if isinstance(scripts, (list, tuple)) else 0
-                                    statusBar['text'] = f"Found {cnt} script(s) in document"
-                                    print(f"[debug] Found {cnt} script(s) when opening {url2}")
-                                    if cnt:
-                                        print("[debug] first script preview:", str(scripts[0])[:200])
-                            except Exception:
-                               pass
+                           pass
 
 
                     # reuse existing HTML parsing flow
@@ -4513,8 +4779,8 @@ def _marquee_tick():
 
 # default regex string map (patterns as strings; flags handled below)
 _DEFAULT_REGEXES = {
-    "KEYWORDS": r'\b(' + r'|'.join(map(re.escape, KEYWORDS)) + r')\b',
-    "BUILTINS": r'\b(' + r'|'.join(map(re.escape, BUILTINS)) + r')\b',
+    "KEYWORDS": r'\b(' + syntax_presets.word_alternation(KEYWORDS) + r')\b',
+    "BUILTINS": r'\b(' + syntax_presets.word_alternation(BUILTINS) + r')\b',
     "STRING_RE": r'("""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"[^"\n]*"|' + r"'[^'\n]*')",
     "COMMENT_RE": r'#[^\n]*',
     "NUMBER_RE": r'\b(?:0b[01_]+|0o[0-7_]+|0x[0-9A-Fa-f_]+|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?)(?:[jJ])?\b',
@@ -4531,6 +4797,22 @@ _DEFAULT_REGEXES = {
     "CLASS_BASES_RE": r'(?m)^[ \t]*class\s+[A-Za-z_]\w*\s*\(([^)]*)\)'
 }
 
+_default_regexes_compiled = None
+
+
+def _default_compiled_regexes():
+    """_DEFAULT_REGEXES compiled once (shared by every tab whose preset omits a slot)."""
+    global _default_regexes_compiled
+    if _default_regexes_compiled is None:
+        compiled = {}
+        for key in syntax_presets.REGEX_KEYS:
+            try:
+                compiled[key] = re.compile(_DEFAULT_REGEXES[key], re.DOTALL if key in syntax_presets.DOTALL_KEYS else 0)
+            except Exception:
+                pass
+        _default_regexes_compiled = compiled
+    return _default_regexes_compiled
+
 def scan_syntax_presets(dirname='syntax'):
     """Return list of (path, name, filename_lower) for .ini presets in `dirname`."""
     out = []
@@ -4770,12 +5052,12 @@ def load_syntax_config():
         bk_csv = config.get('Syntax', 'builtins.csv', fallback=','.join(BUILTINS))
         try:
             KEYWORDS = [x.strip() for x in kw_csv.split(',') if x.strip()]
-            KEYWORD_RE = re.compile(r'\b(' + r'|'.join(map(re.escape, KEYWORDS)) + r')\b') if KEYWORDS else re.compile(r'\b\b')
+            KEYWORD_RE = syntax_presets.word_regex(KEYWORDS)
         except Exception:
             pass
         try:
             BUILTINS = [x.strip() for x in bk_csv.split(',') if x.strip()]
-            BUILTIN_RE = re.compile(r'\b(' + r'|'.join(map(re.escape, BUILTINS)) + r')\b') if BUILTINS else re.compile(r'\b\b')
+            BUILTIN_RE = syntax_presets.word_regex(BUILTINS)
         except Exception:
             pass
 
@@ -4850,104 +5132,117 @@ def _make_host_update_cb_for_frame(fr, tw):
       - pos as string -> search for the first occurrence and insert before it (fallback append)
     """
     import re
-    def host_update_cb(arg):
-        def ui_update():
-            try:
-                # get current stored raw HTML
-                base_raw = getattr(fr, '_raw_html', '') or ''
-                # None => force re-render using current stored raw
-                if arg is None:
-                    src_raw = base_raw
-                else:
-                    # normalize input
-                    if isinstance(arg, dict):
-                        html_frag = arg.get('html') or ''
-                        mode = (arg.get('mode') or 'insert').lower()
-                        pos = arg.get('pos', None)
-                        replace_flag = (mode == 'replace') or bool(arg.get('replace', False))
-                    else:
-                        # treat simple string as fragment to insert (default insert behavior)
-                        html_frag = str(arg)
-                        replace_flag = False
-                        pos = None
-
-                    if replace_flag:
-                        # replace whole buffer
-                        src_raw = html_frag
-                    else:
-                        # insert behavior (default)
-                        if base_raw is None:
-                            base_raw = ''
-                        if pos is None or pos == 'end':
-                            # insert before </body> if present
-                            m = re.search(r'</body\s*>', base_raw, flags=re.I)
-                            if m:
-                                idx = m.start()
-                                src_raw = base_raw[:idx] + html_frag + base_raw[idx:]
-                            else:
-                                src_raw = base_raw + html_frag
-                        elif isinstance(pos, int):
-                            off = max(0, min(len(base_raw), int(pos)))
-                            src_raw = base_raw[:off] + html_frag + base_raw[off:]
-                        else:
-                            # pos as search string: find and insert before first occurrence
-                            try:
-                                idx = base_raw.find(str(pos))
-                                if idx >= 0:
-                                    src_raw = base_raw[:idx] + html_frag + base_raw[idx:]
-                                else:
-                                    src_raw = base_raw + html_frag
-                            except Exception:
-                                src_raw = base_raw + html_frag
-
-                if not src_raw:
-                    return
+    pending_lock = threading.Lock()
+
+    def _apply_host_arg(base_raw, arg):
+        """Return the raw buffer after applying one setRaw call to `base_raw`."""
+        # None => force re-render using current stored raw
+        if arg is None:
+            return base_raw
+        # normalize input
+        if isinstance(arg, dict):
+            html_frag = arg.get('html') or ''
+            mode = (arg.get('mode') or 'insert').lower()
+            pos = arg.get('pos', None)
+            replace_flag = (mode == 'replace') or bool(arg.get('replace', False))
+        else:
+            # treat simple string as fragment to insert (default insert behavior)
+            html_frag = str(arg)
+            replace_flag = False
+            pos = None
+
+        if replace_flag:
+            # replace whole buffer
+            return html_frag
+        # insert behavior (default)
+        if base_raw is None:
+            base_raw = ''
+        if pos is None or pos == 'end':
+            # insert before </body> if present
+            m = re.search(r'</body\s*>', base_raw, flags=re.I)
+            if m:
+                idx = m.start()
+                return base_raw[:idx] + html_frag + base_raw[idx:]
+            return base_raw + html_frag
+        if isinstance(pos, int):
+            off = max(0, min(len(base_raw), int(pos)))
+            return base_raw[:off] + html_frag + base_raw[off:]
+        # pos as search string: find and insert before first occurrence
+        try:
+            idx = base_raw.find(str(pos))
+            if idx >= 0:
+                return base_raw[:idx] + html_frag + base_raw[idx:]
+            return base_raw + html_frag
+        except Exception:
+            return base_raw + html_frag
+
+    def ui_update():
+        try:
+            # take every call queued since the last render; apply them in order, render once
+            with pending_lock:
+                args = getattr(fr, '_pending_host_updates', None) or []
+                fr._pending_host_updates = None
+            src_raw = getattr(fr, '_raw_html', '') or ''
+            for arg in args:
+                src_raw = _apply_host_arg(src_raw, arg)
+
+            if not src_raw:
+                return
 
-                # Re-parse and update stored metadata
-                try:
-                    plain2, tags_meta2 = funcs._parse_html_and_apply(src_raw)
-                except Exception:
-                    plain2, tags_meta2 = src_raw, None
+            # Re-parse and update stored metadata
+            try:
+                plain2, tags_meta2 = funcs._parse_html_and_apply(src_raw)
+            except Exception:
+                plain2, tags_meta2 = src_raw, None
 
-                try:
-                    fr._raw_html = src_raw
-                    fr._raw_html_plain = plain2
-                    fr._raw_html_tags_meta = tags_meta2
-                    fr._view_raw = False
-                except Exception:
-                    pass
+            try:
+                fr._raw_html = src_raw
+                fr._raw_html_plain = plain2
+                fr._raw_html_tags_meta = tags_meta2
+                fr._view_raw = False
+            except Exception:
+                pass
 
-                # Replace editor content and apply tags
-                try:
-                    tw.delete('1.0', 'end')
-                    textArea.tag_remove('0.0', 'end')
-                    tw.insert('1.0', plain2 or '')
-                    _apply_tag_configs_to_widget(tw)
-                except Exception:
-                    pass
+            # Replace editor content and apply tags
+            try:
+                tw.delete('1.0', 'end')
+                textArea.tag_remove('0.0', 'end')
+                tw.insert('1.0', plain2 or '')
+                _apply_tag_configs_to_widget(tw)
+            except Exception:
+                pass
 
-                # Apply formatting meta on the right widget context
-                try:
-                    if tags_meta2 and tags_meta2.get('tags'):
-                        prev_ta = globals().get('textArea', None)
-                        try:
-                            globals()['textArea'] = tw
-                            _apply_formatting_from_meta(tags_meta2)
-                        finally:
-                            if prev_ta is not None:
-                                globals()['textArea'] = prev_ta
-                    # lightweight re-highlight
+            # Apply formatting meta on the right widget context
+            try:
+                if tags_meta2 and tags_meta2.get('tags'):
+                    prev_ta = globals().get('textArea', None)
                     try:
-                        root.after(0, highlightPythonInit)
-                    except Exception:
-                        pass
+                        globals()['textArea'] = tw
+                        _apply_formatting_from_meta(tags_meta2)
+                    finally:
+                        if prev_ta is not None:
+                            globals()['textArea'] = prev_ta
+                # lightweight re-highlight
+                try:
+                    root.after(0, highlightPythonInit)
                 except Exception:
                     pass
             except Exception:
                 pass
-
-        try:
-            root.after(0, ui_update)
+        except Exception:
+            pass
+
+    def host_update_cb(arg):
+        # Scripts may call setRaw many times before the UI thread runs; queue the
+        # calls and schedule a single re-render for the whole batch.
+        with pending_lock:
+            pending = getattr(fr, '_pending_host_updates', None)
+            if pending is not None:
+                pending.append(arg)
+                return
+            fr._pending_host_updates = [arg]
+        try:
+            root.after(0, ui_update)
         except Exception:
             ui_update()
 
@@ -5646,27 +5941,20 @@ def _serialize_formatting():
         internal_tags = {
             'string', 'keyword', 'comment', 'selfs', 'def', 'number', 'variable',
             'decorator', 'class_name', 'constant', 'attribute', 'builtin', 'todo',
-            'currentLine', 'trailingWhitespace', 'find_match', 'number', 'operator',
+            'currentLine', 'trailingWhitespace', 'find_match', 'number', 'operator', 'syntax_done',
             # marquee is presentation-only and animated; we still save ranges but visual priority handled by tags
         }
 
+        # one snapshot maps every Tk index below to an absolute offset
+        offsets = funcs.TextOffsetMap(textArea)
+
         # Build tag -> ranges dict by inspecting all widget tags (raw tags)
         tags_data = {}
         for tag in textArea.tag_names():
             try:
                 if tag in internal_tags:
                     continue
-                ranges = textArea.tag_ranges(tag)
-                if not ranges:
-                    continue
-                arr = []
-                for i in range(0, len(ranges), 2):
-                    s = ranges[i]
-                    e = ranges[i + 1]
-                    start = len(textArea.get('1.0', s))
-                    end = len(textArea.get('1.0', e))
-                    if end > start:
-                        arr.append([start, end])
+                arr = offsets.tag_ranges(tag)
                 if arr:
                     tags_data[tag] = arr
             except Exception:
@@ -5678,10 +5966,8 @@ def _serialize_formatting():
             mapping = getattr(textArea, '_hyperlink_map', {}) or {}
             for (s_idx, e_idx), entry in mapping.items():
                 try:
-                    snorm = textArea.index(s_idx)
-                    enorm = textArea.index(e_idx)
-                    start = len(textArea.get('1.0', snorm))
-                    end = len(textArea.get('1.0', enorm))
+                    start = offsets.offset(s_idx)
+                    end = offsets.offset(e_idx)
                     if end <= start:
                         continue
                     if isinstance(entry, dict):
@@ -5730,8 +6016,7 @@ def _serialize_formatting():
 
         # Build composed style ranges from legacy tags (bold/italic/underline combos) partitioned per-font
         try:
-            content = textArea.get('1.0', 'end-1c')
-            N = len(content)
+            N = offsets.length
             if N > 0:
                 # boolean arrays
                 b_arr = [False] * N
@@ -5741,11 +6026,7 @@ def _serialize_formatting():
                 # helper mark ranges
                 def mark_flag_for_tag(tname, b=False, i=False, u=False):
                     try:
-                        for j in range(0, len(textArea.tag_ranges(tname)), 2):
-                            s = textArea.tag_ranges(tname)[j]
-                            e = textArea.tag_ranges(tname)[j+1]
-                            so = len(textArea.get('1.0', s))
-                            eo = len(textArea.get('1.0', e))
+                        for so, eo in offsets.tag_ranges(tname):
                             so = max(0, min(N, so))
                             eo = max(0, min(N, eo))
                             for p in range(so, eo):
@@ -5767,6 +6048,16 @@ def _serialize_formatting():
                 mark_flag_for_tag('underlineitalic', i=True, u=True)
                 mark_flag_for_tag('all', b=True, i=True, u=True)
 
+                # font tag per char: the first font_* tag in priority order, as tag_names(idx) lists them
+                f_arr = [None] * N
+                for tt in textArea.tag_names():
+                    if not tt.startswith('font_'):
+                        continue
+                    for so, eo in tags_data.get(tt, ()):
+                        for q in range(max(0, so), min(N, eo)):
+                            if f_arr[q] is None:
+                                f_arr[q] = tt
+
                 # iterate and group contiguous spans by (b,i,u,font_tag)
                 p = 0
                 while p < N:
@@ -5778,26 +6069,13 @@ def _serialize_formatting():
                         p += 1
                         continue
                     # determine font tag at this position
-                    idx = textArea.index(f"1.0 + {p}c")
-                    tags_here = textArea.tag_names(idx)
-                    font_here = None
-                    for tt in tags_here:
-                        if tt.startswith('font_'):
-                            font_here = tt
-                            break
+                    font_here = f_arr[p]
                     # find run end where all attributes and font_here remain the same
                     run_end = p + 1
                     while run_end < N:
                         if b_arr[run_end] != b or i_arr[run_end] != i or u_arr[run_end] != u:
                             break
-                        idx2 = textArea.index(f"1.0 + {run_end}c")
-                        tags2 = textArea.tag_names(idx2)
-                        f2 = None
-                        for tt in tags2:
-                            if tt.startswith('font_'):
-                                f2 = tt
-                                break
-                        if f2 != font_here:
+                        if f_arr[run_end] != font_here:
                             break
                         run_end += 1
                     # construct style tag and record range
@@ -6685,8 +6963,26 @@ def toggle_raw_rendered():
             'hyperlink', 'marquee'
         )
 
+        def _refresh_view():
+            # Common refresh: trigger lightweight/highlighting updates and UI indicator
+            try:
+                safe_highlight_event(None)
+            except Exception:
+                pass
+            try:
+                update_view_status_indicator()
+            except Exception:
+                pass
+            # NEW: Re-apply browsing mode logic (whitespace indicator may change)
+            _apply_browsing_mode_for_current_tab()
+
+        if currently_raw and _cancel_render(sel):
+            # toggled again while the Rendered view was still parsing: stay in Raw
+            statusBar['text'] = "Rendering cancelled (Raw HTML view)"
+            return
+
         if currently_raw:
-            # Raw -> Rendered
+            # Raw -> Rendered (parsed on the render pool, shown by _show_rendered)
             try:
                 raw_text = tw.get('1.0', 'end-1c')
             except Exception:
@@ -6695,57 +6991,68 @@ def toggle_raw_rendered():
                 frame._raw_html = raw_text
             except Exception:
                 pass
-            try:
-                plain, tags_meta = funcs._parse_html_and_apply(raw_text)
-            except Exception:
-                plain, tags_meta = raw_text, None
 
-            try:
-                # Clear syntax tags before inserting rendered content to avoid collisions
-                for t in SYNTAX_TAGS:
-                    try:
-                        tw.tag_remove(t, '0.0', 'end')
-                    except Exception:
-                        pass
-                # Replace content with rendered/plain text and apply presentation tag configs
+            def _show_rendered(plain, tags_meta, source=raw_text):
+                # the Raw buffer stays editable while parsing: render it again if it changed
+                try:
+                    current = tw.get('1.0', 'end-1c')
+                except Exception:
+                    current = source
+                if current != source:
+                    frame._raw_html = current
+                    _submit_render(sel, current, lambda p, m: _show_rendered(p, m, current))
+                    return
+                try:
+                    # Clear syntax tags before inserting rendered content to avoid collisions
+                    for t in SYNTAX_TAGS:
+                        try:
+                            tw.tag_remove(t, '0.0', 'end')
+                        except Exception:
+                            pass
+                    # Replace content with rendered/plain text and apply presentation tag configs
                 
-                tw.delete('0.0', 'end')
-                tw.tag_remove('0.0', 'end')
-                tw.insert('1.0', plain or '')
-                _apply_tag_configs_to_widget(tw)
+                    tw.delete('0.0', 'end')
+                    tw.tag_remove('0.0', 'end')
+                    tw.insert('1.0', plain or '')
+                    _apply_tag_configs_to_widget(tw)
 
-                if tags_meta and tags_meta.get('tags'):
-                    prev_ta = globals().get('textArea', None)
-                    try:
-                        globals()['textArea'] = tw
-                        _apply_formatting_from_meta(tags_meta)
-                    finally:
-                        if prev_ta is not None:
-                            globals()['textArea'] = prev_ta
+                    if tags_meta and tags_meta.get('tags'):
+                        prev_ta = globals().get('textArea', None)
+                        try:
+                            globals()['textArea'] = tw
+                            _apply_formatting_from_meta(tags_meta)
+                        finally:
+                            if prev_ta is not None:
+                                globals()['textArea'] = prev_ta
 
-                frame._view_raw = False
-                statusBar['text'] = "Rendered HTML view (from current raw buffer)"
-            except Exception:
-                pass
+                    frame._view_raw = False
+                    statusBar['text'] = "Rendered HTML view (from current raw buffer)"
+                except Exception:
+                    pass
 
-            # Re-run scripts after switching to Rendered view (user may have edited JS in Raw)
-            try:
-                scripts_to_run = funcs.extract_script_tags(frame._raw_html or '')
-                if scripts_to_run:
-                    host_cb = _make_host_update_cb_for_frame(frame, tw)
-                    run_results = funcs.run_scripts(
-                        scripts_to_run,
-                        base_url=getattr(frame, 'fileName', None),
-                        log_fn=lambda s: (print(s), statusBar.config(text=s)),
-                        host_update_cb=host_cb,
-                        return_dom=True, 
-                        collect_dom_changes=True, 
-                        html_source=frame._raw_html,
-                        dom_log_verbose=True
-                    )
-                    print("[debug] run_scripts results (toggle raw->rendered):", run_results)
-            except Exception:
-                pass
+                # Re-run scripts after switching to Rendered view (user may have edited JS in Raw)
+                try:
+                    scripts_to_run = funcs.extract_script_tags(frame._raw_html or '')
+                    if scripts_to_run:
+                        host_cb = _make_host_update_cb_for_frame(frame, tw)
+                        run_results = funcs.run_scripts(
+                            scripts_to_run,
+                            base_url=getattr(frame, 'fileName', None),
+                            log_fn=lambda s: (print(s), statusBar.config(text=s)),
+                            host_update_cb=host_cb,
+                            return_dom=True, 
+                            collect_dom_changes=True, 
+                            html_source=frame._raw_html,
+                            dom_log_verbose=True
+                        )
+                        print("[debug] run_scripts results (toggle raw->rendered):", run_results)
+                except Exception:
+                    pass
+                _refresh_view()
+
+            statusBar['text'] = "Rendering HTML view..."
+            _submit_render(sel, raw_text, _show_rendered)
+            return
 
         else:
             # Rendered -> Raw
@@ -6783,17 +7090,7 @@ def toggle_raw_rendered():
             except Exception:
                 statusBar['text'] = "Failed to switch to Raw view"
 
-        # Common refresh: trigger lightweight/highlighting updates and UI indicator
-        try:
-            safe_highlight_event(None)
-        except Exception:
-            pass
-        try:
-            update_view_status_indicator()
-        except Exception:
-            pass
-        # NEW: Re-apply browsing mode logic (whitespace indicator may change)
-        _apply_browsing_mode_for_current_tab()
+        _refresh_view()
     except Exception:
         pass
 def update_view_status_indicator():
@@ -6850,6 +7147,11 @@ def update_view_status_indicator():
             except Exception:
                 pass
         viewIndicator.config(text=txt)
+        try:
+            _update_highlight_coverage()
+            _lazy_hl_schedule(delay=1)
+        except Exception:
+            pass
 
         # Disable/enable syntax-related controls while in Rendered view to avoid conflicting highlights.
         # Controls: syntaxToggleCheckbox, detectSyntaxButton, refreshSyntaxButton, fullScanToggleCheckbox
@@ -6957,6 +7259,8 @@ def safe_highlight_event(event=None):
                 highlight_python_helper(event)
             except Exception:
                 pass
+            # scrolling or typing moves the viewport: background chunks restart around it
+            _lazy_hl_schedule()
 
         # lightweight UI updates always run
         try:
@@ -7029,39 +7333,149 @@ def _extract_header_and_meta(raw):
     except Exception:
         return raw, None
 
-def _apply_full_tags(actions, new_vars, new_defs):
-    """Apply tag actions on the main/UI thread and persist discovered symbols."""
+# Chunked application of a full scan (see _apply_full_tags); a newer scan supersedes the job
+FULL_TAGS_CHUNK = 2000      # ranges per multi-range tag_add call
+FULL_TAGS_TICK_MS = 12      # tagging work per after() tick before the UI gets a turn
+_full_tags_job = {'gen': 0, 'after_id': None, 'on_done': None}
+
+
+def _apply_full_tags(actions, new_vars, new_defs, content=None, progress_callback=None, on_done=None,
+                     text_widget: Text | None = None):
+    """Apply tag actions on the main/UI thread and persist discovered symbols.
+
+    Offsets are turned into 'line.col' indices through one line-start table of content
+    (the scanned snapshot; the current buffer when omitted) and handed to tag_add up to
+    FULL_TAGS_CHUNK ranges per call. The work is spread over after() ticks, ranges on the
+    visible lines first. text_widget is the widget content was taken from (textArea when
+    omitted); the job stops once that widget is no longer the selected raw-view tab.
+    progress_callback(percent, message) reports the application; on_done(completed) runs
+    at the end, with False when a newer scan superseded this one or the tab went away.
+    """
+    job = _full_tags_job
+    try:
+        if job['after_id'] is not None:
+            root.after_cancel(job['after_id'])
+    except Exception:
+        pass
+    superseded = job['on_done']
+    job['gen'] += 1
+    job['after_id'] = None
+    job['on_done'] = on_done
+    gen = job['gen']
+    if superseded:
+        try:
+            superseded(False)
+        except Exception:
+            pass
+
+    def finish(completed):
+        if job['gen'] == gen:
+            job['after_id'] = None
+            job['on_done'] = None
+        if on_done:
+            try:
+                on_done(completed)
+            except Exception:
+                pass
+
+    # the widget the scanned content came from; the global textArea follows tab switches
+    tw = text_widget if text_widget is not None else textArea
+    tw_frame = tw.master
+
+    def still_ours():
+        try:
+            if not tw.winfo_exists():
+                return False
+            sel = editorNotebook.select()
+            if sel and root.nametowidget(sel) is not tw_frame:
+                return False
+            return getattr(tw_frame, '_view_raw', True)
+        except Exception:
+            return False
+
+    if not still_ours():
+        finish(False)
+        return
+
     try:
         # clear tags across the whole buffer first
         for t in ('string', 'keyword', 'comment', 'selfs', 'def', 'number', 'variable',
                   'decorator', 'class_name', 'constant', 'attribute', 'builtin', 'todo'):
-            textArea.tag_remove(t, "1.0", "end")
+            tw.tag_remove(t, "1.0", "end")
+
+        if content is None:
+            content = piece_table.widget_text(tw)
+        lines = syntax_lexer.LineIndex(content)
+        try:
+            top = int(tw.index("@0,0").split('.')[0]) - 1
+            bottom = int(tw.index(f"@0,{tw.winfo_height()}").split('.')[0])
+            vis_s, vis_e = lines.line_start(top), lines.line_start(bottom + 1)
+        except Exception:
+            vis_s = vis_e = 0
 
-        # add tags collected by the worker
+        # (tag, ranges) chunks: everything touching the visible lines, then the rest
+        near, far = [], []
         for tag, ranges in actions.items():
             if not ranges:
                 continue
-            for s, e in ranges:
-                # s/e are absolute character offsets from start of buffer
-                textArea.tag_add(tag, f"1.0 + {s}c", f"1.0 + {e}c")
-
-        # persist newly discovered symbols (union)
-        updated = False
-        if new_vars:
-            if not new_vars.issubset(persisted_vars):
-                persisted_vars.update(new_vars)
-                updated = True
-        if new_defs:
-            if not new_defs.issubset(persisted_defs):
-                persisted_defs.update(new_defs)
-                updated = True
-        if updated:
-            _save_symbol_buffers(persisted_vars, persisted_defs)
-
-        statusBar['text'] = "Ready"
+            parts = ([], [])
+            for r in ranges:
+                parts[r[1] < vis_s or r[0] >= vis_e].append(r)
+            for part, dest in zip(parts, (near, far)):
+                for i in range(0, len(part), FULL_TAGS_CHUNK):
+                    dest.append((tag, part[i:i + FULL_TAGS_CHUNK]))
+        chunks = near + far
+        total = max(1, sum(len(part) for _, part in chunks))
+        state = {'next': 0, 'done': 0}
     except Exception:
         # keep UI resilient to errors
-        pass
+        finish(False)
+        return
+
+    def step():
+        if job['gen'] != gen:
+            return
+        if not still_ours():
+            # tab switched, Rendered view shown or widget destroyed: stop tagging
+            finish(False)
+            return
+        try:
+            deadline = time.perf_counter() + FULL_TAGS_TICK_MS / 1000.0
+            while state['next'] < len(chunks):
+                tag, part = chunks[state['next']]
+                state['next'] += 1
+                tw.tag_add(tag, *lines.tk_ranges(part))
+                state['done'] += len(part)
+                if time.perf_counter() >= deadline:
+                    break
+            if progress_callback:
+                pct = (state['done'] * 100) // total
+                progress_callback(pct, f"Applying highlighting... {pct}%")
+            if state['next'] < len(chunks):
+                job['after_id'] = root.after(1, step)
+                return
+
+            # persist newly discovered symbols (union)
+            updated = False
+            if new_vars:
+                if not new_vars.issubset(persisted_vars):
+                    persisted_vars.update(new_vars)
+                    updated = True
+            if new_defs:
+                if not new_defs.issubset(persisted_defs):
+                    persisted_defs.update(new_defs)
+                    updated = True
+            if updated:
+                _save_symbol_buffers(persisted_vars, persisted_defs)
+
+            statusBar['text'] = "Ready"
+        except Exception:
+            # keep UI resilient to errors
+            finish(False)
+            return
+        finish(True)
+
+    step()
 
 
 def _bg_full_scan_and_collect(content, progress_callback=None):
@@ -7085,7 +7499,6 @@ def _bg_full_scan_and_collect(content, progress_callback=None):
     TODO_RE_loc = TODO_RE
     SELFS_RE_loc = SELFS_RE
     VAR_ANNOT_RE_loc = VAR_ANNOT_RE
-    FSTRING_RE_loc = FSTRING_RE
     DUNDER_RE_loc = DUNDER_RE
     CLASS_BASES_RE_loc = CLASS_BASES_RE
     KEYWORD_RE_loc = KEYWORD_RE
@@ -7117,27 +7530,12 @@ def _bg_full_scan_and_collect(content, progress_callback=None):
             TODO_RE_loc = rx.get('TODO_RE', TODO_RE_loc)
             SELFS_RE_loc = rx.get('SELFS_RE', SELFS_RE_loc)
             VAR_ANNOT_RE_loc = rx.get('VAR_ANNOT_RE', VAR_ANNOT_RE_loc)
-            FSTRING_RE_loc = rx.get('FSTRING_RE', FSTRING_RE_loc)
             DUNDER_RE_loc = rx.get('DUNDER_RE', DUNDER_RE_loc)
             CLASS_BASES_RE_loc = rx.get('CLASS_BASES_RE', CLASS_BASES_RE_loc)
 
-            # Keywords / builtins (compile local)
-            try:
-                kw_list = (trans.get('keywords') or [[], KEYWORD_RE])[0]
-                if kw_list:
-                    KEYWORD_RE_loc = re.compile(r'\b(' + r'|'.join(map(re.escape, kw_list)) + r')\b')
-                else:
-                    KEYWORD_RE_loc = re.compile(r'\b\b')
-            except Exception:
-                KEYWORD_RE_loc = KEYWORD_RE
-            try:
-                bk_list = (trans.get('builtins') or [[], BUILTIN_RE])[0]
-                if bk_list:
-                    BUILTIN_RE_loc = re.compile(r'\b(' + r'|'.join(map(re.escape, bk_list)) + r')\b')
-                else:
-                    BUILTIN_RE_loc = re.compile(r'\b\b')
-            except Exception:
-                BUILTIN_RE_loc = BUILTIN_RE
+            # Keywords / builtins (compiled once by the preset registry)
+            KEYWORD_RE_loc = (trans.get('keywords') or [[], KEYWORD_RE])[1]
+            BUILTIN_RE_loc = (trans.get('builtins') or [[], BUILTIN_RE])[1]
     except Exception:
         # keep defaults on any error
         pass
@@ -7155,121 +7553,25 @@ def _bg_full_scan_and_collect(content, progress_callback=None):
             pass
 
     try:
-        protected_spans = []
-
-        # Pass 1: strings
-        report(2, "Scanning strings...")
-        for m in STRING_RE_loc.finditer(content):
-            s, e = m.span()
-            actions['string'].append((s, e))
-            protected_spans.append((s, e))
-        report(8)
-
-        # Pass 2: comments and TODOs
-        report(9, "Scanning comments...")
-        for m in COMMENT_RE_loc.finditer(content):
-            s, e = m.span()
-            actions['comment'].append((s, e))
-            protected_spans.append((s, e))
-            mm = TODO_RE_loc.search(content, m.start(), m.end())
-            if mm:
-                ts, te = mm.span()
-                actions['todo'].append((ts, te))
-        report(14)
-
-        def overlaps_protected(s, e):
-            for ps, pe in protected_spans:
-                if not (e <= ps or s >= pe):
-                    return True
-            return False
-
-        # Pass 3: numbers
-        report(16, "Scanning numbers...")
-        for i, m in enumerate(NUMBER_RE_loc.finditer(content)):
-            s, e = m.span()
-            if not overlaps_protected(s, e):
-                actions['number'].append((s, e))
-            if i and (i % 200) == 0:
-                report(16 + min(10, i // 200), "Scanning numbers...")
-                time.sleep(0)
-        report(22)
-
-        # Pass 4: decorators
-        report(23, "Scanning decorators...")
-        for m in DECORATOR_RE_loc.finditer(content):
-            # prefer named group/first group when present
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(s, e):
-                actions['decorator'].append((s, e))
-        report(27)
-
-        # Pass 5: classes
-        report(28, "Scanning classes...")
-        for m in CLASS_RE_loc.finditer(content):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(s, e):
-                actions['class_name'].append((s, e))
-        report(32)
-
-        # Pass 6: variable assignments
-        report(33, "Scanning variable assignments...")
-        for i, m in enumerate(VAR_ASSIGN_RE_loc.finditer(content)):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(s, e):
-                actions['variable'].append((s, e))
-            if i and (i % 200) == 0:
-                report(33 + min(8, i // 200), "Scanning variable assignments...")
-                time.sleep(0)
-        report(41)
-
-        # Pass 7: constants ALL_CAPS
-        report(42, "Scanning constants...")
-        for m in CONSTANT_RE_loc.finditer(content):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(s, e):
-                actions['constant'].append((s, e))
-        report(46)
-
-        # Pass 8: attributes (a.b -> tag 'b')
-        report(47, "Scanning attributes...")
-        for i, m in enumerate(ATTRIBUTE_RE_loc.finditer(content)):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(s, e):
-                actions['attribute'].append((s, e))
-            if i and (i % 500) == 0:
-                report(47 + min(8, i // 500), "Scanning attributes...")
-                time.sleep(0)
-        report(55)
-
-        # Pass 9: dunder names
-        report(56, "Scanning dunder names...")
-        for m in DUNDER_RE_loc.finditer(content):
-            s, e = m.span()
-            if not overlaps_protected(s, e):
-                actions['def'].append((s, e))
-        report(60)
-
-        # Pass 10: f-strings (kept for Python; harmless otherwise)
-        report(61, "Scanning f-strings...")
-        for m in FSTRING_RE_loc.finditer(content):
-            s, e = m.span()
-            # Already included in 'string', no extra tagging needed here.
+        # Passes 1-10: strings, comments/TODOs and every other token class in one
+        # left-to-right pass of the preset's combined pattern (strings/comments win)
+        report(2, "Scanning tokens...")
+        master = syntax_lexer.master_pattern(syntax_lexer.rules_from_regexes({
+            'STRING_RE': STRING_RE_loc, 'COMMENT_RE': COMMENT_RE_loc, 'NUMBER_RE': NUMBER_RE_loc,
+            'DECORATOR_RE': DECORATOR_RE_loc, 'CLASS_RE': CLASS_RE_loc, 'VAR_ASSIGN_RE': VAR_ASSIGN_RE_loc,
+            'CONSTANT_RE': CONSTANT_RE_loc, 'ATTRIBUTE_RE': ATTRIBUTE_RE_loc, 'DUNDER_RE': DUNDER_RE_loc,
+            'KEYWORD_RE': KEYWORD_RE_loc, 'BUILTIN_RE': BUILTIN_RE_loc, 'SELFS_RE': SELFS_RE_loc,
+        }), todo_re=TODO_RE_loc)
+        if master.regex is not None:
+            size = max(1, len(content))
+            for i, m in enumerate(master.regex.finditer(content)):
+                if m.end() > m.start():
+                    master.emit(content, m, actions, 0, len(content))
+                if i and (i % 2000) == 0:
+                    report(2 + (m.start() * 62) // size, "Scanning tokens...")
+                    time.sleep(0)
         report(64)
+        overlaps_protected = syntax_lexer.ProtectedSpans(actions['string'] + actions['comment']).overlaps
 
         # Pass 11: defs discovery (python-specific heuristic preserved)
         report(65, "Discovering defs...")
@@ -7297,38 +7599,12 @@ def _bg_full_scan_and_collect(content, progress_callback=None):
                     actions['def'].append((s, e))
         report(76)
 
-        # Pass 13: keywords and builtins
-        report(77, "Scanning keywords and builtins...")
-        for i, m in enumerate(KEYWORD_RE_loc.finditer(content)):
-            s, e = m.span()
-            if not overlaps_protected(s, e):
-                actions['keyword'].append((s, e))
-            if i and (i % 1000) == 0:
-                report(77 + min(8, i // 1000), "Scanning keywords...")
-                time.sleep(0)
-        for i, m in enumerate(BUILTIN_RE_loc.finditer(content)):
-            s, e = m.span()
-            if not overlaps_protected(s, e):
-                actions['builtin'].append((s, e))
-            if i and (i % 1000) == 0:
-                report(85 + min(5, i // 1000), "Scanning builtins...")
-                time.sleep(0)
-        report(88)
-
-        # Pass 14: selfs/attributes highlight
-        report(89, "Scanning self/attributes...")
-        for m in SELFS_RE_loc.finditer(content):
-            s, e = m.span()
-            if not overlaps_protected(s, e):
-                actions['selfs'].append((s, e))
-        report(90)
-
-        # Pass 15: variables discovered across full file
+        # Pass 13: variables discovered across full file
         report(91, "Collecting variables...")
         new_vars = {m.group(1) for m in VAR_ASSIGN_RE_loc.finditer(content)}
         report(93)
 
-        # Pass 16: include persisted buffers
+        # Pass 14: include persisted buffers
         report(94, "Tagging persisted symbols...")
         if persisted_vars:
             try:
@@ -8106,7 +8382,7 @@ def remove_all_formatting():
         internal_tags = {
             'string', 'keyword', 'comment', 'selfs', 'def', 'number', 'variable',
             'decorator', 'class_name', 'constant', 'attribute', 'builtin', 'todo',
-            'currentLine', 'trailingWhitespace', 'find_match', 'operator'
+            'currentLine', 'trailingWhitespace', 'find_match', 'operator', 'syntax_done'
         }
         for t in list(textArea.tag_names()):
             try:
@@ -8130,7 +8406,11 @@ def remove_all_formatting():
 # -------------------------
 def get_size_of_textarea_lines():
     """Return count of lines as a simple progress metric."""
-    return len(textArea.get('1.0', 'end-1c').splitlines()) or 1
+    doc = piece_table.widget_document(textArea)
+    if doc is None:
+        return len(textArea.get('1.0', 'end-1c').splitlines()) or 1
+    # splitlines() does not count the empty line after a trailing newline
+    return max(1, doc.line_count - (doc.get(len(doc) - 1) == '\n'))
 
 
 def save_file_as():
@@ -8174,6 +8454,9 @@ def save_file_as2():
 
 
 def save_file():
+    if _large_file_frame() is not None:
+        statusBar['text'] = "Large-file view is read-only; only a window of the file is loaded."
+        return
     # If current tab points to a URL, prefer Save-as-Markdown flow (respect open-as-source)
     try:
         fn = getattr(root, 'fileName', '') or ''
@@ -8209,7 +8492,7 @@ def save_file():
         # If viewing raw and target is a local file, write raw content directly
         if view_raw and fn and not _is_likely_url(fn):
             try:
-                raw_content = getattr(frame, '_raw_html', None) or textArea.get('1.0', 'end-1c')
+                raw_content = getattr(frame, '_raw_html', None) or piece_table.widget_text(textArea)
                 with open(fn, 'w', errors='replace', encoding='utf-8') as f:
                     f.write(raw_content)
                 statusBar['text'] = f"'{fn}' saved (raw source)!"
@@ -8231,7 +8514,8 @@ def save_file():
         # Otherwise default save behavior (may include formatting header)
 
     
-        content = textArea.get('1.0', 'end-1c')
+        # written piece by piece from a frozen copy of the buffer model
+        content = piece_table.widget_snapshot(textArea)
         # automatically embed formatting header for .set files,
         # or if the user explicitly enabled the option in settings.
         save_formatting = config.getboolean("Section1", "saveFormattingInFile", fallback=False) \
@@ -8240,7 +8524,7 @@ def save_file():
         with open(root.fileName, 'w', errors='replace') as f:
             if header:
                 f.write(header)
-            f.write(content)
+            f.writelines(content.chunks())
         statusBar['text'] = f"'{root.fileName}' saved successfully!"
         add_recent_file(root.fileName)
         refresh_recent_menu()
@@ -8520,19 +8804,8 @@ def _collect_formatting_ranges():
     tags_to_check = ('bold', 'italic', 'underline', 'all',
                      'underlineitalic', 'boldunderline', 'bolditalic',
                      'small', 'mark', 'code', 'kbd', 'sub', 'sup')
-    out = {}
-    for tag in tags_to_check:
-        ranges = textArea.tag_ranges(tag)
-        arr = []
-        for i in range(0, len(ranges), 2):
-            s = ranges[i]
-            e = ranges[i + 1]
-            start = len(textArea.get('1.0', s))
-            end = len(textArea.get('1.0', e))
-            if end > start:
-                arr.append((start, end))
-        out[tag] = arr
-    return out
+    offsets = funcs.TextOffsetMap(textArea)
+    return {tag: [tuple(r) for r in offsets.tag_ranges(tag)] for tag in tags_to_check}
 
 
 def _wrap_segment_by_tags(seg_text: str, active_tags: set):
@@ -8624,54 +8897,141 @@ def save_as_markdown(textArea):
     except Exception:
         return None
 
-def fetch_and_open_url(url: str, open_in_new_tab: bool = True, record_history: bool = True):
+def _stream_show(preview: dict, title: str, url: str, open_tab: bool, text: str, tags: dict, job=None):
+    """Append one HTMLStreamRenderer batch to the preview tab, creating the tab on the first batch.
+
+    When the preview replaces the current tab, job (the page's render job) moves to the new tab.
+    """
+    try:
+        if job is not None and job.cancelled:
+            return
+        tx = preview.get('tx')
+        if tx is None:
+            if not open_tab:
+                sel = editorNotebook.select()
+                if sel:
+                    root.nametowidget(sel).destroy()
+            tx, fr = create_editor_tab(title, text, filename=url)
+            _apply_tag_configs_to_widget(tx)
+            preview.update(tx=tx, frame=fr, tags=set())
+            if job is not None and not open_tab:
+                _render_pool().move(job, str(fr))
+        else:
+            tx.insert('end-1c', text)
+        doc = piece_table.widget_document(tx)
+        for tag, spans in tags.items():
+            if tag.startswith('font_') and tag not in preview['tags']:
+                try:
+                    tx.tag_config(tag, foreground='#' + tag[5:])
+                except Exception:
+                    pass
+            preview['tags'].add(tag)
+            for s, e in spans:
+                tx.tag_add(tag, doc.index(s), doc.index(e))
+    except Exception:
+        pass
+
+
+def _stream_finish(preview: dict, plain: str):
+    """Turn the preview tab into the final page: keep the common prefix, replace the rest, drop preview tags."""
+    tx, fr = preview['tx'], preview['frame']
+    cur = piece_table.widget_text(tx)
+    if plain.startswith(cur):
+        keep = len(cur)
+    else:
+        lo, hi = 0, min(len(cur), len(plain))
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if cur[:mid] == plain[:mid]:
+                lo = mid
+            else:
+                hi = mid - 1
+        keep = lo
+    doc = piece_table.widget_document(tx)
+    if keep < len(cur):
+        tx.delete(doc.index(keep), 'end-1c')
+    if keep < len(plain):
+        tx.insert('end-1c', plain[keep:])
+    for tag in preview['tags']:
+        tx.tag_remove(tag, '1.0', 'end')
+    fr._initial_content = plain
+    try:
+        editorNotebook.select(fr)
+        tx.edit_reset()
+        tx.edit_modified(False)
+    except Exception:
+        pass
+    tx.focus_set()
+    return tx, fr
+
+
+def fetch_and_open_url(url: str, open_in_new_tab: bool = True, record_history: bool = True,
+                       cache_mode: str = 'normal'):
     """Fetch `url` on a background thread and open parsed HTML in a tab (reusable helper).
 
     record_history: when False do NOT call _record_location_opened for the opened URL.
+    cache_mode: how page_cache is used ('normal', 'history' for Back, 'refresh'); see _fetch_page.
+    Rendered pages are parsed while they download (funcs.HTMLStreamRenderer) and shown in a
+    preview tab that is reconciled with the final parse once the body is complete. The page is
+    a render_pool job of its tab: navigating that tab again (or closing it) drops this one.
     """
+    job = _render_pool().begin(('url', url) if open_in_new_tab else (editorNotebook.select() or ('url', url)))
+
     def worker(url_in, open_tab, record_hist):
         try:
-            import urllib.request as urr
             import urllib.parse as up
             parsed = up.urlsplit(url_in)
             if not parsed.scheme:
                 url2 = 'http://' + url_in
             else:
                 url2 = url_in
-            req = urr.Request(url2, headers={"User-Agent": "SimpleEdit/1.0"})
-            with urr.urlopen(req, timeout=15) as resp:
-                charset = None
+            title = up.urlsplit(url2).netloc or url2
+            stream = {'renderer': None}
+            preview = {}
+            as_source = config.getboolean("Section1", "openHtmlAsSource", fallback=False)
+
+            def on_data(chunk, charset):
+                if as_source or job.cancelled:
+                    return
+                if stream['renderer'] is None:
+                    stream['renderer'] = funcs.HTMLStreamRenderer(charset or 'utf-8')
+                text, tags = stream['renderer'].feed(chunk)
+                if text:
+                    root.after(0, lambda t=text, tg=tags: _stream_show(preview, title, url2, open_tab, t, tg, job))
+
+            fetch_started = time.perf_counter()
+            got = _fetch_page(url2, cache_mode, on_data=on_data)
+            if job.cancelled:
+                return
+            # parsing done while the body arrived is counted as parse, not fetch
+            job.record('fetch', time.perf_counter() - fetch_started
+                       - (sum(stream['renderer'].timings.values()) if stream['renderer'] is not None else 0.0))
+            charset = got.charset
+            raw_bytes = got.body
+            enc = charset or 'utf-8'
+            try:
+                raw = raw_bytes.decode(enc, errors='replace')
+                scripts = funcs.extract_script_tags(raw)
                 try:
-                    ct = resp.headers.get_content_charset()
-                    if ct:
-                        charset = ct
+                    cnt = len(scripts) if isinstance(scripts, (list, tuple)) else 0
+                    statusBar['text'] = f"Found {cnt} script(s) in document"
+                    print(f"[debug] Found {cnt} script(s) when opening {url2}")
+                    if cnt:
+                        print("[debug] first script preview:", str(scripts[0])[:200])
                 except Exception:
                     pass
-                raw_bytes = resp.read()
-                enc = charset or 'utf-8'
-                try:
-                    raw = raw_bytes.decode(enc, errors='replace')
-                    scripts = funcs.extract_script_tags(raw)
-                    try:
-                        cnt = len(scripts) if isinstance(scripts, (list, tuple)) else 0
-                        statusBar['text'] = f"Found {cnt} script(s) in document"
-                        print(f"[debug] Found {cnt} script(s) when opening {url2}")
-                        if cnt:
-                            print("[debug] first script preview:", str(scripts[0])[:200])
-                    except Exception:
-                        pass
 
+            except Exception:
+                raw = raw_bytes.decode('utf-8', errors='replace')
+                scripts = funcs.extract_script_tags(raw)
+                try:
+                    cnt = len(scripts) if isinstance(scripts, (list, tuple)) else 0
+                    statusBar['text'] = f"Found {cnt} script(s) in document"
+                    print(f"[debug] Found {cnt} script(s) when opening {url2}")
+                    if cnt:
+                        print("[debug] first script preview:", str(scripts[0])[:200])
                 except Exception:
-                    raw = raw_bytes.decode('utf-8', errors='replace')
-                    scripts = funcs.extract_script_tags(raw)
-                    try:
-                        cnt = len(scripts) if isinstance(scripts, (list, tuple)) else 0
-                        statusBar['text'] = f"Found {cnt} script(s) in document"
-                        print(f"[debug] Found {cnt} script(s) when opening {url2}")
-                        if cnt:
-                            print("[debug] first script preview:", str(scripts[0])[:200])
-                    except Exception:
-                        pass
+                    pass
 
 
             # Respect the 'open as source' preference for fetched HTML/MD
@@ -8686,16 +9046,28 @@ def fetch_and_open_url(url: str, open_in_new_tab: bool = True, record_history: b
                 except Exception:
                     preset_path = None
             else:
-                plain, tags_meta = funcs._parse_html_and_apply(raw)
+                if stream['renderer'] is not None:
+                    plain, tags_meta = stream['renderer'].close()
+                    for stage, seconds in stream['renderer'].timings.items():
+                        job.record(stage, seconds)
+                else:
+                    parse_started = time.perf_counter()
+                    plain, tags_meta = funcs._parse_html_and_apply(raw)
+                    job.record('parse', time.perf_counter() - parse_started)
                 preset_path = None
 
             def ui():
+                if not _render_pool().is_current(job):
+                    return
+                started = time.perf_counter()
                 try:
-                    title = up.urlsplit(url2).netloc or url2
                     if open_tab:
-                        tx, fr = create_editor_tab(title, plain, filename=url2)
-                        tx.focus_set()
-                        _apply_tag_configs_to_widget(tx)
+                        if preview:
+                            tx, fr = _stream_finish(preview, plain)
+                        else:
+                            tx, fr = create_editor_tab(title, plain, filename=url2)
+                            tx.focus_set()
+                            _apply_tag_configs_to_widget(tx)
                         # store raw/parsed data and view flags on the new tab like _open_path does markz
                         try:
                             fr._raw_html = raw
@@ -8754,13 +9126,16 @@ def fetch_and_open_url(url: str, open_in_new_tab: bool = True, record_history: b
 
                         try:
                             sel = editorNotebook.select()
+                            if preview:
+                                tx, frame = _stream_finish(preview, plain)
+                                sel = str(frame)
                             if sel:
-                                frame = root.nametowidget(sel)
-                                frame = root.nametowidget(sel)
-                                frame.destroy()
-                                tx, frame = create_editor_tab(title, plain, filename=url2)
-                                tx.focus_set()
-                                _apply_tag_configs_to_widget(tx)
+                                if not preview:
+                                    frame = root.nametowidget(sel)
+                                    frame.destroy()
+                                    tx, frame = create_editor_tab(title, plain, filename=url2)
+                                    tx.focus_set()
+                                    _apply_tag_configs_to_widget(tx)
                                 frame._raw_html = raw
                                 frame._raw_html_plain = plain
                                 frame._raw_html_tags_meta = tags_meta
@@ -8846,10 +9221,14 @@ def fetch_and_open_url(url: str, open_in_new_tab: bool = True, record_history: b
                         messagebox.showerror("Error", str(e))
                     except Exception:
                         pass
+                root.after(0, lambda: _finish_render_job(job, started))
 
             root.after(0, ui)
 
         except Exception as e:
+            if render_pool is not None:
+                render_pool.finished(job)
+
             def ui_err():
                 try:
                     messagebox.showerror("Fetch error", f"Failed to fetch URL: {e}")
@@ -9052,6 +9431,64 @@ def _apply_browsing_mode_for_current_tab():
     except Exception:
         pass
 
+def _line_lexer_for(tw, regexes, todo_re, extra_rules=()):
+    """Return the syntax_lexer.LineStateLexer of `tw` for these regexes.
+
+    A preset change builds a new, unseeded lexer; its master pattern also serves the
+    region scans, so each preset is compiled into one combined regex once per tab.
+    """
+    key = tuple(regexes.get(k) for k in sorted(regexes)) + (todo_re,) + tuple(rx for _, rx, _ in extra_rules)
+    lexer = getattr(tw, '_line_lexer', None)
+    if lexer is None or lexer.key != key:
+        rules = syntax_lexer.rules_from_regexes(regexes) + list(extra_rules)
+        lexer = syntax_lexer.LineStateLexer(rules, todo_re=todo_re, key=key)
+        tw._line_lexer = lexer
+        # lines highlighted under the previous preset need highlighting again
+        tw.tag_remove('syntax_done', '1.0', 'end')
+    return lexer
+
+
+def _incremental_lex(tw, lexer, full_text=None):
+    """Re-lex only the lines of `tw` edited since its last highlight pass.
+
+    Returns a syntax_lexer.LexResult for the re-lexed lines, or None when the caller should
+    run its region scan instead (nothing edited, or the line-state cache was just seeded).
+    Passing full_text reseeds the cache after a whole-buffer scan.
+    """
+    try:
+        insert_line = int(tw.index('insert').split('.')[0]) - 1
+    except Exception:
+        insert_line = None
+    prev_line = getattr(tw, '_lex_insert_line', insert_line)
+    tw._lex_insert_line = insert_line
+
+    if full_text is not None or lexer.lines is None:
+        lexer.reset(full_text if full_text is not None else piece_table.widget_text(tw))
+        tw._lex_dirty = False
+        return None
+    if not getattr(tw, '_lex_dirty', False):
+        return None
+    tw._lex_dirty = False
+
+    # the edit lies between the cursor of the previous pass and the current cursor
+    hint = None
+    if insert_line is not None and prev_line is not None:
+        hint = (min(prev_line, insert_line), max(prev_line, insert_line))
+    return lexer.update(piece_table.widget_text(tw), hint=hint)
+
+
+def _chars_between(tw, index1, index2):
+    """Character count from index1 to index2 (negative when index2 comes first), counted by Tk
+    rather than by copying the text between them."""
+    try:
+        n = tw.count(index1, index2, 'chars')
+    except Exception:
+        return len(tw.get(index1, index2))
+    if isinstance(n, tuple):
+        n = n[0]
+    return int(n or 0)
+
+
 def highlight_python_helper(event=None, scan_start=None, scan_end=None):
     """Highlight a local region near the current cursor.
 
@@ -9084,7 +9521,6 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
         CONSTANT_RE_loc = trans['regexes'].get('CONSTANT_RE') if (trans and 'CONSTANT_RE' in trans.get('regexes', {})) else CONSTANT_RE
         ATTRIBUTE_RE_loc = trans['regexes'].get('ATTRIBUTE_RE') if (trans and 'ATTRIBUTE_RE' in trans.get('regexes', {})) else ATTRIBUTE_RE
         DUNDER_RE_loc = trans['regexes'].get('DUNDER_RE') if (trans and 'DUNDER_RE' in trans.get('regexes', {})) else DUNDER_RE
-        FSTRING_RE_loc = trans['regexes'].get('FSTRING_RE') if (trans and 'FSTRING_RE' in trans.get('regexes', {})) else FSTRING_RE
         TODO_RE_loc = trans['regexes'].get('TODO_RE') if (trans and 'TODO_RE' in trans.get('regexes', {})) else TODO_RE
         SELFS_RE_loc = trans['regexes'].get('SELFS_RE') if (trans and 'SELFS_RE' in trans.get('regexes', {})) else SELFS_RE
 
@@ -9092,8 +9528,28 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
         KEYWORD_RE_loc = trans['keywords'][1] if (trans and trans.get('keywords')) else KEYWORD_RE
         BUILTIN_RE_loc = trans['builtins'][1] if (trans and trans.get('builtins')) else BUILTIN_RE
 
-        # determine region to scan (visible region by default)
+        # Typing re-lexes only the edited lines (until the line state converges) instead of
+        # rescanning the visible region; other events and explicit regions use the region scan.
+        lex_regexes = {
+            'STRING_RE': STRING_RE_loc, 'COMMENT_RE': COMMENT_RE_loc, 'NUMBER_RE': NUMBER_RE_loc,
+            'DECORATOR_RE': DECORATOR_RE_loc, 'CLASS_RE': CLASS_RE_loc, 'VAR_ASSIGN_RE': VAR_ASSIGN_RE_loc,
+            'CONSTANT_RE': CONSTANT_RE_loc, 'ATTRIBUTE_RE': ATTRIBUTE_RE_loc, 'DUNDER_RE': DUNDER_RE_loc,
+            'KEYWORD_RE': KEYWORD_RE_loc, 'BUILTIN_RE': BUILTIN_RE_loc, 'SELFS_RE': SELFS_RE_loc,
+        }
+        lex_extra = () if SELFS_RE_loc is SELFS_RE else (('selfs', SELFS_RE, False),)
+        lexer = _line_lexer_for(textArea, lex_regexes, TODO_RE_loc, lex_extra)
+        inc = None
         if scan_start is None or scan_end is None:
+            try:
+                inc = _incremental_lex(textArea, lexer)
+            except Exception:
+                inc = None
+
+        # determine region to scan (visible region by default)
+        if inc is not None:
+            start = inc.index(inc.start_offset)
+            end = inc.index(inc.end_offset)
+        elif scan_start is None or scan_end is None:
             try:
                 first_visible = textArea.index('@0,0')
                 last_visible = textArea.index(f'@0,{textArea.winfo_height()}')
@@ -9111,10 +9567,18 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
             end = scan_end
 
         content = textArea.get(start, end)
+        # absolute Tk indices for region offsets, resolved from the region's own lines
+        region = syntax_lexer.LineIndex(content, *map(int, textArea.index(start).split('.')))
         base_offset = 0
-        if start != "1.0":
-            before = textArea.get("1.0", start)
-            base_offset = len(before)
+        if inc is not None:
+            base_offset = inc.start_offset
+        elif start != "1.0":
+            base_offset = _chars_between(textArea, "1.0", start)
+        elif end == "end-1c":
+            try:
+                _incremental_lex(textArea, lexer, full_text=content)
+            except Exception:
+                pass
 
         # remove tags only in the scanned region
         for t in ('string', 'keyword', 'comment', 'selfs', 'def', 'number', 'variable',
@@ -9124,27 +9588,24 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
             except Exception:
                 pass
 
-        protected_spans = []
-
-        # strings and comments first -- protect their spans
-        for m in STRING_RE_loc.finditer(content):
-            s, e = m.span()
-            textArea.tag_add("string", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-            protected_spans.append((s, e))
-        for m in COMMENT_RE_loc.finditer(content):
-            s, e = m.span()
-            textArea.tag_add("comment", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-            protected_spans.append((s, e))
-            mm = TODO_RE_loc.search(content, m.start(), m.end())
-            if mm:
-                ts, te = mm.span()
-                textArea.tag_add("todo", f"1.0 + {base_offset + ts}c", f"1.0 + {base_offset + te}c")
-
-        def overlaps_protected(s, e):
-            for ps, pe in protected_spans:
-                if not (e <= ps or s >= pe):
-                    return True
-            return False
+        if inc is not None:
+            # lexer output for the re-lexed lines: one tag_add call per tag
+            for tag, ranges in inc.tags.items():
+                if ranges:
+                    idx = []
+                    for s, e in ranges:
+                        idx.append(inc.index(s))
+                        idx.append(inc.index(e))
+                    textArea.tag_add(tag, *idx)
+            protected = syntax_lexer.ProtectedSpans((s - base_offset, e - base_offset) for s, e in inc.protected_spans())
+        else:
+            # strings, comments and every other token class in one pass of the master pattern
+            tags = lexer.master.scan(content)
+            for tag, ranges in tags.items():
+                if ranges:
+                    textArea.tag_add(tag, *region.tk_ranges(ranges))
+            protected = syntax_lexer.ProtectedSpans(tags['string'] + tags['comment'])
+        overlaps_protected = protected.overlaps
 
         # HTML-specific tagging: tag comments, element names, attributes and attribute values.
         # Run early so html_comment spans become protected for later passes.
@@ -9154,15 +9615,15 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
                 for m in HTML_COMMENT_RE.finditer(content):
                     s, e = m.span()
                     if not overlaps_protected(s, e):
-                        textArea.tag_add("html_comment", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
+                        textArea.tag_add("html_comment", region.index(s), region.index(e))
                     # Always protect HTML comments from other tagging
-                    protected_spans.append((s, e))
+                    protected.add(s, e)
                 # Tag element names (e.g. <div, </a)
                 for m in HTML_TAG_RE.finditer(content):
                     try:
                         s, e = m.span(1)
                         if not overlaps_protected(s, e):
-                            textArea.tag_add("html_tag", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
+                            textArea.tag_add("html_tag", region.index(s), region.index(e))
                     except Exception:
                         pass
                 # Tag attribute names
@@ -9170,7 +9631,7 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
                     try:
                         s, e = m.span(1)
                         if not overlaps_protected(s, e):
-                            textArea.tag_add("html_attr", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
+                            textArea.tag_add("html_attr", region.index(s), region.index(e))
                     except Exception:
                         pass
                 # Tag attribute values (captured in group 1/2/3)
@@ -9182,7 +9643,7 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
                                     s = m.start(gi)
                                     e = m.end(gi)
                                     if not overlaps_protected(s, e):
-                                        textArea.tag_add("html_attr_value", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
+                                        textArea.tag_add("html_attr_value", region.index(s), region.index(e))
                                     break
                             except Exception:
                                 continue
@@ -9191,68 +9652,6 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
         except Exception:
             pass
 
-        # numbers
-        for m in NUMBER_RE_loc.finditer(content):
-            s, e = m.span()
-            if not overlaps_protected(s, e):
-                textArea.tag_add("number", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-
-        # decorators
-        for m in DECORATOR_RE_loc.finditer(content):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(s, e):
-                textArea.tag_add("decorator", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-
-        # classes
-        for m in CLASS_RE_loc.finditer(content):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(s, e):
-                textArea.tag_add("class_name", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-
-        # variable assignments
-        for m in VAR_ASSIGN_RE_loc.finditer(content):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(s, e):
-                textArea.tag_add("variable", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-
-        # constants
-        for m in CONSTANT_RE_loc.finditer(content):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(s, e):
-                textArea.tag_add("constant", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-
-        # attribute names
-        for m in ATTRIBUTE_RE_loc.finditer(content):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(s, e):
-                textArea.tag_add("attribute", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-
-        # dunders
-        for m in DUNDER_RE_loc.finditer(content):
-            s, e = m.span()
-            if not overlaps_protected(s, e):
-                textArea.tag_add("def", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-
-        # f-strings
-        for m in FSTRING_RE_loc.finditer(content):
-            s, e = m.span()
-            # already tagged as string; keep behavior (no extra tag)
-
         # dynamic defs (existing behaviour)
         global match_string
         match_string = match_case_like_this(start, end)
@@ -9260,29 +9659,7 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
             for m in re.finditer(match_string, content):
                 s, e = m.span()
                 if not overlaps_protected(s, e):
-                    textArea.tag_add("def", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-
-        # keywords and builtins
-        for m in KEYWORD_RE_loc.finditer(content):
-            s, e = m.span()
-            if not overlaps_protected(s, e):
-                textArea.tag_add("keyword", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-        for m in BUILTIN_RE_loc.finditer(content):
-            s, e = m.span()
-            if not overlaps_protected(s, e):
-                textArea.tag_add("builtin", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-
-        # selfs
-        for m in SELFS_RE_loc.finditer(content):
-            s, e = m.span()
-            if not overlaps_protected(s, e):
-                textArea.tag_add("selfs", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
-
-        # selfs/attributes highlight (include 'after' as requested)
-        for m in SELFS_RE.finditer(content):
-            s, e = m.span()
-            if not overlaps_protected(s, e):
-                textArea.tag_add("selfs", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
+                    textArea.tag_add("def", region.index(s), region.index(e))
 
         # tag persisted buffers inside the scanned region (so removed window items still highlight)
         if persisted_vars:
@@ -9290,13 +9667,13 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
             for m in pattern.finditer(content):
                 s, e = m.span(1)
                 if not overlaps_protected(s, e):
-                    textArea.tag_add("variable", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
+                    textArea.tag_add("variable", region.index(s), region.index(e))
         if persisted_defs:
             pattern_def = re.compile(r'\b(' + r'|'.join(re.escape(x) for x in persisted_defs) + r')\b')
             for m in pattern_def.finditer(content):
                 s, e = m.span(1)
                 if not overlaps_protected(s, e):
-                    textArea.tag_add("def", f"1.0 + {base_offset + s}c", f"1.0 + {base_offset + e}c")
+                    textArea.tag_add("def", region.index(s), region.index(e))
 
         # Markdown-style links: [text](url) -> tag only the visible text and remember href
         try:
@@ -9309,10 +9686,8 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
                 href = m.group(2).strip()
                 if overlaps_protected(text_s, text_e):
                     continue
-                abs_s = base_offset + text_s
-                abs_e = base_offset + text_e
-                start_idx = textArea.index(f"1.0 + {abs_s}c")
-                end_idx = textArea.index(f"1.0 + {abs_e}c")
+                start_idx = region.index(text_s)
+                end_idx = region.index(text_e)
                 try:
                     textArea.tag_add("hyperlink", start_idx, end_idx)
                 except Exception:
@@ -9347,6 +9722,7 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
             elif isinstance(frame_links_meta, list):
                 links_list = frame_links_meta
             # Apply parser-provided links as authoritative hyperlink tag ranges on the widget
+            buff_len = _chars_between(textArea, '1.0', 'end-1c') if links_list else 0
             for ln in links_list:
                 try:
                     if isinstance(ln, dict):
@@ -9361,8 +9737,6 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
                         continue
                     if le <= ls or href is None:
                         continue
-                    # Only apply if range intersects scanned region (optimization) OR if scanning whole buffer
-                    buff_len = len(textArea.get('1.0', 'end-1c'))
                     if ls < 0 or le < 0 or ls >= buff_len:
                         continue
                     start_idx = textArea.index(f"1.0 + {ls}c")
@@ -9400,8 +9774,8 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
                 for i in range(0, len(hr), 2):
                     rs = hr[i]
                     re_ = hr[i + 1]
-                    rs_off = len(textArea.get('1.0', rs))
-                    re_off = len(textArea.get('1.0', re_))
+                    rs_off = base_offset + _chars_between(textArea, start, rs)
+                    re_off = base_offset + _chars_between(textArea, start, re_)
                     existing_spans.append((rs_off, re_off))
             except Exception:
                 existing_spans = []
@@ -9424,8 +9798,8 @@ def highlight_python_helper(event=None, scan_start=None, scan_end=None):
                 if overlapped:
                     continue
 
-                start_idx = textArea.index(f"1.0 + {abs_s}c")
-                end_idx = textArea.index(f"1.0 + {abs_e}c")
+                start_idx = region.index(s)
+                end_idx = region.index(e)
                 try:
                     textArea.tag_add("hyperlink", start_idx, end_idx)
                 except Exception:
@@ -9617,6 +9991,8 @@ def highlightPythonInit():
         for t in ('string', 'keyword', 'comment', 'selfs', 'def', 'number', 'variable',
                   'decorator', 'class_name', 'constant', 'attribute', 'builtin', 'todo'):
             textArea.tag_remove(t, "1.0", "end")
+        _lazy_hl_cancel()
+        _update_highlight_coverage()
         statusBar['text'] = "Syntax highlighting disabled."
         return
 
@@ -9627,16 +10003,20 @@ def highlightPythonInit():
             highlight_python_helper(None)
         except Exception:
             pass
+        # the rest of the buffer fills in idle-time chunks around the viewport
+        _lazy_hl_restart()
         statusBar['text'] = "Ready"
         return
 
     statusBar['text'] = "Processing initial syntax..."
     root.update_idletasks()
 
+    # the scan's ranges belong to this widget, whichever tab is selected when they are applied
+    tw = textArea
     try:
-        content_snapshot = textArea.get("1.0", "end-1c")
+        snapshot = piece_table.widget_snapshot(tw)
     except Exception:
-        content_snapshot = ""
+        snapshot = piece_table.PieceTable()
 
     dlg, pb, status = show_progress_popup("Initial syntax highlighting")
     status['text'] = "Scanning..."
@@ -9654,28 +10034,38 @@ def highlightPythonInit():
         root.after(0, ui)
 
     def worker():
-        actions, new_vars, new_defs = _bg_full_scan_and_collect(content_snapshot, progress_callback=progress_cb)
+        # the frozen snapshot is joined here, off the UI thread
+        content_snapshot = snapshot.text()
+        # scanning fills the first 60% of the bar, applying the tags the rest
+        actions, new_vars, new_defs = _bg_full_scan_and_collect(
+            content_snapshot, progress_callback=lambda pct, msg="": progress_cb(pct * 0.6, msg))
         def apply_and_finish():
-            try:
-                _apply_full_tags(actions, new_vars, new_defs)
-                full = textArea.get("1.0", "end-1c")
-                new_vars2 = {m.group(1) for m in VAR_ASSIGN_RE.finditer(full)}
+            def finish(completed):
                 try:
-                    DEF_RE = re.compile(r'(?m)^[ \t]*def\s+([A-Za-z_]\w*)\s*\(')
-                except Exception:
-                    DEF_RE = None
-                new_defs2 = set()
-                if DEF_RE:
-                    new_defs2 = {m.group(1) for m in DEF_RE.finditer(full)}
-                if new_vars2:
-                    persisted_vars.update(new_vars2)
-                if new_defs2:
-                    persisted_defs.update(new_defs2)
-                _save_symbol_buffers(persisted_vars, persisted_defs)
-                highlight_python_helper(None, scan_start="1.0", scan_end="end-1c")
-                statusBar['text'] = "Ready"
-            finally:
-                close_progress_popup(dlg, pb)
+                    if not completed:
+                        return
+                    full = piece_table.widget_text(tw)
+                    new_vars2 = {m.group(1) for m in VAR_ASSIGN_RE.finditer(full)}
+                    try:
+                        DEF_RE = re.compile(r'(?m)^[ \t]*def\s+([A-Za-z_]\w*)\s*\(')
+                    except Exception:
+                        DEF_RE = None
+                    new_defs2 = set()
+                    if DEF_RE:
+                        new_defs2 = {m.group(1) for m in DEF_RE.finditer(full)}
+                    if new_vars2:
+                        persisted_vars.update(new_vars2)
+                    if new_defs2:
+                        persisted_defs.update(new_defs2)
+                    _save_symbol_buffers(persisted_vars, persisted_defs)
+                    tw.tag_add('syntax_done', '1.0', 'end-1c')
+                    _update_highlight_coverage()
+                    statusBar['text'] = "Ready"
+                finally:
+                    close_progress_popup(dlg, pb)
+            _apply_full_tags(actions, new_vars, new_defs, content=content_snapshot,
+                             progress_callback=lambda pct, msg="": progress_cb(60 + pct * 0.4, msg),
+                             on_done=finish, text_widget=tw)
         try:
             root.after(0, apply_and_finish)
         except Exception:
@@ -9696,55 +10086,35 @@ def apply_syntax_preset_transient(path: str, text_widget: Text | None = None) ->
     try:
         if not path or not os.path.isfile(path):
             return False
-        cp = configparser.ConfigParser()
-        cp.read(path)
-        if not cp.has_section('Syntax'):
+        # parsed/compiled once per file version and shared with every other tab using it
+        preset = syntax_presets.registry.get(path)
+        if preset is None:
             return False
+        opts = preset.options
 
-        # Build tag color map (per-tag fg/bg) and compiled regexes/keyword lists
+        # Build tag color map (per-tag fg/bg)
         tag_colors = {}
         for tag, defaults in _DEFAULT_TAG_COLORS.items():
-            fg = cp.get('Syntax', f'tag.{tag}.fg', fallback='').strip()
-            bg = cp.get('Syntax', f'tag.{tag}.bg', fallback='').strip()
+            fg = opts.get(f'tag.{tag}.fg', '').strip()
+            bg = opts.get(f'tag.{tag}.bg', '').strip()
             if fg or bg:
                 tag_colors[tag] = {'fg': fg or defaults.get('fg', ''), 'bg': bg or defaults.get('bg', '')}
 
-        # keywords/builtins
-        kw_csv = cp.get('Syntax', 'keywords.csv', fallback=','.join(KEYWORDS))
-        bk_csv = cp.get('Syntax', 'builtins.csv', fallback=','.join(BUILTINS))
-        try:
-            kw_list = [x.strip() for x in kw_csv.split(',') if x.strip()]
-            kw_re = re.compile(r'\b(' + r'|'.join(map(re.escape, kw_list)) + r')\b') if kw_list else re.compile(r'\b\b')
-        except Exception:
-            kw_list, kw_re = [], KEYWORD_RE
-        try:
-            bk_list = [x.strip() for x in bk_csv.split(',') if x.strip()]
-            bk_re = re.compile(r'\b(' + r'|'.join(map(re.escape, bk_list)) + r')\b') if bk_list else re.compile(r'\b\b')
-        except Exception:
-            bk_list, bk_re = [], BUILTIN_RE
+        # keywords/builtins (fall back to the global lists when the preset has none)
+        kw_list, kw_re = preset.keywords if preset.keywords is not None else (list(KEYWORDS), KEYWORD_RE)
+        bk_list, bk_re = preset.builtins if preset.builtins is not None else (list(BUILTINS), BUILTIN_RE)
 
-        # Generic regex keys
-        compiled = {}
-        for key, default_pattern in _DEFAULT_REGEXES.items():
-            cfg_key = f'regex.{key}'
-            pat = cp.get('Syntax', cfg_key, fallback=default_pattern)
-            if not pat:
-                continue
-            try:
-                if key in ('STRING_RE', 'FSTRING_RE'):
-                    compiled[key] = re.compile(pat, re.DOTALL)
-                else:
-                    compiled[key] = re.compile(pat)
-            except Exception:
-                # fallback to global for this key
-                pass
+        # Generic regex keys: preset slots over the compiled defaults
+        compiled = dict(_default_compiled_regexes())
+        compiled.update(preset.regexes)
 
         # Build transient syntax object
         trans = {
             'tag_colors': tag_colors,
             'regexes': compiled,
             'keywords': (kw_list, kw_re),
-            'builtins': (bk_list, bk_re)
+            'builtins': (bk_list, bk_re),
+            'preset_id': preset.id
         }
 
         # Find target widget and its tab frame
@@ -9890,33 +10260,32 @@ def manual_detect_syntax(force: bool = False):
     except Exception:
         pass
 
-# REPLACE existing refresh_full_syntax() with updated version
+
+def highlightPythonInitT():
+    """Compatibility wrapper used around the codebase; simply calls the non-blocking init."""
+    highlightPythonInit()
+
+
 def refresh_full_syntax():
-    """Manual refresh for syntax highlighting respecting fullScanEnabled."""
+    """Manual refresh for full-file syntax highlighting with progress popup."""
     if not updateSyntaxHighlighting.get():
         for t in ('string', 'keyword', 'comment', 'selfs', 'def', 'number', 'variable',
                   'decorator', 'class_name', 'constant', 'attribute', 'builtin', 'todo'):
             textArea.tag_remove(t, "1.0", "end")
+        _lazy_hl_cancel()
+        _update_highlight_coverage()
         statusBar['text'] = "Syntax highlighting disabled."
         return
 
-    # Quick mode path
-    if not fullScanEnabled.get():
-        statusBar['text'] = "Quick refresh..."
-        try:
-            highlight_python_helper(None)
-        except Exception:
-            pass
-        statusBar['text'] = "Ready"
-        return
-
     statusBar['text'] = "Refreshing syntax..."
     root.update_idletasks()
 
+    # the scan's ranges belong to this widget, whichever tab is selected when they are applied
+    tw = textArea
     try:
-        content_snapshot = textArea.get("1.0", "end-1c")
+        snapshot = piece_table.widget_snapshot(tw)
     except Exception:
-        content_snapshot = ""
+        snapshot = piece_table.PieceTable()
 
     dlg, pb, status = show_progress_popup("Refreshing syntax")
     status['text'] = "Scanning..."
@@ -9934,28 +10303,40 @@ def refresh_full_syntax():
         root.after(0, ui)
 
     def worker():
-        actions, new_vars, new_defs = _bg_full_scan_and_collect(content_snapshot, progress_callback=progress_cb)
+        # the frozen snapshot is joined here, off the UI thread
+        content_snapshot = snapshot.text()
+        # scanning fills the first 60% of the bar, applying the tags the rest
+        actions, new_vars, new_defs = _bg_full_scan_and_collect(
+            content_snapshot, progress_callback=lambda pct, msg="": progress_cb(pct * 0.6, msg))
         def apply_and_close():
-            try:
-                _apply_full_tags(actions, new_vars, new_defs)
-                full = textArea.get("1.0", "end-1c")
-                new_vars2 = {m.group(1) for m in VAR_ASSIGN_RE.finditer(full)}
+            def finish(completed):
                 try:
-                    DEF_RE = re.compile(r'(?m)^[ \t]*def\s+([A-Za-z_]\w*)\s*\(')
-                except Exception:
-                    DEF_RE = None
-                new_defs2 = set()
-                if DEF_RE:
-                    new_defs2 = {m.group(1) for m in DEF_RE.finditer(full)}
-                if new_vars2:
-                    persisted_vars.update(new_vars2)
-                if new_defs2:
-                    persisted_defs.update(new_defs2)
-                _save_symbol_buffers(persisted_vars, persisted_defs)
-                highlight_python_helper(None, scan_start="1.0", scan_end="end-1c")
-                statusBar['text'] = "Ready"
-            finally:
-                close_progress_popup(dlg, pb)
+                    if not completed:
+                        return
+                    # persist any discoveries from a full scan
+                    full = piece_table.widget_text(tw)
+                    new_vars2 = {m.group(1) for m in VAR_ASSIGN_RE.finditer(full)}
+                    try:
+                        DEF_RE = re.compile(r'(?m)^[ \t]*def\s+([A-Za-z_]\w*)\s*\(')
+                    except Exception:
+                        DEF_RE = None
+                    new_defs2 = set()
+                    if DEF_RE:
+                        new_defs2 = {m.group(1) for m in DEF_RE.finditer(full)}
+                    if new_vars2:
+                        persisted_vars.update(new_vars2)
+                    if new_defs2:
+                        persisted_defs.update(new_defs2)
+                    _save_symbol_buffers(persisted_vars, persisted_defs)
+                    tw.tag_add('syntax_done', '1.0', 'end-1c')
+                    _update_highlight_coverage()
+                    statusBar['text'] = "Ready"
+                finally:
+                    close_progress_popup(dlg, pb)
+            _apply_full_tags(actions, new_vars, new_defs, content=content_snapshot,
+                             progress_callback=lambda pct, msg="": progress_cb(60 + pct * 0.4, msg),
+                             on_done=finish, text_widget=tw)
+
         try:
             root.after(0, apply_and_close)
         except Exception:
@@ -9964,74 +10345,142 @@ def refresh_full_syntax():
     Thread(target=worker, daemon=True).start()
 
 
-def highlightPythonInitT():
-    """Compatibility wrapper used around the codebase; simply calls the non-blocking init."""
-    highlightPythonInit()
+# -------------------------
+# Lazy highlighting: viewport first, then idle-time chunks spreading out from it
+# -------------------------
+LAZY_HL_CHUNK_LINES = 80    # lines per highlight_python_helper region scan
+LAZY_HL_SETTLE_MS = 150     # pause after a scroll/edit before background chunks resume
+_lazy_hl = {'after_id': None}
 
 
-def refresh_full_syntax():
-    """Manual refresh for full-file syntax highlighting with progress popup."""
-    if not updateSyntaxHighlighting.get():
-        for t in ('string', 'keyword', 'comment', 'selfs', 'def', 'number', 'variable',
-                  'decorator', 'class_name', 'constant', 'attribute', 'builtin', 'todo'):
-            textArea.tag_remove(t, "1.0", "end")
-        statusBar['text'] = "Syntax highlighting disabled."
-        return
+def _lazy_hl_budget_ms():
+    """Milliseconds of highlighting per idle slice (Settings -> Highlight chunk budget)."""
+    try:
+        return max(1, int(config.get("Section1", "lazyHighlightChunkMs", fallback="8")))
+    except Exception:
+        return 8
+
+
+def _lazy_hl_lines(tw):
+    """Line count the scheduler fills (a trailing empty line after the last newline is not one)."""
+    line, col = map(int, tw.index('end-1c').split('.'))
+    return line if col else line - 1
 
-    statusBar['text'] = "Refreshing syntax..."
-    root.update_idletasks()
 
+def _lazy_hl_done(tw):
+    """Whole lines [a, b) covered by the 'syntax_done' tag, which moves with edits like any tag."""
+    out = []
     try:
-        content_snapshot = textArea.get("1.0", "end-1c")
+        r = tw.tag_ranges('syntax_done')
+        end_pos = tuple(map(int, tw.index('end-1c').split('.')))
+        for i in range(0, len(r), 2):
+            la, ca = map(int, str(r[i]).split('.'))
+            lb, cb = map(int, str(r[i + 1]).split('.'))
+            a = la if ca == 0 else la + 1
+            b = lb if cb == 0 else (lb + 1 if (lb, cb) == end_pos else lb)
+            if b > a:
+                out.append((a, b))
     except Exception:
-        content_snapshot = ""
+        pass
+    return out
 
-    dlg, pb, status = show_progress_popup("Refreshing syntax")
-    status['text'] = "Scanning..."
 
-    def progress_cb(pct, msg=""):
-        def ui():
-            try:
-                if pb['mode'] != 'determinate':
-                    pb.config(mode='determinate', maximum=100)
-                pb['value'] = max(0, min(100, int(pct)))
-                status['text'] = msg or f"{pb['value']}%"
-                dlg.update_idletasks()
-            except Exception:
-                pass
-        root.after(0, ui)
+def _lazy_hl_mark(tw, a, b, total):
+    tw.tag_add('syntax_done', f"{a}.0", f"{b}.0" if b <= total else 'end-1c')
 
-    def worker():
-        actions, new_vars, new_defs = _bg_full_scan_and_collect(content_snapshot, progress_callback=progress_cb)
-        def apply_and_close():
-            try:
-                _apply_full_tags(actions, new_vars, new_defs)
-                # persist any discoveries from a full scan
-                full = textArea.get("1.0", "end-1c")
-                new_vars2 = {m.group(1) for m in VAR_ASSIGN_RE.finditer(full)}
-                try:
-                    DEF_RE = re.compile(r'(?m)^[ \t]*def\s+([A-Za-z_]\w*)\s*\(')
-                except Exception:
-                    DEF_RE = None
-                new_defs2 = set()
-                if DEF_RE:
-                    new_defs2 = {m.group(1) for m in DEF_RE.finditer(full)}
-                if new_vars2:
-                    persisted_vars.update(new_vars2)
-                if new_defs2:
-                    persisted_defs.update(new_defs2)
-                _save_symbol_buffers(persisted_vars, persisted_defs)
-                highlight_python_helper(None, scan_start="1.0", scan_end="end-1c")
-                statusBar['text'] = "Ready"
-            finally:
-                close_progress_popup(dlg, pb)
 
+def _update_highlight_coverage(tw=None, done=None, total=None):
+    """Show the highlighted share of the current buffer in the status bar."""
+    try:
+        if 'highlightCoverageLabel' not in globals():
+            return
+        tw = tw or textArea
+        if not updateSyntaxHighlighting.get():
+            highlightCoverageLabel.config(text='Syntax: off')
+            return
+        if total is None:
+            total = _lazy_hl_lines(tw)
+        if done is None:
+            done = _lazy_hl_done(tw)
+        covered = sum(b - a for a, b in done)
+        pct = 100 if total <= 0 else min(100, covered * 100 // total)
+        highlightCoverageLabel.config(text=f'Syntax: {pct}%')
+    except Exception:
+        pass
+
+
+def _lazy_hl_cancel():
+    if _lazy_hl['after_id'] is not None:
         try:
-            root.after(0, apply_and_close)
+            root.after_cancel(_lazy_hl['after_id'])
         except Exception:
-            close_progress_popup(dlg, pb)
+            pass
+        _lazy_hl['after_id'] = None
 
-    Thread(target=worker, daemon=True).start()
+
+def _lazy_hl_schedule(delay=LAZY_HL_SETTLE_MS):
+    """(Re)start background highlighting of the current tab after `delay` ms.
+
+    Scrolls and edits call this again, which drops the pending slice; the next slice then
+    picks its chunk from wherever the viewport is by then.
+    """
+    _lazy_hl_cancel()
+    try:
+        if not updateSyntaxHighlighting.get() or fullScanEnabled.get():
+            return
+        _lazy_hl['after_id'] = root.after(delay, _lazy_hl_idle)
+    except Exception:
+        pass
+
+
+def _lazy_hl_idle():
+    _lazy_hl['after_id'] = root.after_idle(_lazy_hl_step)
+
+
+def _lazy_hl_step():
+    """Highlight chunks nearest the viewport until the time budget is spent, then yield."""
+    _lazy_hl['after_id'] = None
+    try:
+        tw = textArea
+        if not updateSyntaxHighlighting.get() or fullScanEnabled.get() or _is_browsing_mode_active():
+            return
+        sel = editorNotebook.select()
+        if sel and not getattr(root.nametowidget(sel), '_view_raw', True):
+            return
+        deadline = time.perf_counter() + _lazy_hl_budget_ms() / 1000.0
+        total = _lazy_hl_lines(tw)
+        first = int(tw.index('@0,0').split('.')[0])
+        last = int(tw.index(f'@0,{tw.winfo_height()}').split('.')[0])
+        while True:
+            done = _lazy_hl_done(tw)
+            chunk = syntax_lexer.nearest_gap(done, total, first, last, LAZY_HL_CHUNK_LINES)
+            if chunk is None:
+                _update_highlight_coverage(tw, done, total)
+                return
+            a, b = chunk
+            # start at the line opening any multi-line string/comment the chunk begins inside
+            lexer = getattr(tw, '_line_lexer', None)
+            if lexer is not None and lexer.lines is not None:
+                a = min(a, lexer.token_start_line(a - 1) + 1)
+            highlight_python_helper(None, scan_start=f"{a}.0", scan_end=f"{b}.0" if b <= total else 'end-1c')
+            _lazy_hl_mark(tw, a, b, total)
+            if time.perf_counter() >= deadline:
+                break
+        _update_highlight_coverage(tw, None, total)
+        _lazy_hl['after_id'] = root.after(1, _lazy_hl_idle)
+    except Exception:
+        pass
+
+
+def _lazy_hl_restart(tw=None):
+    """Forget what was highlighted (new buffer, preset or full scan) and refill from the viewport."""
+    tw = tw or textArea
+    try:
+        tw.tag_remove('syntax_done', '1.0', 'end')
+    except Exception:
+        pass
+    _update_highlight_coverage(tw)
+    _lazy_hl_schedule(delay=1)
 
 
 # -------------------------
@@ -10106,13 +10555,15 @@ def redraw_line_numbers(event=None):
     if not lineNumbersCanvas:
         return
     lineNumbersCanvas.delete('all')
+    big = _large_file_frame()
+    base = big._large_first if big is not None else 0
     i = textArea.index('@0,0')
     while True:
         dline = textArea.dlineinfo(i)
         if dline is None:
             break
         y = dline[1]
-        line = i.split('.')[0]
+        line = str(int(i.split('.')[0]) + base)
         try:
             fill = lineNumberFg
         except Exception:
@@ -10123,6 +10574,13 @@ def redraw_line_numbers(event=None):
 
 def go_to_line():
     line = simpledialog.askinteger("Go To Line", "Line number:", parent=root, minvalue=1)
+    big = _large_file_frame()
+    if line and big is not None:
+        _large_file_goto(big, textArea, min(line, big._large_file.line_count) - 1)
+        highlight_current_line()
+        redraw_line_numbers()
+        update_status_bar()
+        return
     if line:
         max_line = int(textArea.index('end-1c').split('.')[0])
         if line > max_line:
@@ -10132,13 +10590,15 @@ def go_to_line():
         highlight_current_line()
         update_status_bar()
 
-def _open_maybe_url(path: str, open_in_new_tab: bool = True, record_history: bool = True):
+def _open_maybe_url(path: str, open_in_new_tab: bool = True, record_history: bool = True,
+                    cache_mode: str = 'normal'):
     """Open `path` as a URL (http/https/file) or as a local file intelligently.
 
     If `path` is a relative URL and there is a current page (toolbar URL or current tab's fileName),
     attempt to resolve it with urllib.parse.urljoin before opening.
 
     record_history: when False do NOT call _record_location_opened for the target URL (used by Back).
+    cache_mode: passed to fetch_and_open_url for URLs.
     """
     try:
         import urllib.parse as up
@@ -10168,7 +10628,7 @@ def _open_maybe_url(path: str, open_in_new_tab: bool = True, record_history: boo
                 if base and _is_likely_url(base):
                     try:
                         resolved = up.urljoin(base, path)
-                        fetch_and_open_url(resolved, open_in_new_tab=open_in_new_tab, record_history=record_history)
+                        fetch_and_open_url(resolved, open_in_new_tab=open_in_new_tab, record_history=record_history, cache_mode=cache_mode)
                         return
                     except Exception:
                         # fall through to normal handling on failure
@@ -10178,10 +10638,10 @@ def _open_maybe_url(path: str, open_in_new_tab: bool = True, record_history: boo
 
         # common www. shorthand
         if not scheme and path.lower().startswith('www.'):
-            fetch_and_open_url('http://' + path, open_in_new_tab=open_in_new_tab, record_history=record_history)
+            fetch_and_open_url('http://' + path, open_in_new_tab=open_in_new_tab, record_history=record_history, cache_mode=cache_mode)
             return
         if scheme in ('http', 'https'):
-            fetch_and_open_url(path, open_in_new_tab=open_in_new_tab, record_history=record_history)
+            fetch_and_open_url(path, open_in_new_tab=open_in_new_tab, record_history=record_history, cache_mode=cache_mode)
             return
         if scheme == 'file':
             p = parsed.path
@@ -10200,7 +10660,7 @@ def _open_maybe_url(path: str, open_in_new_tab: bool = True, record_history: boo
     except Exception:
         pass
     # last resort: try http
-    fetch_and_open_url(path, open_in_new_tab=open_in_new_tab, record_history=record_history)
+    fetch_and_open_url(path, open_in_new_tab=open_in_new_tab, record_history=record_history, cache_mode=cache_mode)
 
 def open_find_replace():
     fr = Toplevel(root)
@@ -10219,13 +10679,36 @@ def open_find_replace():
         pat = findE.get()
         if not pat:
             return
-        content = textArea.get('1.0', 'end-1c')
+        big = _large_file_frame()
+        if big is not None:
+            # next match after the cursor, searched in the mapped file and wrapping once
+            mf = big._large_file
+            line, col = map(int, textArea.index('insert').split('.'))
+            hit = mf.search(pat, big._large_first + line - 1, col + 1) or mf.search(pat)
+            if hit is None:
+                statusL.config(text="No matches")
+                return
+            line, col, n = hit
+            if line >= mf.line_count and not mf.done.is_set():
+                # the window cannot be paged past the indexed lines yet
+                statusL.config(text=f"Match at line {line + 1} (still indexing, try again shortly)")
+                return
+            _large_file_goto(big, textArea, line)
+            rel = line - big._large_first + 1
+            textArea.tag_add('find_match', f"{rel}.{col}", f"{rel}.{col + n}")
+            textArea.mark_set('insert', f"{rel}.{col}")
+            textArea.see(f"{rel}.{col}")
+            statusL.config(text=f"Match at line {line + 1}")
+            return
+        doc = piece_table.widget_document(textArea) or piece_table.PieceTable(textArea.get('1.0', 'end-1c'))
         count = 0
-        for m in re.finditer(re.escape(pat), content):
-            start = f"1.0 + {m.start()}c"
-            end = f"1.0 + {m.end()}c"
-            textArea.tag_add('find_match', start, end)
+        idx = []
+        for m in re.finditer(re.escape(pat), doc.text()):
+            idx.append(doc.index(m.start()))
+            idx.append(doc.index(m.end()))
             count += 1
+        if idx:
+            textArea.tag_add('find_match', *idx)
         statusL.config(text=f"Matches: {count}")
 
     def do_replace():
@@ -10233,7 +10716,10 @@ def open_find_replace():
         repl = replE.get()
         if not pat:
             return
-        content = textArea.get('1.0', 'end-1c')
+        if _large_file_frame() is not None:
+            statusL.config(text="Large-file view is read-only")
+            return
+        content = piece_table.widget_text(textArea)
         new_content = content.replace(pat, repl)
         textArea.delete('1.0', 'end')
         textArea.tag_remove('0.0', 'end')
@@ -10247,6 +10733,9 @@ def open_find_replace():
 def update_status_bar(event=None):
     try:
         line, col = textArea.index('insert').split('.')
+        big = _large_file_frame()
+        if big is not None:
+            line = int(line) + big._large_first
         statusBar['text'] = f"Ln {line} Col {int(col) + 1}"
     except Exception:
         pass
@@ -10772,6 +11261,12 @@ btnToggleRaw.pack(side=RIGHT, padx=4, pady=2)
 # small view-state indicator (updates with active tab)
 viewIndicator = Label(statusFrame, text='View: —', bd=1, relief=SUNKEN, anchor=W, width=18)
 viewIndicator.pack(side=RIGHT, padx=4, pady=2)
+# share of the buffer highlighted so far (quick mode fills it in the background)
+highlightCoverageLabel = Label(statusFrame, text='Syntax: —', bd=1, relief=SUNKEN, anchor=W, width=12)
+highlightCoverageLabel.pack(side=RIGHT, padx=4, pady=2)
+# how the last fetched page was served: cache hit / revalidated (304) / miss
+pageCacheLabel = Label(statusFrame, text='Page: —', bd=1, relief=SUNKEN, anchor=W, width=16)
+pageCacheLabel.pack(side=RIGHT, padx=4, pady=2)
 
 syntaxToggleCheckbox = ttk.Checkbutton(
     statusFrame,
@@ -10794,6 +11289,7 @@ def _on_full_scan_toggle():
         statusBar['text'] = "Full scan enabled." if fullScanEnabled.get() else "Quick (local) highlighting mode."
     except Exception:
         pass
+    _lazy_hl_schedule(delay=1)
 
 fullScanToggleCheckbox = ttk.Checkbutton(
     statusFrame,
@@ -10906,6 +11402,39 @@ def create_config_window():
     seedField = mk_row("AI seed", 11, config.get("Section1", "seed"))
     # New: render-on-open extensions (comma-separated, no leading dots) -> controls which extensions default to rendered view
     renderExtField = mk_row("Render-on-open extensions", 12, config.get("Section1", "renderOnOpenExtensions", fallback="html,htm,md,markdown,php,js"))
+    # idle-time highlighting slice length used in quick (non full-scan) mode
+    lazyChunkField = mk_row("Highlight chunk budget (ms)", 14, config.get("Section1", "lazyHighlightChunkMs", fallback="8"))
+    # files at least this large open memory-mapped and read-only (0 = never)
+    largeFileField = mk_row("Large-file mode above (MB)", 16, config.get("Section1", "largeFileThresholdMB", fallback="64"))
+    # HTML render worker processes (0 = parse on a background thread)
+    renderProcField = mk_row("HTML render processes", 18, config.get("Section1", "renderProcesses", fallback="1"))
+    # parsed-script (AST) cache: in-memory LRU size, optionally persisted under a directory
+    jsAstCacheSizeField = mk_row("Script AST cache entries", 23, config.get("Section1", "jsAstCacheSize", fallback="64"))
+    jsAstDiskCacheVar = IntVar(value=config.getboolean("Section1", "jsAstDiskCache", fallback=False))
+    ttk.Checkbutton(container, text="Also cache parsed scripts on disk", variable=jsAstDiskCacheVar).grid(row=23, column=2, sticky='w', pady=6)
+    jsAstCacheDirField = mk_row("Script AST cache dir", 24, config.get("Section1", "jsAstCacheDir", fallback=""))
+
+    def choose_js_ast_cache_dir():
+        p = filedialog.askdirectory(initialdir=jsAstCacheDirField.get() or os.path.expanduser("~"),
+                                    title="Choose script AST cache directory")
+        if p:
+            jsAstCacheDirField.delete(0, END)
+            jsAstCacheDirField.insert(0, p)
+
+    ttk.Button(container, text="Browse...", command=choose_js_ast_cache_dir).grid(row=24, column=2, padx=6)
+    # on-disk HTTP cache for fetched <script src> files (ETag/Cache-Control)
+    httpCacheVar = IntVar(value=config.getboolean("Section1", "httpCache", fallback=True))
+    ttk.Checkbutton(container, text="Cache fetched scripts on disk (HTTP)", variable=httpCacheVar).grid(row=25, column=0, columnspan=2, sticky='w', pady=6)
+    httpCacheDirField = mk_row("HTTP cache dir", 26, config.get("Section1", "httpCacheDir", fallback=""))
+
+    def choose_http_cache_dir():
+        p = filedialog.askdirectory(initialdir=httpCacheDirField.get() or os.path.expanduser("~"),
+                                    title="Choose HTTP cache directory")
+        if p:
+            httpCacheDirField.delete(0, END)
+            httpCacheDirField.insert(0, p)
+
+    ttk.Button(container, text="Browse...", command=choose_http_cache_dir).grid(row=26, column=2, padx=6)
 
     promptOnRecentOpen = config.getboolean("Section1", "promptOnRecentOpen", fallback=True)
     recentOpenDefault = config.get("Section1", "recentOpenDefault", fallback="new")  # "new" or "current"
@@ -11068,6 +11597,15 @@ def create_config_window():
         config.set("Section1", "exportCssMode", cssModeVar.get())
         config.set("Section1", "exportCssPath", cssPathField.get())
         config.set("Section1", "renderOnOpenExtensions", renderExtField.get().strip())
+        config.set("Section1", "lazyHighlightChunkMs", lazyChunkField.get().strip())
+        config.set("Section1", "largeFileThresholdMB", largeFileField.get().strip())
+        render_processes_before = config.get("Section1", "renderProcesses", fallback="1")
+        config.set("Section1", "renderProcesses", renderProcField.get().strip())
+        config.set("Section1", "jsAstCacheSize", jsAstCacheSizeField.get().strip())
+        config.set("Section1", "jsAstDiskCache", str(bool(jsAstDiskCacheVar.get())))
+        config.set("Section1", "jsAstCacheDir", jsAstCacheDirField.get().strip())
+        config.set("Section1", "httpCache", str(bool(httpCacheVar.get())))
+        config.set("Section1", "httpCacheDir", httpCacheDirField.get().strip())
         config.set("Section1", "openHtmlAsSource", str(bool(openAsSourceVar.get())))
         config.set("Section1", "promptOnRecentOpen", str(bool(promptRecentOpenVar.get())))
         config.set("Section1", "saveZoom", str(bool(saveZoomVar.get())))
@@ -11080,6 +11618,17 @@ def create_config_window():
 
         nonlocal_values_reload()
 
+        # restart the render pool with the new worker count
+        if config.get("Section1", "renderProcesses", fallback="1") != render_processes_before:
+            _reset_render_pool()
+
+        # functions.py keeps its own ConfigParser: reload it so script runs see the new preferences
+        try:
+            funcs.config.read(INI_PATH)
+            funcs._configure_js_ast_cache(jsmini)
+        except Exception:
+            pass
+
         try:
             updateSyntaxHighlighting.set(1 if syntaxCheckVar.get() else 0)
             if syntaxCheckVar.get():
@@ -11132,6 +11681,16 @@ def create_config_window():
         lineHighlightField.delete(0, END)
         lineHighlightField.insert(0, config.get("Section1", "currentLineBg", fallback="#222222"))
         saveZoomVar.set(config.getboolean("Section1", "saveZoom", fallback=False))
+        renderProcField.delete(0, END)
+        renderProcField.insert(0, config.get("Section1", "renderProcesses", fallback="1"))
+        jsAstCacheSizeField.delete(0, END)
+        jsAstCacheSizeField.insert(0, config.get("Section1", "jsAstCacheSize", fallback="64"))
+        jsAstDiskCacheVar.set(config.getboolean("Section1", "jsAstDiskCache", fallback=False))
+        jsAstCacheDirField.delete(0, END)
+        jsAstCacheDirField.insert(0, config.get("Section1", "jsAstCacheDir", fallback=""))
+        httpCacheVar.set(config.getboolean("Section1", "httpCache", fallback=True))
+        httpCacheDirField.delete(0, END)
+        httpCacheDirField.insert(0, config.get("Section1", "httpCacheDir", fallback=""))
 
         try:
             syntaxCheckVar.set(config.getboolean("Section1", "syntaxHighlighting", fallback=True))
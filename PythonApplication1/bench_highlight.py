@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+bench_highlight.py - compare the per-regex highlighting passes (one finditer per *_RE
+slot plus protected-span filtering) against syntax_lexer.MasterPattern's single pass.
+
+Usage:
+    python -u bench_highlight.py                      # Python, rAthena and YAML samples
+    python -u bench_highlight.py --size-kb 256 --repeat 5
+    python -u bench_highlight.py --preset syntax/python.ini --src functions.py
+"""
+from __future__ import annotations
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import syntax_lexer
+import syntax_presets
+import syntax_worker
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (label, preset, sample) used when no --preset/--src is given
+_SAMPLES = (
+    ('Python', 'syntax/python.ini', 'functions.py'),
+    ('rAthena', 'syntax/rathena.ini', 'templates/template.npc'),
+    ('YAML', 'syntax/yaml.ini', 'templates/template.yml'),
+)
+
+_RE_KEYS = ('STRING_RE', 'COMMENT_RE', 'NUMBER_RE', 'DECORATOR_RE', 'CLASS_RE', 'VAR_ASSIGN_RE',
+            'CONSTANT_RE', 'ATTRIBUTE_RE', 'DUNDER_RE', 'SELFS_RE', 'TODO_RE')
+
+
+def load_preset(path: str) -> Tuple[Dict[str, re.Pattern], re.Pattern]:
+    """Compiled regex slots of a syntax/*.ini preset, as the editor's tabs get them.
+
+    Slots the preset does not define (or gets wrong) fall back to syntax_worker's defaults.
+    """
+    preset = syntax_presets.registry.get(path)
+    rx = preset.regexes if preset is not None else {}
+    regexes = {key: rx.get(key) or getattr(syntax_worker, key) for key in _RE_KEYS}
+    for attr, slot in (('keywords', 'KEYWORD_RE'), ('builtins', 'BUILTIN_RE')):
+        words = getattr(preset, attr, None)
+        regexes[slot] = words[1] if words else re.compile(r'\b\b')
+    return regexes, regexes.pop('TODO_RE')
+
+
+def multi_pass(content: str, regexes: Dict[str, re.Pattern], todo_re) -> Dict[str, List[Tuple[int, int]]]:
+    """The region scan highlight_python_helper ran before the master pattern."""
+    tags: Dict[str, List[Tuple[int, int]]] = {t: [] for t in syntax_lexer.LEXER_TAGS}
+    protected_spans = []
+    for m in regexes['STRING_RE'].finditer(content):
+        tags['string'].append(m.span())
+        protected_spans.append(m.span())
+    for m in regexes['COMMENT_RE'].finditer(content):
+        tags['comment'].append(m.span())
+        protected_spans.append(m.span())
+        mm = todo_re.search(content, m.start(), m.end())
+        if mm:
+            tags['todo'].append(mm.span())
+
+    def overlaps_protected(s, e):
+        for ps, pe in protected_spans:
+            if not (e <= ps or s >= pe):
+                return True
+        return False
+
+    for tag, key, group in (('number', 'NUMBER_RE', False), ('decorator', 'DECORATOR_RE', True),
+                            ('class_name', 'CLASS_RE', True), ('variable', 'VAR_ASSIGN_RE', True),
+                            ('constant', 'CONSTANT_RE', True), ('attribute', 'ATTRIBUTE_RE', True),
+                            ('def', 'DUNDER_RE', False), ('keyword', 'KEYWORD_RE', False),
+                            ('builtin', 'BUILTIN_RE', False), ('selfs', 'SELFS_RE', False)):
+        for m in regexes[key].finditer(content):
+            try:
+                s, e = m.span(1) if group else m.span()
+            except IndexError:
+                s, e = m.span()
+            if not overlaps_protected(s, e):
+                tags[tag].append((s, e))
+    return tags
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def _sample(path: str, size_kb: int) -> str:
+    with open(path, encoding='utf-8', errors='replace') as fh:
+        unit = fh.read()
+    if not unit.endswith('\n'):
+        unit += '\n'
+    reps = max(1, (size_kb * 1024) // max(1, len(unit)))
+    return unit * reps
+
+
+def run(label: str, preset: str, src: str, size_kb: int, repeat: int) -> None:
+    regexes, todo_re = load_preset(preset)
+    content = _sample(src, size_kb)
+    t_build = _best_of(lambda: syntax_lexer.MasterPattern(syntax_lexer.rules_from_regexes(regexes), todo_re), 1)
+    master = syntax_lexer.MasterPattern(syntax_lexer.rules_from_regexes(regexes), todo_re=todo_re)
+
+    old = multi_pass(content, regexes, todo_re)
+    new = master.scan(content)
+    t_old = _best_of(lambda: multi_pass(content, regexes, todo_re), repeat)
+    t_new = _best_of(lambda: master.scan(content), repeat)
+
+    n_old = sum(map(len, old.values()))
+    n_new = sum(map(len, new.values()))
+    print(f"{label}: {os.path.relpath(src, _HERE)} x{len(content) // 1024} KB, "
+          f"{content.count(chr(10))} lines, preset {os.path.basename(preset)}")
+    print(f"  multi-pass finditer : {t_old * 1000:9.1f} ms  {n_old} ranges")
+    print(f"  master pattern      : {t_new * 1000:9.1f} ms  {n_new} ranges  x{t_old / t_new:.2f}"
+          f"  (compiled in {t_build * 1000:.1f} ms)")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="bench_highlight.py", description="Benchmark syntax highlighting scans")
+    p.add_argument("--preset", default=None, help="syntax/*.ini preset to use with --src")
+    p.add_argument("--src", default=None, help="Sample file to highlight with --preset")
+    p.add_argument("--size-kb", type=int, default=64, help="Repeat each sample up to this size")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per scanner (best time is reported)")
+    args = p.parse_args(argv)
+
+    if bool(args.preset) != bool(args.src):
+        print("ERROR: --preset and --src go together", file=sys.stderr)
+        return 2
+    samples = [('custom', args.preset, args.src)] if args.preset else [
+        (label, os.path.join(_HERE, preset), os.path.join(_HERE, src)) for label, preset, src in _SAMPLES]
+    for label, preset, src in samples:
+        if not (os.path.isfile(preset) and os.path.isfile(src)):
+            print(f"ERROR: missing {preset} or {src}", file=sys.stderr)
+            return 2
+        run(label, preset, src, args.size_kb, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
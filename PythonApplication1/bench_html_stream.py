@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+bench_html_stream.py - compare _parse_html_and_apply (whole page, then render) against
+HTMLStreamRenderer fed in network-sized chunks: time until the first batch and until a
+first screen of text is ready, and the total time including close().
+
+Usage:
+    python -u bench_html_stream.py                    # coolview.html and tests/examples/demo.html
+    python -u bench_html_stream.py ~/saved-pages --chunk-kb 16 --repeat 5
+    python -u bench_html_stream.py page1.html page2.html --screen-chars 2000
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from typing import List, Optional
+
+import functions
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+_CORPUS = ('coolview.html', 'tests/examples/demo.html')
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def _pages(paths: List[str]) -> List[str]:
+    out = []
+    for path in paths:
+        if os.path.isdir(path):
+            for base, _dirs, files in os.walk(path):
+                out.extend(os.path.join(base, f) for f in sorted(files) if f.lower().endswith(('.html', '.htm')))
+        elif os.path.isfile(path):
+            out.append(path)
+    return out
+
+
+def stream(raw: bytes, chunk: int, screen_chars: int):
+    """(seconds to first batch, seconds to screen_chars of text, total seconds, result)."""
+    t0 = time.perf_counter()
+    first = screen = None
+    shown = 0
+    r = functions.HTMLStreamRenderer()
+    for i in range(0, len(raw), chunk):
+        text, _tags = r.feed(raw[i:i + chunk])
+        if text:
+            shown += len(text)
+            now = time.perf_counter() - t0
+            first = now if first is None else first
+            if screen is None and shown >= screen_chars:
+                screen = now
+    result = r.close()
+    total = time.perf_counter() - t0
+    return first, screen if screen is not None else total, total, result
+
+
+def run(path: str, chunk_kb: int, screen_chars: int, repeat: int) -> bool:
+    with open(path, 'rb') as fh:
+        raw = fh.read()
+    text = raw.decode('utf-8', errors='replace')
+    expected = functions._parse_html_and_apply(text)
+    t_batch = _best_of(lambda: functions._parse_html_and_apply(raw.decode('utf-8', errors='replace')), repeat)
+    runs = [stream(raw, chunk_kb * 1024, screen_chars) for _ in range(repeat)]
+    first = min((r[0] for r in runs if r[0] is not None), default=None)
+    screen = min(r[1] for r in runs)
+    total = min(r[2] for r in runs)
+    same = all(r[3] == expected for r in runs)
+    print(f"{os.path.relpath(path, _HERE) if path.startswith(_HERE) else path}: "
+          f"{len(raw) // 1024} KB -> {len(expected[0])} chars")
+    print(f"  whole page         : {t_batch * 1000:9.1f} ms before anything is shown")
+    print(f"  stream first batch : {first * 1000:9.1f} ms" if first is not None else
+          "  stream first batch :         - (page fits in one batch)")
+    print(f"  stream first screen: {screen * 1000:9.1f} ms  ({screen_chars} chars)")
+    print(f"  stream total       : {total * 1000:9.1f} ms  x{t_batch / total:.2f}"
+          f"  {'same result' if same else 'RESULT DIFFERS'}")
+    return same
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="bench_html_stream.py", description="Benchmark streaming HTML rendering")
+    p.add_argument("paths", nargs='*', help="Saved HTML pages or directories of them")
+    p.add_argument("--chunk-kb", type=int, default=16, help="Size of each fed chunk (one network read)")
+    p.add_argument("--screen-chars", type=int, default=4000, help="Text that fills the first screen")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per page (best time is reported)")
+    args = p.parse_args(argv)
+
+    pages = _pages(args.paths or [os.path.join(_HERE, name) for name in _CORPUS])
+    if not pages:
+        print("ERROR: no HTML pages found", file=sys.stderr)
+        return 2
+    ok = True
+    for path in pages:
+        ok = run(path, max(1, args.chunk_kb), args.screen_chars, max(1, args.repeat)) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
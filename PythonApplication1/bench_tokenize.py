@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+bench_tokenize.py - compare jsmini's dispatching scanner against the reference
+TOKEN_RE tokenizer on a real bundle (local path or http(s) URL).
+
+Usage:
+    python -u bench_tokenize.py --src=./jquery-3.7.1.min.js
+    python -u bench_tokenize.py --src=https://code.jquery.com/jquery-3.7.1.min.js --repeat 5
+    python -u bench_tokenize.py            # synthetic input when no --src is given
+"""
+from __future__ import annotations
+import argparse
+import sys
+import time
+from typing import Optional
+
+try:
+    from PythonApplication1 import jsmini
+except Exception:
+    try:
+        import jsmini
+    except Exception as e:
+        print("ERROR: failed to import jsmini module:", e, file=sys.stderr)
+        raise
+
+from tokendiag_run_test import fetch_src
+
+
+_SYNTHETIC_UNIT = (
+    "/* synthetic bundle chunk */\n"
+    "(function(w, d){ var cache = {}, re = /^\\s*<(\\w+)[^>]*>/i, n = 0;\n"
+    "  function each(o, cb){ for (var k in o) { if (cb.call(o[k], k, o[k]) === false) break; } return o; }\n"
+    "  w.lib = { version: '1.0.0', each: each, get: function(id){ return cache[id] || (cache[id] = d.getElementById(id)); },\n"
+    "    add: function(a, b){ return a + b * 2 / 3 - (a % 4) >>> 0; }, test: function(s){ return re.test(s) && s.length >= 3; } };\n"
+    "  n += 0x1F; n <<= 2; n = n !== 0 ? n : -1; // trailing comment\n"
+    "})(window, document);\n"
+)
+
+
+def _best_of(fn, src: str, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(src)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="bench_tokenize.py", description="Benchmark jsmini tokenizers")
+    p.add_argument("--src", default=None, help="Source URL (http(s)://...) or local path to JS file")
+    p.add_argument("--timeout", type=int, default=20, help="HTTP fetch timeout (seconds)")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per tokenizer (best time is reported)")
+    p.add_argument("--synthetic-kb", type=int, default=300, help="Size of the synthetic input when --src is omitted")
+    args = p.parse_args(argv)
+
+    if args.src:
+        try:
+            src_text = fetch_src(args.src, timeout=args.timeout)
+        except Exception as e:
+            print("ERROR: failed to fetch source:", e, file=sys.stderr)
+            return 2
+        label = args.src
+    else:
+        reps = max(1, (args.synthetic_kb * 1024) // len(_SYNTHETIC_UNIT))
+        src_text = _SYNTHETIC_UNIT * reps
+        label = f"synthetic ({reps} chunks)"
+
+    try:
+        ref = jsmini._tokenize_regex(src_text)
+    except SyntaxError as e:
+        print("ERROR: source does not tokenize:", e, file=sys.stderr)
+        return 1
+    new = jsmini.tokenize(src_text)
+    if new != ref:
+        for i, (a, b) in enumerate(zip(ref, new)):
+            if a != b:
+                print(f"MISMATCH at token #{i}: regex={a!r} scanner={b!r}", file=sys.stderr)
+                break
+        else:
+            print(f"MISMATCH in token count: regex={len(ref)} scanner={len(new)}", file=sys.stderr)
+        return 1
+
+    t_regex = _best_of(jsmini._tokenize_regex, src_text, args.repeat)
+    t_scan = _best_of(jsmini.scan_tokens, src_text, args.repeat)
+    t_tuples = _best_of(jsmini.tokenize, src_text, args.repeat)
+
+    print(f"source: {label}  {len(src_text)} chars, {len(ref)} tokens")
+    print(f"  TOKEN_RE tokenizer : {t_regex * 1000:9.1f} ms")
+    print(f"  scan_tokens (array): {t_scan * 1000:9.1f} ms  x{t_regex / t_scan:.2f}")
+    print(f"  tokenize (tuples)  : {t_tuples * 1000:9.1f} ms  x{t_regex / t_tuples:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
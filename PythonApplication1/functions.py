@@ -25,6 +25,7 @@ import html
 from html.parser import HTMLParser
 import json
 import base64
+import codecs
 from io import StringIO
 from threading import Thread
 from tkinter import *
@@ -36,6 +37,11 @@ import urllib.parse as _up
 import shutil, sys, os
 import traceback as _traceback
 import re as _re
+import bisect
+import syntax_lexer
+import piece_table
+import http_cache
+from concurrent.futures import Future, ThreadPoolExecutor
 
 def _format_js_error_context(script_src: str, exc: Exception, tb: str | None = None, context_lines: int = 2) -> str:
     """
@@ -159,7 +165,15 @@ DEFAULT_CONFIG = {
         'exportCssMode': 'inline-element', # 'inline-element' | 'inline-block' | 'external'
         'exportCssPath': '',               # used when 'external' chosen; default generated at save time
         'jsConsoleOnRun': 'False',         # new: when True open JS Console popup by default for run_scripts
-        'debug': 'False'                   # new: enable verbose debug logging (js_builtins/jsmini)
+        'debug': 'False',                  # new: enable verbose debug logging (js_builtins/jsmini)
+        'jsAstCacheSize': '64',            # parsed-script LRU entries kept in memory (0 disables)
+        'jsAstDiskCache': 'False',         # also persist parsed scripts under jsAstCacheDir
+        'jsAstCacheDir': '',               # default: .jsmini_cache next to config.ini
+        'httpCache': 'True',               # cache fetched <script src> responses on disk (ETag/Cache-Control)
+        'httpCacheDir': '',                # default: .http_cache next to config.ini
+        'lazyHighlightChunkMs': '8',       # quick mode: ms of background highlighting per idle slice
+        'largeFileThresholdMB': '64',      # open files this large memory-mapped and read-only (0 = never)
+        'renderProcesses': '1'             # HTML render worker processes (0 = parse on a background thread)
     }
 }
 exportCssMode = 'inline-element'  # default
@@ -252,6 +266,36 @@ def set_debug_default(value: bool) -> None:
         # best-effort: do not raise to caller
         pass
 
+def _configure_js_ast_cache(jsmini_mod) -> None:
+    """Apply the jsAstCache* preferences to jsmini's parsed-AST cache (best-effort)."""
+    try:
+        size = config.getint("Section1", "jsAstCacheSize", fallback=64)
+        disk_dir = ''
+        if config.getboolean("Section1", "jsAstDiskCache", fallback=False):
+            disk_dir = config.get("Section1", "jsAstCacheDir", fallback='').strip()
+            if not disk_dir:
+                disk_dir = os.path.join(os.path.dirname(os.path.abspath(INI_PATH)), '.jsmini_cache')
+        jsmini_mod.configure_ast_cache(max_entries=size, disk_dir=disk_dir)
+    except Exception:
+        pass
+
+_HTTP_CACHES: dict = {}
+
+def _script_http_cache() -> Optional[http_cache.HttpCache]:
+    """The on-disk HTTP cache selected by the httpCache* preferences, or None when disabled."""
+    try:
+        if not config.getboolean("Section1", "httpCache", fallback=True):
+            return None
+        cache_dir = config.get("Section1", "httpCacheDir", fallback='').strip()
+        if not cache_dir:
+            cache_dir = os.path.join(os.path.dirname(os.path.abspath(INI_PATH)), '.http_cache')
+    except Exception:
+        return None
+    cache = _HTTP_CACHES.get(cache_dir)
+    if cache is None:
+        cache = _HTTP_CACHES.setdefault(cache_dir, http_cache.HttpCache(cache_dir))
+    return cache
+
 def _strip_leading_license_comment(src: str) -> str:
     """Remove a leading /*! ... */ license header (common in minified libs) to avoid jsmini parse issues.
     Keeps everything else intact. Safe no-op when nothing matches.
@@ -414,6 +458,29 @@ def clear_recent_files(config, ini_path: str, on_update: Optional[Callable[[], N
         except Exception:
             pass
 
+class _SpanIndex:
+    """[start, end) spans sorted by start with a running max of their ends.
+
+    overlaps() is a bisect instead of a scan over every span.
+    """
+    def __init__(self, spans=()):
+        items = sorted((int(s), int(e)) for s, e in spans)
+        self._starts = [s for s, _e in items]
+        self._reach = []
+        reach = None
+        for _s, e in items:
+            reach = e if reach is None else max(reach, e)
+            self._reach.append(reach)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """True when some span has ps < end and pe > start."""
+        i = bisect.bisect_left(self._starts, end)
+        return i > 0 and self._reach[i - 1] > start
+
+
 # --- HTML parser to extract plain text and tag ranges from simple HTML fragments ---
 class _SimpleHTMLToTagged(HTMLParser):
     """Parses a fragment of HTML and returns plain text plus tag ranges and explicit link entries.
@@ -497,18 +564,30 @@ class _SimpleHTMLToTagged(HTMLParser):
                         rec['end'] = max(0, int(rec.get('end', 0)) + delta)
         except Exception:
             pass
+    # --- Output tail access (walks self.out from the end instead of joining all of it) ---
+    def _out_slice(self, start: int, end: int) -> str:
+        """Return ''.join(self.out)[start:end] for offsets near the end of the output."""
+        parts = []
+        n = self.pos
+        for part in reversed(self.out):
+            if n <= start:
+                break
+            parts.append(part)
+            n -= len(part)
+        return ''.join(reversed(parts))[start - n:end - n]
+
+    def _out_endswith(self, suffix: str) -> bool:
+        return self._out_slice(max(0, self.pos - len(suffix)), self.pos) == suffix
+
     # --- Added helpers for block element spacing (<p>, <div>) ---
     def _current_tail_newline_count(self) -> int:
         """Return how many consecutive newlines appear at end of current output."""
         try:
-            if not self.out:
-                return 0
-            s = ''.join(self.out)
             cnt = 0
-            for ch in reversed(s):
-                if ch == '\n':
-                    cnt += 1
-                else:
+            for part in reversed(self.out):
+                stripped = part.rstrip('\n')
+                cnt += len(part) - len(stripped)
+                if stripped:
                     break
             return cnt
         except Exception:
@@ -804,8 +883,7 @@ class _SimpleHTMLToTagged(HTMLParser):
                     except Exception:
                         pass
                 elif tag in ('td', 'th'):
-                    prev_text = ''.join(self.out) if self.out else ''
-                    if prev_text and not prev_text.endswith('\n'):
+                    if self.pos > 0 and not self._out_endswith('\n'):
                         self.out.append('\t'); self.pos += 1
                     # record cell start and attrs so we can preserve rowspan/colspan/align on export
                     attrd = dict(attrs or {})
@@ -822,7 +900,7 @@ class _SimpleHTMLToTagged(HTMLParser):
                     except Exception:
                         pass
                 elif tag == 'li':
-                    if self.pos > 0 and not ''.join(self.out).endswith('\n'):
+                    if self.pos > 0 and not self._out_endswith('\n'):
                         self.out.append('\n'); self.pos += 1
                     if self._ol_counters:
                         n = self._ol_counters[-1]; s_n = f"{n}. "
@@ -1176,8 +1254,7 @@ class _SimpleHTMLToTagged(HTMLParser):
                         try:
                             found['end'] = end
                             # extract the text content between start..end from the current output buffer
-                            full_text = ''.join(self.out)
-                            found['text'] = full_text[start:end]
+                            found['text'] = self._out_slice(start, end)
                         except Exception:
                             try:
                                 found['text'] = ''
@@ -1441,16 +1518,12 @@ class _SimpleHTMLToTagged(HTMLParser):
                     r'(https?://[^\s)]+|file:///[^\s)]+|www\.[^\s)]+)'
                     r'\)'
                 )
-                protected = list(self.ranges.get('code_block', [])) if isinstance(self.ranges.get('code_block', []), list) else []
-                existing_links = list(self.ranges.get('hyperlink', [])) if isinstance(self.ranges.get('hyperlink', []), list) else []
-
-                def _overlaps_any(s: int, e: int, spans) -> bool:
-                    for ps, pe in spans:
-                        if not (e <= ps or s >= pe):
-                            return True
-                    return False
+                protected = _SpanIndex(self.ranges.get('code_block', []) if isinstance(self.ranges.get('code_block', []), list) else [])
+                # links added below sit before every later match, so only the parser's own can overlap
+                existing_links = _SpanIndex(self.ranges.get('hyperlink', []) if isinstance(self.ranges.get('hyperlink', []), list) else [])
 
                 new_out = []
+                new_len = 0
                 last = 0
                 new_ranges = self.ranges.copy()
                 new_hrefs = self.hrefs.copy()
@@ -1460,16 +1533,16 @@ class _SimpleHTMLToTagged(HTMLParser):
                     href = m.group(2).strip()
                     title = m.group(1).strip()
 
-                    if _overlaps_any(s_text, e_text, protected) or _overlaps_any(s_text, e_text, existing_links):
+                    if protected.overlaps(s_text, e_text) or existing_links.overlaps(s_text, e_text):
                         continue
 
                     new_out.append(full[last:s_full])
-                    link_start = sum(len(part) for part in new_out)
+                    link_start = new_len + (s_full - last)
                     new_out.append(title)
                     link_end = link_start + len(title)
+                    new_len = link_end
 
                     new_ranges.setdefault('hyperlink', []).append([link_start, link_end])
-                    existing_links.append([link_start, link_end])
 
                     try:
                         rec = {'start': link_start, 'end': link_end, 'href': href}
@@ -2084,6 +2157,18 @@ def _should_execute_script(attrs: dict | None) -> bool:
         return True
 
 
+def _fetch_script_url(url: str, entry: dict) -> tuple[Optional[str], Optional[str]]:
+    """Fetch an http/https/file script URL through the HTTP cache; returns (text, error)."""
+    try:
+        cache = _script_http_cache() if url.lower().startswith(('http:', 'https:')) else None
+        got = http_cache.fetch(url, cache, timeout=10, headers={"User-Agent": "SimpleEdit/jsmini"})
+        # prefer explicit charset on tag
+        charset = (entry.get('attrs') or {}).get('charset') or got.charset or 'utf-8'
+        return got.body.decode(charset, errors='replace'), None
+    except Exception as e:
+        return None, f"Failed to fetch {url}: {e}"
+
+
 def _load_script_text(entry: dict, base_url: Optional[str]) -> tuple[Optional[str], Optional[str]]:
     """
     Resolve and load script text for a script entry.
@@ -2130,17 +2215,7 @@ def _load_script_text(entry: dict, base_url: Optional[str]) -> tuple[Optional[st
 
         # URL-like?
         if re.match(r'^[a-zA-Z][a-zA-Z0-9+.\-]*://', src):
-            try:
-                req = _urr.Request(src, headers={"User-Agent": "SimpleEdit/jsmini"})
-                with _urr.urlopen(req, timeout=10) as resp:
-                    raw_bytes = resp.read()
-                    # prefer explicit charset on tag
-                    charset = (entry.get('attrs') or {}).get('charset')
-                    if charset:
-                        return raw_bytes.decode(charset, errors='replace'), None
-                    return raw_bytes.decode(resp.headers.get_content_charset() or 'utf-8', errors='replace'), None
-            except Exception as e:
-                return None, f"Failed to fetch {src}: {e}"
+            return _fetch_script_url(src, entry)
 
         # If we have a base_url that is a URL, urljoin it
         resolved = src
@@ -2156,16 +2231,7 @@ def _load_script_text(entry: dict, base_url: Optional[str]) -> tuple[Optional[st
             pass
 
         if re.match(r'^[a-zA-Z][a-zA-Z0-9+.\-]*://', resolved):
-            try:
-                req = _urr.Request(resolved, headers={"User-Agent": "SimpleEdit/jsmini"})
-                with _urr.urlopen(req, timeout=10) as resp:
-                    raw_bytes = resp.read()
-                    charset = (entry.get('attrs') or {}).get('charset')
-                    if charset:
-                        return raw_bytes.decode(charset, errors='replace'), None
-                    return raw_bytes.decode(resp.headers.get_content_charset() or 'utf-8', errors='replace'), None
-            except Exception as e:
-                return None, f"Failed to fetch {resolved}: {e}"
+            return _fetch_script_url(resolved, entry)
 
         # Filesystem path
         path = resolved
@@ -2189,6 +2255,43 @@ def _load_script_text(entry: dict, base_url: Optional[str]) -> tuple[Optional[st
     except Exception as e:
         return None, str(e)
 
+SCRIPT_FETCH_WORKERS = 6
+
+def _prefetch_scripts(scripts: list, base_url: Optional[str]) -> list:
+    """
+    Start loading every executable <script src> concurrently, before the first one runs.
+    Returns one Future per entry, in script order, resolving to _load_script_text's
+    (text, error); run_scripts waits on each in turn, so execution order is unchanged while
+    the fetches overlap. Inline and skipped entries get already-completed futures.
+    """
+    futures: list = []
+    pending = []
+    for entry in scripts:
+        fut: Future = Future()
+        futures.append(fut)
+        try:
+            wanted = bool(entry.get('src')) and _should_execute_script(entry.get('attrs') or {})
+        except Exception:
+            wanted = False
+        if wanted:
+            pending.append((fut, entry))
+        else:
+            fut.set_result(_load_script_text(entry, base_url) if entry.get('inline') is not None else ('', None))
+    if pending:
+        pool = ThreadPoolExecutor(max_workers=min(SCRIPT_FETCH_WORKERS, len(pending)),
+                                  thread_name_prefix='script-fetch')
+
+        def _load(fut, entry):
+            try:
+                fut.set_result(_load_script_text(entry, base_url))
+            except Exception as e:
+                fut.set_result((None, str(e)))
+
+        for fut, entry in pending:
+            pool.submit(_load, fut, entry)
+        pool.shutdown(wait=False)
+    return futures
+
 # ADDITIONAL NOTES FOR THE UPDATED run_scripts FUNCTION
 # ----------------------------------------------------
 # New parameters:
@@ -2212,7 +2315,8 @@ def _load_script_text(entry: dict, base_url: Optional[str]) -> tuple[Optional[st
 #   - If host_update_cb is supplied, a host object {'setRaw': cb, 'forceRerender': lambda: cb(None)}
 #     is attached early via context['__attachHost'] when available (preferred) or directly
 #     through context['host'] and document['__setHost'] fallback.
-#   - DOM mutations inside jsmini's Element class call host.setRaw(body.innerHTML).
+#   - DOM mutations inside jsmini's Element class are batched by the document; host.setRaw(body.innerHTML)
+#     is called once per script run / timer drain (and at most every jsmini.DOM_FRAME_MS during long scripts).
 #
 # Per-script DOM capture:
 #   - Uses _snapshot_dom(ctx) to read current document.body.innerHTML after each script and after errors.
@@ -2260,6 +2364,7 @@ def run_scripts(
         for _ in scripts:
             results.append({'ok': False, 'error': f"jsmini import failed: {e}"})
         return results
+    _configure_js_ast_cache(jsmini)
 
     # Persisted user prefs
     try:
@@ -2283,7 +2388,7 @@ def run_scripts(
             is_debug_line = any(
                 token in msg for token in (
                     "[js_builtins]", "[jsmini.recursion]", "[jsmini.trace]",
-                    "[jsmini.intercept]", "[jsmini.guard]"
+                    "[jsmini.intercept]", "[jsmini.guard]", "[jsmini.cache]"
                 )
             )
             if is_debug_line and not debug_pref:
@@ -2308,6 +2413,25 @@ def run_scripts(
             except Exception:
                 pass
 
+    def _log_cache_stats(console_flag: bool):
+        try:
+            st = jsmini.ast_cache_stats()
+            _log_route(
+                f"[jsmini.cache] AST cache hits={st['hits']} misses={st['misses']} "
+                f"disk_hits={st['disk_hits']} entries={st['entries']}",
+                console_flag
+            )
+        except Exception:
+            pass
+        cache = _script_http_cache()
+        if cache is not None:
+            st = cache.stats
+            _log_route(
+                f"[jsmini.cache] HTTP cache hits={st['hits']} revalidated={st['revalidated']} "
+                f"misses={st['misses']} stores={st['stores']}",
+                console_flag
+            )
+
     def _snapshot_dom(ctx) -> str:
         """Return current document.body.innerHTML best-effort."""
         try:
@@ -2445,6 +2569,7 @@ def run_scripts(
                 _maybe_open_console_if_allowed()
                 ctx = _create_context(actual_show_console)
                 console_flag = actual_show_console
+                loads = _prefetch_scripts(scripts, base_url)
 
                 for idx, entry in enumerate(scripts):
                     try:
@@ -2458,7 +2583,7 @@ def run_scripts(
                             preview = (entry.get('inline') or '')[:400]
                             if preview:
                                 _log_route(f"[jsconsole] Inline preview: {preview!r}{'...' if len(entry.get('inline') or '') > 400 else ''}", console_flag)
-                        script_src, load_err = _load_script_text(entry, base_url)
+                        script_src, load_err = loads[idx].result()
                         if load_err:
                             _log_route(f"[jsconsole] {load_err}", console_flag)
                             results.append({'ok': False, 'error': load_err})
@@ -2514,6 +2639,7 @@ def run_scripts(
                     final_dom_html_local = _final_flush(ctx, console_flag)
 
                 _log_route("[jsconsole] All scripts processed.", console_flag)
+                _log_cache_stats(console_flag)
 
                 if return_dom:
                     try:
@@ -2535,10 +2661,12 @@ def run_scripts(
         return results
 
     # Synchronous path
+    console_created = False
     if actual_show_console:
         try:
             _ensure_js_console()
             _log_route(f"[jsconsole] Opened console for {len(scripts)} script(s).", True)
+            console_created = True
         except Exception:
             console_created = False
 
@@ -2554,6 +2682,7 @@ def run_scripts(
 
     ctx = _create_context(actual_show_console)
     console_flag = actual_show_console
+    loads = _prefetch_scripts(scripts, base_url)
 
     # NEW: preload DOM & inline events
     if html_source:
@@ -2584,7 +2713,7 @@ def run_scripts(
                 if preview:
                     _log_route(f"[jsconsole] Inline preview: {preview!r}{'...' if len(entry.get('inline') or '') > 400 else ''}", console_flag)
 
-            script_src, load_err = _load_script_text(entry, base_url)
+            script_src, load_err = loads[idx].result()
             if load_err:
                 _log_route(f"[jsconsole] {load_err}", console_flag)
                 results.append({'ok': False, 'error': load_err})
@@ -2650,6 +2779,7 @@ def run_scripts(
         final_dom_html = _final_flush(ctx, console_flag)
 
     _log_route("[jsconsole] All scripts processed.", console_flag)
+    _log_cache_stats(console_flag)
     if auto_fire_events:
         try:
             auto_fire_clicks(ctx)
@@ -2984,10 +3114,11 @@ def _strip_whitespace_between_tags(html: str) -> str:
         except Exception:
             pass
 
-        # Restore preserved blocks
+        # Restore preserved blocks (one pass; the trailing '__' keeps _1__ apart from _10__)
         if preserved:
-            for i, original in enumerate(preserved):
-                working = working.replace(placeholder_fmt % i, original)
+            working = re.sub(r'__HTML_PRESERVE_(\d+)__',
+                             lambda m: preserved[int(m.group(1))] if int(m.group(1)) < len(preserved) else m.group(0),
+                             working)
 
         return working
     except Exception:
@@ -3020,107 +3151,316 @@ def _parse_html_and_apply(raw) -> tuple[str, dict]:
         parser = _SimpleHTMLToTagged()
         # Feed the processed HTML to the parser (this is the key change)
         parser.feed(prochtml)
-        plain, meta = parser.get_result()
+        return _finish_html_parse(parser, raw_fragment, prochtml)
+    except Exception:
+        return raw, {'tags': {}}
 
-        # Attach both raw and processed HTML to meta so caller/UI can keep raw and re-process later
-        try:
-            if not isinstance(meta, dict):
-                meta = dict(meta or {})
-            meta['raw_fragment'] = raw_fragment
-            meta['prochtml'] = prochtml
-        except Exception:
-            pass
+def _finish_html_parse(parser: '_SimpleHTMLToTagged', raw_fragment: str, prochtml: str) -> tuple[str, dict]:
+    """
+    Second half of _parse_html_and_apply, shared with HTMLStreamRenderer.close(): take the
+    parser's result, attach raw_fragment/prochtml and remap anchors from prochtml.
+    """
+    plain, meta = parser.get_result()
 
-        # --- NEW: Robust anchor remapping based on prochtml -> plain
-        # This guarantees each <a ...>...</a> in the processed HTML yields a
-        # separate entry in meta['links'] and a corresponding non-overlapping
-        # 'hyperlink' range in meta['tags'] even when anchors sit adjacent.
-        try:
-            # Helper: extract anchors from prochtml (preserving order)
-            anchors = []
-            for m_a in re.finditer(r'(?is)<a\b([^>]*)>(.*?)</a\s*>', prochtml):
+    # Attach both raw and processed HTML to meta so caller/UI can keep raw and re-process later
+    try:
+        if not isinstance(meta, dict):
+            meta = dict(meta or {})
+        meta['raw_fragment'] = raw_fragment
+        meta['prochtml'] = prochtml
+    except Exception:
+        pass
+
+    # --- NEW: Robust anchor remapping based on prochtml -> plain
+    # This guarantees each <a ...>...</a> in the processed HTML yields a
+    # separate entry in meta['links'] and a corresponding non-overlapping
+    # 'hyperlink' range in meta['tags'] even when anchors sit adjacent.
+    try:
+        # Helper: extract anchors from prochtml (preserving order)
+        anchors = []
+        for m_a in re.finditer(r'(?is)<a\b([^>]*)>(.*?)</a\s*>', prochtml):
+            try:
+                attrstr = m_a.group(1) or ''
+                inner_html = m_a.group(2) or ''
+                # find href and title (best-effort)
+                href = None
+                title = None
+                ah = re.search(r'href\s*=\s*(?:"([^"]+)"|\'([^\']+)\'|([^\s>]+))', attrstr, flags=re.I)
+                if ah:
+                    href = ah.group(1) or ah.group(2) or ah.group(3)
+                th = re.search(r'title\s*=\s*(?:"([^"]+)"|\'([^\']+)\'|([^\s>]+))', attrstr, flags=re.I)
+                if th:
+                    title = th.group(1) or th.group(2) or th.group(3)
+                # strip inner tags to get visible text
+                visible = re.sub(r'<[^>]+>', '', inner_html)
+                visible = html.unescape(visible or '')
+                visible_norm = re.sub(r'\s+', ' ', visible).strip()
+                anchors.append({'href': href, 'title': title, 'visible': visible, 'visible_norm': visible_norm})
+            except Exception:
+                continue
+
+        if anchors:
+            new_links = []
+            new_hyper_ranges = []
+            # Walk anchors sequentially and locate their visible text in `plain`.
+            # Use a moving search start so repeated identical link texts map in order.
+            search_pos = 0
+            plain_for_search = plain or ''
+            for a in anchors:
+                vn = a.get('visible_norm', '') or ''
+                if not vn:
+                    # If no visible text (e.g. image-only link) try to locate small token or skip
+                    # fallback: attempt to find an empty boundary near search_pos
+                    # skip mapping if we can't reasonably locate text
+                    continue
+                # Build a flexible regex from normalized visible text: allow arbitrary whitespace in source
+                esc = re.escape(vn)
+                esc = esc.replace(r'\ ', r'\s+')
+                rx = re.compile(esc)
+                m_found = rx.search(plain_for_search, search_pos)
+                if not m_found:
+                    # try a looser exact substring search (fallback)
+                    idx = plain_for_search.find(vn, search_pos)
+                    if idx >= 0:
+                        s_idx = idx
+                        e_idx = idx + len(vn)
+                    else:
+                        # as a last resort, try from beginning
+                        m_found = rx.search(plain_for_search)
+                        if m_found:
+                            s_idx, e_idx = m_found.span()
+                        else:
+                            continue
+                else:
+                    s_idx, e_idx = m_found.span()
+
+                # Accept and record
                 try:
-                    attrstr = m_a.group(1) or ''
-                    inner_html = m_a.group(2) or ''
-                    # find href and title (best-effort)
-                    href = None
-                    title = None
-                    ah = re.search(r'href\s*=\s*(?:"([^"]+)"|\'([^\']+)\'|([^\s>]+))', attrstr, flags=re.I)
-                    if ah:
-                        href = ah.group(1) or ah.group(2) or ah.group(3)
-                    th = re.search(r'title\s*=\s*(?:"([^"]+)"|\'([^\']+)\'|([^\s>]+))', attrstr, flags=re.I)
-                    if th:
-                        title = th.group(1) or th.group(2) or th.group(3)
-                    # strip inner tags to get visible text
-                    visible = re.sub(r'<[^>]+>', '', inner_html)
-                    visible = html.unescape(visible or '')
-                    visible_norm = re.sub(r'\s+', ' ', visible).strip()
-                    anchors.append({'href': href, 'title': title, 'visible': visible, 'visible_norm': visible_norm})
+                    link_rec = {'start': int(s_idx), 'end': int(e_idx), 'href': a.get('href'), 'title': a.get('title') or None}
+                    new_links.append(link_rec)
+                    new_hyper_ranges.append([int(s_idx), int(e_idx)])
+                    search_pos = e_idx
                 except Exception:
                     continue
 
-            if anchors:
-                new_links = []
-                new_hyper_ranges = []
-                # Walk anchors sequentially and locate their visible text in `plain`.
-                # Use a moving search start so repeated identical link texts map in order.
-                search_pos = 0
-                plain_for_search = plain or ''
-                for a in anchors:
-                    vn = a.get('visible_norm', '') or ''
-                    if not vn:
-                        # If no visible text (e.g. image-only link) try to locate small token or skip
-                        # fallback: attempt to find an empty boundary near search_pos
-                        # skip mapping if we can't reasonably locate text
-                        continue
-                    # Build a flexible regex from normalized visible text: allow arbitrary whitespace in source
-                    esc = re.escape(vn)
-                    esc = esc.replace(r'\ ', r'\s+')
-                    rx = re.compile(esc)
-                    m_found = rx.search(plain_for_search, search_pos)
-                    if not m_found:
-                        # try a looser exact substring search (fallback)
-                        idx = plain_for_search.find(vn, search_pos)
-                        if idx >= 0:
-                            s_idx = idx
-                            e_idx = idx + len(vn)
-                        else:
-                            # as a last resort, try from beginning
-                            m_found = rx.search(plain_for_search)
-                            if m_found:
-                                s_idx, e_idx = m_found.span()
-                            else:
-                                continue
-                    else:
-                        s_idx, e_idx = m_found.span()
+            # Merge with any pre-existing non-anchor links (e.g., markdown-links) safely:
+            existing_meta_links = list(meta.get('links') or [])
+            # prefer mapped anchors first (they correspond to literal <a> elements)
+            mapped = {(nl.get('start'), nl.get('end')) for nl in new_links}
+            combined_links = new_links + [l for l in existing_meta_links if (l.get('start'), l.get('end')) not in mapped]
+            # update meta and parser structures
+            meta['links'] = combined_links
+            tags = meta.get('tags') or {}
+            # replace/merge hyperlink tag ranges
+            if new_hyper_ranges:
+                tags['hyperlink'] = new_hyper_ranges
+                meta['tags'] = tags
+    except Exception:
+        # best-effort: if mapping fails, keep parser's original hrefs
+        pass
 
-                    # Accept and record
-                    try:
-                        link_rec = {'start': int(s_idx), 'end': int(e_idx), 'href': a.get('href'), 'title': a.get('title') or None}
-                        new_links.append(link_rec)
-                        new_hyper_ranges.append([int(s_idx), int(e_idx)])
-                        search_pos = e_idx
-                    except Exception:
-                        continue
+    return plain, meta
 
-                # Merge with any pre-existing non-anchor links (e.g., markdown-links) safely:
-                existing_meta_links = list(meta.get('links') or [])
-                # prefer mapped anchors first (they correspond to literal <a> elements)
-                combined_links = new_links + [l for l in existing_meta_links if not any((l.get('start') == nl.get('start') and l.get('end') == nl.get('end')) for nl in new_links)]
-                # update meta and parser structures
-                meta['links'] = combined_links
-                tags = meta.get('tags') or {}
-                # replace/merge hyperlink tag ranges
-                if new_hyper_ranges:
-                    tags['hyperlink'] = new_hyper_ranges
-                    meta['tags'] = tags
+# --- Streaming HTML rendering ------------------------------------------------
+# HTMLStreamRenderer runs _parse_html_and_apply incrementally: bytes are decoded as they
+# arrive, the <body> fragment is cut into pieces just before a '<' that sits outside any
+# <script>/<style>/<pre>/<code> block or <a> element (and never right before one), and each
+# piece goes through _strip_whitespace_between_tags and into one _SimpleHTMLToTagged.
+# Those rules only touch whitespace next to '>' and whole blocks/anchors, so at such a cut
+# they give the same result as on the whole fragment, and close() returns exactly what
+# _parse_html_and_apply returns for the whole document.
+#
+# Each feed() returns the text the parser can no longer change (everything up to the last
+# non-whitespace character, held back at an open <table>) with the tag ranges that end
+# inside it. get_result() still rewrites tables and markdown links at the end, so callers
+# append the batches as a preview and reconcile with the text close() returns.
+# With preview=False feed() skips the batches; timings adds up the seconds spent in
+# _strip_whitespace_between_tags ('preprocess') and in the parser and get_result ('parse').
+_STREAM_BLOCKS = ('script', 'style', 'pre', 'code')
+_STREAM_TAG_RE = re.compile(r'<(/?)([A-Za-z][A-Za-z0-9]*)?')
+_BODY_OPEN_RE = re.compile(r'<body[^>]*>', re.IGNORECASE)
+_BODY_CLOSE_RE = re.compile(r'</body>', re.IGNORECASE)
+_DOCUMENT_HINT_RE = re.compile(r'<(?:!doctype|html|head)\b', re.IGNORECASE)
+_STREAM_SNIFF = 1024                 # characters read before a document without <body> counts as a fragment
+
+
+class HTMLStreamRenderer:
+    """Incremental _parse_html_and_apply: feed() chunks, append the batches, then close()."""
+
+    def __init__(self, encoding: str = 'utf-8', preview: bool = True):
+        self.preview = preview
+        self.timings = {'preprocess': 0.0, 'parse': 0.0}
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._raw: list[str] = []
+        self._buf = ''
+        self._mode: Optional[str] = None      # None until decided, then 'body' | 'fragment'
+        self._parser = _SimpleHTMLToTagged()
+        self._frag: list[str] = []
+        self._proc: list[str] = []
+        # cut scanner state over self._buf
+        self._scan = 0
+        self._cut = 0
+        self._in_block: Optional[str] = None
+        self._in_anchor = False
+        # preview state
+        self.emitted = 0                      # characters of preview text handed out so far
+        self._lead: Optional[int] = None      # leading characters dropped by the top-of-document collapse
+        self._tag_next: dict = {}
+
+    def feed(self, data) -> tuple[str, dict]:
+        """Add bytes (or str) and return (new preview text, {tag: [[start, end], ...]})."""
+        text = self._decoder.decode(data) if isinstance(data, (bytes, bytearray)) else str(data)
+        if text:
+            self._raw.append(text)
+            self._buf += text
+            self._advance(final=False)
+        return self._batch() if self.preview else ('', {})
+
+    def close(self) -> tuple[str, dict]:
+        """Finish parsing; returns (plain, meta) exactly as _parse_html_and_apply(whole document)."""
+        tail = self._decoder.decode(b'', final=True)
+        if tail:
+            self._raw.append(tail)
+            self._buf += tail
+        self._advance(final=True)
+        raw = ''.join(self._raw)
+        raw_fragment = ''.join(self._frag)
+        m = re.search(r'<body[^>]*>(.*)</body>', raw, flags=re.DOTALL | re.IGNORECASE)
+        t0 = time.perf_counter()
+        try:
+            if raw_fragment != (m.group(1) if m else raw):
+                # guessed wrong between <body> document and bare fragment: parse in one go
+                return _parse_html_and_apply(raw)
+            return _finish_html_parse(self._parser, raw_fragment, ''.join(self._proc))
         except Exception:
-            # best-effort: if mapping fails, keep parser's original hrefs
-            pass
-
-        return plain, meta
-    except Exception:
-        return raw, {'tags': {}}
+            return raw, {'tags': {}}
+        finally:
+            self.timings['parse'] += time.perf_counter() - t0
+
+    # ---- cutting -------------------------------------------------------------
+    def _advance(self, final: bool) -> None:
+        if self._mode is None:
+            m = _BODY_OPEN_RE.search(self._buf)
+            if m:
+                self._mode = 'body'
+                self._buf = self._buf[m.end():]
+            elif final or (len(self._buf) >= _STREAM_SNIFF and not _DOCUMENT_HINT_RE.search(self._buf)):
+                self._mode = 'fragment'
+            else:
+                return
+        if final:
+            end = len(self._buf)
+            if self._mode == 'body':
+                ends = [m.start() for m in _BODY_CLOSE_RE.finditer(self._buf)]
+                end = ends[-1] if ends else end
+            self._emit_piece(end)
+            self._buf = ''
+            return
+        limit = len(self._buf)
+        if self._mode == 'body':
+            m = _BODY_CLOSE_RE.search(self._buf)
+            if m:
+                limit = m.start()
+        self._scan_cuts(limit)
+        if self._cut > 0:
+            cut = self._cut
+            self._emit_piece(cut)
+            self._buf = self._buf[cut:]
+            self._scan -= cut
+            self._cut = 0
+
+    def _scan_cuts(self, limit: int) -> None:
+        """Advance over complete tags before limit, remembering the last safe cut."""
+        for m in _STREAM_TAG_RE.finditer(self._buf, self._scan, limit):
+            if m.end() >= limit:
+                # the tag name may continue in the next chunk
+                self._scan = m.start()
+                return
+            closing, name = m.group(1), (m.group(2) or '').lower()
+            if self._in_block:
+                if closing and name == self._in_block:
+                    self._in_block = None
+                continue
+            if name == 'a':
+                self._in_anchor = not closing
+                continue
+            opens_block = not closing and name in _STREAM_BLOCKS
+            # whitespace before a preserved block survives (the placeholder is not a '<'), so no
+            # cut there; and the first piece must hold more than whitespace for '^\s+<'
+            if (not self._in_anchor and not opens_block and m.start() > 0
+                    and (self._frag or self._buf[:m.start()].strip())):
+                self._cut = m.start()
+            if opens_block:
+                self._in_block = name
+        self._scan = limit
+
+    def _emit_piece(self, end: int) -> None:
+        piece = self._buf[:end]
+        if not piece:
+            return
+        t0 = time.perf_counter()
+        try:
+            proc = _strip_whitespace_between_tags(piece)
+        except Exception:
+            proc = piece
+        t1 = time.perf_counter()
+        self._frag.append(piece)
+        self._proc.append(proc)
+        self._parser.feed(proc)
+        self.timings['preprocess'] += t1 - t0
+        self.timings['parse'] += time.perf_counter() - t1
+
+    # ---- preview batches -----------------------------------------------------
+    def _stable_end(self) -> int:
+        """Output offset up to which the parser will not change its text any more."""
+        p = self._parser
+        end = p.pos
+        for part in reversed(p.out):
+            stripped = part.rstrip()
+            if stripped:
+                end -= len(part) - len(stripped)
+                break
+            end -= len(part)
+        for item in p.stack:
+            if isinstance(item, (tuple, list)) and len(item) > 1 and item[0] == 'table':
+                end = min(end, item[1])
+                break
+        return end
+
+    def _batch(self) -> tuple[str, dict]:
+        end = self._stable_end()
+        if self._lead is None:
+            if end <= 0:
+                return '', {}
+            # same top-of-document collapse as get_result(): leading whitespace -> at most one '\n'
+            head = self._parser._out_slice(0, end)
+            first = len(head) - len(head.lstrip())
+            self._lead = first - (1 if '\n' in head[:first] else 0)
+            self.emitted = 0
+        start = self.emitted + self._lead
+        if end <= start:
+            return '', {}
+        text = self._parser._out_slice(start, end)
+        if self.emitted == 0 and text[:1].isspace():
+            text = '\n' + text[1:]
+        self.emitted += len(text)
+        tags = {}
+        lead = self._lead
+        for tag, spans in self._parser.ranges.items():
+            i = self._tag_next.get(tag, 0)
+            out = []
+            while i < len(spans) and spans[i][1] <= end:
+                s, e = spans[i][0] - lead, spans[i][1] - lead
+                if e > s and e > 0:
+                    out.append([max(0, s), e])
+                i += 1
+            self._tag_next[tag] = i
+            if out:
+                tags[tag] = out
+        return text, tags
 
 def force_final_dom_redraw(ctx):
     """Host-side manual flush: invokes document.forceRedraw() if present and returns HTML."""
@@ -3327,6 +3667,59 @@ def _parse_simple_markdown(md_text):
     tags = {k: v for k, v in tags.items() if v}
     return plain_text, tags
 
+# characters Tk may count as two index columns (surrogate pairs)
+_ASTRAL_RE = _re.compile('[\U00010000-\U0010FFFF]')
+
+
+class TextOffsetMap:
+    """Maps Tk indices of one Text widget snapshot to absolute character offsets.
+
+    The buffer is read once and a cumulative line-start table is built, so every
+    'line.col' index (as returned by tag_ranges/index) maps in constant time instead of
+    copying the buffer prefix with len(widget.get('1.0', idx)) per boundary. Lines holding
+    characters outside the BMP fall back to measuring just that line's prefix.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        content = piece_table.widget_text(widget)
+        self.length = len(content)
+        self.starts = syntax_lexer.LineIndex(content).starts
+        self._astral_lines = {bisect.bisect_right(self.starts, m.start())
+                              for m in _ASTRAL_RE.finditer(content)}
+
+    def offset(self, index) -> int:
+        """Absolute offset of a Tk index (non 'line.col' forms are normalized by the widget)."""
+        idx = str(index)
+        try:
+            line_s, col_s = idx.split('.')
+            line, col = int(line_s), int(col_s)
+        except ValueError:
+            idx = self.widget.index(idx)
+            line_s, col_s = idx.split('.')
+            line, col = int(line_s), int(col_s)
+        if line > len(self.starts):
+            return self.length
+        if line < 1:
+            return 0
+        if line in self._astral_lines:
+            col = len(self.widget.get(f"{line}.0", idx))
+        start = self.starts[line - 1]
+        end = self.starts[line] - 1 if line < len(self.starts) else self.length
+        return start + max(0, min(col, end - start))
+
+    def tag_ranges(self, tag) -> List[List[int]]:
+        """[[start, end], ...] offsets of tag's non-empty ranges."""
+        ranges = self.widget.tag_ranges(tag)
+        out = []
+        for i in range(0, len(ranges), 2):
+            start = self.offset(ranges[i])
+            end = self.offset(ranges[i + 1])
+            if end > start:
+                out.append([start, end])
+        return out
+
+
 def _collect_all_tag_ranges(textArea):
     """Collect ranges for both formatting and syntax tags as absolute offsets."""
     tags_to_save = (
@@ -3338,18 +3731,9 @@ def _collect_all_tag_ranges(textArea):
     )
     data = {}
     try:
+        offsets = TextOffsetMap(textArea)
         for tag in tags_to_save:
-            ranges = textArea.tag_ranges(tag)
-            if not ranges:
-                continue
-            arr = []
-            for i in range(0, len(ranges), 2):
-                s = ranges[i]
-                e = ranges[i + 1]
-                start = len(textArea.get('1.0', s))
-                end = len(textArea.get('1.0', e))
-                if end > start:
-                    arr.append([start, end])
+            arr = offsets.tag_ranges(tag)
             if arr:
                 data[tag] = arr
     except Exception:
@@ -3362,7 +3746,7 @@ def _convert_buffer_to_html_fragment(textArea):
     wrap code blocks into <pre>, and turn marked div/p ranges into actual HTML blocks.
     """
     try:
-        content = textArea.get('1.0', 'end-1c')
+        content = piece_table.widget_text(textArea)
         if not content:
             return ''
 
@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+import email.utils
+import hashlib
+import http.client
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional
+
+# Tkinter-free HTTP fetching through an on-disk response cache.
+#
+# Each cached URL is two files named by the SHA-256 of the URL: '<key>.body' holds the
+# response bytes and '<key>.json' the validators (ETag, Last-Modified), the charset and
+# the time the entry stops being fresh. The time comes from Cache-Control max-age or
+# Expires. A fresh entry is answered from disk without touching the network. A stale
+# entry that has a validator is revalidated with a conditional GET; a 304 refreshes the
+# metadata and reuses the stored body. 'no-store' responses are never written, and
+# 'no-cache' ones are stored but revalidated on every use. Files are replaced
+# atomically, so concurrent fetches of the same URL never see a torn entry.
+#
+# PageCache is the in-memory counterpart used for pages opened in the editor: it keeps
+# every page (validators or not) so history navigation can show it again without a
+# request. ConnectionPool is an opener for fetch() that keeps HTTP/1.1 connections open
+# per host, where urllib.request closes every connection after one response.
+#
+# fetch() can also hand the body to an on_data callback while it arrives (in READ_CHUNK
+# pieces; once, whole, when it comes from a cache) so callers can start on a page
+# before the download finishes.
+
+MAX_REDIRECTS = 5
+READ_CHUNK = 16 * 1024
+
+
+class Fetched(NamedTuple):
+    body: bytes
+    charset: Optional[str]
+    source: str              # 'network' | 'cache' (no request made) | 'revalidated' (304)
+
+
+def _read_body(resp, charset: Optional[str], on_data=None) -> bytes:
+    """resp.read(), passing each chunk to on_data(chunk, charset) as it arrives."""
+    if on_data is None:
+        return resp.read()
+    parts = []
+    while True:
+        chunk = resp.read(READ_CHUNK)
+        if not chunk:
+            return b''.join(parts)
+        parts.append(chunk)
+        on_data(chunk, charset)
+
+
+def _cache_control(headers) -> Dict[str, str]:
+    out = {}
+    for part in (headers.get('Cache-Control') or '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            out[name.lower()] = value.strip().strip('"')
+    return out
+
+
+def _expires_at(headers, now: float) -> Optional[float]:
+    """Epoch time the response stops being fresh, or None when it must not be stored."""
+    cc = _cache_control(headers)
+    if 'no-store' in cc:
+        return None
+    if 'no-cache' in cc:
+        return 0.0
+    if 'max-age' in cc:
+        try:
+            return now + max(0, int(cc['max-age']))
+        except ValueError:
+            return 0.0
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            return email.utils.parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return 0.0
+    return 0.0
+
+
+class _Counted:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stores': 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+
+class HttpCache(_Counted):
+    """Response cache in one directory (see the module comment); safe to share across threads."""
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.body'
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """The stored metadata for url (with its body under 'body'), or None."""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as fh:
+                meta = json.load(fh)
+            if meta.get('url') != url:
+                return None
+            with open(body_path, 'rb') as fh:
+                meta['body'] = fh.read()
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def store(self, url: str, headers, body: bytes, now: Optional[float] = None) -> bool:
+        """Cache a 200 response when its headers allow it; returns whether it was written."""
+        now = time.time() if now is None else now
+        expires = _expires_at(headers, now)
+        etag = headers.get('ETag')
+        modified = headers.get('Last-Modified')
+        if expires is None or (expires <= now and not etag and not modified):
+            return False
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': modified,
+            'charset': headers.get_content_charset() if hasattr(headers, 'get_content_charset') else None,
+            'expires': expires,
+            'stored': now,
+        }
+        meta_path, body_path = self._paths(url)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._write(body_path, body)
+            self._write(meta_path, json.dumps(meta).encode('utf-8'))
+        except OSError:
+            return False
+        self._count('stores')
+        return True
+
+    def refresh(self, meta: dict, headers, now: Optional[float] = None) -> None:
+        """Apply the headers of a 304 to a stored entry."""
+        now = time.time() if now is None else now
+        expires = _expires_at(headers, now)
+        meta = {k: v for k, v in meta.items() if k != 'body'}
+        meta['expires'] = 0.0 if expires is None else expires
+        meta['etag'] = headers.get('ETag') or meta.get('etag')
+        meta['last_modified'] = headers.get('Last-Modified') or meta.get('last_modified')
+        try:
+            self._write(self._paths(meta['url'])[0], json.dumps(meta).encode('utf-8'))
+        except OSError:
+            pass
+
+
+class PageCache(_Counted):
+    """In-memory LRU of fetched pages with the same lookup/store/refresh calls as HttpCache."""
+
+    def __init__(self, max_entries: int = 32):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, dict]' = OrderedDict()
+
+    def lookup(self, url: str) -> Optional[dict]:
+        with self._lock:
+            meta = self._entries.get(url)
+            if meta is not None:
+                self._entries.move_to_end(url)
+            return dict(meta) if meta is not None else None
+
+    def store(self, url: str, headers, body: bytes, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        expires = _expires_at(headers, now)
+        meta = {
+            'url': url,
+            'etag': headers.get('ETag') if expires is not None else None,
+            'last_modified': headers.get('Last-Modified') if expires is not None else None,
+            'charset': headers.get_content_charset() if hasattr(headers, 'get_content_charset') else None,
+            'expires': expires or 0.0,
+            'stored': now,
+            'body': body,
+        }
+        with self._lock:
+            self._entries[url] = meta
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._count('stores')
+        return True
+
+    def refresh(self, meta: dict, headers, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        expires = _expires_at(headers, now)
+        with self._lock:
+            entry = self._entries.get(meta['url'])
+            if entry is not None:
+                entry['expires'] = expires or 0.0
+                entry['etag'] = headers.get('ETag') or entry.get('etag')
+                entry['last_modified'] = headers.get('Last-Modified') or entry.get('last_modified')
+
+    def discard(self, url: str) -> None:
+        with self._lock:
+            self._entries.pop(url, None)
+
+
+class _PooledResponse:
+    """The parts of a urllib response fetch() uses, over a fully read body."""
+
+    def __init__(self, url: str, status: int, headers, body: bytes):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    def read(self) -> bytes:
+        return self._body
+
+    def geturl(self) -> str:
+        return self.url
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class ConnectionPool:
+    """Opener for fetch() that reuses keep-alive connections per (scheme, host).
+
+    open() follows redirects and raises urllib.error.HTTPError for any other status >= 300
+    (304 included), like urllib.request.urlopen. Non-HTTP URLs fall back to urlopen.
+    """
+
+    def __init__(self, per_host: int = 2, idle_timeout: float = 30.0):
+        self.per_host = per_host
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        self.connects = 0
+
+    def _get(self, key: tuple, timeout: float):
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn, used = idle.pop()
+                if now - used <= self.idle_timeout:
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    return conn, True
+                conn.close()
+            self.connects += 1
+        cls = http.client.HTTPSConnection if key[0] == 'https' else http.client.HTTPConnection
+        return cls(key[1], timeout=timeout), False
+
+    def _put(self, key: tuple, conn) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _used in conns:
+                conn.close()
+
+    def open(self, req, timeout: float = 10.0, on_data=None):
+        url = req.full_url
+        headers = dict(req.header_items())
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            scheme = parts.scheme.lower()
+            if scheme not in ('http', 'https'):
+                with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as resp:
+                    body = _read_body(resp, resp.headers.get_content_charset(), on_data)
+                    return _PooledResponse(resp.geturl(), getattr(resp, 'status', None) or 200, resp.headers, body)
+            key = (scheme, parts.netloc)
+            path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+            while True:
+                conn, reused = self._get(key, timeout)
+                resp = None
+                try:
+                    conn.request('GET', path, headers=headers)
+                    resp = conn.getresponse()
+                    stream = on_data if 200 <= resp.status < 300 else None
+                    body = _read_body(resp, resp.msg.get_content_charset(), stream)
+                    break
+                except (http.client.HTTPException, ConnectionError):
+                    conn.close()
+                    # the server dropped an idle connection: retry once on a new one
+                    if not reused or resp is not None:
+                        raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._put(key, conn)
+            location = resp.getheader('Location')
+            if resp.status in (301, 302, 303, 307, 308) and location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            if resp.status >= 300:
+                raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.msg, io.BytesIO(body))
+            return _PooledResponse(url, resp.status, resp.msg, body)
+        raise urllib.error.HTTPError(url, resp.status, 'Too many redirects', resp.msg, io.BytesIO(body))
+
+
+def fetch(url: str, cache=None, timeout: float = 10.0, headers: Optional[Dict[str, str]] = None,
+          opener=None, revalidate: bool = False, prefer_cache: bool = False,
+          on_data: Optional[Callable[[bytes, Optional[str]], None]] = None) -> Fetched:
+    """GET url through cache (an HttpCache or PageCache, when given).
+
+    revalidate skips the freshness check (a stored entry is always revalidated, as on a
+    browser refresh); prefer_cache answers from any stored entry, fresh or not (history
+    navigation). on_data(chunk, charset) sees the body as it is read. Raises what urllib
+    raises on failure.
+    """
+    headers = dict(headers or {})
+    meta = cache.lookup(url) if cache is not None else None
+    if meta is not None:
+        if prefer_cache or (not revalidate and meta.get('expires', 0) > time.time()):
+            cache._count('hits')
+            if on_data is not None:
+                on_data(meta['body'], meta.get('charset'))
+            return Fetched(meta['body'], meta.get('charset'), 'cache')
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        if opener is not None:
+            resp_cm, stream = opener.open(req, timeout=timeout, on_data=on_data), None
+        else:
+            resp_cm, stream = urllib.request.urlopen(req, timeout=timeout), on_data
+        with resp_cm as resp:
+            body = _read_body(resp, resp.headers.get_content_charset(), stream)
+            if cache is not None:
+                cache._count('misses')
+                cache.store(url, resp.headers, body)
+            return Fetched(body, resp.headers.get_content_charset(), 'network')
+    except urllib.error.HTTPError as e:
+        if e.code != 304 or meta is None:
+            raise
+        cache.refresh(meta, e.headers)
+        cache._count('revalidated')
+        if on_data is not None:
+            on_data(meta['body'], meta.get('charset'))
+        return Fetched(meta['body'], meta.get('charset'), 'revalidated')
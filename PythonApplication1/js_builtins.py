@@ -13,6 +13,8 @@ where:
  - args is list of evaluated arguments
 """
 from typing import Any, Dict, List, Optional
+from collections import deque
+import heapq
 import json
 import importlib
 import math
@@ -25,6 +27,454 @@ class JSError(Exception):
         self.value = value
         super().__init__(str(value))
 
+class _Hole:
+    """Marker for a missing element inside a dense JSArray."""
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<hole>"
+
+HOLE = _Hole()
+
+# Writes further than this past the end switch an array to sparse storage.
+_MAX_DENSE_GAP = 1024
+
+
+def _array_index(key) -> int:
+    """Return the canonical array index named by string `key`, or -1."""
+    if key.__class__ is str and key.isdigit() and key.isascii() and (key[0] != '0' or len(key) == 1) and len(key) < 11:
+        i = int(key)
+        if i < 4294967295:
+            return i
+    return -1
+
+
+class JSArray(dict):
+    """JS Array backed by a Python list.
+
+    Behaves like the dict-shaped arrays used before (``"0"``, ``"1"``, ... keys
+    plus ``"length"``), so code that treats arrays as dicts keeps working, but
+    elements live in ``_items`` and ``length`` is ``len(_items)``.  Missing
+    elements are stored as ``HOLE``.  Named properties (``__proto__``,
+    expandos) stay in the dict itself.  A write far past the end, an invalid
+    ``length`` or deleting ``length`` moves the elements into the dict as
+    string keys (``_items`` becomes None) and from then on it is a plain
+    dict-shaped array.
+    """
+    __slots__ = ('_items',)
+
+    def __init__(self, items=None, proto=None):
+        dict.__init__(self)
+        dict.__setitem__(self, '__proto__', proto)
+        self._items = list(items) if items is not None else []
+
+    # -- storage helpers ---------------------------------------------------
+    def _make_sparse(self):
+        items = self._items
+        if items is None:
+            return
+        self._items = None
+        for i, v in enumerate(items):
+            if v is not HOLE:
+                dict.__setitem__(self, str(i), v)
+        dict.__setitem__(self, 'length', len(items))
+
+    def _set_length(self, value) -> bool:
+        items = self._items
+        if value.__class__ not in (int, float):
+            return False
+        try:
+            n = int(value)
+        except (OverflowError, ValueError):
+            return False
+        if n != value or n < 0:
+            return False
+        cur = len(items)
+        if n <= cur:
+            del items[n:]
+        elif n - cur <= _MAX_DENSE_GAP:
+            items.extend([HOLE] * (n - cur))
+        else:
+            return False
+        return True
+
+    def elements(self, length=None):
+        """Yield (index, value) for present elements below `length` (default: all).
+
+        Reads through the live storage, so callbacks may mutate the array while
+        it is being iterated.
+        """
+        if length is None:
+            length = int(self.get('length', 0) or 0)
+        for i in range(length):
+            items = self._items
+            if items is not None:
+                if i < len(items):
+                    v = items[i]
+                    if v is not HOLE:
+                        yield i, v
+                continue
+            key = str(i)
+            if dict.__contains__(self, key):
+                yield i, dict.__getitem__(self, key)
+
+    # -- dict protocol -----------------------------------------------------
+    def __getitem__(self, key):
+        items = self._items
+        if items is not None and key.__class__ is str:
+            if key.isdigit():
+                i = _array_index(key)
+                if i >= 0:
+                    if i < len(items):
+                        v = items[i]
+                        if v is not HOLE:
+                            return v
+                    raise KeyError(key)
+            elif key == 'length':
+                return len(items)
+        return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        items = self._items
+        if items is not None:
+            i = _array_index(key)
+            if i >= 0:
+                n = len(items)
+                if i < n:
+                    items[i] = value
+                    return
+                if i - n <= _MAX_DENSE_GAP:
+                    if i > n:
+                        items.extend([HOLE] * (i - n))
+                    items.append(value)
+                    return
+                self._make_sparse()
+            elif key == 'length':
+                if self._set_length(value):
+                    return
+                self._make_sparse()
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        items = self._items
+        if items is not None:
+            i = _array_index(key)
+            if i >= 0:
+                if i < len(items) and items[i] is not HOLE:
+                    items[i] = HOLE
+                    return
+                raise KeyError(key)
+            if key == 'length':
+                self._make_sparse()
+        dict.__delitem__(self, key)
+
+    def __contains__(self, key):
+        items = self._items
+        if items is not None and key.__class__ is str:
+            if key.isdigit():
+                i = _array_index(key)
+                if i >= 0:
+                    return i < len(items) and items[i] is not HOLE
+            elif key == 'length':
+                return True
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        items = self._items
+        if items is not None and key.__class__ is str:
+            if key.isdigit():
+                i = _array_index(key)
+                if i >= 0:
+                    if i < len(items):
+                        v = items[i]
+                        if v is not HOLE:
+                            return v
+                    return default
+            elif key == 'length':
+                return len(items)
+        return dict.get(self, key, default)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def pop(self, key, *default):
+        if key in self:
+            v = self[key]
+            del self[key]
+            return v
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def keys(self):
+        items = self._items
+        if items is None:
+            return list(dict.keys(self))
+        out = []
+        named = list(dict.keys(self))
+        if '__proto__' in named:
+            out.append('__proto__')
+        out.extend(str(i) for i, v in enumerate(items) if v is not HOLE)
+        out.append('length')
+        out.extend(k for k in named if k != '__proto__')
+        return out
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        items = self._items
+        if items is None:
+            return dict.__len__(self)
+        return dict.__len__(self) + 1 + sum(1 for v in items if v is not HOLE)
+
+    def __bool__(self):
+        return True
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def update(self, other=(), **kw):
+        pairs = other.items() if hasattr(other, 'items') else other
+        for k, v in pairs:
+            self[k] = v
+        for k, v in kw.items():
+            self[k] = v
+
+    def clear(self):
+        dict.clear(self)
+        self._items = []
+
+    def copy(self):
+        out = JSArray.__new__(JSArray)
+        dict.update(out, dict.items(self))
+        out._items = list(self._items) if self._items is not None else None
+        return out
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+def _array_elements(obj, length):
+    """Iterate (index, value) for the present elements of an array-like below `length`."""
+    if obj.__class__ is JSArray:
+        return obj.elements(length)
+    return _dict_elements(obj, length)
+
+
+def _dict_elements(obj, length):
+    for i in range(length):
+        key = str(i)
+        if key in obj:
+            yield i, obj.get(key)
+
+
+# Browsers clamp timers nested deeper than this to _NESTED_MIN_DELAY ms, which
+# also keeps a self-rescheduling setTimeout(fn, 0) from freezing the virtual clock.
+_NESTING_CLAMP_LEVEL = 5
+_NESTED_MIN_DELAY = 4.0
+_MICROTASK_LIMIT = 10000
+
+# TimerQueue entry slots; entries are lists so intervals re-arm in place.
+_T_DUE, _T_SEQ, _T_ID, _T_FN, _T_ARGS, _T_INTERVAL, _T_NESTING = range(7)
+
+
+def _timer_delay(value) -> float:
+    """Coerce a JS delay argument to milliseconds (NaN/negative/garbage -> 0)."""
+    try:
+        d = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    if d != d or d < 0:
+        return 0.0
+    return d
+
+
+class TimerQueue:
+    """Per-context event-loop queue behind setTimeout/setInterval (``context['_timers']``).
+
+    Timers live in a heap ordered by (due time, sequence) against a virtual
+    clock ``now`` in milliseconds, so equal due times run in scheduling order.
+    Interval entries are pushed back with a new due time instead of being
+    reallocated, and cancelled ids are dropped lazily when they reach the top.
+    Microtasks (``queueMicrotask``) run after every macrotask.
+
+    It still looks like the old list of ``(fn, args)`` pairs to callers that
+    only inspect it: ``len()`` counts pending tasks, iteration yields
+    ``(fn, args)`` in run order (``('__interval__', id)`` for intervals) and
+    ``append((fn, args))`` schedules a zero-delay task.
+    """
+    __slots__ = ('now', '_heap', '_live', '_micro', '_seq', '_next_id', '_nesting')
+
+    def __init__(self, items=()):
+        self.now = 0.0
+        self._heap: List[list] = []
+        self._live: Dict[int, list] = {}
+        self._micro = deque()
+        self._seq = 0
+        self._next_id = 1
+        self._nesting = 0
+        for item in items:
+            self.append(item)
+
+    # -- scheduling --------------------------------------------------------
+    def schedule(self, fn, delay=0, args=(), repeat=False) -> int:
+        """Queue `fn(*args)` after `delay` ms (every `delay` ms when `repeat`); return its id."""
+        delay = _timer_delay(delay)
+        nesting = self._nesting + 1
+        if nesting > _NESTING_CLAMP_LEVEL and delay < _NESTED_MIN_DELAY:
+            delay = _NESTED_MIN_DELAY
+        tid = self._next_id
+        self._next_id = tid + 1
+        self._seq += 1
+        ent = [self.now + delay, self._seq, tid, fn, tuple(args), delay if repeat else None, nesting]
+        self._live[tid] = ent
+        heapq.heappush(self._heap, ent)
+        return tid
+
+    def cancel(self, tid) -> None:
+        """clearTimeout/clearInterval: forget `tid` (its heap entry is skipped later)."""
+        try:
+            self._live.pop(int(tid), None)
+        except (TypeError, ValueError, OverflowError):
+            pass
+
+    def queue_microtask(self, fn, args=()) -> None:
+        self._micro.append((fn, tuple(args)))
+
+    def append(self, item) -> None:
+        """List-style enqueue of an ``(fn, args)`` pair as a zero-delay task."""
+        fn, args = item
+        if fn == '__interval__':
+            return
+        self.schedule(fn, 0, args or ())
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._live.clear()
+        self._micro.clear()
+
+    def next_due(self) -> Optional[float]:
+        """Due time of the earliest live timer, or None when none is pending."""
+        heap = self._heap
+        while heap and self._live.get(heap[0][_T_ID]) is not heap[0]:
+            heapq.heappop(heap)
+        return heap[0][_T_DUE] if heap else None
+
+    # -- running -----------------------------------------------------------
+    def run(self, invoke, advance=None, max_tasks=1000) -> int:
+        """Run due tasks through ``invoke(fn, args)``; return how many macrotasks ran.
+
+        With `advance` None this is one drain: every timer scheduled before the
+        call runs once in (due, sequence) order, fast-forwarding the clock to
+        each due time; timers scheduled meanwhile (including re-armed
+        intervals) wait for the next drain.  With `advance` (ms) the clock moves
+        forward by that much and everything due by then runs, including timers
+        scheduled along the way.
+        """
+        heap = self._heap
+        live = self._live
+        cutoff = self._seq if advance is None else None
+        deadline = None if advance is None else self.now + _timer_delay(advance)
+        deferred = []
+        ran = 0
+        try:
+            self.run_microtasks(invoke)
+            while heap and ran < max_tasks:
+                ent = heap[0]
+                if deadline is not None and ent[_T_DUE] > deadline:
+                    break
+                heapq.heappop(heap)
+                tid = ent[_T_ID]
+                if live.get(tid) is not ent:
+                    continue
+                if cutoff is not None and ent[_T_SEQ] > cutoff:
+                    deferred.append(ent)
+                    continue
+                if ent[_T_DUE] > self.now:
+                    self.now = ent[_T_DUE]
+                interval = ent[_T_INTERVAL]
+                if interval is None:
+                    del live[tid]
+                self._nesting = ent[_T_NESTING]
+                try:
+                    invoke(ent[_T_FN], ent[_T_ARGS])
+                except BaseException:
+                    # the entry is off the heap; don't leave it counted as pending
+                    if interval is not None and live.get(tid) is ent:
+                        del live[tid]
+                    raise
+                finally:
+                    self._nesting = 0
+                ran += 1
+                if interval is not None and live.get(tid) is ent:
+                    nesting = ent[_T_NESTING] + 1
+                    if nesting > _NESTING_CLAMP_LEVEL and interval < _NESTED_MIN_DELAY:
+                        interval = ent[_T_INTERVAL] = _NESTED_MIN_DELAY
+                    self._seq += 1
+                    ent[_T_DUE] = self.now + interval
+                    ent[_T_SEQ] = self._seq
+                    ent[_T_NESTING] = nesting
+                    heapq.heappush(heap, ent)
+                self.run_microtasks(invoke)
+        finally:
+            for ent in deferred:
+                heapq.heappush(heap, ent)
+        if deadline is not None and ran < max_tasks and deadline > self.now:
+            self.now = deadline
+        return ran
+
+    def run_microtasks(self, invoke) -> int:
+        """Drain the microtask queue, including microtasks queued while draining."""
+        micro = self._micro
+        n = 0
+        while micro:
+            if n >= _MICROTASK_LIMIT:
+                raise RuntimeError(
+                    f"Microtask limit exceeded ({n} microtasks in one checkpoint). "
+                    "Possible infinite microtask loop detected."
+                )
+            fn, args = micro.popleft()
+            invoke(fn, args)
+            n += 1
+        return n
+
+    # -- list-like view ----------------------------------------------------
+    def __len__(self):
+        return len(self._live) + len(self._micro)
+
+    def __bool__(self):
+        return bool(self._live) or bool(self._micro)
+
+    def __iter__(self):
+        yield from self._micro
+        for ent in sorted(self._live.values()):
+            if ent[_T_INTERVAL] is not None:
+                yield ('__interval__', ent[_T_ID])
+            else:
+                yield (ent[_T_FN], ent[_T_ARGS])
+
+    def __repr__(self):
+        return f"<TimerQueue now={self.now:g}ms pending={len(self)}>"
+
+
 def register_builtins(context: Dict[str, Any], JSFunction):
     # --- Host environment shims (conservative, inert defaults) ---
     # Provide aliases and minimal google_tag* structures so real-world tag code
@@ -40,25 +490,24 @@ def register_builtins(context: Dict[str, Any], JSFunction):
     tidr.setdefault('container', {})
     tidr.setdefault('injectedFirstPartyContainers', {})
 
-    # Ensure timer containers used by setTimeout/setInterval exist on context
-    context.setdefault('_timers', [])
-    # Store active intervals and next timer id on context so run_timers_from_context
-    # (in jsmini.py) can access them.
-    context.setdefault('_intervals', {})
-    context.setdefault('_next_timer_id', 1)
+    # setTimeout/setInterval share one TimerQueue per context; adopt any plain
+    # (fn, args) list queued before the builtins were registered.
+    timers = context.get('_timers')
+    if not isinstance(timers, TimerQueue):
+        timers = context['_timers'] = TimerQueue(timers or ())
 
     # --- Array constructor + prototype methods --------------------------------
     def _array_ctor(interp, this, args):
-        # this is created by Interpreter.new as a dict with '__proto__' set
-        this.setdefault("length", 0)
+        # `this` is created by Interpreter.new as a dict with '__proto__' set;
+        # return a list-backed array that keeps the same prototype.
+        proto = this.get("__proto__", Arr.prototype) if isinstance(this, dict) else Arr.prototype
+        arr = JSArray(proto=proto)
         if args:
             if len(args) == 1 and isinstance(args[0], (int, float)):
-                this["length"] = int(args[0])
+                arr["length"] = int(args[0])
             else:
-                push_fn = Arr.prototype.get("push")
-                if isinstance(push_fn, JSFunction):
-                    push_fn.call(interp, this, args)
-        return this
+                arr._items.extend(args)
+        return arr
 
     # Minimal localStorage (string keys/values)
     _store: Dict[str, str] = {}
@@ -94,61 +543,42 @@ def register_builtins(context: Dict[str, Any], JSFunction):
         'clear': JSFunction([], None, None, name='clear', native_impl=_ls_clear),
     })
 
-    # setInterval/clearInterval using context['_timers'] and context['_intervals']
-    def _set_interval(interp, this, args):
-        """
-        setInterval(fn, delay, ...args) -> id
-        - stores active interval in context['_intervals'] (fn, args_tuple)
-        - enqueues a marker ('__interval__', id) into context['_timers'] so runner will call it
-        """
-        try:
-            fn = args[0] if args else None
-            # additional args to pass to callback when invoked
-            extra_args = tuple(args[2:]) if len(args) > 2 else ()
-        except Exception:
-            fn = None
-            extra_args = ()
+    # Timer functions; all of them go through context['_timers'] (a TimerQueue)
+    def _timer_args(args):
+        fn = args[0] if args else None
+        delay = args[1] if len(args) > 1 else 0
+        return fn, delay, tuple(args[2:])
 
-        # allocate id on context so run_timers can see it
-        try:
-            tid = int(context.get('_next_timer_id', 1))
-        except Exception:
-            tid = 1
-        try:
-            context['_next_timer_id'] = tid + 1
-        except Exception:
-            # best-effort: ignore if cannot write
-            pass
+    def _set_timeout(interp, this, args):
+        fn, delay, extra_args = _timer_args(args)
+        return context['_timers'].schedule(fn, delay, extra_args)
 
-        try:
-            context['_intervals'][tid] = (fn, extra_args)
-        except Exception:
-            # fall back to no-op if context not writable
-            return None
+    def _set_interval(interp, this, args):
+        fn, delay, extra_args = _timer_args(args)
+        return context['_timers'].schedule(fn, delay, extra_args, repeat=True)
 
-        try:
-            context['_timers'].append(('__interval__', tid))
-        except Exception:
-            # if timers not writable, still return id
-            pass
-        return tid
+    def _clear_timer(interp, this, args):
+        if args:
+            context['_timers'].cancel(args[0])
+        return None
 
-    def _clear_interval(interp, this, args):
-        try:
-            tid = int(args[0]) if args else None
-        except Exception:
-            tid = None
-        if tid is None:
-            return None
-        try:
-            context.get('_intervals', {}).pop(tid, None)
-        except Exception:
-            pass
+    def _queue_microtask(interp, this, args):
+        if args:
+            context['_timers'].queue_microtask(args[0])
         return None
 
-    # Register interval functions as JSFunction instances
+    def _performance_now(interp, this, args):
+        return context['_timers'].now
+
+    # Register timer functions as JSFunction instances
+    context.setdefault('setTimeout', JSFunction([], None, None, name='setTimeout', native_impl=_set_timeout))
     context.setdefault('setInterval', JSFunction([], None, None, name='setInterval', native_impl=_set_interval))
-    context.setdefault('clearInterval', JSFunction([], None, None, name='clearInterval', native_impl=_clear_interval))
+    context.setdefault('clearTimeout', JSFunction([], None, None, name='clearTimeout', native_impl=_clear_timer))
+    context.setdefault('clearInterval', JSFunction([], None, None, name='clearInterval', native_impl=_clear_timer))
+    context.setdefault('queueMicrotask', JSFunction([], None, None, name='queueMicrotask', native_impl=_queue_microtask))
+    context.setdefault('performance', {
+        'now': JSFunction([], None, None, name='now', native_impl=_performance_now),
+    })
 
     # Array prototype methods
     def _array_push(interp, this, args):
@@ -156,6 +586,9 @@ def register_builtins(context: Dict[str, Any], JSFunction):
         # Prefer dict semantics (the interpreter expects string-indexed dicts),
         # but tolerate other shapes to avoid silent failures when 'this' isn't a dict.
         try:
+            if this.__class__ is JSArray and this._items is not None:
+                this._items.extend(args)
+                return len(this._items)
             if isinstance(this, dict):
                 length = int(this.get("length", 0) or 0)
             else:
@@ -200,6 +633,11 @@ def register_builtins(context: Dict[str, Any], JSFunction):
     def _array_pop(interp, this, args):
         # Defensive pop: mirror _array_push fallback behavior.
         try:
+            if this.__class__ is JSArray and this._items is not None:
+                if not this._items:
+                    return context.get("undefined")
+                val = this._items.pop()
+                return context.get("undefined") if val is HOLE else val
             if isinstance(this, dict):
                 length = int(this.get("length", 0) or 0)
             else:
@@ -273,11 +711,7 @@ def register_builtins(context: Dict[str, Any], JSFunction):
             return context.get("undefined")
         
         length = int(this.get("length", 0) or 0)
-        for i in range(length):
-            key = str(i)
-            if key not in this:
-                continue
-            val = this.get(key)
+        for i, val in _array_elements(this, length):
             
             # Guard against deep recursion before callback
             if isinstance(cb, JSFunction):
@@ -303,17 +737,11 @@ def register_builtins(context: Dict[str, Any], JSFunction):
         cb = args[0] if args else None
         this_arg = args[1] if len(args) > 1 else None
         length = int(this.get("length", 0) or 0)
-        res: Dict[str, Any] = {"__proto__": Arr.prototype, "length": 0}
-        out_index = 0
+        out: List[Any] = []
         if not cb:
-            return res
+            return JSArray(proto=Arr.prototype)
         
-        for i in range(length):
-            key = str(i)
-            if key not in this:
-                # Skip holes in sparse arrays
-                continue
-            val = this.get(key)
+        for i, val in _array_elements(this, length):
             
             # Guard against deep recursion before callback
             if isinstance(cb, JSFunction):
@@ -331,26 +759,19 @@ def register_builtins(context: Dict[str, Any], JSFunction):
                     rv = context.get("undefined")
             else:
                 rv = context.get("undefined")
-            res[str(out_index)] = rv
-            out_index += 1
-        res["length"] = out_index
-        return res
+            out.append(rv)
+        return JSArray(out, proto=Arr.prototype)
     
     def _array_filter(interp, this, args):
         """Array.prototype.filter with stack depth guard."""
         cb = args[0] if args else None
         this_arg = args[1] if len(args) > 1 else None
         length = int(this.get("length", 0) or 0)
-        res: Dict[str, Any] = {"__proto__": Arr.prototype, "length": 0}
-        out_index = 0
+        out: List[Any] = []
         if not cb:
-            return res
+            return JSArray(proto=Arr.prototype)
         
-        for i in range(length):
-            key = str(i)
-            if key not in this:
-                continue
-            val = this.get(key)
+        for i, val in _array_elements(this, length):
             
             # Guard against deep recursion before callback
             if isinstance(cb, JSFunction):
@@ -370,10 +791,8 @@ def register_builtins(context: Dict[str, Any], JSFunction):
                 test = False
             
             if interp._is_truthy(test):
-                res[str(out_index)] = val
-                out_index += 1
-        res["length"] = out_index
-        return res
+                out.append(val)
+        return JSArray(out, proto=Arr.prototype)
     
     def _array_reduce(interp, this, args):
         """Array.prototype.reduce with stack depth guard (added for completeness)."""
@@ -392,21 +811,17 @@ def register_builtins(context: Dict[str, Any], JSFunction):
             # Find first non-hole element
             accumulator = context.get("undefined")
             start_idx = 0
-            for i in range(length):
-                key = str(i)
-                if key in this:
-                    accumulator = this.get(key)
-                    start_idx = i + 1
-                    break
+            for i, val in _array_elements(this, length):
+                accumulator = val
+                start_idx = i + 1
+                break
             if accumulator is context.get("undefined"):
                 raise JSError("TypeError: Reduce of empty array with no initial value")
         
         # Iterate and reduce
-        for i in range(start_idx, length):
-            key = str(i)
-            if key not in this:
+        for i, val in _array_elements(this, length):
+            if i < start_idx:
                 continue
-            val = this.get(key)
             
             # Guard against deep recursion before callback
             if isinstance(cb, JSFunction):
@@ -436,11 +851,7 @@ def register_builtins(context: Dict[str, Any], JSFunction):
         if not cb:
             return False
         
-        for i in range(length):
-            key = str(i)
-            if key not in this:
-                continue
-            val = this.get(key)
+        for i, val in _array_elements(this, length):
             
             # Guard against deep recursion before callback
             if isinstance(cb, JSFunction):
@@ -473,11 +884,7 @@ def register_builtins(context: Dict[str, Any], JSFunction):
         if not cb:
             return True
         
-        for i in range(length):
-            key = str(i)
-            if key not in this:
-                continue
-            val = this.get(key)
+        for i, val in _array_elements(this, length):
             
             # Guard against deep recursion before callback
             if isinstance(cb, JSFunction):
@@ -510,11 +917,7 @@ def register_builtins(context: Dict[str, Any], JSFunction):
         if not cb:
             return context.get("undefined")
         
-        for i in range(length):
-            key = str(i)
-            if key not in this:
-                continue
-            val = this.get(key)
+        for i, val in _array_elements(this, length):
             
             # Guard against deep recursion before callback
             if isinstance(cb, JSFunction):
@@ -547,11 +950,7 @@ def register_builtins(context: Dict[str, Any], JSFunction):
         if not cb:
             return -1
         
-        for i in range(length):
-            key = str(i)
-            if key not in this:
-                continue
-            val = this.get(key)
+        for i, val in _array_elements(this, length):
             
             # Guard against deep recursion before callback
             if isinstance(cb, JSFunction):
@@ -587,20 +986,18 @@ def register_builtins(context: Dict[str, Any], JSFunction):
             end = max(length + end, 0)
         else:
             end = min(end, length)
-        res: Dict[str, Any] = {"__proto__": Arr.prototype, "length": 0}
-        out_index = 0
+        if this.__class__ is JSArray and this._items is not None:
+            return JSArray(this._items[start:max(start, end)], proto=Arr.prototype)
+        out: List[Any] = []
         for i in range(start, max(start, end)):
             key = str(i)
-            if key in this:
-                res[str(out_index)] = this.get(key)
-            out_index += 1
-        res["length"] = out_index
-        return res
+            out.append(this.get(key) if key in this else HOLE)
+        return JSArray(out, proto=Arr.prototype)
 
     def _array_splice(interp, this, args):
         length = int(this.get("length", 0) or 0)
         if not args:
-            return {"__proto__": Arr.prototype, "length": 0}
+            return JSArray(proto=Arr.prototype)
         start = int(args[0])
         if start < 0:
             start = max(length + start, 0)
@@ -612,14 +1009,16 @@ def register_builtins(context: Dict[str, Any], JSFunction):
             delete_count = int(args[1])
             delete_count = max(0, min(delete_count, length - start))
         inserts = list(args[2:]) if len(args) > 2 else []
-        removed: Dict[str, Any] = {"__proto__": Arr.prototype, "length": 0}
-        rem_idx = 0
+        if this.__class__ is JSArray and this._items is not None:
+            items = this._items
+            removed_items = items[start:start + delete_count]
+            items[start:start + delete_count] = inserts
+            return JSArray(removed_items, proto=Arr.prototype)
+        removed_list: List[Any] = []
         for i in range(start, start + delete_count):
             k = str(i)
-            if k in this:
-                removed[str(rem_idx)] = this.get(k)
-            rem_idx += 1
-        removed["length"] = rem_idx
+            removed_list.append(this.get(k) if k in this else HOLE)
+        removed = JSArray(removed_list, proto=Arr.prototype)
         new_obj: Dict[str, Any] = {}
         idx = 0
         for i in range(0, start):
@@ -653,39 +1052,22 @@ def register_builtins(context: Dict[str, Any], JSFunction):
         length = int(this.get("length", 0) or 0)
         if from_index < 0:
             from_index = max(length + from_index, 0)
-        for i in range(from_index, length):
-            k = str(i)
-            if k not in this:
-                continue
-            if this.get(k) == search:
+        for i, val in _array_elements(this, length):
+            if i >= from_index and val == search:
                 return i
         return -1
 
     def _array_concat(interp, this, args):
-        res: Dict[str, Any] = {"__proto__": Arr.prototype, "length": 0}
-        out_idx = 0
-
-        def _append(val):
-            nonlocal out_idx
-            res[str(out_idx)] = val
-            out_idx += 1
-
+        out: List[Any] = []
         length = int(this.get("length", 0) or 0)
-        for i in range(length):
-            k = str(i)
-            if k in this:
-                _append(this.get(k))
+        out.extend(v for _, v in _array_elements(this, length))
         for a in args:
             if isinstance(a, dict) and "length" in a:
                 alen = int(a.get("length", 0) or 0)
-                for j in range(alen):
-                    kk = str(j)
-                    if kk in a:
-                        _append(a.get(kk))
+                out.extend(v for _, v in _array_elements(a, alen))
             else:
-                _append(a)
-        res["length"] = out_idx
-        return res
+                out.append(a)
+        return JSArray(out, proto=Arr.prototype)
 
     # Add this to register_builtins() in js_builtins.py, after the Array.prototype methods:
     
@@ -701,11 +1083,7 @@ def register_builtins(context: Dict[str, Any], JSFunction):
             return this
         
         length = int(this.get("length", 0) or 0)
-        for i in range(length):
-            key = str(i)
-            if key not in this:
-                continue
-            val = this.get(key)
+        for i, val in _array_elements(this, length):
             
             # jQuery convention: callback(index, value) - REVERSED!
             if isinstance(cb, JSFunction):
@@ -781,11 +1159,7 @@ def register_builtins(context: Dict[str, Any], JSFunction):
                     length = 0
                 
                 # **USE PYTHON LOOP - DO NOT call any JS function that might recurse!**
-                for i in range(length):
-                    key = str(i)
-                    if key not in obj:
-                        continue
-                    val = obj.get(key)
+                for i, val in _array_elements(obj, length):
                     
                     # jQuery convention: callback.call(element, index, element)
                     if isinstance(callback, JSFunction):
@@ -907,11 +1281,7 @@ def register_builtins(context: Dict[str, Any], JSFunction):
             if isinstance(v, (str, bool, int, float)):
                 return v
             if isinstance(v, list):
-                out = {'__proto__': Arr.prototype, 'length': 0}
-                for i, el in enumerate(v):
-                    out[str(i)] = _to_js(el)
-                out['length'] = len(v)
-                return out
+                return JSArray([_to_js(el) for el in v], proto=Arr.prototype)
             if isinstance(v, dict):
                 o = {}
                 for k, vv in v.items():
@@ -1093,15 +1463,14 @@ def register_builtins(context: Dict[str, Any], JSFunction):
                         length = int(value.get("length", 0) or 0)
                     except Exception:
                         length = 0
-                    for i in range(length):
-                        k = str(i)
-                        child_path = tuple(list(path) + [i])
-                        if k in value:
-                            pv = _serialize(value, k, value.get(k), stack, in_array=True, 
-                                          path=child_path, max_depth=max_depth)
-                            out_list.append(None if pv is UNSET else pv)
-                        else:
-                            out_list.append(None)
+                    for i, ev in _array_elements(value, length):
+                        if i > len(out_list):
+                            # holes serialize as null
+                            out_list.extend([None] * (i - len(out_list)))
+                        pv = _serialize(value, str(i), ev, stack, in_array=True,
+                                        path=path + (i,), max_depth=max_depth)
+                        out_list.append(None if pv is UNSET else pv)
+                    out_list.extend([None] * (length - len(out_list)))
                     stack.remove(vid)
                     return out_list
                     
@@ -1182,7 +1551,7 @@ def register_builtins(context: Dict[str, Any], JSFunction):
     def _object_keys(interp, this, args):
         """
         Return own enumerable property names as a JS-shaped array:
-        - result is a dict with '__proto__' set to Arr.prototype and numeric string keys plus 'length'.
+        - result is a JSArray with '__proto__' set to Arr.prototype.
         - skips '__proto__' to avoid prototype-pollution mixing.
         """
         target = args[0] if args else None
@@ -1202,18 +1571,8 @@ def register_builtins(context: Dict[str, Any], JSFunction):
         except Exception:
             names = []
 
-        res: Dict[str, Any] = {"__proto__": Arr.prototype, "length": 0}
-        idx = 0
-        for n in names:
-            try:
-                # always store property names as strings in the JS-shaped result
-                res[str(idx)] = str(n)
-            except Exception:
-                # skip problematic names
-                continue
-            idx += 1
-        res["length"] = idx
-        return res
+        # names are already coerced to strings above
+        return JSArray(names, proto=Arr.prototype)
 
     def _object_assign(interp, this, args):
         """
@@ -1267,6 +1626,11 @@ def register_builtins(context: Dict[str, Any], JSFunction):
                 return target
             except Exception:
                 return context.get("undefined")
+        # copied keys may shadow inherited ones: let compiled inline caches re-verify
+        try:
+            interp._note_shape_change()
+        except Exception:
+            pass
         return target
 
     def _has_own_property(interp, this, args):
@@ -1430,6 +1794,8 @@ def register_builtins(context: Dict[str, Any], JSFunction):
         """Array.isArray(obj) - critical for jQuery's each() to distinguish arrays from objects"""
         try:
             obj = args[0] if args else None
+            if isinstance(obj, JSArray):
+                return True
             # Check if object is array-like (has numeric 'length' and numeric indices)
             if isinstance(obj, dict) and 'length' in obj:
                 try:
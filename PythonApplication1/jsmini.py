@@ -17,6 +17,13 @@ import random
 import math
 import html
 import sys
+import os
+import hashlib
+import marshal
+import threading
+import time
+from array import array
+from collections import OrderedDict
 from html.parser import HTMLParser
 from typing import Any, Dict, List, Optional, Tuple
 try:
@@ -24,11 +31,19 @@ try:
 except ImportError:
     import js_builtins
 
+# list-backed JS arrays (see js_builtins.JSArray)
+JSArray = js_builtins.JSArray
+TimerQueue = js_builtins.TimerQueue
+HOLE = js_builtins.HOLE
+
 try:
     sys.setrecursionlimit(5000)  # Allow deep recursion for complex JS
 except Exception:
     pass  # Ignore if setting fails
 
+# Bump whenever tokenizer/parser output changes shape: it keys the parsed-AST cache.
+JSMINI_VERSION = '0.3'
+
 # --- Tokenizer --------------------------------------------------------------
 Token = Tuple[str, str]  # (type, value)
 
@@ -47,11 +62,11 @@ TOKEN_SPEC = [
 ]
 TOKEN_RE = re.compile('|'.join('(?P<%s>%s)' % pair for pair in TOKEN_SPEC), re.M)
 
-def tokenize(src: str) -> List[Token]:
-    """Tokenize source and include token start/end offsets for enhanced error reporting.
+def _tokenize_regex(src: str) -> List[Token]:
+    """Reference tokenizer driven by the combined TOKEN_RE alternation.
 
-    Returns list of 4-tuples (type, value, start, end).
-    Heuristic: tries to detect JS regex literals starting with '/' when context allows.
+    Kept for differential tests and benchmarks against the dispatching scanner
+    (`scan_tokens`); it returns the same 4-tuples as `tokenize`.
     """
     out = []
     pos = 0
@@ -104,20 +119,7 @@ def tokenize(src: str) -> List[Token]:
     while pos < L:
         m = TOKEN_RE.match(src, pos)
         if not m:
-            # Build informative error with surrounding snippet and offending character info
-            ch = src[pos] if pos < L else ''
-            ord_ch = ord(ch) if ch else None
-            window = 40
-            start_snip = max(0, pos - window)
-            end_snip = min(L, pos + window)
-            snippet = src[start_snip:end_snip].replace('\n', '\\n')
-            caret_pos = pos - start_snip
-            caret_line = ' ' * caret_pos + '^'
-            msg = (
-                f"Illegal character {repr(ch)} (ord={ord_ch}) in input at position {pos}.\n"
-                f"...{snippet}...\n   {caret_line}"
-            )
-            raise SyntaxError(msg)
+            raise _illegal_char_error(src, pos)
         typ = m.lastgroup
         val = m.group(0)
         start = m.start()
@@ -153,6 +155,320 @@ def tokenize(src: str) -> List[Token]:
     out.append(('EOF', '', L, L))
     return out
 
+def _illegal_char_error(src: str, pos: int) -> SyntaxError:
+    """Build informative error with surrounding snippet and offending character info."""
+    L = len(src)
+    ch = src[pos] if pos < L else ''
+    ord_ch = ord(ch) if ch else None
+    window = 40
+    start_snip = max(0, pos - window)
+    end_snip = min(L, pos + window)
+    snippet = src[start_snip:end_snip].replace('\n', '\\n')
+    caret_pos = pos - start_snip
+    caret_line = ' ' * caret_pos + '^'
+    msg = (
+        f"Illegal character {repr(ch)} (ord={ord_ch}) in input at position {pos}.\n"
+        f"...{snippet}...\n   {caret_line}"
+    )
+    return SyntaxError(msg)
+
+# -- Dispatching scanner -----------------------------------------------------
+# Each token class is recognised from its first character; only numbers,
+# identifiers, strings and regex literals need a (small, anchored) regex.
+# Tie-breaks follow TOKEN_RE exactly: NUMBER wins over PUNC for '.5',
+# COMMENT wins over OP for '//' and closed '/*', and OP is longest match.
+_NUMBER_RE = re.compile(TOKEN_SPEC[0][1])
+_IDENT_RE = re.compile(TOKEN_SPEC[2][1])
+_SKIP_RE = re.compile(TOKEN_SPEC[6][1])
+_STRING_RES = {
+    '"': re.compile(r'"(?:[^"\\]|\\.)*"'),
+    "'": re.compile(r"'(?:[^'\\]|\\.)*'"),
+}
+_REGEX_LIT_RE = re.compile(r'/((?:\\.|(?:\[(?:\\.|[^\]\\])*\])|[^/\\\n])*)/([gimuy]*)')
+
+_OPERATORS = (
+    '+=', '-=', '*=', '/=', '%=', '&=', '|=', '^=', '>>>=', '<<=', '>>=', '>>>', '<<', '>>',
+    '===', '!==', '==', '!=', '<=', '>=', '&&', '||', '++', '--',
+    '!', '&', '^', '|', '~', '+', '-', '*', '/', '%', '<', '>', '=',
+)
+# candidate operators per first character, longest first
+_OPS_BY_CHAR: Dict[str, Tuple[str, ...]] = {}
+for _op in sorted(_OPERATORS, key=len, reverse=True):
+    _OPS_BY_CHAR[_op[0]] = _OPS_BY_CHAR.get(_op[0], ()) + (_op,)
+del _op
+
+_REGEX_AFTER_PUNC = frozenset('({[,;:?')
+_REGEX_AFTER_WORD = frozenset((
+    'return', 'case', 'throw', 'else', 'new', 'typeof', 'instanceof', 'delete', 'void'
+))
+_KEYWORDS = (
+    'var', 'function', 'return', 'if', 'else', 'for', 'in', 'while', 'do', 'break', 'continue',
+    'switch', 'case', 'default', 'try', 'catch', 'finally', 'throw', 'new', 'this', 'typeof',
+    'instanceof', 'delete', 'void', 'true', 'false', 'null', 'undefined',
+)
+
+(_K_OTHER, _K_SKIP, _K_IDENT, _K_PUNC, _K_OP, _K_NUMBER, _K_DOT, _K_STRING, _K_SLASH) = range(9)
+_SCAN_KIND: Dict[str, int] = {}
+for _c in ' \t\r\n':
+    _SCAN_KIND[_c] = _K_SKIP
+for _c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_$':
+    _SCAN_KIND[_c] = _K_IDENT
+for _c in '(){},;[]:?':
+    _SCAN_KIND[_c] = _K_PUNC
+for _c in _OPS_BY_CHAR:
+    _SCAN_KIND[_c] = _K_OP
+for _c in '0123456789':
+    _SCAN_KIND[_c] = _K_NUMBER
+_SCAN_KIND['.'] = _K_DOT
+_SCAN_KIND['"'] = _SCAN_KIND["'"] = _K_STRING
+_SCAN_KIND['/'] = _K_SLASH
+del _c
+
+
+class TokenArrays:
+    """Compact token stream: parallel type/value lists and start/end offset arrays.
+
+    `types[i]`, `values[i]`, `starts[i]`, `ends[i]` describe token i; the last
+    token is always EOF.  Identifier, operator and punctuation values are
+    interned so repeated names share one string object.
+    """
+    __slots__ = ('types', 'values', 'starts', 'ends')
+
+    def __init__(self):
+        self.types: List[str] = []
+        self.values: List[str] = []
+        self.starts = array('q')
+        self.ends = array('q')
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, i):
+        return (self.types[i], self.values[i], self.starts[i], self.ends[i])
+
+    def pairs(self) -> List[Token]:
+        """(type, value) pairs as consumed by Parser."""
+        return list(zip(self.types, self.values))
+
+    def positions(self) -> List[Tuple[int, int]]:
+        return list(zip(self.starts, self.ends))
+
+    def as_tuples(self) -> List[Tuple[str, str, int, int]]:
+        return list(zip(self.types, self.values, self.starts, self.ends))
+
+
+def scan_tokens(src: str) -> TokenArrays:
+    """Tokenize `src` into a TokenArrays stream (same tokens as `_tokenize_regex`)."""
+    toks = TokenArrays()
+    _scan_into(toks, src, 0, None, None, {k: k for k in _KEYWORDS}, -1)
+    return toks
+
+def _scan_into(toks: TokenArrays, src: str, pos: int, prev_type, prev_val,
+               names: Dict[str, str], limit: int):
+    """Append up to `limit` tokens scanned from `pos` to `toks` (-1: no limit).
+
+    `prev_type`/`prev_val` describe the token before `pos` (regex heuristic) and
+    `names` is the interning table.  Returns the state to resume from as
+    (pos, prev_type, prev_val); pos is -1 once EOF has been appended.
+    """
+    types = toks.types
+    values = toks.values
+    starts = toks.starts
+    ends = toks.ends
+    add_type = types.append
+    add_val = values.append
+    add_start = starts.append
+    add_end = ends.append
+
+    kinds = _SCAN_KIND
+    ops_by_char = _OPS_BY_CHAR
+    ident_match = _IDENT_RE.match
+    number_match = _NUMBER_RE.match
+    skip_match = _SKIP_RE.match
+    names_get = names.setdefault
+
+    L = len(src)
+    while pos < L:
+        ch = src[pos]
+        kind = kinds.get(ch, _K_OTHER)
+        if kind == _K_IDENT:
+            end = ident_match(src, pos).end()
+            val = src[pos:end]
+            val = names_get(val, val)
+            typ = 'IDENT'
+        elif kind == _K_PUNC:
+            typ = 'PUNC'
+            val = ch
+            end = pos + 1
+        elif kind == _K_SKIP:
+            pos = skip_match(src, pos).end()
+            continue
+        elif kind == _K_OP:
+            for val in ops_by_char[ch]:
+                if src.startswith(val, pos):
+                    break
+            typ = 'OP'
+            end = pos + len(val)
+        elif kind == _K_NUMBER:
+            end = number_match(src, pos).end()
+            val = src[pos:end]
+            typ = 'NUMBER'
+        elif kind == _K_STRING:
+            m = _STRING_RES[ch].match(src, pos)
+            if m is None:
+                raise _illegal_char_error(src, pos)
+            end = m.end()
+            val = src[pos:end]
+            typ = 'STRING'
+        elif kind == _K_DOT:
+            m = number_match(src, pos)
+            if m is not None:
+                end = m.end()
+                val = src[pos:end]
+                typ = 'NUMBER'
+            else:
+                typ = 'PUNC'
+                val = '.'
+                end = pos + 1
+        elif kind == _K_SLASH:
+            nxt = src[pos + 1:pos + 2]
+            if nxt == '/':
+                nl = src.find('\n', pos + 2)
+                pos = L if nl < 0 else nl
+                continue
+            if nxt == '*':
+                close = src.find('*/', pos + 2)
+                if close >= 0:
+                    pos = close + 2
+                    continue
+            # a '/' may start a regex literal where an expression is expected
+            m = None
+            if (prev_type is None or prev_type == 'OP'
+                    or (prev_type == 'PUNC' and prev_val in _REGEX_AFTER_PUNC)
+                    or (prev_type == 'IDENT' and prev_val in _REGEX_AFTER_WORD)):
+                m = _REGEX_LIT_RE.match(src, pos)
+            if m is not None:
+                end = m.end()
+                val = src[pos:end]
+                typ = 'REGEX'
+            else:
+                typ = 'OP'
+                val = '/=' if nxt == '=' else '/'
+                end = pos + len(val)
+        else:
+            # non-ASCII decimal digits still match NUMBER (\d is Unicode-aware)
+            m = number_match(src, pos)
+            if m is None:
+                raise _illegal_char_error(src, pos)
+            end = m.end()
+            val = src[pos:end]
+            typ = 'NUMBER'
+        add_type(typ)
+        add_val(val)
+        add_start(pos)
+        add_end(end)
+        prev_type = typ
+        prev_val = val
+        pos = end
+        limit -= 1
+        if not limit:
+            return pos, prev_type, prev_val
+
+    add_type('EOF')
+    add_val('')
+    add_start(L)
+    add_end(L)
+    return -1, None, None
+
+def tokenize(src: str) -> List[Tuple[str, str, int, int]]:
+    """Tokenize source and include token start/end offsets for enhanced error reporting.
+
+    Returns list of 4-tuples (type, value, start, end).
+    Heuristic: tries to detect JS regex literals starting with '/' when context allows.
+    Use `scan_tokens` directly to get the compact array form.
+    """
+    return scan_tokens(src).as_tuples()
+
+class TokenStream:
+    """Lazily scanned token sequence feeding Parser through a sliding window.
+
+    Tokens are scanned `chunk` at a time.  `buf` holds (type, value) pairs for
+    absolute indices base .. base + len(buf) - 1 and `starts`/`ends` their
+    offsets; `pull` discards everything before the parser's oldest backtrack
+    mark, so memory stays proportional to lookahead, not file size.
+    Reading past EOF keeps returning EOF.  A scan error is raised only when
+    the parser reaches the offending position.
+    """
+    CHUNK = 256
+
+    def __init__(self, src: str, chunk: int = CHUNK):
+        self.src = src
+        self.chunk = max(1, int(chunk))
+        self.buf: List[Token] = []
+        self.starts = array('q')
+        self.ends = array('q')
+        self.base = 0
+        self.peak = 0
+        self.error: Optional[SyntaxError] = None
+        self._scratch = TokenArrays()
+        self._state = (0, None, None)
+        self._names = {k: k for k in _KEYWORDS}
+
+    def pull(self, i: int, keep_from: int) -> Token:
+        """Return token `i`, dropping tokens before absolute index `keep_from`."""
+        buf = self.buf
+        drop = min(keep_from, i) - self.base
+        if drop > 0:
+            del buf[:drop]
+            del self.starts[:drop]
+            del self.ends[:drop]
+            self.base += drop
+        while self.base + len(buf) <= i:
+            if self.error is not None:
+                raise self.error
+            pos, prev_type, prev_val = self._state
+            if pos < 0:
+                return buf[-1]
+            tmp = self._scratch
+            try:
+                self._state = _scan_into(tmp, self.src, pos, prev_type, prev_val, self._names, self.chunk)
+            except SyntaxError as e:
+                self.error = e
+            buf.extend(zip(tmp.types, tmp.values))
+            self.starts.extend(tmp.starts)
+            self.ends.extend(tmp.ends)
+            del tmp.types[:], tmp.values[:], tmp.starts[:], tmp.ends[:]
+            if len(buf) > self.peak:
+                self.peak = len(buf)
+        return buf[i - self.base]
+
+    def position(self, i: int) -> Tuple[int, int]:
+        """(start, end) source offsets of buffered token `i` (clamped to the window)."""
+        if not self.buf:
+            return (0, 0)
+        j = min(max(i - self.base, 0), len(self.buf) - 1)
+        return (self.starts[j], self.ends[j])
+
+def _iter_token_window(src: str, lo: int, hi: int):
+    """Re-scan `src` and yield (index, type, value, start, end) for lo <= index < hi.
+
+    Returns the total token count (including EOF) as the generator's value; only
+    one chunk of tokens is held at a time.
+    """
+    tmp = TokenArrays()
+    state = (0, None, None)
+    names = {k: k for k in _KEYWORDS}
+    n = 0
+    while state[0] >= 0:
+        state = _scan_into(tmp, src, state[0], state[1], state[2], names, TokenStream.CHUNK)
+        count = len(tmp)
+        if n < hi and n + count > lo:
+            for j in range(max(0, lo - n), min(count, hi - n)):
+                yield (n + j, tmp.types[j], tmp.values[j], tmp.starts[j], tmp.ends[j])
+        n += count
+        del tmp.types[:], tmp.values[:], tmp.starts[:], tmp.ends[:]
+    return n
+
 def _format_parse_error_context(src: str, err_pos: int, err_len: int = 1, window: int = 40) -> str:
     """Return a short snippet around err_pos with a caret marker and (line,col) info."""
     try:
@@ -188,12 +504,51 @@ def _format_parse_error_context(src: str, err_pos: int, err_len: int = 1, window
 # --- Parser -----------------------------------------------------------------
 
 class Parser:
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
+    def __init__(self, tokens):
+        """`tokens` is a list of (type, value) pairs or a TokenStream."""
         self.i = 0
+        self._marks: List[int] = []
+        if isinstance(tokens, TokenStream):
+            self._stream = tokens
+            self.tokens = tokens.buf   # sliding window, re-based by _pull
+        else:
+            self._stream = None
+            self.tokens = tokens
+        self._base = 0
 
     def peek(self):
-        return self.tokens[self.i]
+        try:
+            return self.tokens[self.i - self._base]
+        except IndexError:
+            return self._pull(self.i)
+
+    def _pull(self, i: int):
+        stream = self._stream
+        if stream is None:
+            return self.tokens[i]
+        keep = min(self._marks) if self._marks else self.i
+        tok = stream.pull(i, keep)
+        self._base = stream.base
+        return tok
+
+    def _peek_at(self, i: int):
+        j = i - self._base
+        if 0 <= j < len(self.tokens):
+            return self.tokens[j]
+        if self._stream is None:
+            return ('EOF', '')
+        return self._pull(i)
+
+    def _mark(self) -> int:
+        """Pin the current position so a later `_reset` can backtrack to it."""
+        self._marks.append(self.i)
+        return self.i
+
+    def _release(self, mark: int) -> None:
+        try:
+            self._marks.remove(mark)
+        except ValueError:
+            pass
 
     def eat(self, typ: Optional[str]=None, val: Optional[str]=None):
         t, v = self.peek()
@@ -227,16 +582,15 @@ class Parser:
         # support label: statement (e.g. `label: { ... }`), avoiding reserved keywords
         if self.match('IDENT'):
             # lookahead for colon token
-            if self.i + 1 < len(self.tokens):
-                nt, nv = self.tokens[self.i + 1]
-                if nt == 'PUNC' and nv == ':':
-                    # avoid treating language keywords as labels
-                    cur_ident = self.peek()[1]
-                    if cur_ident not in ('var','function','return','if','while','do','for','switch','try','throw','break','continue'):
-                        name = self.eat('IDENT')[1]
-                        self.eat('PUNC', ':')
-                        stmt = self.parse_statement()
-                        return ('label', name, stmt)
+            nt, nv = self._peek_at(self.i + 1)
+            if nt == 'PUNC' and nv == ':':
+                # avoid treating language keywords as labels
+                cur_ident = self.peek()[1]
+                if cur_ident not in ('var','function','return','if','while','do','for','switch','try','throw','break','continue'):
+                    name = self.eat('IDENT')[1]
+                    self.eat('PUNC', ':')
+                    stmt = self.parse_statement()
+                    return ('label', name, stmt)
 
         if self.match('IDENT','var'):
             return self.parse_var_decl()
@@ -400,46 +754,51 @@ class Parser:
             else:
                 # Parse a left-hand-side candidate using parse_call_member so we don't
                 # accidentally consume an `in` token as a binary operator.
-                saved_i = self.i
-                lhs_candidate = None
+                saved_i = self._mark()  # pins the token window while we may backtrack
                 try:
-                    lhs_candidate = self.parse_call_member()
-                except SyntaxError:
-                    # restore on failure
-                    self.i = saved_i
                     lhs_candidate = None
+                    try:
+                        lhs_candidate = self.parse_call_member()
+                    except SyntaxError:
+                        # restore on failure
+                        self.i = saved_i
+                        lhs_candidate = None
+
+                    # If we see `in` after a valid LHS candidate, it's a for-in form.
+                    is_for_in = lhs_candidate is not None and self.match('IDENT', 'in')
+                    if not is_for_in:
+                        # Otherwise treat parsed content as the init expression of a normal C-style for.
+                        # If we restored earlier, parse a full expression now.
+                        if lhs_candidate is None:
+                            init = self.parse_expression()
+                        else:
+                            # parse_call_member may have consumed only a left-hand prefix (e.g. a string or id)
+                            # while the full init expression continues (e.g. `"boolean" == typeof s ...`).
+                            # If the next token can continue an expression, restore and parse the full expression.
+                            try:
+                                t, v = self.peek()
+                            except Exception:
+                                t, v = None, None
+                            # Accept tokens that indicate the expression continues:
+                            # - operator tokens (OP)
+                            # - identifiers that are binary operators (e.g. 'in', 'instanceof' stored in BINOPS)
+                            # - comma (',' PUNC) which is the comma operator and valid inside `for` init clause
+                            if t == 'OP' or (t == 'IDENT' and v in self.BINOPS) or (t == 'PUNC' and v == ','):
+                                # restore position and parse the complete expression
+                                self.i = saved_i
+                                init = self.parse_expression()
+                            else:
+                                init = lhs_candidate
+                finally:
+                    self._release(saved_i)
 
-                # If we see `in` after a valid LHS candidate, it's a for-in form.
-                if lhs_candidate is not None and self.match('IDENT', 'in'):
+                if is_for_in:
                     self.eat('IDENT', 'in')
                     right = self.parse_expression()
                     self.eat('PUNC', ')')
                     body = self.parse_statement()
                     return ('for_in', lhs_candidate, right, body)
 
-                # Otherwise treat parsed content as the init expression of a normal C-style for.
-                # If we restored earlier, parse a full expression now.
-                if lhs_candidate is None:
-                    init = self.parse_expression()
-                else:
-                    # parse_call_member may have consumed only a left-hand prefix (e.g. a string or id)
-                    # while the full init expression continues (e.g. `"boolean" == typeof s ...`).
-                    # If the next token can continue an expression, restore and parse the full expression.
-                    try:
-                        t, v = self.peek()
-                    except Exception:
-                        t, v = None, None
-                    # Accept tokens that indicate the expression continues:
-                    # - operator tokens (OP)
-                    # - identifiers that are binary operators (e.g. 'in', 'instanceof' stored in BINOPS)
-                    # - comma (',' PUNC) which is the comma operator and valid inside `for` init clause
-                    if t == 'OP' or (t == 'IDENT' and v in self.BINOPS) or (t == 'PUNC' and v == ','):
-                        # restore position and parse the complete expression
-                        self.i = saved_i
-                        init = self.parse_expression()
-                    else:
-                        init = lhs_candidate
-
                 # consume required semicolon (best-effort recovery if missing)
                 if self.match('PUNC', ';'):
                     self.eat('PUNC', ';')
@@ -771,23 +1130,20 @@ class Parser:
 def parse(src: str):
     """
     Parse source into AST with improved SyntaxError messages.
-    - Tokenizer now returns positional info; parser instance keeps positions so
-      we can map token index to source offsets on error.
+    - Tokens are scanned lazily through a TokenStream; the parser only keeps a
+      small window, whose offsets map the failing token index back to source.
     """
-    # produce raw tokens with positions
-    raw_toks = tokenize(src)
-    # keep tokens in Parser as (type,value) for backwards-compatible parsing
-    toks = [(t, v) for (t, v, s, e) in raw_toks]
-    positions = [(s, e) for (t, v, s, e) in raw_toks]
-
-    p = Parser(toks)
+    stream = TokenStream(src)
+    p = Parser(stream)
     # attach helper metadata for error reporting
-    p._token_positions = positions
     p._src_text = src
 
     try:
         return p.parse_program()
     except SyntaxError as se:
+        # scanner errors already carry their own snippet
+        if se is stream.error:
+            raise
         # try to locate failure token index and position
         try:
             idx = getattr(p, 'i', None)
@@ -796,10 +1152,9 @@ def parse(src: str):
             # clamp idx
             if idx < 0:
                 idx = 0
-            if idx >= len(p._token_positions):
-                idx = len(p._token_positions) - 1
-            start, end = p._token_positions[idx]
-            token = toks[idx] if idx < len(toks) else ('', '')
+            start, end = stream.position(idx)
+            j = idx - stream.base
+            token = stream.buf[j] if 0 <= j < len(stream.buf) else ('', '')
             context = _format_parse_error_context(src, start, max(1, end - start))
             # augment message with token info + snippet
             msg = f"SyntaxError at token #{idx} {token!r}: {se}\n{context}"
@@ -826,42 +1181,110 @@ class ContinueExc(Exception):
     def __init__(self, label: Optional[str] = None):
         self.label = label
 
+class _Unset:
+    """Marker for a declared-but-not-yet-assigned slot (see SlotEnv)."""
+    def __repr__(self):
+        return "<unset>"
+UNSET = _Unset()
+
+_NO_SLOTS: Dict[str, int] = {}
+# Parent-chain walks longer than this are checked for cycles (defensive).
+_ENV_CYCLE_CHECK = 10_000
+
 class Env:
+    # static slot layout (name -> index); plain environments have none
+    layout: Dict[str, int] = _NO_SLOTS
+
     def __init__(self, parent: Optional['Env']=None):
         self.vars: Dict[str, Any] = {}
         self.parent = parent
 
-    def get(self, name: str):
-        # Iterative lookup with cycle detection to avoid infinite recursion when
-        # parent chains contain cycles (defensive).
+    def _check_cycle(self):
+        # Defensive: surface a clearer error instead of looping forever.
         cur = self
         seen = set()
         while cur is not None:
-            cid = id(cur)
-            if cid in seen:
-                # Defensive: stop and surface a clearer error instead of RecursionError.
+            if id(cur) in seen:
                 raise RuntimeError("Environment parent chain contains a cycle")
-            seen.add(cid)
+            seen.add(id(cur))
+            cur = cur.parent
+
+    def _find(self, name: str):
+        """Return the nearest environment binding `name`, or None."""
+        cur = self
+        hops = 0
+        while cur is not None:
+            if name in cur.vars:
+                return cur
+            if cur.layout:
+                i = cur.layout.get(name)
+                if i is not None and cur.slots[i] is not UNSET:
+                    return cur
+            cur = cur.parent
+            hops += 1
+            if hops == _ENV_CYCLE_CHECK:
+                self._check_cycle()
+        return None
+
+    def get(self, name: str):
+        cur = self
+        hops = 0
+        while cur is not None:
             if name in cur.vars:
                 return cur.vars[name]
+            if cur.layout:
+                i = cur.layout.get(name)
+                if i is not None:
+                    v = cur.slots[i]
+                    if v is not UNSET:
+                        return v
             cur = cur.parent
+            hops += 1
+            if hops == _ENV_CYCLE_CHECK:
+                self._check_cycle()
         raise NameError(name)
 
+    def has_local(self, name: str) -> bool:
+        return name in self.vars
+
     def set_local(self, name: str, value: Any):
         self.vars[name] = value
 
     def set(self, name: str, value: Any):
         # set on nearest environment that already has the name, otherwise local
-        if name in self.vars:
-            self.vars[name] = value
+        target = self._find(name)
+        if target is None:
+            self.set_local(name, value)
+        elif name in target.vars:
+            target.vars[name] = value
+        else:
+            target.slots[target.layout[name]] = value
+
+class SlotEnv(Env):
+    """Environment whose statically declared names live in a fixed-size list.
+
+    `layout` maps name -> slot index and is shared by every environment created
+    for the same scope (computed by `Compiler`); names outside the layout fall
+    back to the `vars` dict so dynamic bindings keep working.
+    """
+
+    def __init__(self, parent: Optional[Env], layout: Dict[str, int]):
+        self.vars = {}
+        self.parent = parent
+        self.layout = layout
+        self.slots = [UNSET] * len(layout)
+
+    def has_local(self, name: str) -> bool:
+        i = self.layout.get(name)
+        if i is not None:
+            return self.slots[i] is not UNSET
+        return name in self.vars
+
+    def set_local(self, name: str, value: Any):
+        i = self.layout.get(name)
+        if i is not None:
+            self.slots[i] = value
             return
-        if self.parent:
-            try:
-                self.parent.get(name)
-                self.parent.set(name, value)
-                return
-            except NameError:
-                pass
         self.vars[name] = value
 
 class JSFunction:
@@ -876,6 +1299,8 @@ class JSFunction:
         self.name = name
         # Optional native implementation: native_impl(interpreter, this, args) -> value
         self.native_impl = native_impl
+        # Compiled body for the closure engine (set by `Compiler`, or lazily on first call)
+        self._compiled = None
         # each function gets its own prototype object by default; fall back to class-level shared prototype
         try:
             # keep per-instance prototype but if absent, point at class prototype
@@ -1068,12 +1493,16 @@ class JSFunction:
                     pass
 
         # Scripted function
-        local = Env(self.env)
-        local.set_local('this', this)
-        for i, p in enumerate(self.params):
-            local.set_local(p, args[i] if i < len(args) else undefined)
-        if self.name:
-            local.set_local(self.name, self)
+        new_env = getattr(interp, '_new_call_env', None)
+        if new_env is not None:
+            local = new_env(self, this, args)
+        else:
+            local = Env(self.env)
+            local.set_local('this', this)
+            for i, p in enumerate(self.params):
+                local.set_local(p, args[i] if i < len(args) else undefined)
+            if self.name:
+                local.set_local(self.name, self)
 
         fn_label = self.debug_label()
         try:
@@ -1116,6 +1545,9 @@ class JSFunction:
                         interp._per_fn_call_counts[fn_id] = interp._per_fn_call_counts.get(fn_id, 0) + 1
                 except Exception:
                     pass
+                run_body = getattr(interp, '_run_function_body', None)
+                if run_body is not None:
+                    return run_body(self, local, this)
                 return interp._eval_stmt(self.body, local, this)
             except ReturnExc as r:
                 return r.value
@@ -1164,7 +1596,7 @@ class ReturnExc(Exception):
         self.value = value
 
 class Interpreter:
-    def __init__(self, globals_map: Optional[Dict[str, Any]] = None):
+    def __init__(self, globals_map: Optional[Dict[str, Any]] = None, engine: str = 'tree'):
         self.global_env = Env()
         if globals_map:
             for k, v in globals_map.items():
@@ -1183,6 +1615,11 @@ class Interpreter:
         # Threshold at which we abort with a descriptive RuntimeError.
         # Applied to the per-function DEPTH so we stop before Python recursion blows up.
         self._per_fn_call_threshold: int = 1500  # Increased from 1200 for jQuery
+        # Execution engine: 'tree' walks the parser tuples directly (reference
+        # implementation); 'closure' runs bodies pre-translated by `Compiler`.
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown jsmini engine {engine!r} (expected one of {ENGINES})")
+        self._engine = engine
 
         global _LAST_INTERPRETER
         try:
@@ -1193,18 +1630,38 @@ class Interpreter:
         """Prototype-aware property lookup with cycle detection. Returns `undefined` when not found."""
     def _prop_get(self, obj, key):
         try:
+            # list-backed arrays: numeric index straight into the element list
+            if obj.__class__ is JSArray and key.__class__ is float:
+                items = obj._items
+                if items is not None and key.is_integer() and 0 <= key < len(items):
+                    v = items[int(key)]
+                    if v is not HOLE:
+                        return v
             # dict-like JS objects: walk __proto__ chain with cycle detection
             if isinstance(obj, dict):
-                lookup_key = self._norm_prop_key(key)
+                lookup_key = key if type(key) is str else self._norm_prop_key(key)
                 cur = obj
-                seen = set()  # Track visited object IDs to detect cycles
+                if obj.__class__ is JSArray:
+                    # one call for the array's own elements/length, then walk from its prototype
+                    v = obj.get(lookup_key, _MISSING)
+                    if v is not _MISSING:
+                        return v
+                    cur = _dict_get(obj, '__proto__', None)
+                # Ordinary chains are short: only track visited objects once
+                # the walk gets long enough that a cycle is plausible.
+                depth = 0
+                seen = None
                 
                 while cur is not None:
-                    obj_id = id(cur)
-                    if obj_id in seen:
-                        # Cycle detected in prototype chain - return undefined to break loop
-                        return undefined
-                    seen.add(obj_id)
+                    depth += 1
+                    if depth > _PROTO_WALK_UNCHECKED:
+                        if seen is None:
+                            seen = set()
+                        obj_id = id(cur)
+                        if obj_id in seen:
+                            # Cycle detected in prototype chain - return undefined to break loop
+                            return undefined
+                        seen.add(obj_id)
                     
                     if lookup_key in cur:
                         return cur[lookup_key]
@@ -1241,16 +1698,32 @@ class Interpreter:
             return undefined
     
     def _prop_set(self, obj, key, value):
-        """Interpreter method: set own property on object (no prototype walk)."""
+        """Interpreter method: set own property on object (no prototype walk).
+
+        Adding a key or relinking `__proto__` bumps the shape version that
+        compiled inline caches validate against.
+        """
         try:
+            if obj.__class__ is JSArray and key.__class__ is float:
+                items = obj._items
+                if items is not None and key.is_integer() and 0 <= key < len(items) and items[int(key)] is not HOLE:
+                    items[int(key)] = value
+                    return True
             if isinstance(obj, dict):
-                obj[self._norm_prop_key(key)] = value
+                k = self._norm_prop_key(key)
+                if k not in obj or k == '__proto__':
+                    _SHAPE_VERSION[0] += 1
+                obj[k] = value
                 return True
             setattr(obj, key, value)
             return True
         except Exception:
             return False
      
+    def _note_shape_change(self):
+        """Invalidate inline caches after host code restructured JS objects directly."""
+        _SHAPE_VERSION[0] += 1
+
     def _norm_prop_key(self, key):
         """Normalize a property key to the string form used for dict-backed JS objects.
      
@@ -1287,15 +1760,89 @@ class Interpreter:
     def run_ast(self, ast):
         return self._eval_prog(ast, self.global_env)
      
+    def _new_call_env(self, fn, this, args):
+        """Build the activation environment for a scripted call of `fn`."""
+        if getattr(self, '_engine', 'tree') == 'closure':
+            code = getattr(fn, '_compiled', None)
+            if code is None:
+                # function created by the tree-walker (or before the engine switch)
+                code = _COMPILER.function_code(fn.params, fn.name, fn.body, None)
+                try:
+                    fn._compiled = code
+                except Exception:
+                    pass
+            return code.frame(fn, this, args)
+        local = Env(fn.env)
+        local.set_local('this', this)
+        for i, p in enumerate(fn.params):
+            local.set_local(p, args[i] if i < len(args) else undefined)
+        if fn.name:
+            local.set_local(fn.name, fn)
+        return local
+
+    def _run_function_body(self, fn, local, this):
+        """Execute a scripted JSFunction body using the selected engine."""
+        if getattr(self, '_engine', 'tree') == 'closure' and isinstance(local, SlotEnv):
+            return fn._compiled(self, local, this)
+        return self._eval_stmt(fn.body, local, this)
+
+    def _exec_check(self, node):
+        """Trace/limit instrumentation shared with compiled statements (see `_eval_stmt`)."""
+        if self._trace and (self._exec_count % 50000) == 0:
+            print(f"[jsmini.trace] executed={self._exec_count} call_stack={self._call_stack}")
+        if self._exec_limit and self._exec_count > self._exec_limit:
+            raise RuntimeError(
+                f"Execution limit exceeded ({self._exec_count} statements). "
+                f"Call stack (top->bottom): {self._call_stack}. Current node: {node!r}"
+            )
+
+    def _note_js_call(self, fn_val):
+        """Per-function reentrancy guard — count repeated invocations of `fn_val`."""
+        try:
+            fid = id(fn_val)
+            cnt = self._per_fn_call_counts.get(fid, 0) + 1
+            self._per_fn_call_counts[fid] = cnt
+            if self._per_fn_call_threshold and cnt > self._per_fn_call_threshold:
+                # Emit compressed call stack and annotate the offending function
+                try:
+                    cs = list(getattr(self, '_call_stack', []))
+                    cs_comp = JSFunction._compress_call_stack(cs)
+                    import sys, re
+                    print(f"[jsmini.recursion] Per-function call threshold exceeded for {fn_val.debug_label()} (count={cnt}). Call stack:", file=sys.stderr)
+                    for line in cs_comp[-80:]:
+                        m = re.search(r'@(\d+)', line)
+                        if m:
+                            try:
+                                fn_id = int(m.group(1))
+                                snip = JSFUNCTION_REGISTRY.get(fn_id)
+                                if snip:
+                                    print(f"  {line} -> snippet: {snip!r}", file=sys.stderr)
+                                    continue
+                            except Exception:
+                                pass
+                        print(f"  {line}", file=sys.stderr)
+                except Exception:
+                    pass
+                raise RuntimeError(f"Per-function recursion limit hit for {fn_val.debug_label()} (count={cnt})")
+        except Exception:
+            # if guard bookkeeping fails, continue without guard
+            pass
+
     def _eval_prog(self, node, env):
         assert node[0] == 'prog'
         res = undefined
 
         jquery_each_depth = getattr(self, '_jquery_each_depth', 0)
+        steps = None
+        if getattr(self, '_engine', 'tree') == 'closure':
+            steps = _COMPILER.compile_program(node)
 
         try:
-            for st in node[1]:
-                res = self._eval_stmt(st, env, None)
+            for idx, st in enumerate(node[1]):
+                if steps is None:
+                    res = self._eval_stmt(st, env, None)
+                else:
+                    res = steps[idx](self, env, None)
                 
                 # **GUARD: Detect runaway jQuery.each recursion**
                 try:
@@ -1652,6 +2199,7 @@ class Interpreter:
                         if isinstance(base, dict):
                             if key in base:
                                 del base[key]
+                                _SHAPE_VERSION[0] += 1
                             return True
                         # try attribute deletion on host objects
                         try:
@@ -1668,7 +2216,7 @@ class Interpreter:
                     # If it's a property on global_env represented as dict, allow delete
                     try:
                         # If variable exists in current local env, JS semantics: delete variable -> false
-                        if name in env.vars:
+                        if env.has_local(name):
                             return False
                     except Exception:
                         pass
@@ -1774,15 +2322,8 @@ class Interpreter:
                     key = prop_node[1]
                 else:
                     key = self._eval_expr(prop_node, env, this)
-                try:
-                    if isinstance(tgt_obj, dict):
-                        # always coerce property keys to string for dict-like JS objects
-                        tgt_obj[self._norm_prop_key(key)] = value
-                    else:
-                        setattr(tgt_obj, key, value)
-                    return True
-                except Exception:
-                    return False
+                # always coerce property keys to string for dict-like JS objects
+                return self._prop_set(tgt_obj, key, value)
             return False
      
         # prefix ++/--
@@ -1835,7 +2376,7 @@ class Interpreter:
         # Array literal: ('arr', [elem_node, ...]) - supports holes represented as ('undef', None)
         if t == 'arr':
             _, elems = node
-            out: Dict[str, Any] = {'__proto__': None}
+            out = JSArray()
             # Try to get Arr.prototype from context
             try:
                 arr_ctor = self._context.get('Array') if self._context else None
@@ -1843,19 +2384,17 @@ class Interpreter:
                     out['__proto__'] = arr_ctor.prototype
             except Exception:
                 pass
-            idx = 0
+            items = out._items
             for el in elems:
                 # sparse array hole
                 if isinstance(el, tuple) and el and el[0] == 'undef':
-                    idx += 1
+                    items.append(HOLE)
                     continue
                 try:
                     v = self._eval_expr(el, env, this)
                 except Exception:
                     v = undefined
-                out[str(idx)] = v
-                idx += 1
-            out['length'] = idx
+                items.append(v)
             return out
      
         if t == 'id':
@@ -2056,13 +2595,7 @@ class Interpreter:
                     key = prop_node[1]
                 else:
                     key = self._eval_expr(prop_node, env, this)
-                try:
-                    if isinstance(target, dict):
-                        target[self._norm_prop_key(key)] = r
-                    else:
-                        setattr(target, key, r)
-                except Exception:
-                    pass
+                self._prop_set(target, key, r)
                 return r
             raise RuntimeError("Invalid assignment target")
      
@@ -2109,37 +2642,7 @@ class Interpreter:
      
             # JSFunction (scripted/native)
             if isinstance(fn_val, JSFunction):
-                # New: per-function reentrancy guard — count repeated invocations
-                try:
-                    fid = id(fn_val)
-                    cnt = self._per_fn_call_counts.get(fid, 0) + 1
-                    self._per_fn_call_counts[fid] = cnt
-                    if self._per_fn_call_threshold and cnt > self._per_fn_call_threshold:
-                        # Emit compressed call stack and annotate the offending function
-                        try:
-                            cs = list(getattr(self, '_call_stack', []))
-                            cs_comp = JSFunction._compress_call_stack(cs)
-                            import sys, re
-                            print(f"[jsmini.recursion] Per-function call threshold exceeded for {fn_val.debug_label()} (count={cnt}). Call stack:", file=sys.stderr)
-                            for line in cs_comp[-80:]:
-                                m = re.search(r'@(\d+)', line)
-                                if m:
-                                    try:
-                                        fn_id = int(m.group(1))
-                                        snip = JSFUNCTION_REGISTRY.get(fn_id)
-                                        if snip:
-                                            print(f"  {line} -> snippet: {snip!r}", file=sys.stderr)
-                                            continue
-                                    except Exception:
-                                        pass
-                                print(f"  {line}", file=sys.stderr)
-                        except Exception:
-                            pass
-                        raise RuntimeError(f"Per-function recursion limit hit for {fn_val.debug_label()} (count={cnt})")
-                except Exception:
-                    # if guard bookkeeping fails, continue without guard
-                    pass
-     
+                self._note_js_call(fn_val)
                 return fn_val.call(self, receiver, args)
      
             # Host python-callable (native helpers)
@@ -2314,290 +2817,1453 @@ class Interpreter:
         return None
      
     def _is_truthy(self, v):
-        if v is undefined or v is None: return False
-        if isinstance(v, bool): return v
-        if isinstance(v, (int,float)): return v != 0
-        if isinstance(v, str): return v != ''
-        if isinstance(v, (list, dict)): return True
-        return True
-    
+        return _truthy(v)
 
-# --- Tiny DOM shim helpers --------------------------------------------------
-# --- Tiny DOM shim helpers --------------------------------------------------
-class JSList:
-    """Small wrapper that behaves like a JS Array for our shim:
-    - exposes .length property
-    - supports append, indexing, iteration and a Pythonic repr
-    """
-    def __init__(self, items: Optional[List[Any]] = None):
-        self._list: List[Any] = list(items or [])
 
-    def append(self, item: Any) -> None:
-        self._list.append(item)
+def _truthy(v):
+    """JS truthiness (module-level so compiled closures avoid a method lookup)."""
+    if v is undefined or v is None: return False
+    if isinstance(v, bool): return v
+    if isinstance(v, (int,float)): return v != 0
+    if isinstance(v, str): return v != ''
+    if isinstance(v, (list, dict)): return True
+    return True
+    
 
-    def __len__(self) -> int:
-        return len(self._list)
+# --- Closure compiler (opt-in engine) ---------------------------------------
+# Selectable via make_context(engine=...) / run_with_interpreter(..., engine=...).
+ENGINES = ('tree', 'closure')
 
-    def __repr__(self) -> str:
-        return repr(self._list)
 
-    def __getitem__(self, idx: int) -> Any:
+def _invoke(it, fn_val, receiver, args):
+    """Call `fn_val` the way `_eval_expr` does for a 'call' node."""
+    # JSFunction (scripted/native)
+    if isinstance(fn_val, JSFunction):
+        it._note_js_call(fn_val)
+        return fn_val.call(it, receiver, args)
+    # Host python-callable (native helpers)
+    if callable(fn_val):
         try:
-            return self._list[idx]
-        except Exception:
-            return None
-
-    def __iter__(self):
-        return iter(self._list)
-
-    @property
-    def length(self) -> int:
-        return len(self._list)
-
-    def get(self, idx: int, default: Any = None) -> Any:
-        if 0 <= idx < len(self._list):
-            return self._list[idx]
-        return default
+            if receiver is not None:
+                return fn_val(receiver, *args)
+            return fn_val(*args)
+        except TypeError:
+            return fn_val(*args)
+    return undefined
 
 
-class Element:
-    def __init__(self, tag: str):
-        self.tagName = tag
-        self.attrs: Dict[str, Any] = {}
-        self.children: JSList = JSList()
-        self.id: Optional[str] = None
-        self.parent = None
-        self._class_set = set()
-        # Host / document links (set by make_dom_shim or when appended)
-        self._host = None
-        self._owner_document = None
-        # DOM change logger (callable: (element, op, details_dict) -> None), injected by make_context/__enableDomLog
-        self._dom_log = None
-            
-    def _dom_path(self) -> str:
-        """Return a simple CSS-like path for this element (#id > tag.class)."""
+def _to_number(v):
+    if v is undefined or v is None:
+        return 0.0
+    if isinstance(v, bool):
+        return 1.0 if v else 0.0
+    if isinstance(v, (int, float)):
+        return float(v)
+    try:
+        return float(v)
+    except Exception:
         try:
-            parts = []
-            cur = self
-            while isinstance(cur, Element):
-                name = cur.tagName or 'node'
-                pid = f"#{cur.id}" if cur.id else ''
-                cls = cur.attrs.get('class') or ''
-                cls_sfx = ('.' + '.'.join(cls.split())) if cls else ''
-                parts.append(f"{name}{pid}{cls_sfx}")
-                cur = getattr(cur, 'parent', None)
-            return ' > '.join(reversed(parts))
+            return float(str(v))
         except Exception:
-            return self.tagName or 'node'
+            return float('nan')
 
-    def _log_change(self, op: str, details: Dict[str, Any]) -> None:
-        try:
-            cb = getattr(self, '_dom_log', None)
-            if not callable(cb):
-                # fallback: try from ownerDocument (document dict stores fn under '__dom_log_fn')
-                try:
-                    doc = getattr(self, '_owner_document', None)
-                    if isinstance(doc, dict):
-                        cb = doc.get('__dom_log_fn')
-                except Exception:
-                    cb = None
-            if callable(cb):
-                cb(self, op, details or {})
-        except Exception:
-            pass
 
-    def _notify_dom_change(self):
-        """
-        Best-effort: when this element (or any descendant) mutates, push updated body HTML
-        through host.setRaw(). Uses ownerDocument['body'].innerHTML for serialization.
-        """
+def _to_int32(val):
+    try:
+        n = int(float(val))
+    except Exception:
         try:
-            host = self._host
-            doc = self._owner_document
-            if not host or not isinstance(host, dict):
-                return
-            if not doc or not isinstance(doc, dict):
-                return
-            body = doc.get('body')
-            if not isinstance(body, Element):
-                return
-            set_raw = host.get('setRaw')
-            if callable(set_raw):
-                set_raw(body.innerHTML)
+            n = int(str(val))
         except Exception:
-            pass
+            n = 0
+    n = n & 0xFFFFFFFF
+    return n - 0x100000000 if n & 0x80000000 else n
 
-    def setAttribute(self, k: str, v: Any) -> None:
-        self.attrs[k] = v
-        if k == 'id':
-            self.id = v
-        if k == 'class':
-            try:
-                self._class_set = set(str(v).split())
-            except Exception:
-                self._class_set = set()
-        self._log_change('setAttribute', {'name': k, 'value': v, 'path': self._dom_path()})
-        self._notify_dom_change()
 
-    def removeAttribute(self, k: str) -> None:
-        try:
-            self.attrs.pop(k, None)
-            if k == 'id':
-                self.id = None
-            if k == 'class':
-                self._class_set = set()
-        except Exception:
-            pass
-        self._log_change('removeAttribute', {'name': k, 'path': self._dom_path()})
-        self._notify_dom_change()
+def _declared_names(stmts, out: Dict[str, int]) -> Dict[str, int]:
+    """Collect `var`/function-declaration names bound in the environment that runs `stmts`.
 
-    def appendChild(self, child: Any) -> None:
-        """Attach child, propagate host/document and notify."""
-        try:
-            if isinstance(child, Element):
-                child.parent = self
-                child._host = self._host
-                child._owner_document = self._owner_document
-                # propagate logger
-                child._dom_log = getattr(self, '_dom_log', None) or (self._owner_document.get('__dom_log_fn') if isinstance(self._owner_document, dict) else None)
-            if isinstance(self.children, JSList):
-                self.children.append(child)
+    Statements that create their own environment (block, for, for-in, try/catch
+    blocks, functions) are not entered; their names belong to the inner scope.
+    """
+    for st in stmts:
+        if not isinstance(st, tuple) or not st:
+            continue
+        typ = st[0]
+        if typ == 'var':
+            for name, _init in st[1]:
+                out.setdefault(name, len(out))
+        elif typ == 'func':
+            if st[1]:
+                out.setdefault(st[1], len(out))
+        elif typ == 'if':
+            _declared_names([x for x in st[2:4] if x], out)
+        elif typ == 'while':
+            _declared_names([st[2]], out)
+        elif typ == 'do':
+            _declared_names([st[1]], out)
+        elif typ == 'label':
+            _declared_names([st[2]], out)
+        elif typ == 'switch':
+            for _case, case_stmts in st[2]:
+                _declared_names(case_stmts, out)
+            _declared_names(st[3] or [], out)
+    return out
+
+
+class _Scope:
+    """Compile-time mirror of one runtime environment (see SlotEnv)."""
+    __slots__ = ('layout', 'parent')
+
+    def __init__(self, layout: Dict[str, int], parent: Optional['_Scope']):
+        self.layout = layout
+        self.parent = parent
+
+    def resolve(self, name: str):
+        """Return (depth, slot) of the nearest static declaration of `name`, or None."""
+        sc = self
+        depth = 0
+        while sc is not None:
+            i = sc.layout.get(name)
+            if i is not None:
+                return depth, i
+            sc = sc.parent
+            depth += 1
+        return None
+
+
+# -- Inline caches ------------------------------------------------------------
+# Bumped when a property is added to or deleted from a JS object, or a
+# '__proto__' link changes.  Cache entries recorded under an older version
+# re-verify their prototype chain before they are trusted again.
+_SHAPE_VERSION = [0]
+_MISSING = object()
+_dict_get = dict.get
+_PROTO_WALK_UNCHECKED = 64
+_IC_MAX_ENTRIES = 4
+_IC_MAX_DEPTH = 32
+
+
+class _PropCache:
+    """Inline cache for one compiled `obj.name` read or `obj.name(...)` call site.
+
+    Own properties are always read directly.  Otherwise each entry
+    [proto, chain, holder, version] records that receivers whose `__proto__`
+    is `proto` inherit `name` from `holder`, reached through the dicts in
+    `chain`.  Up to _IC_MAX_ENTRIES protos are kept (polymorphic); past that the
+    site is megamorphic and always uses `Interpreter._prop_get`.
+    """
+    __slots__ = ('key', 'is_length', 'entries', 'megamorphic')
+
+    def __init__(self, key: str):
+        self.key = key
+        self.is_length = key == 'length'
+        self.entries: List[list] = []
+        self.megamorphic = False
+
+    def get(self, it, obj):
+        key = self.key
+        if isinstance(obj, dict):
+            # raw dict storage: identifier keys are never array indices
+            v = _dict_get(obj, key, _MISSING)
+            if v is not _MISSING:
+                return v
+            if self.is_length and obj.__class__ is JSArray and obj._items is not None:
+                return len(obj._items)
+            proto = _dict_get(obj, '__proto__')
+            for ent in self.entries:
+                if ent[0] is proto:
+                    holder = ent[2]
+                    if key in holder and (ent[3] == _SHAPE_VERSION[0] or self._verify(ent)):
+                        return holder[key]
+                    break
+            return self._miss(it, obj, proto)
+        return it._prop_get(obj, key)
+
+    def _verify(self, ent) -> bool:
+        """Re-check a stale entry's chain; refresh its version when still valid."""
+        key = self.key
+        chain = ent[1]
+        for i in range(len(chain) - 1):
+            link = chain[i]
+            if key in link or link.get('__proto__') is not chain[i + 1]:
+                return False
+        ent[3] = _SHAPE_VERSION[0]
+        return True
+
+    def _miss(self, it, obj, proto):
+        val = it._prop_get(obj, self.key)
+        if self.megamorphic:
+            return val
+        key = self.key
+        chain = []
+        cur = proto
+        while isinstance(cur, dict) and len(chain) < _IC_MAX_DEPTH:
+            chain.append(cur)
+            if key in cur:
+                entries = self.entries
+                ent = [proto, tuple(chain), cur, _SHAPE_VERSION[0]]
+                for i, old in enumerate(entries):
+                    if old[0] is proto:
+                        entries[i] = ent
+                        break
+                else:
+                    if len(entries) >= _IC_MAX_ENTRIES:
+                        self.megamorphic = True
+                        entries.clear()
+                    else:
+                        entries.append(ent)
+                break
+            cur = cur.get('__proto__')
+        return val
+
+
+def _dynamic_get(it, env, name):
+    try:
+        return env.get(name)
+    except NameError:
+        try:
+            return it.global_env.get(name)
+        except NameError:
+            return undefined
+
+
+class Compiler:
+    """Translate parser tuples into nested Python closures.
+
+    Every node is inspected once at compile time; the returned callables take
+    ``(interp, env, this)`` and reproduce `Interpreter._eval_stmt` /
+    `_eval_expr` behaviour (including their best-effort quirks) without
+    re-dispatching on ``node[0]``. The tree-walker stays the reference
+    implementation; keep both in step when changing semantics.
+
+    Scopes are resolved while compiling: every environment the compiled code
+    creates is a `SlotEnv` whose layout is known here, so identifiers declared
+    in an enclosing compiled scope become (depth, slot) accesses. Globals and
+    names from environments built elsewhere keep the dynamic dict path.
+    """
+
+    def compile_program(self, node):
+        """Return one compiled statement per top-level statement of a 'prog' node."""
+        assert node[0] == 'prog'
+        # top-level code runs in the (dict-based) global environment
+        return [self.stmt(st, None) for st in node[1]]
+
+    def function_code(self, params, name, body, sc):
+        """Return a callable for a function body, compiled on first invocation.
+
+        Function bodies are compiled lazily so large libraries only pay for the
+        functions they actually call; the result is shared by every JSFunction
+        created from the same literal. `code.frame(fn, this, args)` builds the
+        activation environment (`this`, parameters, own name) it expects.
+        """
+        layout: Dict[str, int] = {'this': 0}
+        for p in params:
+            layout.setdefault(p, len(layout))
+        if name:
+            layout.setdefault(name, len(layout))
+        frame_scope = _Scope(layout, sc)
+        param_slots = [layout[p] for p in params]
+        name_slot = layout[name] if name else None
+        cell = []
+
+        def code(it, env, this):
+            if not cell:
+                cell.append(self.stmt(body, frame_scope))
+            return cell[0](it, env, this)
+
+        def frame(fn, this, args):
+            local = SlotEnv(fn.env, layout)
+            slots = local.slots
+            slots[0] = this
+            n = len(args)
+            for pos, i in enumerate(param_slots):
+                slots[i] = args[pos] if pos < n else undefined
+            if name_slot is not None:
+                slots[name_slot] = fn
+            return local
+
+        code.frame = frame
+        return code
+
+    # -- statements ---------------------------------------------------------
+    def stmt(self, node, sc):
+        run = self._stmt(node, sc)
+
+        def step(it, env, this):
+            it._exec_count += 1
+            if it._trace or (it._exec_limit and it._exec_count > it._exec_limit):
+                it._exec_check(node)
+            return run(it, env, this)
+        return step
+
+    def _stmt(self, node, sc):
+        typ = node[0]
+        handler = getattr(self, '_s_' + typ, None)
+        if handler is None:
+            def run(it, env, this):
+                raise RuntimeError(f"Unknown stmt {typ}")
+            return run
+        return handler(node, sc)
+
+    def _s_empty(self, node, sc):
+        return lambda it, env, this: undefined
+
+    def _s_var(self, node, sc):
+        # slot index when the declaration is part of the scope layout (always, unless top-level)
+        decls = [(name, sc.layout.get(name) if sc is not None else None,
+                  None if init is None else self.expr(init, sc)) for name, init in node[1]]
+
+        def run(it, env, this):
+            last_val = undefined
+            try:
+                for name, slot, init in decls:
+                    val = undefined if init is None else init(it, env, this)
+                    if slot is None:
+                        env.set_local(name, val)
+                    else:
+                        env.slots[slot] = val
+                    last_val = val
+            except Exception:
+                # best-effort: if any declarator evaluation fails, leave previous ones intact
+                pass
+            return last_val
+        return run
+
+    def _s_func(self, node, sc):
+        _, name, params, body = node
+        code = self.function_code(params, name, body, sc)
+
+        def run(it, env, this):
+            fn = JSFunction(params, body, env, name)
+            fn._compiled = code
+            if name:
+                env.set_local(name, fn)
+            return fn
+        return run
+
+    def _s_label(self, node, sc):
+        _, label_name, stmt = node
+        inner = self.stmt(stmt, sc)
+
+        def run(it, env, this):
+            try:
+                return inner(it, env, this)
+            except BreakExc as be:
+                if getattr(be, 'label', None) == label_name:
+                    return undefined
+                raise
+            except ContinueExc as ce:
+                if getattr(ce, 'label', None) == label_name:
+                    raise RuntimeError(f"Invalid 'continue {label_name}' target (not a loop)")
+                raise
+        return run
+
+    def _s_block(self, node, sc):
+        layout = _declared_names(node[1], {})
+        inner = _Scope(layout, sc)
+        codes = tuple(self.stmt(s, inner) for s in node[1])
+
+        def run(it, env, this):
+            local = SlotEnv(env, layout)
+            res = undefined
+            for c in codes:
+                res = c(it, local, this)
+            return res
+        return run
+
+    def _s_return(self, node, sc):
+        val = self.expr(node[1], sc)
+
+        def run(it, env, this):
+            raise ReturnExc(val(it, env, this))
+        return run
+
+    def _s_if(self, node, sc):
+        _, cond, cons, alt = node
+        c_cond = self.expr(cond, sc)
+        c_cons = self.stmt(cons, sc)
+        c_alt = self.stmt(alt, sc) if alt else None
+
+        def run(it, env, this):
+            if _truthy(c_cond(it, env, this)):
+                return c_cons(it, env, this)
+            elif c_alt is not None:
+                return c_alt(it, env, this)
+            return undefined
+        return run
+
+    def _s_while(self, node, sc):
+        _, cond, body = node
+        c_cond = self.expr(cond, sc)
+        c_body = self.stmt(body, sc)
+
+        def run(it, env, this):
+            res = undefined
+            while _truthy(c_cond(it, env, this)):
+                try:
+                    res = c_body(it, env, this)
+                except BreakExc as be:
+                    if getattr(be, 'label', None) is None:
+                        break
+                    raise
+                except ContinueExc as ce:
+                    if getattr(ce, 'label', None) is None:
+                        continue
+                    raise
+            return res
+        return run
+
+    def _s_do(self, node, sc):
+        _, body, cond = node
+        c_body = self.stmt(body, sc)
+        c_cond = self.expr(cond, sc)
+
+        def run(it, env, this):
+            res = undefined
+            while True:
+                try:
+                    res = c_body(it, env, this)
+                except BreakExc as be:
+                    if getattr(be, 'label', None) is None:
+                        break
+                    raise
+                except ContinueExc as ce:
+                    if getattr(ce, 'label', None) is not None:
+                        raise
+                try:
+                    if not _truthy(c_cond(it, env, this)):
+                        break
+                except Exception:
+                    break
+            return res
+        return run
+
+    def _s_for_in(self, node, sc):
+        _, lhs, rhs, body = node
+        is_var = isinstance(lhs, tuple) and lhs[0] == 'var'
+        layout = _declared_names(([lhs] if is_var else []) + [body], {})
+        sc = _Scope(layout, sc)
+        c_decl = self.stmt(lhs, sc) if is_var else None
+        c_rhs = self.expr(rhs, sc)
+        c_body = self.stmt(body, sc)
+        var_name = None
+        if is_var:
+            try:
+                var_name = lhs[1][0][0]
+            except Exception:
+                var_name = None
+        elif isinstance(lhs, tuple) and lhs[0] == 'id':
+            var_name = lhs[1]
+        c_tgt = c_key = None
+        key_name = None
+        if isinstance(lhs, tuple) and lhs[0] == 'get':
+            c_tgt = self.expr(lhs[1], sc)
+            if lhs[2][0] == 'id':
+                key_name = lhs[2][1]
             else:
-                self.children.append(child)
+                c_key = self.expr(lhs[2], sc)
+
+        def run(it, env, this):
+            local = SlotEnv(env, layout)
+            if c_decl is not None:
+                try:
+                    c_decl(it, local, this)
+                except Exception:
+                    pass
+            res = undefined
+            try:
+                target = c_rhs(it, local, this)
+            except Exception:
+                target = None
+            keys: List[str] = []
+            try:
+                if isinstance(target, dict):
+                    keys = [k for k in target.keys() if k != '__proto__']
+                elif isinstance(target, JSList):
+                    keys = [str(i) for i in range(len(target))]
+                elif isinstance(target, list):
+                    keys = [str(i) for i in range(len(target))]
+                elif hasattr(target, '__dict__'):
+                    keys = list(vars(target).keys())
+                else:
+                    try:
+                        seq = list(target)
+                        keys = [str(i) for i in range(len(seq))]
+                    except Exception:
+                        keys = []
+            except Exception:
+                keys = []
+            for k in keys:
+                try:
+                    if var_name is not None:
+                        local.set(var_name, k)
+                    if c_tgt is not None:
+                        try:
+                            tgt_obj = c_tgt(it, local, this)
+                            prop_name = key_name if c_key is None else c_key(it, local, this)
+                            if isinstance(tgt_obj, dict):
+                                tgt_obj[it._norm_prop_key(prop_name)] = k
+                            else:
+                                setattr(tgt_obj, prop_name, k)
+                        except Exception:
+                            pass
+                    try:
+                        res = c_body(it, local, this)
+                    except BreakExc as be:
+                        if getattr(be, 'label', None) is None:
+                            break
+                        raise
+                    except ContinueExc as ce:
+                        if getattr(ce, 'label', None) is None:
+                            continue
+                        raise
+                except Exception:
+                    # per-iteration errors should not abort entire loop
+                    continue
+            return res
+        return run
+
+    def _s_for(self, node, sc):
+        _, init, cond, post, body = node
+        is_var = isinstance(init, tuple) and init[0] == 'var'
+        layout = _declared_names(([init] if is_var else []) + [body], {})
+        sc = _Scope(layout, sc)
+        c_init = None
+        if init is not None:
+            if isinstance(init, tuple) and init[0] == 'var':
+                c_init = self.stmt(init, sc)
+            else:
+                c_init = self.expr(init, sc)
+        c_cond = self.expr(cond, sc) if cond is not None else None
+        c_post = self.expr(post, sc) if post is not None else None
+        c_body = self.stmt(body, sc)
+
+        def run(it, env, this):
+            local = SlotEnv(env, layout)
+            if c_init is not None:
+                c_init(it, local, this)
+            res = undefined
+            while True:
+                if c_cond is not None and not _truthy(c_cond(it, local, this)):
+                    break
+                try:
+                    res = c_body(it, local, this)
+                except BreakExc as be:
+                    if getattr(be, 'label', None) is None:
+                        break
+                    raise
+                except ContinueExc as ce:
+                    if getattr(ce, 'label', None) is not None:
+                        raise
+                if c_post is not None:
+                    try:
+                        c_post(it, local, this)
+                    except Exception:
+                        # post-expression errors ignored (best-effort)
+                        pass
+            return res
+        return run
+
+    def _s_switch(self, node, sc):
+        _, expr, cases, default_block = node
+        c_expr = self.expr(expr, sc)
+        c_cases = [(self.expr(ce, sc), [self.stmt(s, sc) for s in stmts]) for ce, stmts in cases]
+        c_default = [self.stmt(s, sc) for s in default_block] if default_block else None
+
+        def run(it, env, this):
+            val = c_expr(it, env, this)
+            executed = False
+            try:
+                for c_case, codes in c_cases:
+                    cval = c_case(it, env, this)
+                    if cval == val or executed:
+                        executed = True
+                        for c in codes:
+                            c(it, env, this)
+                if not executed and c_default:
+                    for c in c_default:
+                        c(it, env, this)
+            except BreakExc as be:
+                if getattr(be, 'label', None) is not None:
+                    raise
+            return undefined
+        return run
+
+    def _s_try(self, node, sc):
+        _, try_block, catch_name, catch_block = node
+        c_try = self.stmt(try_block, sc)
+        c_catch = None
+        if catch_name and catch_block:
+            catch_layout = {catch_name: 0}
+            c_catch = self.stmt(catch_block, _Scope(catch_layout, sc))
+
+        def run(it, env, this):
+            try:
+                return c_try(it, env, this)
+            except JSError as je:
+                if c_catch is not None:
+                    local = SlotEnv(env, catch_layout)
+                    local.slots[0] = je.value
+                    return c_catch(it, local, this)
+                raise
+        return run
+
+    def _s_throw(self, node, sc):
+        val = self.expr(node[1], sc)
+
+        def run(it, env, this):
+            raise JSError(val(it, env, this))
+        return run
+
+    def _s_break(self, node, sc):
+        label = node[1]
+
+        def run(it, env, this):
+            raise BreakExc(label)
+        return run
+
+    def _s_continue(self, node, sc):
+        label = node[1]
+
+        def run(it, env, this):
+            raise ContinueExc(label)
+        return run
+
+    def _s_expr(self, node, sc):
+        return self.expr(node[1], sc)
+
+    # -- expressions --------------------------------------------------------
+    def expr(self, node, sc):
+        handler = getattr(self, '_e_' + node[0], None)
+        if handler is None:
+            # rare/unknown node: defer to the reference evaluator
+            return lambda it, env, this: it._eval_expr(node, env, this)
+        return handler(node, sc)
+
+    def _const(self, value):
+        return lambda it, env, this: value
+
+    def _e_num(self, node, sc):
+        return self._const(node[1])
+
+    _e_str = _e_regex = _e_bool = _e_num
+
+    def _e_null(self, node, sc):
+        return self._const(None)
+
+    def _e_undef(self, node, sc):
+        return self._const(undefined)
+
+    def _e_id(self, node, sc):
+        name = node[1]
+        where = sc.resolve(name) if sc is not None else None
+        if where is None:
+            return lambda it, env, this: _dynamic_get(it, env, name)
+        depth, i = where
+        if depth == 0:
+            def run(it, env, this):
+                v = env.slots[i]
+                if v is UNSET:
+                    return _dynamic_get(it, env, name)
+                return v
+        elif depth == 1:
+            def run(it, env, this):
+                # a dynamic binding (implicit assignment) in a skipped environment shadows the slot
+                if name in env.vars:
+                    return _dynamic_get(it, env, name)
+                v = env.parent.slots[i]
+                if v is UNSET:
+                    return _dynamic_get(it, env, name)
+                return v
+        else:
+            def run(it, env, this):
+                e = env
+                for _ in range(depth):
+                    if name in e.vars:
+                        return _dynamic_get(it, env, name)
+                    e = e.parent
+                v = e.slots[i]
+                if v is UNSET:
+                    return _dynamic_get(it, env, name)
+                return v
+        return run
+
+    def _setter(self, name, sc):
+        """Return write(env, value) with `Env.set` semantics for identifier `name`."""
+        where = sc.resolve(name) if sc is not None else None
+        if where is None:
+            return lambda env, value: env.set(name, value)
+        depth, i = where
+
+        def write(env, value):
+            e = env
+            for _ in range(depth):
+                if name in e.vars:
+                    break
+                e = e.parent
+            else:
+                slots = e.slots
+                if slots[i] is not UNSET:
+                    slots[i] = value
+                    return
+            env.set(name, value)
+        return write
+
+    def _member(self, node, sc):
+        """Return (object_code, static_key, key_code) for a 'get' node."""
+        c_obj = self.expr(node[1], sc)
+        prop_node = node[2]
+        if prop_node[0] == 'id':
+            return c_obj, prop_node[1], None
+        return c_obj, None, self.expr(prop_node, sc)
+
+    def _e_delete(self, node, sc):
+        target_node = node[1]
+        if target_node[0] == 'get':
+            c_obj, skey, c_key = self._member(target_node, sc)
+
+            def run(it, env, this):
+                try:
+                    base = c_obj(it, env, this)
+                    key = skey if c_key is None else c_key(it, env, this)
+                    if isinstance(base, dict):
+                        if key in base:
+                            del base[key]
+                            _SHAPE_VERSION[0] += 1
+                        return True
+                    try:
+                        delattr(base, key)
+                    except Exception:
+                        pass
+                    return True
+                except Exception:
+                    return True
+            return run
+        if target_node[0] == 'id':
+            name = target_node[1]
+
+            def run(it, env, this):
+                try:
+                    if env.has_local(name):
+                        return False
+                except Exception:
+                    pass
+                try:
+                    if name in it.global_env.vars:
+                        del it.global_env.vars[name]
+                        return True
+                except Exception:
+                    pass
+                return False
+            return run
+        return self._const(None)
+
+    def _e_typeof(self, node, sc):
+        c_val = self.expr(node[1], sc)
+
+        def run(it, env, this):
+            try:
+                v = c_val(it, env, this)
+            except Exception:
+                return 'undefined'
+            if v is undefined:
+                return 'undefined'
+            if v is None:
+                return 'object'
+            if isinstance(v, bool):
+                return 'boolean'
+            if isinstance(v, (int, float)):
+                return 'number'
+            if isinstance(v, str):
+                return 'string'
+            if isinstance(v, JSFunction) or callable(v):
+                return 'function'
+            return 'object'
+        return run
+
+    def _e_void(self, node, sc):
+        c_val = self.expr(node[1], sc)
+
+        def run(it, env, this):
+            try:
+                c_val(it, env, this)
+            except Exception:
+                pass
+            return undefined
+        return run
+
+    def _update(self, node, sc, prefix):
+        _, op, target = node
+        delta = 1.0 if op == '++' else -1.0
+        kind = target[0]
+        if kind == 'id':
+            read = self._e_id(target, sc)
+            write = self._setter(target[1], sc)
+
+            def run(it, env, this):
+                old = read(it, env, this)
+                newv = _to_number(old) + delta
+                write(env, newv)
+                return newv if prefix else old
+            return run
+        if kind == 'get':
+            c_obj, skey, c_key = self._member(target, sc)
+
+            def run(it, env, this):
+                # read and write each evaluate the member expression (matches tree-walker)
+                tgt_obj = c_obj(it, env, this)
+                key = skey if c_key is None else c_key(it, env, this)
+                try:
+                    if isinstance(tgt_obj, dict):
+                        old = tgt_obj.get(it._norm_prop_key(key), undefined)
+                    else:
+                        old = getattr(tgt_obj, key, undefined)
+                except Exception:
+                    old = undefined
+                newv = _to_number(old) + delta
+                tgt_obj = c_obj(it, env, this)
+                key = skey if c_key is None else c_key(it, env, this)
+                it._prop_set(tgt_obj, key, newv)
+                return newv if prefix else old
+            return run
+        c_val = self.expr(target, sc)
+
+        def run(it, env, this):
+            old = c_val(it, env, this)
+            newv = _to_number(old) + delta
+            return newv if prefix else old
+        return run
+
+    def _e_preop(self, node, sc):
+        return self._update(node, sc, True)
+
+    def _e_postop(self, node, sc):
+        return self._update(node, sc, False)
+
+    def _e_func(self, node, sc):
+        _, name, params, body = node
+        code = self.function_code(params, name, body, sc)
+
+        def run(it, env, this):
+            fn = JSFunction(params, body, env, name)
+            fn._compiled = code
+            return fn
+        return run
+
+    def _e_obj(self, node, sc):
+        props = [(str(k), None if v is None else self.expr(v, sc)) for k, v in node[1]]
+
+        def run(it, env, this):
+            out = {}
+            try:
+                obj_ctor = it._context.get('Object') if it._context else None
+                if obj_ctor and hasattr(obj_ctor, 'prototype'):
+                    out['__proto__'] = obj_ctor.prototype
+            except Exception:
+                pass
+            for k, c_val in props:
+                try:
+                    val = undefined if c_val is None else c_val(it, env, this)
+                except Exception:
+                    val = undefined
+                out[k] = val
+            return out
+        return run
+
+    def _e_arr(self, node, sc):
+        # None marks a hole ('undef' element)
+        elems = [None if (isinstance(el, tuple) and el and el[0] == 'undef') else self.expr(el, sc)
+                 for el in node[1]]
+
+        def run(it, env, this):
+            out = JSArray()
+            try:
+                arr_ctor = it._context.get('Array') if it._context else None
+                if arr_ctor and hasattr(arr_ctor, 'prototype'):
+                    out['__proto__'] = arr_ctor.prototype
+            except Exception:
+                pass
+            items = out._items
+            for c_el in elems:
+                if c_el is None:
+                    items.append(HOLE)
+                    continue
+                try:
+                    v = c_el(it, env, this)
+                except Exception:
+                    v = undefined
+                items.append(v)
+            return out
+        return run
+
+    def _e_bin(self, node, sc):
+        _, op, a, b = node
+        c_a = self.expr(a, sc)
+        c_b = self.expr(b, sc)
+        if op == '&&':
+            def run(it, env, this):
+                lhs = c_a(it, env, this)
+                if not _truthy(lhs):
+                    return lhs
+                return c_b(it, env, this)
+        elif op == '||':
+            def run(it, env, this):
+                lhs = c_a(it, env, this)
+                if _truthy(lhs):
+                    return lhs
+                return c_b(it, env, this)
+        else:
+            def run(it, env, this):
+                lhs = c_a(it, env, this)
+                return it._apply_bin(op, lhs, c_b(it, env, this))
+        return run
+
+    def _e_cond(self, node, sc):
+        _, cond_node, true_node, false_node = node
+        c_cond = self.expr(cond_node, sc)
+        c_true = self.expr(true_node, sc)
+        c_false = self.expr(false_node, sc)
+
+        def run(it, env, this):
+            if _truthy(c_cond(it, env, this)):
+                return c_true(it, env, this)
+            return c_false(it, env, this)
+        return run
+
+    def _e_comma(self, node, sc):
+        c_left = self.expr(node[1], sc)
+        c_right = self.expr(node[2], sc)
+
+        def run(it, env, this):
+            try:
+                c_left(it, env, this)
+            except Exception:
+                pass
+            return c_right(it, env, this)
+        return run
+
+    def _e_unary(self, node, sc):
+        _, op, x = node
+        c_x = self.expr(x, sc)
+        if op == '-':
+            def run(it, env, this):
+                return -float(c_x(it, env, this))
+        elif op == '!':
+            def run(it, env, this):
+                return not _truthy(c_x(it, env, this))
+        elif op == '~':
+            def run(it, env, this):
+                res = (~_to_int32(c_x(it, env, this))) & 0xFFFFFFFF
+                return res - 0x100000000 if res & 0x80000000 else res
+        else:
+            # the tree-walker evaluates the operand and yields None for other ops (e.g. unary '+')
+            def run(it, env, this):
+                c_x(it, env, this)
+                return None
+        return run
+
+    def _e_assign(self, node, sc):
+        _, left, right = node
+        c_right = self.expr(right, sc)
+        kind = left[0]
+        if kind == 'id':
+            write = self._setter(left[1], sc)
+
+            def run(it, env, this):
+                r = c_right(it, env, this)
+                write(env, r)
+                return r
+            return run
+        if kind != 'get':
+            def run(it, env, this):
+                c_right(it, env, this)
+                raise RuntimeError("Invalid assignment target")
+            return run
+
+        c_obj, skey, c_key = self._member(left, sc)
+        # jQuery.each intercept only applies when the property is (or may be) 'each'
+        check_each = c_key is not None or skey == 'each'
+
+        def run(it, env, this):
+            r = c_right(it, env, this)
+            if check_each:
+                replaced = self._intercept_jquery_each(it, env, this, c_obj, skey, c_key)
+                if replaced is not None:
+                    return replaced
+            target = c_obj(it, env, this)
+            key = skey if c_key is None else c_key(it, env, this)
+            it._prop_set(target, key, r)
+            return r
+        return run
+
+    @staticmethod
+    def _intercept_jquery_each(it, env, this, c_obj, skey, c_key):
+        """Mirror of the jQuery.each replacement in `_eval_expr` ('assign')."""
+        try:
+            prop_name = skey if c_key is None else c_key(it, env, this)
+            if str(prop_name) != 'each':
+                return None
+            target_obj = c_obj(it, env, this)
+            if not (isinstance(target_obj, dict) and 'fn' in target_obj and 'extend' in target_obj):
+                return None
+            try:
+                native_jquery = it._context.get('jQuery') if it._context else None
+                if native_jquery and isinstance(native_jquery, dict):
+                    native_each = native_jquery.get('each')
+                    if native_each:
+                        target_obj['each'] = native_each
+                        print(f"[jsmini.intercept] Replaced jQuery.each with native implementation")
+                        return native_each
+            except Exception as e:
+                print(f"[jsmini.intercept] Failed to replace jQuery.each: {e}")
+        except Exception:
+            pass
+        return None
+
+    def _e_get(self, node, sc):
+        c_obj, skey, c_key = self._member(node, sc)
+        if c_key is None:
+            lookup = _PropCache(skey).get
+
+            def run(it, env, this):
+                return lookup(it, c_obj(it, env, this))
+        else:
+            def run(it, env, this):
+                obj = c_obj(it, env, this)
+                return it._prop_get(obj, c_key(it, env, this))
+        return run
+
+    def _e_call(self, node, sc):
+        _, callee_node, args_nodes = node
+        c_args = tuple(self.expr(a, sc) for a in args_nodes)
+        if isinstance(callee_node, tuple) and callee_node[0] == 'get':
+            c_recv = self.expr(callee_node[1], sc)
+            prop_node = callee_node[2]
+            if prop_node[0] == 'id':
+                pname = prop_node[1]
+                is_each = pname == 'each'
+                lookup = _PropCache(pname).get
+
+                def run(it, env, this):
+                    receiver = c_recv(it, env, this)
+                    fn_val = lookup(it, receiver)
+                    if is_each and isinstance(fn_val, JSFunction):
+                        try:
+                            depth = it._per_fn_call_depth.get(id(fn_val), 0)
+                            if depth > 100:
+                                print(f"[jsmini.guard] Blocking deep jQuery.each recursion (depth={depth})")
+                                return undefined
+                        except Exception:
+                            pass
+                    args = [a(it, env, this) for a in c_args]
+                    return _invoke(it, fn_val, receiver, args)
+                return run
+            # computed callee `o[k](...)`: the tree-walker uses the key's value as the function
+            c_fn = self.expr(prop_node, sc)
+
+            def run(it, env, this):
+                receiver = c_recv(it, env, this)
+                fn_val = c_fn(it, env, this)
+                args = [a(it, env, this) for a in c_args]
+                return _invoke(it, fn_val, receiver, args)
+            return run
+        c_fn = self.expr(callee_node, sc)
+
+        def run(it, env, this):
+            fn_val = c_fn(it, env, this)
+            args = [a(it, env, this) for a in c_args]
+            return _invoke(it, fn_val, None, args)
+        return run
+
+    def _e_new(self, node, sc):
+        callee_node = node[1]
+        if isinstance(callee_node, tuple) and callee_node and callee_node[0] == 'call':
+            target_node, args_nodes = callee_node[1], callee_node[2]
+        else:
+            target_node, args_nodes = callee_node, []
+        c_ctor = self.expr(target_node, sc)
+        c_args = tuple(self.expr(a, sc) for a in args_nodes)
+
+        def run(it, env, this):
+            ctor = c_ctor(it, env, this)
+            args_vals = [a(it, env, this) for a in c_args]
+            try:
+                if isinstance(ctor, JSFunction):
+                    proto = getattr(ctor, 'prototype', None)
+                    new_obj: Dict[str, Any] = {'__proto__': proto} if isinstance(proto, dict) or proto is not None else {}
+                    try:
+                        res = ctor.call(it, new_obj, args_vals)
+                    except Exception:
+                        return undefined
+                    if isinstance(res, dict) or isinstance(res, JSFunction):
+                        return res
+                    return new_obj
+                if callable(ctor):
+                    try:
+                        res = ctor(*args_vals)
+                        if isinstance(res, dict) or isinstance(res, JSFunction):
+                            return res
+                    except Exception:
+                        pass
+                    return {}
+            except Exception:
+                return undefined
+            return None
+        return run
+
+
+_COMPILER = Compiler()
+
+# --- Tiny DOM shim helpers --------------------------------------------------
+# --- Tiny DOM shim helpers --------------------------------------------------
+class JSList:
+    """Small wrapper that behaves like a JS Array for our shim:
+    - exposes .length property
+    - supports append, indexing, iteration and a Pythonic repr
+    """
+    def __init__(self, items: Optional[List[Any]] = None):
+        self._list: List[Any] = list(items or [])
+
+    def append(self, item: Any) -> None:
+        self._list.append(item)
+
+    def __len__(self) -> int:
+        return len(self._list)
+
+    def __repr__(self) -> str:
+        return repr(self._list)
+
+    def __getitem__(self, idx: int) -> Any:
+        try:
+            return self._list[idx]
+        except Exception:
+            return None
+
+    def __iter__(self):
+        return iter(self._list)
+
+    @property
+    def length(self) -> int:
+        return len(self._list)
+
+    def get(self, idx: int, default: Any = None) -> Any:
+        if 0 <= idx < len(self._list):
+            return self._list[idx]
+        return default
+
+
+def _element_children(el) -> List[Any]:
+    ch = el.children
+    return ch._list if isinstance(ch, JSList) else list(ch or ())
+
+
+class _DomIndex:
+    """id / class / tag lookup tables for the elements attached under a document body.
+
+    Connected elements carry `_index`; the Element mutators keep the tables
+    current as subtrees are attached, detached or re-labelled, so lookups
+    never walk the tree.  Buckets are unordered; `ordered()` sorts a bucket
+    into document order once and caches it until the next change (`version`).
+    """
+
+    def __init__(self, root: 'Element'):
+        self.root = root
+        self.by_id: Dict[str, List['Element']] = {}
+        self.by_class: Dict[str, Dict['Element', None]] = {}
+        self.by_tag: Dict[str, Dict['Element', None]] = {}
+        self.version = 0
+        self._tables = {'id': self.by_id, 'class': self.by_class, 'tag': self.by_tag}
+        self._ordered: Dict[Tuple[str, str], List['Element']] = {}
+        self._positions: Dict[int, Dict[int, int]] = {}
+        self._cache_version = -1
+        self.add_tree(root)
+
+    def add_tree(self, el: 'Element') -> None:
+        stack = [el]
+        while stack:
+            n = stack.pop()
+            if n._index is self:
+                continue
+            n._index = self
+            if n._id is not None:
+                self.by_id.setdefault(str(n._id), []).append(n)
+            self.by_tag.setdefault((n.tagName or '').lower(), {})[n] = None
+            for c in n._class_set:
+                self.by_class.setdefault(c, {})[n] = None
+            stack.extend(c for c in _element_children(n) if isinstance(c, Element))
+        self.version += 1
+
+    def remove_tree(self, el: 'Element') -> None:
+        stack = [el]
+        while stack:
+            n = stack.pop()
+            if n._index is not self:
+                continue
+            n._index = None
+            if n._id is not None:
+                self._drop_id(str(n._id), n)
+            self._drop(self.by_tag, (n.tagName or '').lower(), n)
+            for c in n._class_set:
+                self._drop(self.by_class, c, n)
+            stack.extend(c for c in _element_children(n) if isinstance(c, Element))
+        self.version += 1
+
+    def update_id(self, el: 'Element', old: Any, new: Any) -> None:
+        if old is not None:
+            self._drop_id(str(old), el)
+        if new is not None:
+            self.by_id.setdefault(str(new), []).append(el)
+        self.version += 1
+
+    def update_classes(self, el: 'Element', old: set, new: set) -> None:
+        for c in old - new:
+            self._drop(self.by_class, c, el)
+        for c in new - old:
+            self.by_class.setdefault(c, {})[el] = None
+        self.version += 1
+
+    def _drop_id(self, key: str, el: 'Element') -> None:
+        lst = self.by_id.get(key)
+        if lst:
+            try:
+                lst.remove(el)
+            except ValueError:
+                pass
+            if not lst:
+                del self.by_id[key]
+
+    @staticmethod
+    def _drop(table: Dict[str, Dict['Element', None]], key: str, el: 'Element') -> None:
+        bucket = table.get(key)
+        if bucket is not None:
+            bucket.pop(el, None)
+            if not bucket:
+                del table[key]
+
+    def ordered(self, kind: str, key: str) -> List['Element']:
+        """Elements in bucket `key` of table `kind` ('id', 'class', 'tag'), in document order."""
+        if self._cache_version != self.version:
+            self._ordered.clear()
+            self._positions.clear()
+            self._cache_version = self.version
+        res = self._ordered.get((kind, key))
+        if res is None:
+            bucket = self._tables[kind].get(key)
+            if not bucket:
+                res = []
+            elif len(bucket) == 1:
+                res = list(bucket)
+            else:
+                res = sorted(bucket, key=self._doc_position)
+            self._ordered[(kind, key)] = res
+        return res
+
+    def _doc_position(self, el: 'Element') -> List[int]:
+        path = []
+        cur = el
+        while cur is not self.root:
+            par = cur.parent
+            if par is None:
+                break
+            pos = self._positions.get(id(par))
+            if pos is None:
+                pos = self._positions[id(par)] = {id(c): i for i, c in enumerate(_element_children(par))}
+            path.append(pos.get(id(cur), 0))
+            cur = par
+        path.reverse()
+        return path
+
+
+# Default minimum spacing (ms) between host pushes while a script keeps mutating.
+DOM_FRAME_MS = 100.0
+
+
+class _DomBatch:
+    """Coalesces DOM mutations into few host pushes.
+
+    Mutating an element only records it as dirty.  `flush()` makes one
+    ``host['setRaw'](body.innerHTML)`` push when any dirty element is still
+    connected to the document.  Flushes happen at the
+    end of every timer drain and script run, on `forceRedraw`, and during a
+    long script whenever `frame_ms` has passed since the previous push
+    (None: only at those points; 0: every mutation).
+    """
+
+    def __init__(self, body: 'Element', frame_ms: Optional[float] = DOM_FRAME_MS):
+        self.body = body
+        self.host = None
+        self.frame_ms = frame_ms
+        self.dirty: Dict['Element', None] = {}
+        self.mutations = 0
+        self.flushes = 0
+        self._last_flush = 0.0
+
+    def mark(self, el: 'Element') -> None:
+        self.mutations += 1
+        if el._index is None and el is not self.body:
+            # detached subtree: nothing on screen changed yet
+            return
+        self.dirty[el] = None
+        if self.frame_ms is not None and self.host:
+            if (time.monotonic() - self._last_flush) * 1000.0 >= self.frame_ms:
+                self.flush()
+
+    def flush(self) -> bool:
+        """Push pending changes to the host; return True when a push was made."""
+        if not self.dirty:
+            return False
+        body = self.body
+        connected = any(el is body or el._index is not None for el in self.dirty)
+        self.dirty = {}
+        self._last_flush = time.monotonic()
+        host = self.host
+        if not connected or not host or not isinstance(host, dict):
+            return False
+        set_raw = host.get('setRaw')
+        if not callable(set_raw):
+            return False
+        set_raw(body.innerHTML)
+        self.flushes += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {'mutations': self.mutations, 'flushes': self.flushes, 'pending': len(self.dirty)}
+
+
+class Element:
+    def __init__(self, tag: str):
+        self._index: Optional[_DomIndex] = None
+        self._id: Optional[str] = None
+        self.tagName = tag
+        self.attrs: Dict[str, Any] = {}
+        self.children: JSList = JSList()
+        self.id: Optional[str] = None
+        self.parent = None
+        self._class_set = set()
+        # Host / document links (set by make_dom_shim or when appended)
+        self._host = None
+        self._owner_document = None
+        # DOM change logger (callable: (element, op, details_dict) -> None), injected by make_context/__enableDomLog
+        self._dom_log = None
+            
+    def _dom_path(self) -> str:
+        """Return a simple CSS-like path for this element (#id > tag.class)."""
+        try:
+            parts = []
+            cur = self
+            while isinstance(cur, Element):
+                name = cur.tagName or 'node'
+                pid = f"#{cur.id}" if cur.id else ''
+                cls = cur.attrs.get('class') or ''
+                cls_sfx = ('.' + '.'.join(cls.split())) if cls else ''
+                parts.append(f"{name}{pid}{cls_sfx}")
+                cur = getattr(cur, 'parent', None)
+            return ' > '.join(reversed(parts))
         except Exception:
-            try:
-                self.children.append(child)
-            except Exception:
-                pass
-        self._log_change('appendChild', {'child': getattr(child, 'tagName', type(child).__name__), 'path': self._dom_path()})
-        self._notify_dom_change()
+            return self.tagName or 'node'
 
-    def removeChild(self, child: Any) -> None:
-        """Detach child and notify (no exception on failure)."""
+    def _log_change(self, op: str, details: Dict[str, Any]) -> None:
         try:
-            if isinstance(self.children, JSList):
-                lst = self.children._list
-                if child in lst:
-                    lst.remove(child)
-                    if isinstance(child, Element):
-                        child.parent = None
-            else:
-                if child in self.children:
-                    self.children.remove(child)
-                    if isinstance(child, Element):
-                        child.parent = None
+            cb = getattr(self, '_dom_log', None)
+            if not callable(cb):
+                # fallback: try from ownerDocument (document dict stores fn under '__dom_log_fn')
+                try:
+                    doc = getattr(self, '_owner_document', None)
+                    if isinstance(doc, dict):
+                        cb = doc.get('__dom_log_fn')
+                except Exception:
+                    cb = None
+            if callable(cb):
+                cb(self, op, details or {})
         except Exception:
             pass
-        self._log_change('removeChild', {'child': getattr(child, 'tagName', type(child).__name__), 'path': self._dom_path()})
-        self._notify_dom_change()
 
-    def insertBefore(self, newNode: Any, referenceNode: Any) -> None:
-        """Insert newNode before referenceNode; append if ref not found; notify."""
+    def _notify_dom_change(self):
+        """
+        Best-effort: record that this element's subtree changed. The document's
+        _DomBatch pushes the accumulated changes to the host (see _DomBatch.flush).
+        """
         try:
-            lst = self.children._list
-            try:
-                idx = lst.index(referenceNode)
-            except ValueError:
-                idx = len(lst)
-            if isinstance(newNode, Element):
-                newNode.parent = self
-                newNode._host = self._host
-                newNode._owner_document = self._owner_document
-                newNode._dom_log = getattr(self, '_dom_log', None) or (self._owner_document.get('__dom_log_fn') if isinstance(self._owner_document, dict) else None)
-            lst.insert(idx, newNode)
+            doc = self._owner_document
+            if isinstance(doc, dict):
+                batch = doc.get('__domBatch')
+                if batch is not None:
+                    batch.mark(self)
         except Exception:
+            pass
+
+    @property
+    def id(self) -> Optional[str]:
+        return self._id
+
+    @id.setter
+    def id(self, value: Any) -> None:
+        old = self._id
+        self._id = value
+        if self._index is not None and old != value:
+            self._index.update_id(self, old, value)
+
+    def _set_class_set(self, classes: set) -> None:
+        old = self._class_set
+        self._class_set = classes
+        if self._index is not None:
+            self._index.update_classes(self, old, classes)
+
+    def _classes_changed(self, old: set) -> None:
+        """Re-index after `_class_set` was mutated in place (classList)."""
+        if self._index is not None:
+            self._index.update_classes(self, old, self._class_set)
+
+    def _adopt(self, child: Any) -> None:
+        """Detach `child` from its current parent and link it to this element's document."""
+        if not isinstance(child, Element):
+            return
+        old = child.parent
+        if old is not None:
             try:
-                self.appendChild(newNode)
-                return
-            except Exception:
+                old.children._list.remove(child)
+            except (AttributeError, ValueError):
                 pass
-        self._log_change('insertBefore', {
-            'newNode': getattr(newNode, 'tagName', type(newNode).__name__),
-            'referenceNode': getattr(referenceNode, 'tagName', type(referenceNode).__name__),
-            'path': self._dom_path()
-        })
+            if old._index is not None:
+                old._index.remove_tree(child)
+        child.parent = self
+        child._host = self._host
+        child._owner_document = self._owner_document
+        child._dom_log = getattr(self, '_dom_log', None) or (self._owner_document.get('__dom_log_fn') if isinstance(self._owner_document, dict) else None)
+
+    def _drop_children(self) -> None:
+        """Unlink all current children (before `children` is replaced wholesale)."""
+        for c in _element_children(self):
+            if isinstance(c, Element):
+                if self._index is not None:
+                    self._index.remove_tree(c)
+                c.parent = None
+
+    def setAttribute(self, k: str, v: Any) -> None:
+        self.attrs[k] = v
+        if k == 'id':
+            self.id = v
+        if k == 'class':
+            try:
+                self._set_class_set(set(str(v).split()))
+            except Exception:
+                self._set_class_set(set())
+        self._log_change('setAttribute', {'name': k, 'value': v, 'path': self._dom_path()})
         self._notify_dom_change()
 
-    def replaceChild(self, newNode: Any, oldNode: Any) -> None:
-        """Replace oldNode with newNode and notify."""
+    def removeAttribute(self, k: str) -> None:
         try:
-            lst = self.children._list
-            try:
-                idx = lst.index(oldNode)
-                if isinstance(newNode, Element):
-                    newNode.parent = self
-                    newNode._host = self._host
-                    newNode._owner_document = self._owner_document
-                    newNode._dom_log = getattr(self, '_dom_log', None) or (self._owner_document.get('__dom_log_fn') if isinstance(self._owner_document, dict) else None)
-                lst[idx] = newNode
-                if isinstance(oldNode, Element):
-                    oldNode.parent = None
-            except ValueError:
-                if isinstance(newNode, Element):
-                    newNode.parent = self
-                    newNode._host = self._host
-                    newNode._owner_document = self._owner_document
-                    newNode._dom_log = getattr(self, '_dom_log', None) or (self._owner_document.get('__dom_log_fn') if isinstance(self._owner_document, dict) else None)
-                lst.append(newNode)
+            self.attrs.pop(k, None)
+            if k == 'id':
+                self.id = None
+            if k == 'class':
+                self._set_class_set(set())
         except Exception:
             pass
-        self._log_change('replaceChild', {
-            'newNode': getattr(newNode, 'tagName', type(newNode).__name__),
-            'oldNode': getattr(oldNode, 'tagName', type(oldNode).__name__),
-            'path': self._dom_path()
-        })
+        self._log_change('removeAttribute', {'name': k, 'path': self._dom_path()})
         self._notify_dom_change()
 
-    @property
-    def classList(self):
-        el = self
-        def _add(this, *cls_names):
-            try:
-                for nm in cls_names:
-                    el._class_set.add(str(nm))
-                el.attrs['class'] = ' '.join(el._class_set)
-            except Exception:
-                pass
-            el._notify_dom_change()
-        def _remove(this, *cls_names):
-            try:
-                for nm in cls_names:
-                    el._class_set.discard(str(nm))
-                el.attrs['class'] = ' '.join(el._class_set)
-            except Exception:
-                pass
-            el._notify_dom_change()
-        def _contains(this, name):
-            try:
-                return str(name) in el._class_set
-            except Exception:
-                return False
-        def _toggle(this, name, force=None):
-            try:
-                n = str(name)
-                if force is None:
-                    present = n not in el._class_set
-                    if present:
-                        el._class_set.add(n)
-                    else:
-                        el._class_set.remove(n)
-                else:
-                    if bool(force):
-                        el._class_set.add(n); present = True
-                    else:
-                        el._class_set.discard(n); present = False
-                el.attrs['class'] = ' '.join(el._class_set)
-            except Exception:
-                present = False
-            el._notify_dom_change()
-            return present
-        return {
-            'add': lambda *a: _add(None, *a),
-            'remove': lambda *a: _remove(None, *a),
-            'contains': lambda a: _contains(None, a),
-            'toggle': lambda a, f=None: _toggle(None, a, f)
-        }
-
     def hasAttribute(self, k: str) -> bool:
         try:
             return k in self.attrs
@@ -2783,21 +4449,18 @@ class Element:
             return False
 
     def appendChild(self, child: Any) -> None:
-        """Attach child, propagate host/document and notify."""
+        """Attach child (moving it from any previous parent), propagate host/document and notify."""
         try:
-            if isinstance(child, Element):
-                child.parent = self
-                child._host = self._host
-                child._owner_document = self._owner_document
-            if isinstance(self.children, JSList):
-                self.children.append(child)
-            else:
-                self.children.append(child)
+            self._adopt(child)
+            self.children.append(child)
+            if self._index is not None and isinstance(child, Element):
+                self._index.add_tree(child)
         except Exception:
             try:
                 self.children.append(child)
             except Exception:
                 pass
+        self._log_change('appendChild', {'child': getattr(child, 'tagName', type(child).__name__), 'path': self._dom_path()})
         self._notify_dom_change()
 
     def removeChild(self, child: Any) -> None:
@@ -2805,60 +4468,67 @@ class Element:
         try:
             if isinstance(self.children, JSList):
                 lst = self.children._list
-                if child in lst:
-                    lst.remove(child)
-                    if isinstance(child, Element):
-                        child.parent = None
             else:
-                if child in self.children:
-                    self.children.remove(child)
-                    if isinstance(child, Element):
-                        child.parent = None
+                lst = self.children
+            if child in lst:
+                lst.remove(child)
+                if isinstance(child, Element):
+                    child.parent = None
+                    if self._index is not None:
+                        self._index.remove_tree(child)
         except Exception:
             pass
+        self._log_change('removeChild', {'child': getattr(child, 'tagName', type(child).__name__), 'path': self._dom_path()})
         self._notify_dom_change()
 
     def insertBefore(self, newNode: Any, referenceNode: Any) -> None:
         """Insert newNode before referenceNode; append if ref not found; notify."""
         try:
             lst = self.children._list
+            self._adopt(newNode)
             try:
                 idx = lst.index(referenceNode)
             except ValueError:
                 idx = len(lst)
-            if isinstance(newNode, Element):
-                newNode.parent = self
-                newNode._host = self._host
-                newNode._owner_document = self._owner_document
             lst.insert(idx, newNode)
+            if self._index is not None and isinstance(newNode, Element):
+                self._index.add_tree(newNode)
         except Exception:
             try:
                 self.appendChild(newNode)
+                return
             except Exception:
                 pass
+        self._log_change('insertBefore', {
+            'newNode': getattr(newNode, 'tagName', type(newNode).__name__),
+            'referenceNode': getattr(referenceNode, 'tagName', type(referenceNode).__name__),
+            'path': self._dom_path()
+        })
         self._notify_dom_change()
 
     def replaceChild(self, newNode: Any, oldNode: Any) -> None:
         """Replace oldNode with newNode and notify."""
         try:
             lst = self.children._list
+            self._adopt(newNode)
             try:
                 idx = lst.index(oldNode)
-                if isinstance(newNode, Element):
-                    newNode.parent = self
-                    newNode._host = self._host
-                    newNode._owner_document = self._owner_document
                 lst[idx] = newNode
                 if isinstance(oldNode, Element):
                     oldNode.parent = None
+                    if self._index is not None:
+                        self._index.remove_tree(oldNode)
             except ValueError:
-                if isinstance(newNode, Element):
-                    newNode.parent = self
-                    newNode._host = self._host
-                    newNode._owner_document = self._owner_document
                 lst.append(newNode)
+            if self._index is not None and isinstance(newNode, Element):
+                self._index.add_tree(newNode)
         except Exception:
             pass
+        self._log_change('replaceChild', {
+            'newNode': getattr(newNode, 'tagName', type(newNode).__name__),
+            'oldNode': getattr(oldNode, 'tagName', type(oldNode).__name__),
+            'path': self._dom_path()
+        })
         self._notify_dom_change()
 
     @property
@@ -2930,6 +4600,7 @@ class Element:
     @textContent.setter
     def textContent(self, val: Any) -> None:
         try:
+            self._drop_children()
             self.children = JSList([str(val)])
         except Exception:
             pass
@@ -2961,6 +4632,7 @@ class Element:
         try:
             raw = str(html_str or '')
             nodes = _parse_inner_html_fragment(raw)
+            self._drop_children()
             for n in nodes:
                 if isinstance(n, Element):
                     n.parent = self
@@ -2968,8 +4640,13 @@ class Element:
                     n._owner_document = self._owner_document
                     n._dom_log = getattr(self, '_dom_log', None) or (self._owner_document.get('__dom_log_fn') if isinstance(self._owner_document, dict) else None)
             self.children = JSList(nodes)
+            if self._index is not None:
+                for n in nodes:
+                    if isinstance(n, Element):
+                        self._index.add_tree(n)
         except Exception:
             try:
+                self._drop_children()
                 self.children = JSList([str(html_str)])
             except Exception:
                 pass
@@ -3005,7 +4682,7 @@ class Element:
         try:
             s = '' if val is None else str(val)
             self.attrs['class'] = s
-            self._class_set = set(s.split())
+            self._set_class_set(set(s.split()))
         except Exception:
             pass
         self._log_change('setClassName', {'value': str(val), 'path': self._dom_path()})
@@ -3069,6 +4746,8 @@ class Element:
             if not class_name:
                 return JSList([])
             want = str(class_name)
+            if self._index is not None and self._index.root is self:
+                return JSList([e for e in self._index.ordered('class', want) if e is not self])
             out: List[Any] = []
 
             def walk(node):
@@ -3093,21 +4772,25 @@ class Element:
     def classList(self):
         el = self
         def _add(this, *cls_names):
+            before = set(el._class_set)
             try:
                 for nm in cls_names:
                     el._class_set.add(str(nm))
                 el.attrs['class'] = ' '.join(el._class_set)
             except Exception:
                 pass
+            el._classes_changed(before)
             el._log_change('classList.add', {'tokens': [str(n) for n in cls_names], 'path': el._dom_path()})
             el._notify_dom_change()
         def _remove(this, *cls_names):
+            before = set(el._class_set)
             try:
                 for nm in cls_names:
                     el._class_set.discard(str(nm))
                 el.attrs['class'] = ' '.join(el._class_set)
             except Exception:
                 pass
+            el._classes_changed(before)
             el._log_change('classList.remove', {'tokens': [str(n) for n in cls_names], 'path': el._dom_path()})
             el._notify_dom_change()
         def _contains(this, name):
@@ -3116,6 +4799,7 @@ class Element:
             except Exception:
                 return False
         def _toggle(this, name, force=None):
+            before = set(el._class_set)
             try:
                 n = str(name)
                 if force is None:
@@ -3132,6 +4816,7 @@ class Element:
                 el.attrs['class'] = ' '.join(el._class_set)
             except Exception:
                 present = False
+            el._classes_changed(before)
             el._log_change('classList.toggle', {'token': str(name), 'force': None if force is None else bool(force), 'path': el._dom_path()})
             el._notify_dom_change()
             return present
@@ -3145,6 +4830,8 @@ class Element:
     def getElementsByTagName(self, tag: str):
         """Return JSList of descendant elements matching tag (case-insensitive)."""
         try:
+            if tag and self._index is not None and self._index.root is self:
+                return JSList([e for e in self._index.ordered('tag', str(tag).lower()) if e is not self])
             out = []
 
             def walk(node):
@@ -3255,6 +4942,9 @@ def make_dom_shim(host=None):
     root = Element('document')
     body = Element('body')
     root.body = body
+    index = _DomIndex(body)
+    batch = _DomBatch(body)
+    batch.host = host
 
     # Attach host / document pointers to body
     body._host = host
@@ -3262,18 +4952,17 @@ def make_dom_shim(host=None):
     body._owner_document = document
 
     def _notify_dom_change():
+        """Mark the whole body dirty (pushed on the next flush)."""
         try:
-            if host and isinstance(host, dict):
-                set_raw = host.get('setRaw')
-                if callable(set_raw):
-                    set_raw(body.innerHTML)
+            batch.mark(body)
         except Exception:
             pass
 
     def _force_redraw():
-        """Explicit redraw: recompute body.innerHTML and push through host.setRaw."""
+        """Explicit redraw: push the whole body to the host now and return its HTML."""
         try:
-            _notify_dom_change()
+            batch.mark(body)
+            batch.flush()
         except Exception:
             pass
         return body.innerHTML
@@ -3302,20 +4991,8 @@ def make_dom_shim(host=None):
         return el
 
     def getElementById(idv: str) -> Optional[Element]:
-        if body.id == idv:
-            return body
-        for c in body.children:
-            if isinstance(c, Element) and c.id == idv:
-                return c
-            stack = [c] if isinstance(c, Element) else []
-            while stack:
-                n = stack.pop(0)
-                if n.id == idv:
-                    return n
-                for ch in n.children:
-                    if isinstance(ch, Element):
-                        stack.append(ch)
-        return None
+        found = index.ordered('id', str(idv))
+        return found[0] if found else None
 
     def append_to_body(el: Any) -> None:
         if isinstance(el, Element):
@@ -3328,28 +5005,23 @@ def make_dom_shim(host=None):
                 cb(body, 'document.appendChild', {'child': getattr(el, 'tagName', type(el).__name__), 'path': body._dom_path()})
         except Exception:
             pass
-        _notify_dom_change()
+
+    def _select(sel: str) -> List[Element]:
+        """Connected elements matching a simple #id, .class or tag selector, in document order."""
+        sel = sel.strip()
+        if sel.startswith('#'):
+            return index.ordered('id', sel[1:])
+        if sel.startswith('.'):
+            return index.ordered('class', sel[1:])
+        return index.ordered('tag', sel.lower())
 
     def querySelector(sel: str) -> Optional[Element]:
         """Minimal querySelector: supports #id, .class, tag selectors."""
         try:
             if not sel:
                 return None
-            sel = sel.strip()
-            if sel.startswith('#'):
-                return getElementById(sel[1:])
-            # For class/tag, do a simple walk (not optimized)
-            if sel.startswith('.'):
-                cls = sel[1:]
-                for el in [body] + list(body.getElementsByClassName(cls)):
-                    if isinstance(el, Element):
-                        return el
-                return None
-            # Tag selector
-            for el in [body] + list(body.getElementsByTagName(sel)):
-                if isinstance(el, Element):
-                    return el
-            return None
+            found = _select(sel)
+            return found[0] if found else None
         except Exception:
             return None
 
@@ -3358,10 +5030,7 @@ def make_dom_shim(host=None):
         try:
             if not sel:
                 return JSList([])
-            sel = sel.strip()
-            if sel.startswith('.'):
-                return body.getElementsByClassName(sel[1:])
-            return body.getElementsByTagName(sel)
+            return JSList(list(_select(sel)))
         except Exception:
             return JSList([])
 
@@ -3490,6 +5159,8 @@ def make_dom_shim(host=None):
         'dispatchEvent': _w_dispatch_event,
         'forceRedraw': lambda: _force_redraw(),          
         '_notify_dom_change': _notify_dom_change,
+        '__domBatch': batch,
+        'flushDomChanges': lambda *a: batch.flush(),
         '__setHost': lambda h: (_set_host(h))
     }
     body._owner_document = document
@@ -3498,20 +5169,53 @@ def make_dom_shim(host=None):
         nonlocal host
         host = h
         body._host = h
+        batch.host = h
         document['host'] = h
-        _notify_dom_change()
+        _force_redraw()
 
     if host is not None:
         _set_host(host)
 
     return document
+def flush_dom_changes(context: Optional[Dict[str, Any]]) -> bool:
+    """Push pending DOM changes of the context's document to its host; True if a push was made."""
+    try:
+        doc = (context or {}).get('document')
+        batch = doc.get('__domBatch') if isinstance(doc, dict) else None
+        return bool(batch is not None and batch.flush())
+    except Exception:
+        return False
+
+def configure_dom_batching(context: Dict[str, Any], frame_ms: Optional[float] = DOM_FRAME_MS) -> None:
+    """Set the mid-script push interval for the context's document (None: only at flush points, 0: every mutation)."""
+    doc = context.get('document')
+    if isinstance(doc, dict) and doc.get('__domBatch') is not None:
+        doc['__domBatch'].frame_ms = frame_ms
+
+def dom_batch_stats(context: Dict[str, Any]) -> Dict[str, Any]:
+    """Counters for the context's document: mutations received vs. flushes pushed."""
+    doc = context.get('document')
+    batch = doc.get('__domBatch') if isinstance(doc, dict) else None
+    if batch is None:
+        return {'mutations': 0, 'flushes': 0, 'pending': 0}
+    return batch.stats()
+
 # --- timers / scheduler -----------------------------------------------------
 def make_timers_container():
-    return {'_timers': []}  # timers: list of (fn, args)
+    return {'_timers': TimerQueue()}
+
+def run_timers_from_context(context: Dict[str,Any], advance_ms: Optional[float] = None,
+                            max_tasks: int = 1000) -> int:
+    """Run due timers from the context's TimerQueue; return how many ran.
 
-def run_timers_from_context(context: Dict[str,Any]):
-    """Run queued timers with enhanced guards against infinite loops."""
-    timers = context.setdefault('_timers', [])
+    By default this is one drain: each timer queued before the call runs once,
+    in due-time order, with the virtual clock fast-forwarded as it goes.
+    Pass `advance_ms` to move the clock forward by that many milliseconds and
+    run everything that falls due, including timers scheduled along the way.
+    """
+    timers = context.get('_timers')
+    if not isinstance(timers, TimerQueue):
+        timers = context['_timers'] = TimerQueue(timers or ())
     interp = context.get('_interp') or _LAST_INTERPRETER
     if interp is not None and context.get('_interp') is None:
         try:
@@ -3519,135 +5223,171 @@ def run_timers_from_context(context: Dict[str,Any]):
         except Exception:
             pass
 
-    intervals = context.get('_intervals', None)
-    
-    # Enhanced: Track total timer executions across all drain cycles
-    total_executed = context.get('_total_timer_executions', 0)
-    max_total_executions = 10000  # Absolute cap
-    
-    if total_executed >= max_total_executions:
-        raise RuntimeError(
-            f"Timer execution limit exceeded ({total_executed} total executions). "
-            "Possible infinite timer loop detected."
-        )
-
-    initial_len = len(timers)
-    executed_count = 0
-    
-    # **NEW GUARD**: Detect runaway queue growth (enqueuing faster than executing)
-    max_growth_per_cycle = 100  # Allow queue to grow by max 100 items per drain
-    
-    for _ in range(initial_len):
-        if executed_count >= 1000:  # Per-drain-cycle limit
-            break
-        
-        # **CHECK QUEUE GROWTH**: If queue is growing too fast, abort
-        current_queue_size = len(timers)
-        if current_queue_size > (initial_len + max_growth_per_cycle):
-            raise RuntimeError(
-                f"Timer queue explosion detected: started with {initial_len} timers, "
-                f"now have {current_queue_size} after {executed_count} executions. "
-                "Event handlers are likely enqueuing new events faster than they can be processed."
-            )
-            
-        if not timers:  # Queue emptied early
-            break
-            
-        item = timers.pop(0)
+    def _check_timer_guard(fn_obj):
         try:
-            def _check_timer_guard(fn_obj):
-                try:
-                    if not isinstance(fn_obj, JSFunction):
-                        return
-                    interp_local = context.get('_interp') or _LAST_INTERPRETER
-                    limit = int(getattr(interp_local, '_per_fn_call_threshold', 0) or 0)
-                    if not limit:
-                        return
-                    counts = context.setdefault('_timer_call_counts', {})
-                    fid = id(fn_obj)
-                    cnt = counts.get(fid, 0) + 1
-                    counts[fid] = cnt
-                    if cnt > limit:
-                        raise RuntimeError(
-                            f"Per-function recursion limit hit for {fn_obj.debug_label()} "
-                            f"(timer-invocations={cnt})"
-                        )
-                except RuntimeError:
-                    raise
-                except Exception:
-                    pass
-
-            # Interval handling
-            if isinstance(item, tuple) and len(item) == 2 and item[0] == '__interval__':
-                tid = item[1]
-                if not intervals:
-                    continue
-                entry = intervals.get(tid)
-                if not entry:
-                    continue
-                fn, it_args = entry
-                _check_timer_guard(fn)
-                
-                call_interp = interp or _LAST_INTERPRETER
-                if isinstance(fn, JSFunction):
-                    if call_interp:
-                        try:
-                            if context.get('_interp') is None:
-                                context['_interp'] = call_interp
-                        except Exception:
-                            pass
-                        fn.call(call_interp, None, list(it_args or ()))
-                elif callable(fn):
-                    try:
-                        fn(*list(it_args or ()))
-                    except Exception:
-                        pass
-                if tid in intervals:
-                    timers.append(('__interval__', tid))
-                executed_count += 1
-                continue
+            if not isinstance(fn_obj, JSFunction):
+                return
+            interp_local = context.get('_interp') or _LAST_INTERPRETER
+            limit = int(getattr(interp_local, '_per_fn_call_threshold', 0) or 0)
+            if not limit:
+                return
+            counts = context.setdefault('_timer_call_counts', {})
+            fid = id(fn_obj)
+            cnt = counts.get(fid, 0) + 1
+            counts[fid] = cnt
+            if cnt > limit:
+                raise RuntimeError(
+                    f"Per-function recursion limit hit for {fn_obj.debug_label()} "
+                    f"(timer-invocations={cnt})"
+                )
+        except RuntimeError:
+            raise
+        except Exception:
+            pass
 
-            # Regular timer
-            fn, args = item
+    def _invoke(fn, args):
+        try:
             _check_timer_guard(fn)
             if isinstance(fn, JSFunction):
                 call_interp = interp or _LAST_INTERPRETER
                 if call_interp:
-                    try:
-                        if context.get('_interp') is None:
-                            context['_interp'] = call_interp
-                    except Exception:
-                        pass
-                    fn.call(call_interp, None, list(args or ()))
+                    fn.call(call_interp, None, list(args))
             elif callable(fn):
                 try:
-                    fn(*list(args or ()))
+                    fn(*args)
                 except Exception:
                     pass
-            executed_count += 1
-            
         except Exception as e:
             if isinstance(e, RuntimeError) and "recursion limit" in str(e).lower():
                 raise
+
+    try:
+        return timers.run(_invoke, advance=advance_ms, max_tasks=max_tasks)
+    finally:
+        # **NEW: Clear the pending events batch tracker for next cycle**
+        try:
+            context.pop('_pending_events', None)
+        except Exception:
             pass
-    
-    # Update total execution counter
-    context['_total_timer_executions'] = total_executed + executed_count
-    
-    # **NEW: Clear the pending events batch tracker for next cycle**
+        # one host push for everything the drained callbacks changed
+        flush_dom_changes(context)
+
+# --- Parsed-AST cache -------------------------------------------------------
+# Scripts shared across pages/tabs (jQuery, widget code) are tokenized and parsed
+# once: ASTs are immutable tuples, so a cached tree can be run by any interpreter.
+_AST_CACHE: 'OrderedDict[str, Any]' = OrderedDict()
+_AST_CACHE_LOCK = threading.Lock()
+_AST_CACHE_MAX = 64
+_AST_CACHE_DIR: Optional[str] = None
+_AST_CACHE_STATS = {'hits': 0, 'misses': 0, 'disk_hits': 0, 'disk_writes': 0}
+
+def configure_ast_cache(max_entries: Optional[int] = None, disk_dir: Optional[str] = None) -> None:
+    """Set the in-memory LRU size and/or the on-disk cache directory ('' disables disk caching)."""
+    global _AST_CACHE_MAX, _AST_CACHE_DIR
+    with _AST_CACHE_LOCK:
+        if max_entries is not None:
+            _AST_CACHE_MAX = max(0, int(max_entries))
+            while len(_AST_CACHE) > _AST_CACHE_MAX:
+                _AST_CACHE.popitem(last=False)
+        if disk_dir is not None:
+            _AST_CACHE_DIR = disk_dir or None
+
+def ast_cache_stats() -> Dict[str, int]:
+    """Return a snapshot of cache counters (hits/misses/disk_hits/disk_writes) plus current size."""
+    with _AST_CACHE_LOCK:
+        out = dict(_AST_CACHE_STATS)
+        out['entries'] = len(_AST_CACHE)
+    return out
+
+def clear_ast_cache(reset_stats: bool = False) -> None:
+    """Drop all in-memory entries (disk files are left in place)."""
+    with _AST_CACHE_LOCK:
+        _AST_CACHE.clear()
+        if reset_stats:
+            for k in _AST_CACHE_STATS:
+                _AST_CACHE_STATS[k] = 0
+
+def _ast_cache_key(src: str) -> str:
+    # marshal output is interpreter-specific, so the Python version is part of the key
+    h = hashlib.sha256()
+    h.update(f"jsmini-{JSMINI_VERSION}-py{sys.version_info[0]}.{sys.version_info[1]}\0".encode('ascii'))
+    h.update(src.encode('utf-8', 'surrogatepass'))
+    return h.hexdigest()
+
+def _ast_disk_load(key: str):
+    d = _AST_CACHE_DIR
+    if not d:
+        return None
     try:
-        context.pop('_pending_events', None)
+        with open(os.path.join(d, key + '.ast'), 'rb') as fh:
+            return marshal.load(fh)
     except Exception:
-        pass
+        return None
+
+def _ast_disk_store(key: str, ast) -> bool:
+    d = _AST_CACHE_DIR
+    if not d:
+        return False
+    try:
+        os.makedirs(d, exist_ok=True)
+        path = os.path.join(d, key + '.ast')
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as fh:
+            marshal.dump(ast, fh)
+        os.replace(tmp, path)
+        return True
+    except Exception:
+        return False
+
+def parse_cached(src: str):
+    """`parse(src)` through the LRU (and optional disk) cache keyed by SHA-256 of the source.
+
+    Syntax errors are not cached; they re-raise from `parse` on every call.
+    """
+    key = _ast_cache_key(src)
+    with _AST_CACHE_LOCK:
+        ast = _AST_CACHE.get(key)
+        if ast is not None:
+            _AST_CACHE.move_to_end(key)
+            _AST_CACHE_STATS['hits'] += 1
+            return ast
+    ast = _ast_disk_load(key)
+    from_disk = ast is not None
+    stored = False
+    if ast is None:
+        ast = parse(src)
+        stored = _ast_disk_store(key, ast)
+    with _AST_CACHE_LOCK:
+        if from_disk:
+            _AST_CACHE_STATS['disk_hits'] += 1
+        else:
+            _AST_CACHE_STATS['misses'] += 1
+            if stored:
+                _AST_CACHE_STATS['disk_writes'] += 1
+        if _AST_CACHE_MAX:
+            _AST_CACHE[key] = ast
+            _AST_CACHE.move_to_end(key)
+            while len(_AST_CACHE) > _AST_CACHE_MAX:
+                _AST_CACHE.popitem(last=False)
+    return ast
 
 # --- Public helpers ---------------------------------------------------------
 def run_in_interpreter(src: str, interp) -> Any:
     """Evaluate `src` in an existing Interpreter (preserves variables and function bindings)."""
-    ast = parse(src)
-    return interp.run_ast(ast)
+    ast = parse_cached(src)
+    try:
+        return interp.run_ast(ast)
+    finally:
+        flush_dom_changes(getattr(interp, '_context', None))
+
+def make_context(log_fn=None, engine: str = 'tree'):
+    """Return a globals dict suitable for Interpreter — pass log_fn to capture console.log.
 
-def make_context(log_fn=None):
-    """Return a globals dict suitable for Interpreter — pass log_fn to capture console.log."""
+    `engine` selects how scripts run in this context: 'tree' (default, walks the AST)
+    or 'closure' (compiles each body once into Python closures; see `Compiler`).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown jsmini engine {engine!r} (expected one of {ENGINES})")
     def _log(*args):
         s = ' '.join(str(x) for x in args)
         if log_fn:
@@ -3656,23 +5396,17 @@ def make_context(log_fn=None):
             print(s)
     # tiny document
     document = make_dom_shim()
-    timers = []
-    def setTimeout(fn, delay=0, *args):
-        # store function + args; fn may be a JSFunction (from interpreter) or a python callable
-        ctx_t = context_ref
-        ctx_t['_timers'].append((fn, args))
-        return len(ctx_t['_timers'])
 
     # small Math object
     Math = { 'random': lambda: random.random(), 'floor': lambda x: int(x)//1 }
 
-    # context - created mutable to allow setTimeout closure reference
+    # context - created mutable so builtins (timers, window) can reference it
     context_ref = {
         'console': {'log': _log},
         'Math': Math,
         'document': document,
-        '_timers': [],
-        'setTimeout': setTimeout
+        '_timers': TimerQueue(),
+        '_engine': engine
     }
     context_ref['undefined'] = undefined
 
@@ -3745,50 +5479,71 @@ def make_context(log_fn=None):
     )
     
     return context_ref
-def run(src: str, context: Optional[Dict[str,Any]]=None):
+def _resolve_engine(context: Optional[Dict[str,Any]], engine: Optional[str]) -> str:
+    """Explicit `engine` wins, then the context's `_engine`, then the tree-walker."""
+    if engine:
+        return engine
+    try:
+        return (context or {}).get('_engine') or 'tree'
+    except Exception:
+        return 'tree'
+
+def run(src: str, context: Optional[Dict[str,Any]]=None, engine: Optional[str]=None):
     """Backward-compatible: Parse and execute JS source string in a fresh interpreter with given context dict."""
-    ast = parse(src)
-    interp = Interpreter(context or {})
+    ast = parse_cached(src)
+    interp = Interpreter(context or {}, engine=_resolve_engine(context, engine))
     # expose interpreter on context for timers/constructors
     if context is not None:
         context['_interp'] = interp
         # ensure context['undefined'] refers to interpreter sentinel so builtins see correct undefined
         context['undefined'] = undefined
-    return interp.run_ast(ast)
+    try:
+        return interp.run_ast(ast)
+    finally:
+        flush_dom_changes(context)
+
+def run_with_interpreter(src: str, context: Optional[Dict[str,Any]]=None, engine: Optional[str]=None):
+    """Run and return (result, interpreter). Caller can later call run_timers_from_context(context).
 
-def run_with_interpreter(src: str, context: Optional[Dict[str,Any]]=None):
-    """Run and return (result, interpreter). Caller can later call run_timers_from_context(context)."""
-    ast = parse(src)
+    `engine` overrides the context's engine ('tree' or 'closure') for this run.
+    """
+    ast = parse_cached(src)
     ctx = context or {}
-    interp = Interpreter(ctx)
+    interp = Interpreter(ctx, engine=_resolve_engine(ctx, engine))
     ctx['_interp'] = interp
     # ensure context['undefined'] refers to the interpreter sentinel
     ctx['undefined'] = undefined
-    res = interp.run_ast(ast)
+    try:
+        res = interp.run_ast(ast)
+    finally:
+        flush_dom_changes(ctx)
     return res, interp
 
-def run_timers(context: Dict[str,Any]):
-    """Convenience wrapper to execute stored timers in given context."""
-    run_timers_from_context(context)
+def run_timers(context: Dict[str,Any], advance_ms: Optional[float] = None) -> int:
+    """Convenience wrapper to execute stored timers in given context (see run_timers_from_context)."""
+    return run_timers_from_context(context, advance_ms=advance_ms)
 
 def dump_tokens(src: str, start_index: int, count: int = 40) -> str:
     """
     Return a readable token dump around `start_index`.
     start_index may be negative (interpreted as 0).
     """
+    idx = max(0, start_index)
+    lo = max(0, idx - count // 2)
+    # re-scan the source, keeping only the requested window
+    window = []
+    gen = _iter_token_window(src, lo, lo + count)
     try:
-        raw = tokenize(src)
+        while True:
+            window.append(next(gen))
+    except StopIteration as stop:
+        n = stop.value
     except Exception as e:
         return f"tokenize() failed: {e}"
-    toks = [(t, v, s, e) for (t, v, s, e) in raw]
-    n = len(toks)
-    idx = max(0, start_index)
-    lo = max(0, idx - count // 2)
     hi = min(n, lo + count)
     lines = []
     lines.append(f"Tokens {lo}..{hi-1} (total {n}):")
-    for i in range(lo, hi):
-        t, v, s, e = toks[i]
+    for i, t, v, s, e in window:
         snippet = src[s:e].replace('\n', '\\n')
         markers = '<--' if i == idx else ''
         lines.append(f"{i:4}: {t:7} {v!r}  [{s}:{e}]  {snippet} {markers}")
@@ -3809,19 +5564,22 @@ def diagnose_parse(src: str, radius_tokens: int = 24, radius_chars: int = 80) ->
     except SyntaxError as se:
         # Try to get parser index by running Parser and catching the same error position
         try:
-            # produce raw tokens with positions
-            raw = tokenize(src)
-            toks = [(t, v) for (t, v, s, e) in raw]
-            positions = [(s, e) for (t, v, s, e) in raw]
-            p = Parser(toks)
+            # re-run the parser over a fresh token stream; its window still holds the failing token
+            stream = TokenStream(src)
+            p = Parser(stream)
             try:
                 p.parse_program()
             except SyntaxError:
                 idx = getattr(p, 'i', None)
                 if idx is None:
                     raise
-                start, end = positions[idx] if idx < len(positions) else (0, 0)
-                token = toks[idx] if idx < len(toks) else ('', '')
+                j = idx - stream.base
+                if 0 <= j < len(stream.buf):
+                    start, end = stream.position(idx)
+                    token = stream.buf[j]
+                else:
+                    start, end = (0, 0)
+                    token = ('', '')
                 token_ctx = dump_tokens(src, idx, count=radius_tokens)
                 # source char snippet
                 start_char = max(0, start - radius_chars)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import mmap
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Callable, Optional, Tuple
+
+# Tkinter-free, read-only view of a file too large to load into a Text widget.
+#
+# The file is memory-mapped instead of read. A background thread records the byte offset
+# of every line start (8 bytes per line) a block at a time, so the editor can page a window
+# of lines into its Text widget, and jump to any line, while the rest is still being
+# indexed. Searches run the regex over the mapping itself (UTF-8 bytes), never over the
+# window shown in the widget.
+
+INDEX_BLOCK = 1 << 22       # bytes indexed per step; progress is reported after each
+
+
+class MappedFile:
+    """A memory-mapped file with a line-start index built in the background."""
+
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        self.path = path
+        self.encoding = encoding
+        self.size = os.path.getsize(path)
+        self._fh = open(path, 'rb')
+        # mmap refuses empty files; an empty bytes object answers the same calls
+        self.mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self.starts = array('q', [0])
+        self.done = threading.Event()
+        self._cancel = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- line index ----------------------------------------------------------
+    def start_indexing(self, progress: Optional[Callable[[int, int, int], None]] = None) -> None:
+        """Index line starts on a daemon thread; progress(bytes_done, size, lines) per block."""
+        self._thread = threading.Thread(target=self._index, args=(progress,), daemon=True)
+        self._thread.start()
+
+    def _index(self, progress) -> None:
+        pos = 0
+        try:
+            while pos < self.size and not self._cancel:
+                end = min(self.size, pos + INDEX_BLOCK)
+                parts = self.mm[pos:end].split(b'\n')
+                # the offset after each newline in the block, summed in C
+                starts = accumulate(map((1).__add__, map(len, parts[:-1])), initial=pos)
+                next(starts)
+                self.starts.extend(starts)
+                pos = end
+                if progress is not None:
+                    progress(pos, self.size, len(self.starts))
+        except (ValueError, OSError):
+            # the mapping was closed under us
+            pass
+        finally:
+            self.done.set()
+
+    def index_all(self) -> None:
+        """Build the whole line index on the calling thread."""
+        self._index(None)
+
+    @property
+    def line_count(self) -> int:
+        """Lines whose text is known: every line once indexing is done, else the complete ones."""
+        return len(self.starts) if self.done.is_set() else len(self.starts) - 1
+
+    def line_of(self, offset: int) -> int:
+        """0-based line of a byte offset (counting past the index while it is still growing)."""
+        starts = self.starts
+        if offset >= starts[-1] and not self.done.is_set():
+            return len(starts) - 1 + self.mm[starts[-1]:offset].count(b'\n')
+        return bisect_right(starts, offset) - 1
+
+    # ---- reading -------------------------------------------------------------
+    def _decode(self, data: bytes) -> str:
+        return data.decode(self.encoding, errors='replace').replace('\r\n', '\n')
+
+    def _end_of(self, last: int) -> int:
+        # byte offset where line `last` starts, minus its preceding newline (and a CR before it)
+        if last >= len(self.starts):
+            return self.size
+        end = self.starts[last] - 1
+        if end > 0 and self.mm[end - 1:end] == b'\r':
+            end -= 1
+        return end
+
+    def text(self, first: int, last: int) -> str:
+        """Text of lines [first, last) without the final newline."""
+        first = max(0, min(first, len(self.starts) - 1))
+        last = min(last, self.line_count)
+        if last <= first:
+            return ''
+        return self._decode(self.mm[self.starts[first]:self._end_of(last)])
+
+    # ---- search --------------------------------------------------------------
+    def search(self, pattern: str, line: int = 0, col: int = 0, regex: bool = False,
+               nocase: bool = False) -> Optional[Tuple[int, int, int]]:
+        """First match at or after (line, col) as (line, col, length) in characters, or None.
+
+        The pattern is encoded and run over the mapping, so regexes see UTF-8 bytes
+        ('.' matches a single byte of a multi-byte character).
+        """
+        if not pattern:
+            return None
+        raw = pattern.encode(self.encoding)
+        rx = re.compile(raw if regex else re.escape(raw), re.IGNORECASE if nocase else 0)
+        line = max(0, min(line, len(self.starts) - 1))
+        a = self.starts[line]
+        pos = a + len(self.text(line, line + 1)[:col].encode(self.encoding))
+        m = rx.search(self.mm, pos)
+        if m is None:
+            return None
+        hit = self.line_of(m.start())
+        start = self.starts[hit] if hit < len(self.starts) else self.mm.rfind(b'\n', 0, m.start()) + 1
+        return (hit, len(self._decode(self.mm[start:m.start()])), len(self._decode(m.group())))
+
+    def close(self) -> None:
+        self._cancel = True
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        if self.size:
+            self.mm.close()
+        self._fh.close()
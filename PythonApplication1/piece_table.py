@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import List, Tuple, Optional
+
+# Tkinter-free piece-table model of an editor buffer.
+#
+# The text is a list of pieces, each a slice (buffer, start, length) of an immutable string
+# buffer: the text the tab was opened with, or the text of one insert. Edits split and
+# splice the piece list and never copy the buffers, so snapshot() can hand a background
+# thread a frozen copy of the document by copying the (short) piece list only.
+#
+# Offsets, line starts and 'line.col' indices are found by bisecting the cumulative
+# length/newline counts of the pieces, and inside a piece by bisecting the newline
+# positions of its buffer (computed once per buffer). The cumulative counts are rebuilt
+# lazily after an edit; when typing has fragmented the list past COMPACT_PIECES the next
+# text() read folds it back into a single buffer.
+#
+# attach(widget) keeps a Tk Text widget and a PieceTable in step by routing the widget's
+# insert/delete/replace commands through the model, the way idlelib's WidgetRedirector
+# intercepts them; widget_text/widget_snapshot then read the model instead of Tk.
+
+COMPACT_PIECES = 512        # fold the piece list into one buffer past this many pieces
+_COALESCE_LIMIT = 4096      # consecutive typing grows one small buffer up to this size
+_ASTRAL_RE = re.compile('[\U00010000-\U0010FFFF]')
+
+
+class _Buffer:
+    """An immutable string plus the positions of its newlines (computed on first use)."""
+    __slots__ = ('text', '_nl')
+
+    def __init__(self, text: str):
+        self.text = text
+        self._nl = None
+
+    @property
+    def nl(self) -> array:
+        if self._nl is None:
+            text = self.text
+            nl = array('q')
+            i = text.find('\n')
+            while i >= 0:
+                nl.append(i)
+                i = text.find('\n', i + 1)
+            self._nl = nl
+        return self._nl
+
+    def newlines(self, start: int, end: int) -> int:
+        nl = self.nl
+        return bisect_left(nl, end) - bisect_left(nl, start)
+
+
+class PieceTable:
+    """Editable text as pieces of immutable buffers (see the module comment).
+
+    Offsets are 0-based character offsets; lines are 0-based except in the Tk-style
+    index()/offset() pair, which use 'line.col' with 1-based lines like Text indices.
+    """
+    __slots__ = ('pieces', 'version', '_len', '_ends', '_nls', '_text')
+
+    def __init__(self, text: str = ''):
+        self.pieces: List[Tuple[_Buffer, int, int]] = [(_Buffer(text), 0, len(text))] if text else []
+        self.version = 0
+        self._len = len(text)
+        self._ends: Optional[List[int]] = None
+        self._nls: Optional[List[int]] = None
+        self._text: Optional[str] = text
+
+    def __len__(self) -> int:
+        return self._len
+
+    # ---- reading -----------------------------------------------------------
+    def text(self) -> str:
+        """The whole text (joined once per version and cached)."""
+        if self._text is None:
+            self._text = ''.join(b.text[s:s + n] for b, s, n in self.pieces)
+            if len(self.pieces) > COMPACT_PIECES:
+                self.pieces = [(_Buffer(self._text), 0, self._len)]
+                self._ends = self._nls = None
+        return self._text
+
+    def get(self, start: int = 0, end: Optional[int] = None) -> str:
+        """Text between two offsets, copying only that span."""
+        end = self._len if end is None else min(end, self._len)
+        start = max(0, start)
+        if start >= end:
+            return ''
+        if self._text is not None:
+            return self._text[start:end]
+        return ''.join(self.chunks(start, end))
+
+    def chunks(self, start: int = 0, end: Optional[int] = None):
+        """Yield the text between two offsets piece by piece."""
+        end = self._len if end is None else min(end, self._len)
+        if start >= end:
+            return
+        ends = self._index()[0]
+        k = bisect_right(ends, start)
+        pos = ends[k - 1] if k else 0
+        pieces = self.pieces
+        while pos < end:
+            b, s, n = pieces[k]
+            lo = max(start - pos, 0)
+            hi = min(end - pos, n)
+            yield b.text[s + lo:s + hi]
+            pos += n
+            k += 1
+
+    @property
+    def line_count(self) -> int:
+        nls = self._index()[1]
+        return (nls[-1] if nls else 0) + 1
+
+    def line_start(self, line: int) -> int:
+        """Offset of the start of 0-based line (clamped to the last line)."""
+        if line <= 0:
+            return 0
+        ends, nls = self._index()
+        if not nls or line > nls[-1]:
+            return self.line_start(nls[-1]) if nls and nls[-1] else 0
+        k = bisect_left(nls, line)
+        before = nls[k - 1] if k else 0
+        b, s, _n = self.pieces[k]
+        nl = b.nl
+        i = bisect_left(nl, s) + (line - before) - 1
+        return (ends[k - 1] if k else 0) + nl[i] - s + 1
+
+    def line_of(self, offset: int) -> int:
+        """0-based line containing offset."""
+        offset = max(0, min(offset, self._len))
+        ends, nls = self._index()
+        k = bisect_right(ends, offset)
+        if k >= len(ends):
+            return nls[-1] if nls else 0
+        before = nls[k - 1] if k else 0
+        b, s, _n = self.pieces[k]
+        return before + b.newlines(s, s + offset - (ends[k - 1] if k else 0))
+
+    def index(self, offset: int) -> str:
+        """Tk 'line.col' index of an offset."""
+        offset = max(0, min(offset, self._len))
+        line = self.line_of(offset)
+        return f"{line + 1}.{offset - self.line_start(line)}"
+
+    def offset(self, line: int, col: int) -> int:
+        """Offset of Tk line (1-based) and column, clamped the way Text clamps indices."""
+        if line < 1:
+            return 0
+        if line > self.line_count:
+            return self._len
+        start = self.line_start(line - 1)
+        end = self.line_start(line) - 1 if line < self.line_count else self._len
+        return start + max(0, min(col, end - start))
+
+    # ---- editing -----------------------------------------------------------
+    def insert(self, offset: int, text: str) -> None:
+        if not text:
+            return
+        offset = max(0, min(offset, self._len))
+        pieces = self.pieces
+        ends = self._index()[0]
+        k = bisect_left(ends, offset)
+        if k < len(pieces) and ends[k] == offset:
+            # appending to piece k: typing keeps growing one small buffer
+            b, s, n = pieces[k]
+            if s + n == len(b.text) and len(b.text) + len(text) <= _COALESCE_LIMIT:
+                pieces[k] = (_Buffer(b.text + text), s, n + len(text))
+                self._edited(len(text))
+                return
+            pieces.insert(k + 1, (_Buffer(text), 0, len(text)))
+        elif k >= len(pieces):
+            pieces.append((_Buffer(text), 0, len(text)))
+        else:
+            b, s, n = pieces[k]
+            cut = offset - (ends[k - 1] if k else 0)
+            if cut == 0:
+                pieces.insert(k, (_Buffer(text), 0, len(text)))
+            else:
+                pieces[k:k + 1] = [(b, s, cut), (_Buffer(text), 0, len(text)), (b, s + cut, n - cut)]
+        self._edited(len(text))
+
+    def delete(self, start: int, end: int) -> None:
+        start = max(0, start)
+        end = min(end, self._len)
+        if start >= end:
+            return
+        pieces = self.pieces
+        ends = self._index()[0]
+        k = bisect_right(ends, start)
+        j = bisect_left(ends, end)
+        keep = []
+        b, s, n = pieces[k]
+        head = start - (ends[k - 1] if k else 0)
+        if head:
+            keep.append((b, s, head))
+        b, s, n = pieces[j]
+        tail = ends[j] - end
+        if tail:
+            keep.append((b, s + n - tail, tail))
+        pieces[k:j + 1] = keep
+        self._edited(start - end)
+
+    def replace(self, start: int, end: int, text: str) -> None:
+        self.delete(start, end)
+        self.insert(start, text)
+
+    def snapshot(self) -> 'PieceTable':
+        """A frozen copy for another thread: shares every buffer, copies the piece list."""
+        snap = PieceTable.__new__(PieceTable)
+        snap.pieces = list(self.pieces)
+        snap.version = self.version
+        snap._len = self._len
+        snap._ends = self._ends
+        snap._nls = self._nls
+        snap._text = self._text
+        return snap
+
+    # ---- internals ---------------------------------------------------------
+    def _edited(self, delta: int) -> None:
+        self._len += delta
+        self.version += 1
+        self._ends = self._nls = None
+        self._text = None
+
+    def _index(self) -> Tuple[List[int], List[int]]:
+        """Cumulative piece end offsets and newline counts (rebuilt, never mutated, after edits)."""
+        if self._ends is None:
+            pieces = self.pieces
+            self._ends = list(accumulate(n for _b, _s, n in pieces))
+            self._nls = list(accumulate(b.newlines(s, s + n) for b, s, n in pieces))
+        return self._ends, self._nls
+
+
+# ---- Tk Text binding -------------------------------------------------------
+class _TextSync:
+    """Routes one Text widget's edit commands through its PieceTable.
+
+    The widget's Tcl command is renamed and replaced by dispatch(), which converts the edit's
+    indices to offsets with the model (before Tk changes the text), runs the real command and
+    applies the same edit to the model. Undo/redo run inside Tk without passing through the
+    widget command, and non-BMP characters are counted differently by Tk, so either marks
+    the model stale; the next read resyncs it from the widget.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.tk = widget.tk
+        self.name = str(widget)
+        self.orig = self.name + '_pt'
+        self.doc = PieceTable()
+        self.stale = False
+        self.astral = False
+        self.tk.call('rename', self.name, self.orig)
+        self.tk.createcommand(self.name, self.dispatch)
+        # Misc.destroy() deletes the widget's registered Python commands, this one included
+        if widget._tclCommands is None:
+            widget._tclCommands = []
+        widget._tclCommands.append(self.name)
+        self.resync()
+
+    def resync(self) -> PieceTable:
+        text = self.tk.call(self.orig, 'get', '1.0', 'end-1c')
+        self.doc = PieceTable(str(text))
+        self.astral = bool(_ASTRAL_RE.search(self.doc.text()))
+        self.stale = False
+        return self.doc
+
+    def document(self) -> PieceTable:
+        return self.resync() if self.stale else self.doc
+
+    def _offset(self, index) -> int:
+        line, col = map(int, str(self.tk.call(self.orig, 'index', index)).split('.'))
+        return self.doc.offset(line, col)
+
+    def dispatch(self, *args):
+        orig = self.orig
+        cmd = args[0] if args else ''
+        if self.stale or cmd not in ('insert', 'delete', 'replace'):
+            if cmd == 'edit' and len(args) > 1 and args[1] in ('undo', 'redo'):
+                self.stale = True
+            return self.tk.call((orig,) + args)
+        if str(self.tk.call(orig, 'cget', '-state')) == 'disabled':
+            # Tk ignores edits of a disabled widget
+            return self.tk.call((orig,) + args)
+        inserted = args[2::2] if cmd == 'insert' else args[3::2] if cmd == 'replace' else ()
+        if self.astral or any(_ASTRAL_RE.search(str(a)) for a in inserted):
+            self.stale = True
+            return self.tk.call((orig,) + args)
+        try:
+            if cmd == 'insert':
+                at = self._offset(args[1])
+                result = self.tk.call((orig,) + args)
+                self.doc.insert(at, ''.join(inserted))
+            elif cmd == 'delete':
+                if len(args) > 3:
+                    self.stale = True
+                    return self.tk.call((orig,) + args)
+                s = self._offset(args[1])
+                e = self._offset(args[2]) if len(args) > 2 else s + 1
+                result = self.tk.call((orig,) + args)
+                self.doc.delete(s, e)
+            else:
+                s = self._offset(args[1])
+                e = self._offset(args[2])
+                result = self.tk.call((orig,) + args)
+                if e > s:
+                    self.doc.delete(s, e)
+                self.doc.insert(s, ''.join(inserted))
+        except Exception:
+            self.stale = True
+            raise
+        return result
+
+
+def attach(widget) -> PieceTable:
+    """Back a Tk Text widget with a PieceTable kept in step with its edits (idempotent)."""
+    sync = getattr(widget, '_piece_sync', None)
+    if sync is None:
+        sync = _TextSync(widget)
+        widget._piece_sync = sync
+    return sync.document()
+
+
+def widget_document(widget) -> Optional[PieceTable]:
+    """The widget's up-to-date PieceTable, or None for widgets without attach()."""
+    sync = getattr(widget, '_piece_sync', None)
+    return sync.document() if sync is not None else None
+
+
+def widget_text(widget) -> str:
+    """The widget's text from its model when attached, else from Tk."""
+    doc = widget_document(widget)
+    return doc.text() if doc is not None else widget.get('1.0', 'end-1c')
+
+
+def widget_snapshot(widget) -> PieceTable:
+    """A frozen copy of the widget's text for a background thread."""
+    doc = widget_document(widget)
+    return doc.snapshot() if doc is not None else PieceTable(widget.get('1.0', 'end-1c'))
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+import itertools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+import syntax_worker
+
+# Tkinter-free HTML render jobs, off the Tk thread.
+#
+# Each tab submits a RenderJob under a key (the tab's widget name, say) and a newer job
+# for the same key cancels the older one: a toggle pressed twice, or a navigation away,
+# never paints a stale page. Jobs queue for RenderPool's worker threads. With processes=0
+# a worker parses in this process with functions.HTMLStreamRenderer, RENDER_SLICE
+# characters at a time, and stops between slices once its job is cancelled. Otherwise
+# every worker thread owns one `render_jobs.py --serve` subprocess (started like the
+# syntax_worker servers, so the GUI module is never imported there) and ships it the raw
+# HTML as one JSON line; the tag ranges come back as syntax_worker.pack_spans int32
+# arrays. A cancelled job still finishes in its process, and its result is dropped.
+# RenderPool.begin registers a job the caller runs itself (a page parsed while it
+# downloads) so that it is cancelled and timed like the others.
+#
+# Every job records how long it spent in each stage (STAGES, in seconds): 'fetch' (set by
+# the caller), 'queue', 'preprocess' (whitespace stripping), 'parse' (HTML parser plus
+# get_result and anchor remapping), 'transfer' (process round trip minus parsing) and
+# 'apply' (set by the caller once the tab shows the result). RenderPool.recent keeps the
+# last finished jobs.
+
+STAGES = ('fetch', 'queue', 'preprocess', 'parse', 'transfer', 'apply')
+RENDER_SLICE = 64 * 1024
+
+_job_ids = itertools.count(1)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class RenderJob:
+    """One parse of `raw` for `key`; on_done(job, plain, meta) runs on a pool thread."""
+
+    def __init__(self, key, raw: str, on_done: Callable, on_error: Optional[Callable] = None):
+        self.id = next(_job_ids)
+        self.key = key
+        self.raw = raw
+        self.on_done = on_done
+        self.on_error = on_error
+        self.metrics: Dict[str, float] = {}
+        self.submitted = time.perf_counter()
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.metrics[stage] = self.metrics.get(stage, 0.0) + max(0.0, seconds)
+
+    def summary(self) -> str:
+        parts = [f"{stage} {self.metrics[stage] * 1000:.0f} ms" for stage in STAGES if stage in self.metrics]
+        return f"render #{self.id}: " + (', '.join(parts) or 'no stages timed')
+
+
+def render_html(raw: str, cancelled: Optional[Callable[[], bool]] = None) -> Tuple[str, dict, Dict[str, float]]:
+    """_parse_html_and_apply(raw) in RENDER_SLICE pieces; returns (plain, meta, stage timings)."""
+    import functions  # imported here so the GUI-free server process only pays for it once
+    stream = functions.HTMLStreamRenderer(preview=False)
+    for i in range(0, len(raw), RENDER_SLICE):
+        if cancelled is not None and cancelled():
+            raise JobCancelled()
+        stream.feed(raw[i:i + RENDER_SLICE])
+    if cancelled is not None and cancelled():
+        raise JobCancelled()
+    plain, meta = stream.close()
+    return plain, meta, dict(stream.timings)
+
+
+def pack_result(plain: str, meta: dict, timings: Dict[str, float]) -> dict:
+    """Wire form of a render: tag ranges as packed int32 arrays, the rest of meta as is."""
+    meta = meta if isinstance(meta, dict) else {}
+    return {
+        "ok": True,
+        "plain": plain,
+        "tags": syntax_worker.pack_spans(meta.get('tags') or {}),
+        "meta": {k: v for k, v in meta.items() if k != 'tags'},
+        "timings": timings,
+    }
+
+
+def unpack_result(resp: dict) -> Tuple[str, dict]:
+    meta = dict(resp.get("meta") or {})
+    meta['tags'] = {tag: [[s, e] for s, e in spans]
+                    for tag, spans in syntax_worker.unpack_spans(resp.get("tags") or {}).items()}
+    return resp.get("plain", ""), meta
+
+
+class _Server:
+    """One `render_jobs.py --serve` subprocess, used by a single pool thread."""
+
+    def __init__(self):
+        self.proc: Optional[subprocess.Popen] = None
+
+    def start(self) -> None:
+        if self.proc is None or self.proc.poll() is not None:
+            self.proc = subprocess.Popen(
+                [sys.executable, '-u', os.path.abspath(__file__), '--serve'],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                text=True, encoding='utf-8', bufsize=1)
+
+    def render(self, raw: str) -> Optional[dict]:
+        try:
+            self.start()
+            self.proc.stdin.write(json.dumps({"action": "render", "raw": raw}) + "\n")
+            self.proc.stdin.flush()
+            line = self.proc.stdout.readline()
+            return json.loads(line) if line else None
+        except Exception:
+            self.close()
+            return None
+
+    def close(self) -> None:
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.write(json.dumps({"action": "shutdown"}) + "\n")
+            proc.stdin.flush()
+            proc.wait(timeout=1)
+        except Exception:
+            proc.kill()
+
+
+class RenderPool:
+    """Worker threads (each with its own render process unless processes=0) serving RenderJobs."""
+
+    def __init__(self, processes: int = 1, threads: int = 1, keep: int = 50):
+        self.processes = max(0, int(processes))
+        count = self.processes or max(1, int(threads))
+        self.recent: deque = deque(maxlen=keep)
+        self._queue: 'queue.Queue[Optional[RenderJob]]' = queue.Queue()
+        self._latest: Dict[object, RenderJob] = {}
+        self._lock = threading.Lock()
+        self._servers = [_Server() if self.processes else None for _ in range(count)]
+        self._threads = [threading.Thread(target=self._run, args=(srv,), daemon=True) for srv in self._servers]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, key, raw: str, on_done: Callable, on_error: Optional[Callable] = None,
+               fetch_seconds: Optional[float] = None) -> RenderJob:
+        """Queue a render of raw for key, cancelling the job key had before."""
+        job = self.begin(key, fetch_seconds, RenderJob(key, raw, on_done, on_error))
+        self._queue.put(job)
+        return job
+
+    def begin(self, key, fetch_seconds: Optional[float] = None, job: Optional[RenderJob] = None) -> RenderJob:
+        """Make job (by default an empty one the caller runs itself) key's current job."""
+        job = job if job is not None else RenderJob(key, '', None)
+        if fetch_seconds is not None:
+            job.record('fetch', fetch_seconds)
+        with self._lock:
+            prev = self._latest.get(key)
+            self._latest[key] = job
+        if prev is not None:
+            prev.cancel()
+        return job
+
+    def move(self, job: RenderJob, key) -> None:
+        """File a still current job under key (its tab was replaced by a new one)."""
+        with self._lock:
+            if self._latest.get(job.key) is not job:
+                return
+            del self._latest[job.key]
+            prev = self._latest.get(key)
+            self._latest[key] = job
+            job.key = key
+        if prev is not None:
+            prev.cancel()
+
+    def cancel(self, key) -> bool:
+        """Cancel key's pending or running job (the tab was closed or navigated away)."""
+        with self._lock:
+            job = self._latest.pop(key, None)
+        if job is not None:
+            job.cancel()
+        return job is not None
+
+    def is_current(self, job: RenderJob) -> bool:
+        """False once a newer job for the same key was submitted or the key was cancelled."""
+        with self._lock:
+            return not job.cancelled and self._latest.get(job.key) is job
+
+    def finished(self, job: RenderJob) -> None:
+        """Keep job's metrics in recent (call after the caller recorded 'apply')."""
+        with self._lock:
+            if self._latest.get(job.key) is job:
+                del self._latest[job.key]
+        self.recent.append((job.id, job.key, dict(job.metrics)))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            jobs, self._latest = list(self._latest.values()), {}
+        for job in jobs:
+            job.cancel()
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join(timeout=2)
+        for srv in self._servers:
+            if srv is not None:
+                srv.close()
+
+    def _run(self, server: Optional[_Server]) -> None:
+        if server is not None:
+            try:
+                server.start()
+            except Exception:
+                pass
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.cancelled:
+                continue
+            job.record('queue', time.perf_counter() - job.submitted)
+            try:
+                result = self._render(job, server)
+            except JobCancelled:
+                continue
+            except Exception as exc:
+                if job.on_error is not None and not job.cancelled:
+                    try:
+                        job.on_error(job, exc)
+                    except Exception:
+                        pass
+                continue
+            if job.cancelled:
+                continue
+            try:
+                job.on_done(job, *result)
+            except Exception:
+                pass
+
+    def _render(self, job: RenderJob, server: Optional[_Server]) -> Tuple[str, dict]:
+        if server is not None:
+            t0 = time.perf_counter()
+            resp = server.render(job.raw)
+            if resp is not None and resp.get("ok"):
+                timings = resp.get("timings") or {}
+                for stage in ('preprocess', 'parse'):
+                    job.record(stage, float(timings.get(stage, 0.0)))
+                job.record('transfer', time.perf_counter() - t0 - sum(float(v) for v in timings.values()))
+                return unpack_result(resp)
+            # the process failed or went away: render this job here instead
+        plain, meta, timings = render_html(job.raw, lambda: job.cancelled)
+        for stage, seconds in timings.items():
+            job.record(stage, seconds)
+        return plain, meta
+
+
+# ---- server main (invoked when running this file directly with --serve) -----
+def _server_main() -> None:
+    # replies go to the real stdout; stray prints from the parser must not reach the parent
+    out_stream, sys.stdout = sys.stdout, sys.stderr
+    for line in sys.stdin:
+        try:
+            req = json.loads(line)
+        except ValueError:
+            continue
+        if req.get("action") == "shutdown":
+            break
+        try:
+            out = pack_result(*render_html(req.get("raw", "")))
+        except Exception as exc:
+            out = {"ok": False, "error": repr(exc)}
+        out_stream.write(json.dumps(out) + "\n")
+        out_stream.flush()
+
+
+if __name__ == '__main__':
+    if '--serve' in sys.argv:
+        _server_main()
@@ -0,0 +1,713 @@
+# -*- coding: utf-8 -*-
+import re
+import string as _string
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, islice
+from typing import List, Tuple, Dict, Optional, Any
+
+try:
+    import re._parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse as _sre_parse
+
+# Tkinter-free tokenizer and incremental lexer used by the editor's highlighter.
+#
+# MasterPattern folds every *_RE slot of a syntax preset into one combined regex, so a
+# single left-to-right finditer classifies the text: at each position the first rule in
+# precedence order that matches wins and consumes its span. Strings and comments come
+# first, so nothing is tagged inside them and a quote inside a comment (or '#' inside a
+# string) no longer starts a span of its own.
+#
+# LineStateLexer remembers the text of every line together with the lexer state at the end
+# of that line: either None (no token covers the newline) or (tag, depth, column) for the
+# token that covers it and started `depth` lines earlier at `column`. Depth is relative so
+# the states of lines below an edit stay valid when lines are inserted or removed; the
+# column tells apart two tokens opened on the same line (an old ''' and a new """).
+#
+# After an edit the lexer diffs the new text against the cached lines, backs up to the line
+# where the token open across the first changed line began, and re-lexes forward until the
+# end-of-line state matches the cached state of the corresponding old line again.
+#
+# An opener without any closer below it (a lone '"""' or '/*') is no token, so no state
+# records it. Lines holding such a dangling delimiter are flagged instead; when an edit
+# types a delimiter, the flagged lines above it are tried again and the re-lex starts at
+# the first one whose opener now runs past its line.
+
+# Tags produced by the lexer (the other highlighter passes own the remaining tags).
+LEXER_TAGS = ('string', 'keyword', 'comment', 'selfs', 'def', 'number', 'variable',
+              'decorator', 'class_name', 'constant', 'attribute', 'builtin', 'todo')
+
+# Alternatives of the master pattern, highest precedence first: strings and comments, then
+# the context rules that tag a group (they consume the keyword in 'class Foo', whose text
+# is classified again), then plain words. Within each group the order follows the Text
+# display priority of _apply_tag_configs_to_widget (later tags are drawn on top), so a span
+# keeps the colour it showed when every regex ran as a separate pass.
+TOKEN_PRECEDENCE = ('comment', 'string', 'attribute', 'constant', 'class_name', 'decorator',
+                    'variable', 'keyword', 'def', 'builtin', 'selfs', 'number')
+
+State = Optional[Tuple[str, int, int]]
+
+_LEADING_FLAGS_RE = re.compile(r'\(\?[aiLmsux]+\)')
+_BACKREF_RE = re.compile(r'\\[1-9]|\(\?P=')
+_SCOPED_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+# text every real rule finds something in; rules that only match empty here (the '\b\b'
+# placeholders of presets without such a construct) add nothing to the master pattern
+_EMPTY_PROBE = "x Ab_1 .@y = 'a' \"b\" # c\n\t/* d */ // e ; f: g <h> [i] -j 0x1F 2.5\n"
+
+
+def _scoped(rx) -> str:
+    """rx's pattern as a self-contained alternative with its flags scoped to it."""
+    pat = rx.pattern
+    while True:
+        m = _LEADING_FLAGS_RE.match(pat)
+        if not m:
+            break
+        pat = pat[m.end():]
+    flags = ''.join(ch for bit, ch in _SCOPED_FLAGS if rx.flags & bit)
+    return f'(?{flags}:{pat})' if flags else f'(?:{pat})'
+
+
+_REPEATS = tuple(op for op in (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT,
+                                getattr(_sre_parse, 'POSSESSIVE_REPEAT', None)) if op is not None)
+_ZERO_WIDTH = (_sre_parse.AT, _sre_parse.ASSERT, _sre_parse.ASSERT_NOT)
+_PUNCTUATION = frozenset(_string.punctuation)
+
+
+def _class_chars(items) -> Optional[set]:
+    """Characters of a parsed [...] class, or None when it is negated or uses categories."""
+    out = set()
+    for op, av in items:
+        if op == _sre_parse.LITERAL:
+            out.add(chr(av))
+        elif op == _sre_parse.RANGE and av[1] - av[0] < 256:
+            out.update(chr(c) for c in range(av[0], av[1] + 1))
+        else:
+            return None
+    return out
+
+
+def _first_chars(items) -> Tuple[Optional[set], bool]:
+    """(characters a match of parsed items can start with or None for any, can match empty)."""
+    chars: set = set()
+    for op, av in items:
+        if op in _ZERO_WIDTH:
+            continue
+        if op == _sre_parse.LITERAL:
+            return chars | {chr(av)}, False
+        if op == _sre_parse.IN:
+            sub = _class_chars(av)
+            return (None if sub is None else chars | sub), False
+        if op == _sre_parse.SUBPATTERN:
+            sub, nullable = _first_chars(av[-1])
+        elif op == getattr(_sre_parse, 'ATOMIC_GROUP', None):
+            sub, nullable = _first_chars(av)
+        elif op in _REPEATS:
+            sub, nullable = _first_chars(av[2])
+            nullable = nullable or av[0] == 0
+        elif op == _sre_parse.BRANCH:
+            sub, nullable = set(), False
+            for alt in av[1]:
+                alt_chars, alt_nullable = _first_chars(alt)
+                if alt_chars is None:
+                    return None, False
+                sub |= alt_chars
+                nullable = nullable or alt_nullable
+        else:
+            return None, False
+        if sub is None:
+            return None, False
+        chars |= sub
+        if not nullable:
+            return chars, False
+    return chars, True
+
+
+def _literal_chars(items, out: set) -> None:
+    """Add every literal character of parsed items (outside negated classes) to out."""
+    for op, av in items:
+        if op == _sre_parse.LITERAL:
+            out.add(chr(av))
+        elif op == _sre_parse.IN:
+            if not any(o == _sre_parse.NEGATE for o, _ in av):
+                out.update(chr(a) for o, a in av if o == _sre_parse.LITERAL)
+        elif op == _sre_parse.SUBPATTERN:
+            _literal_chars(av[-1], out)
+        elif op == getattr(_sre_parse, 'ATOMIC_GROUP', None):
+            _literal_chars(av, out)
+        elif op in _REPEATS:
+            _literal_chars(av[2], out)
+        elif op in (_sre_parse.ASSERT, _sre_parse.ASSERT_NOT):
+            _literal_chars(av[1], out)
+        elif op == _sre_parse.BRANCH:
+            for alt in av[1]:
+                _literal_chars(alt, out)
+
+
+def _delimiters(regexes) -> Tuple[frozenset, frozenset]:
+    """(delimiters, openers): punctuation in string/comment regexes, and what they start with.
+
+    Unknown constructs fall back to every ASCII punctuation character.
+    """
+    delims: set = set()
+    openers: set = set()
+    for rx in regexes:
+        try:
+            parsed = _sre_parse.parse(rx.pattern, rx.flags)
+        except Exception:
+            return _PUNCTUATION, _PUNCTUATION
+        first, _ = _first_chars(parsed)
+        if first is None:
+            return _PUNCTUATION, _PUNCTUATION
+        _literal_chars(parsed, delims)
+        openers |= first
+    # word characters and spaces occur everywhere outside tokens; they would flag every line
+    openers = frozenset(c for c in openers if not (c.isalnum() or c == '_' or c.isspace()))
+    delims = frozenset(c for c in delims if not (c.isalnum() or c == '_' or c.isspace())) | openers
+    return delims, openers
+
+
+def _char_class(chars) -> Optional[Any]:
+    return re.compile('[' + ''.join(re.escape(c) for c in sorted(chars)) + ']') if chars else None
+
+
+def _matches_empty(rx) -> Tuple[bool, bool]:
+    """(can match empty, only matches empty) for rx, judged on a probe string."""
+    spans = [m.span() for m in rx.finditer(_EMPTY_PROBE)]
+    empty = any(s == e for s, e in spans) or rx.match('') is not None
+    return empty, empty and all(s == e for s, e in spans)
+
+
+class MasterPattern:
+    """One combined regex for a preset's rules.
+
+    rules: iterable of (tag, compiled_regex, prefer_group1). Group 1 is tagged when it
+    participates (the text around it is classified again, so 'class' in 'class Foo' is
+    still a keyword); otherwise the whole match is. Rules using backreferences cannot be
+    renumbered into the combined pattern and are left out, as are rules that only match
+    the empty string.
+    todo_re: optional regex searched inside each comment ('todo' tag).
+    delim_re/opener_re match one punctuation character of the string and comment rules
+    (any, or one they can start with); openers is the set behind opener_re.
+    """
+
+    def __init__(self, rules, todo_re=None):
+        self.todo_re = todo_re
+        entries = []
+        for order, (tag, rx, prefer_group) in enumerate(rules):
+            if rx is None or _BACKREF_RE.search(rx.pattern):
+                continue
+            can_empty, only_empty = _matches_empty(rx)
+            if only_empty:
+                continue
+            rank = TOKEN_PRECEDENCE.index(tag) if tag in TOKEN_PRECEDENCE else len(TOKEN_PRECEDENCE)
+            # rules that may match empty go last so they never hide a real token
+            entries.append((can_empty, rank, order, tag, rx, bool(prefer_group)))
+        entries.sort(key=lambda ent: ent[:3])
+        self.regex = None
+        self.slots: Dict[int, Tuple[str, int]] = {}
+        try:
+            self._compile(entries)
+        except re.error:
+            # keep every rule that still compiles next to the ones before it
+            kept = []
+            for ent in entries:
+                try:
+                    self._compile(kept + [ent])
+                    kept.append(ent)
+                except re.error:
+                    pass
+            self._compile(kept)
+        delims, self.openers = _delimiters(rx for _, _, _, tag, rx, _ in entries if tag in ('string', 'comment'))
+        self.delim_re = _char_class(delims)
+        self.opener_re = _char_class(self.openers)
+
+    def _compile(self, entries) -> None:
+        parts = []
+        slots = {}
+        group = 1
+        for _, _, _, tag, rx, prefer_group in entries:
+            parts.append('(' + _scoped(rx) + ')')
+            slots[group] = (tag, group + 1 if (prefer_group and rx.groups) else 0)
+            group += 1 + rx.groups
+        self.regex = re.compile('|'.join(parts)) if parts else None
+        self.slots = slots
+
+    def tag_of(self, m) -> str:
+        return self.slots[m.lastindex][0]
+
+    def scan(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> Dict[str, List[Tuple[int, int]]]:
+        """Classify text[pos:endpos] and return tag -> list[(start, end)] offsets into text."""
+        tags: Dict[str, List[Tuple[int, int]]] = {t: [] for t in LEXER_TAGS}
+        if self.regex is None:
+            return tags
+        if endpos is None:
+            endpos = len(text)
+        for m in self.regex.finditer(text, pos, endpos):
+            if m.end() > m.start():
+                self.emit(text, m, tags, pos, endpos)
+        return tags
+
+    def emit(self, text: str, m, tags: Dict[str, List[Tuple[int, int]]], lo: int, hi: int) -> None:
+        """Add the tag ranges of master match m, clipped to [lo, hi), to tags."""
+        tag, group = self.slots[m.lastindex]
+        s, e = m.span()
+        if group:
+            gs, ge = m.span(group)
+            if gs >= 0:
+                if gs > s:
+                    self._rescan(text, s, gs, tags, lo, hi)
+                if ge > gs:
+                    self._add(text, tag, gs, ge, tags, lo, hi)
+                if e > ge and (ge > gs or gs > s):
+                    self._rescan(text, ge, e, tags, lo, hi)
+                return
+        self._add(text, tag, s, e, tags, lo, hi)
+
+    def _rescan(self, text, a, b, tags, lo, hi) -> None:
+        for m in self.regex.finditer(text, a, b):
+            if m.end() > m.start():
+                self.emit(text, m, tags, lo, hi)
+
+    def _add(self, text, tag, s, e, tags, lo, hi) -> None:
+        s, e = max(s, lo), min(e, hi)
+        if e <= s:
+            return
+        tags.setdefault(tag, []).append((s, e))
+        if tag == 'comment' and self.todo_re is not None:
+            # markers are searched in the clipped part only so regions stay independent
+            for mm in self.todo_re.finditer(text, s, e):
+                if mm.end() > mm.start():
+                    tags['todo'].append(mm.span())
+
+
+# (rules, todo_re) -> MasterPattern; tabs using the same preset share one combined regex
+_master_cache: Dict[Tuple, MasterPattern] = {}
+_MASTER_CACHE_SIZE = 32
+
+
+def master_pattern(rules, todo_re=None) -> MasterPattern:
+    """Return the (shared) MasterPattern for rules; compiled regexes compare by pattern/flags."""
+    rules = tuple((tag, rx, bool(prefer_group)) for tag, rx, prefer_group in rules)
+    key = (rules, todo_re)
+    master = _master_cache.get(key)
+    if master is None:
+        master = MasterPattern(rules, todo_re=todo_re)
+        if len(_master_cache) >= _MASTER_CACHE_SIZE:
+            _master_cache.clear()
+        _master_cache[key] = master
+    return master
+
+
+class ProtectedSpans:
+    """Sorted, merged (start, end) spans answering overlap queries with a bisect."""
+
+    def __init__(self, spans=()):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        for s, e in sorted(spans):
+            if self._starts and s <= self._ends[-1]:
+                if e > self._ends[-1]:
+                    self._ends[-1] = e
+            else:
+                self._starts.append(s)
+                self._ends.append(e)
+
+    def add(self, s: int, e: int) -> None:
+        k = bisect_left(self._ends, s)
+        j = bisect_right(self._starts, e)
+        if k < j:
+            s = min(s, self._starts[k])
+            e = max(e, self._ends[j - 1])
+        self._starts[k:j] = [s]
+        self._ends[k:j] = [e]
+
+    def overlaps(self, s: int, e: int) -> bool:
+        k = bisect_right(self._starts, s) - 1
+        if k >= 0 and self._ends[k] > s:
+            return True
+        k += 1
+        return k < len(self._starts) and self._starts[k] < e
+
+
+class LineIndex:
+    """Line-start offsets of a text, turning absolute offsets into Tk 'line.col' indices.
+
+    Built once per scanned snapshot so applying thousands of ranges does not make Tk resolve
+    a "1.0 + Nc" expression from the top of the buffer for every one of them. line0/col0 give
+    the Tk position text starts at when it is a region of the buffer rather than all of it.
+    """
+    __slots__ = ('starts', 'line0', 'col0')
+
+    def __init__(self, text: str, line0: int = 1, col0: int = 0):
+        self.starts: List[int] = [0]
+        self.starts += accumulate(len(line) + 1 for line in text.split('\n')[:-1])
+        self.line0 = line0
+        self.col0 = col0
+
+    def line_start(self, line: int) -> int:
+        """Offset of the start of 0-based line (clamped to the first/last line)."""
+        return self.starts[max(0, min(line, len(self.starts) - 1))]
+
+    def index(self, offset: int) -> str:
+        i = bisect_right(self.starts, offset) - 1
+        return f"{self.line0 + i}.{offset - self.starts[i] + (self.col0 if i == 0 else 0)}"
+
+    def tk_ranges(self, ranges) -> List[str]:
+        """Flat [start, end, start, end, ...] indices for one multi-range tag_add call."""
+        if self.col0:
+            return [self.index(o) for r in ranges for o in r]
+        starts = self.starts
+        line0 = self.line0
+        out: List[str] = []
+        append = out.append
+        lo = 0
+        prev = -1
+        for s, e in ranges:
+            if s < prev:
+                lo = 0
+            prev = s
+            i = bisect_right(starts, s, lo) - 1
+            append(f"{line0 + i}.{s - starts[i]}")
+            j = bisect_right(starts, e, i) - 1
+            append(f"{line0 + j}.{e - starts[j]}")
+            lo = i
+        return out
+
+
+def nearest_gap(done, total: int, first: int, last: int, size: int) -> Optional[Tuple[int, int]]:
+    """Next block of at most size lines [a, b) to highlight, nearest the viewport first.
+
+    done is the sorted list of highlighted line ranges [a, b) of a total-line buffer (lines are
+    1-based, as in Tk) and first/last the visible lines. Lines inside the viewport come first,
+    then the gap edge closest to it, below before above. Returns None once everything is done.
+    """
+    best = None
+    pos = 1
+    for a, b in list(done) + [(total + 1, total + 1)]:
+        if a > pos and pos <= total:
+            ga, gb = pos, min(a, total + 1)
+            if ga <= last and gb > first:
+                ga = max(ga, first)
+                return ga, min(gb, ga + size)
+            # below the viewport wins ties: that is where reading goes on
+            key = (ga - last, 0) if ga > last else (first - gb + 1, 1)
+            if best is None or key < best[0]:
+                best = (key, ga, gb)
+        pos = max(pos, b)
+    if best is None:
+        return None
+    _, ga, gb = best
+    return (ga, min(gb, ga + size)) if ga > last else (max(ga, gb - size), gb)
+
+
+class LexResult:
+    """Tag ranges produced for the re-lexed lines [start_line, end_line) (0-based).
+
+    tags maps tag -> list[(abs_start, abs_end)] character offsets into the lexed text.
+    """
+    __slots__ = ('start_line', 'end_line', 'start_offset', 'end_offset', 'tags', '_line_starts')
+
+    def __init__(self, start_line: int, end_line: int, line_starts: List[int], end_offset: int,
+                 tags: Dict[str, List[Tuple[int, int]]]):
+        self.start_line = start_line
+        self.end_line = end_line
+        self._line_starts = line_starts
+        self.start_offset = line_starts[0] if line_starts else end_offset
+        self.end_offset = end_offset
+        self.tags = tags
+
+    def index(self, offset: int) -> str:
+        """Return the Tk 'line.col' index of an absolute offset inside the lexed region."""
+        if not self._line_starts:
+            return f"{self.start_line + 1}.0"
+        i = max(0, bisect_right(self._line_starts, offset) - 1)
+        return f"{self.start_line + i + 1}.{offset - self._line_starts[i]}"
+
+    def protected_spans(self) -> List[Tuple[int, int]]:
+        """String and comment spans (absolute offsets) in the region, in start order."""
+        return sorted(self.tags.get('string', []) + self.tags.get('comment', []))
+
+
+class LineStateLexer:
+    """Line-state cache + incremental re-lexer for one text buffer.
+
+    rules:   (tag, compiled_regex, prefer_group1) triples, see MasterPattern.
+    todo_re: optional regex searched inside each comment span ('todo' tag).
+    """
+
+    def __init__(self, rules: List[Tuple[str, Any, bool]], todo_re=None, key: Any = None):
+        self.master = master_pattern(rules, todo_re=todo_re)
+        self.key = key
+        self.lines: Optional[List[str]] = None
+        self.states: List[State] = []
+        # per line: holds an opener (or a quote next to a string) no match accounts for
+        self.dangling: List[bool] = []
+        # offsets of the first lines of self.lines, extended on demand by _line_start
+        self._starts: List[int] = [0]
+
+    # ---- public API --------------------------------------------------------
+    def reset(self, text: str) -> None:
+        """Seed the line/state cache from text without producing tag ranges."""
+        lines = text.split('\n')
+        self.states, self.dangling, self._starts = [], [], [0]
+        self._lex(text, lines, 0, 0, None, None, None, want_tags=False)
+        self.lines = lines
+
+    def lex_all(self, text: str) -> LexResult:
+        """Lex the whole text, reseeding the cache, and return every tag range."""
+        lines = text.split('\n')
+        self.states, self.dangling, self._starts = [], [], [0]
+        res = self._lex(text, lines, 0, 0, None, None, None, want_tags=True)
+        self.lines = lines
+        return res
+
+    def update(self, text: str, hint=None) -> Optional[LexResult]:
+        """Re-lex the lines affected by the change from the cached text to text.
+
+        hint is the 0-based line (or (first, last) line range) of the new text where the
+        edit happened, e.g. the insert cursor before/after typing. The diff alone cannot tell
+        which of several identical lines was inserted or removed, while Text tags move with
+        the real edit, so the re-lexed region always covers the hinted lines.
+        Returns None when the text did not change.
+        """
+        new = text.split('\n')
+        old = self.lines
+        if old is None:
+            return self.lex_all(text)
+        if len(new) == len(old) and new == old:
+            return None
+
+        if hint is None:
+            hint_lo = hint_hi = None
+        elif isinstance(hint, tuple):
+            hint_lo, hint_hi = hint
+        else:
+            hint_lo = hint_hi = hint
+        first = _first_diff(old, new, hint_lo)
+        if hint_lo is not None:
+            first = max(0, min(first, hint_lo))
+        limit = min(len(old), len(new)) - first
+        if hint_hi is not None:
+            limit = min(limit, len(new) - 1 - hint_hi)
+        tail = _common_suffix(old, new, limit)
+        changed_end = len(new) - tail
+        delta = len(new) - len(old)
+
+        # back up to a line that starts outside every multi-line token
+        start = self.token_start_line(first)
+        delim_re = self.master.delim_re
+        if start > 0 and delim_re is not None:
+            lo = self._line_start(first)
+            hi = lo + sum(len(new[i]) + 1 for i in range(first, min(len(new), max(first + 1, changed_end))))
+            if delim_re.search(text, lo, min(hi, len(text))):
+                # the edit may close an opener above that nothing matched so far
+                start = self._opener_line(text, start)
+        states = self.states
+
+        def converged(i: int, state: State) -> bool:
+            # only lines ending at or after the last changed line map onto a cached line
+            if i < first or i < changed_end - 1:
+                return False
+            # a token opened on a changed line is new, whatever its cached namesake was
+            if state is not None and first <= i - state[1] < changed_end:
+                return False
+            j = i - delta
+            return 0 <= j < len(old) and states[j] == state
+
+        old_states, old_dangling = states, self.dangling
+        self.states = old_states[:start]
+        self.dangling = old_dangling[:start]
+        res = self._lex(text, new, start, self._line_start(start), converged, old_states, old_dangling,
+                        want_tags=True, delta=delta)
+        self.lines = new
+        # the offsets of lines up to the first changed one still hold
+        del self._starts[first + 1:]
+        return res
+
+    def token_start_line(self, line: int) -> int:
+        """First line of the multi-line token open at the start of 0-based line, or line itself.
+
+        A region scan starting there sees whole strings/comments instead of their tails.
+        """
+        states = self.states
+        start = min(line, len(states))
+        while start > 0 and states[start - 1] is not None:
+            start = start - 1 - states[start - 1][1]
+        return start
+
+    # ---- internals ---------------------------------------------------------
+    def _line_start(self, line: int) -> int:
+        """Offset of 0-based line of self.lines, extending the offset table up to it."""
+        starts = self._starts
+        k = len(starts) - 1
+        if line > k:
+            starts.extend(islice(accumulate((len(s) + 1 for s in self.lines[k:line]), initial=starts[k]), 1, None))
+        return starts[line]
+
+    def _opener_line(self, text: str, start: int) -> int:
+        """First line above start whose dangling opener now matches past its end, or start.
+
+        text is the new text; the lines above start are the same in it and in self.lines.
+        """
+        regex = self.master.regex
+        if regex is None:
+            return start
+        best = start
+        above = self.dangling[start - 1::-1]
+        k = 0
+        while True:
+            try:
+                k = above.index(True, k)
+            except ValueError:
+                return best
+            line = start - 1 - k
+            k += 1
+            origin = self.token_start_line(line)
+            eol = self._line_start(line) + len(self.lines[line])
+            for m in regex.finditer(text, self._line_start(origin)):
+                if m.start() > eol:
+                    break
+                if m.end() > eol:
+                    best = origin
+                    break
+
+    def _lex(self, text: str, lines: List[str], start: int, pos: int, converged, old_states,
+             old_dangling, want_tags: bool, delta: int = 0) -> LexResult:
+        """Lex from the start of line `start` (offset pos) until converged(i, state) or the end.
+
+        Appends the end-of-line states and dangling flags of the lexed lines to self.states
+        and self.dangling and, when stopping early, splices in the remaining cached ones.
+        """
+        region_start = pos
+        master = self.master
+        opener_re = master.opener_re
+        openers = master.openers
+        covering = 0            # index into matches of the first one ending after the opener
+        it = master.regex.finditer(text, pos) if master.regex is not None else iter(())
+        m = next(it, None)
+
+        matches = []
+        open_m = None           # match covering the newline of an earlier line
+        origin = origin_col = 0
+        line_starts: List[int] = []
+        out_states = self.states
+        out_dangling = self.dangling
+        n = len(lines)
+        stop = n
+        i = start
+        while i < n:
+            line_starts.append(pos)
+            eol = pos + len(lines[i])
+            while m is not None and m.start() <= eol:
+                if m.end() > m.start():
+                    matches.append(m)
+                    if m.end() > eol:
+                        open_m, origin, origin_col = m, i, m.start() - pos
+                m = next(it, None)
+            state = None
+            if open_m is not None:
+                if open_m.end() > eol:
+                    state = (master.tag_of(open_m), i - origin, origin_col)
+                else:
+                    open_m = None
+            out_states.append(state)
+            dangling = False
+            if opener_re is not None:
+                for d in opener_re.finditer(text, pos, eol):
+                    q = d.start()
+                    while covering < len(matches) and matches[covering].end() <= q:
+                        covering += 1
+                    if covering == len(matches) or matches[covering].start() > q:
+                        dangling = True     # no match took it: an opener that found no closer
+                        break
+                    if matches[covering].start() == q and q > pos and text[q - 1] in openers:
+                        dangling = True     # '""' + '"': the triple quote found no closer
+                        break
+            out_dangling.append(dangling)
+            i += 1
+            pos = eol + 1
+            if converged is not None and converged(i - 1, state):
+                stop = i
+                break
+
+        if stop == n:
+            end_offset = min(pos - 1, len(text))
+        else:
+            # the region ends with the newline of its last line: index() maps it to 'line.0'
+            end_offset = pos
+            line_starts.append(pos)
+        if stop < n and old_states is not None:
+            out_states.extend(old_states[stop - delta:])
+            out_dangling.extend(old_dangling[stop - delta:])
+
+        tags: Dict[str, List[Tuple[int, int]]] = {t: [] for t in LEXER_TAGS}
+        if not want_tags:
+            return LexResult(start, stop, line_starts, end_offset, tags)
+
+        for m in matches:
+            master.emit(text, m, tags, region_start, end_offset)
+        return LexResult(start, stop, line_starts, end_offset, tags)
+
+
+def _first_diff(old: List[str], new: List[str], hint: Optional[int]) -> int:
+    """Index of the first line that differs between old and new."""
+    n = min(len(old), len(new))
+    i = 0
+    if hint is not None:
+        h = max(0, min(int(hint), n))
+        # edits usually happen at the cursor: confirm the prefix in one C-level compare
+        if old[:h] == new[:h]:
+            i = h
+    while i < n and old[i] == new[i]:
+        i += 1
+    return i
+
+
+def _common_suffix(old: List[str], new: List[str], limit: int) -> int:
+    """Number of equal trailing lines, never more than limit."""
+    if limit <= 0:
+        return 0
+    lo_old, lo_new = len(old), len(new)
+
+    def equal(k: int) -> bool:
+        return old[lo_old - k:] == new[lo_new - k:]
+
+    if equal(limit):
+        return limit
+    # gallop down from the edit (usually one or two C-level slice compares), then bisect
+    hi, step = limit - 1, 1
+    while True:
+        k = max(0, hi - step + 1)
+        if k == 0 or equal(k):
+            lo = k
+            break
+        hi, step = k - 1, step * 2
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if equal(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def rules_from_regexes(regexes: Dict[str, Any]) -> List[Tuple[str, Any, bool]]:
+    """Build MasterPattern/LineStateLexer rules from the highlighter's *_RE slots.
+
+    Group 1 is tagged for the same slots the region scanner used it for; the order here
+    does not matter, MasterPattern orders the alternatives by TOKEN_PRECEDENCE.
+    """
+    return [
+        ('string', regexes.get('STRING_RE'), False),
+        ('comment', regexes.get('COMMENT_RE'), False),
+        ('number', regexes.get('NUMBER_RE'), False),
+        ('decorator', regexes.get('DECORATOR_RE'), True),
+        ('class_name', regexes.get('CLASS_RE'), True),
+        ('variable', regexes.get('VAR_ASSIGN_RE'), True),
+        ('constant', regexes.get('CONSTANT_RE'), True),
+        ('attribute', regexes.get('ATTRIBUTE_RE'), True),
+        ('def', regexes.get('DUNDER_RE'), False),
+        ('keyword', regexes.get('KEYWORD_RE'), False),
+        ('builtin', regexes.get('BUILTIN_RE'), False),
+        ('selfs', regexes.get('SELFS_RE'), False),
+    ]
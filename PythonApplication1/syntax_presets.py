@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import configparser
+import threading
+from typing import List, Tuple, Dict, Optional, Any
+
+# Tkinter-free registry of compiled syntax presets (syntax/*.ini).
+#
+# Each preset file is parsed and compiled once per (path, mtime); every tab using the preset
+# shares the same compiled regex objects (and therefore the same syntax_lexer master
+# pattern). A preset is identified across processes by its id, "<abs path>@<mtime_ns>", so
+# the parent sends only the id to syntax_worker --serve processes and each worker resolves
+# it through its own registry.
+
+# *_RE slots a preset may override; strings need DOTALL like load_syntax_config compiles them
+REGEX_KEYS = ('STRING_RE', 'COMMENT_RE', 'NUMBER_RE', 'DECORATOR_RE', 'CLASS_RE', 'VAR_ASSIGN_RE',
+              'CONSTANT_RE', 'ATTRIBUTE_RE', 'TODO_RE', 'SELFS_RE', 'VAR_ANNOT_RE', 'FSTRING_RE',
+              'DUNDER_RE', 'CLASS_BASES_RE')
+DOTALL_KEYS = frozenset(('STRING_RE', 'FSTRING_RE'))
+
+
+def _trie_pattern(node: Dict[str, Any]) -> Optional[str]:
+    """Regex for the words below a trie node (None when only the word end is left)."""
+    if '' in node and len(node) == 1:
+        return None
+    alts: List[str] = []
+    chars: List[str] = []
+    optional = False
+    for ch in sorted(node):
+        if ch == '':
+            optional = True
+            continue
+        sub = _trie_pattern(node[ch])
+        if sub is None:
+            chars.append(re.escape(ch))
+        else:
+            alts.append(re.escape(ch) + sub)
+    chars_only = not alts
+    if chars:
+        alts.append(chars[0] if len(chars) == 1 else '[' + ''.join(chars) + ']')
+    result = alts[0] if len(alts) == 1 else '(?:' + '|'.join(alts) + ')'
+    if optional:
+        result = result + '?' if chars_only else '(?:' + result + ')?'
+    return result
+
+
+def word_alternation(words) -> str:
+    """Alternation matching any of words, factored on common prefixes.
+
+    'close|close2|close3|clear' becomes 'cl(?:ear|ose[23]?)', so the regex engine decides
+    with one character test per position instead of trying every word in turn. Where one
+    word is a prefix of another the longer one is tried first.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+    if not trie:
+        return ''
+    return _trie_pattern(trie) or ''
+
+
+def word_regex(words, flags: int = 0):
+    """Compile words into the highlighter's r'\\b(...)\\b' form (r'\\b\\b' when empty)."""
+    alt = word_alternation(words)
+    return re.compile(r'\b(' + alt + r')\b', flags) if alt else re.compile(r'\b\b')
+
+
+def _split_csv(csv: str) -> List[str]:
+    return [x.strip() for x in csv.split(',') if x.strip()]
+
+
+class CompiledPreset:
+    """One parsed + compiled syntax preset.
+
+    options:  the raw [Syntax] options (tag.*, detect.*, ...)
+    regexes:  compiled *_RE slots the preset defines (invalid patterns are left out so the
+              caller falls back to its defaults)
+    keywords/builtins: (word list, compiled regex), or None when the preset has no list
+    """
+    __slots__ = ('id', 'path', 'mtime_ns', 'name', 'options', 'regexes', 'keywords', 'builtins')
+
+    def __init__(self, path: str, mtime_ns: int, options: Dict[str, str]):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.id = preset_id(path, mtime_ns)
+        self.options = options
+        self.name = options.get('name') or os.path.splitext(os.path.basename(path))[0]
+        self.regexes: Dict[str, Any] = {}
+        for key in REGEX_KEYS:
+            pat = options.get(f'regex.{key}'.lower())
+            if not pat:
+                continue
+            try:
+                self.regexes[key] = re.compile(pat, re.DOTALL if key in DOTALL_KEYS else 0)
+            except re.error:
+                pass
+        self.keywords = self._words('keywords.csv')
+        self.builtins = self._words('builtins.csv')
+
+    def _words(self, option: str) -> Optional[Tuple[List[str], Any]]:
+        csv = self.options.get(option)
+        if csv is None:
+            return None
+        words = _split_csv(csv)
+        try:
+            return words, word_regex(words)
+        except re.error:
+            return None
+
+
+def preset_id(path: str, mtime_ns: int) -> str:
+    return f"{os.path.abspath(path)}@{mtime_ns}"
+
+
+class PresetRegistry:
+    """Cache of CompiledPreset objects keyed by absolute path and file mtime.
+
+    get(path) recompiles only after the file changed; get_by_id(id) resolves an id built
+    by another process, loading the file when this process has not compiled it yet.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._by_path: Dict[str, CompiledPreset] = {}
+        self._by_id: Dict[str, CompiledPreset] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[CompiledPreset]:
+        """Return the compiled preset for path, or None if it is missing or has no [Syntax]."""
+        try:
+            path = os.path.abspath(path)
+            mtime_ns = os.stat(path).st_mtime_ns
+        except (OSError, TypeError, ValueError):
+            return None
+        with self._lock:
+            cached = self._by_path.get(path)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                return cached
+        cp = configparser.ConfigParser()
+        try:
+            cp.read(path)
+            if not cp.has_section('Syntax'):
+                return None
+            options = dict(cp.items('Syntax'))
+        except (configparser.Error, UnicodeDecodeError):
+            return None
+        preset = CompiledPreset(path, mtime_ns, options)
+        with self._lock:
+            old = self._by_path.get(path)
+            if old is not None:
+                self._by_id.pop(old.id, None)
+            if len(self._by_path) >= self.max_entries:
+                self._by_path.clear()
+                self._by_id.clear()
+            self._by_path[path] = preset
+            self._by_id[preset.id] = preset
+        return preset
+
+    def get_by_id(self, pid: str) -> Optional[CompiledPreset]:
+        """Resolve a preset id; a file edited since the id was made yields the newer preset."""
+        if not pid:
+            return None
+        with self._lock:
+            cached = self._by_id.get(pid)
+        if cached is not None:
+            return cached
+        path = pid.rsplit('@', 1)[0]
+        return self.get(path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_path.clear()
+            self._by_id.clear()
+
+
+# Shared by every tab of the editor (and, in worker processes, by every request)
+registry = PresetRegistry()
@@ -8,8 +8,15 @@ import threading
 import tempfile
 import datetime
 import socket
+import base64
+import uuid
+from array import array
+from bisect import bisect_right
 from collections import deque
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
+
+import syntax_lexer
+import syntax_presets
 
 # Minimal, tkinter-free worker module used by the main process via a separate subprocess.
 # Keeps imports small so child processes start quickly.
@@ -68,14 +75,14 @@ def _load_syntax_from_config():
             kws = [x.strip() for x in kw_csv.split(',') if x.strip()]
             KEYWORDS = kws
             try:
-                KEYWORD_RE = re.compile(r'\b(' + r'|'.join(map(re.escape, KEYWORDS)) + r')\b') if KEYWORDS else re.compile(r'\b\b')
+                KEYWORD_RE = syntax_presets.word_regex(KEYWORDS)
             except Exception:
                 KEYWORD_RE = re.compile(r'\b\b')
         if bk_csv is not None:
             bks = [x.strip() for x in bk_csv.split(',') if x.strip()]
             BUILTINS = bks
             try:
-                BUILTIN_RE = re.compile(r'\b(' + r'|'.join(map(re.escape, BUILTINS)) + r')\b') if BUILTINS else re.compile(r'\b\b')
+                BUILTIN_RE = syntax_presets.word_regex(BUILTINS)
             except Exception:
                 BUILTIN_RE = re.compile(r'\b\b')
 
@@ -105,12 +112,72 @@ def _load_syntax_from_config():
         return False
 
 # ---- slice processing (pure worker logic) ----------------------------------
+# Tags returned by process_slice: (tag, module regex slot, tag group 1).
+_SLICE_RULES = (
+    ('number', 'NUMBER_RE', False), ('decorator', 'DECORATOR_RE', True),
+    ('class_name', 'CLASS_RE', True), ('attribute', 'ATTRIBUTE_RE', True),
+    ('def', 'DUNDER_RE', False), ('selfs', 'SELFS_RE', False), ('variable', 'VAR_ASSIGN_RE', True),
+)
+# (preset id | keywords + builtins, module regexes) -> MasterPattern rules
+_rules_cache: Dict[Tuple, Tuple] = {}
+
+
+def _word_re(words):
+    try:
+        return syntax_presets.word_regex(words)
+    except Exception:
+        return re.compile(r'\b\b')
+
+
+def _rules_for(keywords: List[str], builtins: List[str], preset=None) -> Tuple:
+    """MasterPattern rules for the module regexes plus these keyword/builtin lists (cached).
+
+    With a syntax_presets.CompiledPreset its regexes and word lists take precedence; the
+    preset is then cached by id, so a request carrying only the id compiles nothing.
+    """
+    rx = preset.regexes if preset is not None else {}
+    slots = tuple(rx.get(name) or globals()[name] for _, name, _ in _SLICE_RULES)
+    string_re = rx.get('STRING_RE') or STRING_RE
+    comment_re = rx.get('COMMENT_RE') or COMMENT_RE
+    if preset is not None:
+        key = (preset.id, slots, string_re, comment_re)
+    else:
+        key = (tuple(keywords if keywords else KEYWORDS), tuple(builtins if builtins else BUILTINS),
+               slots, string_re, comment_re)
+    rules = _rules_cache.get(key)
+    if rules is None:
+        if preset is not None and preset.keywords is not None:
+            kw_re = preset.keywords[1]
+        else:
+            kw_re = _word_re(keywords if keywords else KEYWORDS)
+        if preset is not None and preset.builtins is not None:
+            bk_re = preset.builtins[1]
+        else:
+            bk_re = _word_re(builtins if builtins else BUILTINS)
+        # strings and comments take part only so nothing is tagged inside them
+        rules = (('string', string_re, False), ('comment', comment_re, False),
+                 ('keyword', kw_re, False), ('builtin', bk_re, False))
+        rules += tuple((tag, slot, group) for (tag, _, group), slot in zip(_SLICE_RULES, slots))
+        if len(_rules_cache) >= 8:
+            _rules_cache.clear()
+        _rules_cache[key] = rules
+    return rules
+
+
+def _master_for(keywords: List[str], builtins: List[str], preset=None):
+    """Single-pass pattern for _rules_for(...), shared through syntax_lexer.master_pattern."""
+    return syntax_lexer.master_pattern(_rules_for(keywords, builtins, preset))
+
+
 def process_slice(content: str, s_start: int, s_end: int, protected_spans: List[Tuple[int, int]],
-                  keywords: List[str], builtins: List[str]) -> Dict[str, List[Tuple[int, int]]]:
+                  keywords: List[str], builtins: List[str],
+                  preset_id: Optional[str] = None) -> Dict[str, List[Tuple[int, int]]]:
     """
     Scan substring content[s_start:s_end] and return a dict mapping tag -> list[(abs_s, abs_e)].
-    protected_spans is a list of (s,e) absolute offsets to be skipped.
+    protected_spans is a list of (s,e) absolute offsets to be skipped (e.g. a string opened
+    before s_start); strings and comments inside the slice are skipped in any case.
     keywords and builtins are lists of strings (may be empty).
+    preset_id (syntax_presets id) selects a syntax/*.ini preset compiled by this process.
     """
     rd = {
         'number': [], 'decorator': [], 'class_name': [], 'attribute': [],
@@ -118,103 +185,325 @@ def process_slice(content: str, s_start: int, s_end: int, protected_spans: List[
     }
 
     try:
-        seg = content[s_start:s_end]
-        base = s_start
+        # one left-to-right pass classifies every token of the slice
+        preset = syntax_presets.registry.get_by_id(preset_id) if preset_id else None
+        tags = _master_for(keywords, builtins, preset).scan(content, s_start, s_end)
+        overlaps_protected = syntax_lexer.ProtectedSpans(protected_spans or ()).overlaps
+        for tag, dest in rd.items():
+            for s, e in tags.get(tag, ()):
+                if not overlaps_protected(s, e):
+                    dest.append((s, e))
+    except Exception:
+        # Worker should be resilient and return an empty-ish dict on failure.
+        pass
 
-        # Compile keyword/builtin regexes locally (prefer passed lists, fall back to module-level)
-        try:
-            kw_list = keywords if keywords else KEYWORDS
-            if kw_list:
-                KEYWORD_LOCAL = re.compile(r'\b(' + r'|'.join(map(re.escape, kw_list)) + r')\b')
-            else:
-                KEYWORD_LOCAL = re.compile(r'\b\b')
-        except Exception:
-            KEYWORD_LOCAL = re.compile(r'\b\b')
+    return rd
 
-        try:
-            bk_list = builtins if builtins else BUILTINS
-            if bk_list:
-                BUILTIN_LOCAL = re.compile(r'\b(' + r'|'.join(map(re.escape, bk_list)) + r')\b')
+# ---- slice transport --------------------------------------------------------
+# A "map" request carries each range as its own slice of the document instead of the whole
+# buffer: [base, text, s, e, protected] where text = content[base:e] and s, e, protected are
+# relative to base. base starts SLICE_CONTEXT characters before the range so anchors and
+# lookbehinds (^, \b, (?<=\.)) see the same neighbours as in the full document. Results come
+# back as packed little-endian int32 (start, end) pairs per tag, base64-encoded and relative
+# to the slice base, instead of JSON lists of pairs.
+
+SLICE_CONTEXT = 64
+
+
+def pack_slice(content: str, s: int, e: int, protected_spans: List[Tuple[int, int]]) -> list:
+    """Build the wire form of content[s:e] (see the slice transport notes above)."""
+    base = max(0, s - SLICE_CONTEXT)
+    prot = [(max(ps, base) - base, min(pe, e) - base)
+            for ps, pe in (protected_spans or ()) if pe > base and ps < e]
+    return [base, content[base:e], s - base, e - base, prot]
+
+
+def pack_spans(rd: Dict[str, List[Tuple[int, int]]], base: int = 0) -> Dict[str, str]:
+    """Encode tag -> [(s, e)] as tag -> base64 of int32 pairs, offsets made relative to base."""
+    out = {}
+    for tag, spans in rd.items():
+        arr = array('i', [v - base for pair in spans for v in pair])
+        if sys.byteorder != 'little':
+            arr.byteswap()
+        out[tag] = base64.b64encode(arr.tobytes()).decode('ascii')
+    return out
+
+
+def unpack_spans(packed: Dict[str, str], base: int = 0) -> Dict[str, List[Tuple[int, int]]]:
+    """Inverse of pack_spans: shift the int32 pairs back by base into (s, e) tuples."""
+    rd = {}
+    for tag, data in packed.items():
+        arr = array('i')
+        arr.frombytes(base64.b64decode(data))
+        if sys.byteorder != 'little':
+            arr.byteswap()
+        it = iter(arr)
+        rd[tag] = [(base + a, base + b) for a, b in zip(it, it)]
+    return rd
+
+
+def _map_request(content: str, ranges, protected_spans, keywords, builtins, preset_id) -> str:
+    return json.dumps({
+        "action": "map",
+        "slices": [pack_slice(content, int(s), int(e), protected_spans) for s, e in ranges],
+        "packed": True,
+        "keywords": [] if preset_id else keywords,
+        "builtins": [] if preset_id else builtins,
+        "preset": preset_id
+    })
+
+
+def _map_results(line: str, ranges) -> List[Dict[str, Any]]:
+    resp = json.loads(line)
+    results = resp.get("results", [])
+    if not resp.get("packed"):
+        return results
+    return [unpack_spans(rd, max(0, int(s) - SLICE_CONTEXT)) if isinstance(rd, dict) else {}
+            for (s, _e), rd in zip(ranges, results)]
+
+
+def _log_excerpt(line: str, limit: int = 240) -> str:
+    """Head of a request/response line for the worker log (slices can be megabytes)."""
+    line = line.rstrip('\n')
+    if len(line) <= limit:
+        return line
+    return f"{line[:limit]}... ({len(line)} chars)"
+
+# ---- document sessions -------------------------------------------------------
+# A session keeps one document open in a worker: the parent sends the text once ("open"),
+# then only edit deltas [offset, deleted, inserted] ("edit", or batched with "highlight").
+# The worker holds the current text, a syntax_lexer.LineStateLexer and the tokens of every
+# line, so "highlight" re-lexes just the lines the edits touched and answers the requested
+# line ranges from the cache. Tokens travel as packed int32 (line, start col, end col)
+# triples per tag, 0-based lines, one triple per line a token covers.
+
+SESSION_ACTIONS = ("open", "edit", "highlight", "close")
+
+
+class DocumentSession:
+    """Text, line states and per-line token cache of one open document."""
+
+    def __init__(self, text: str, keywords: List[str], builtins: List[str],
+                 preset_id: Optional[str] = None):
+        preset = syntax_presets.registry.get_by_id(preset_id) if preset_id else None
+        self.lexer = syntax_lexer.LineStateLexer(_rules_for(keywords, builtins, preset))
+        self.text = text
+        res = self.lexer.lex_all(text)
+        self.line_tokens: List[List[Tuple[str, int, int]]] = self._by_line(res)
+        # (first, last) lines of the current text touched by edits not lexed yet
+        self._dirty: Optional[Tuple[int, int]] = None
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_tokens)
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> None:
+        """Replace text[offset:offset + deleted] with inserted (lexed on the next highlight)."""
+        offset = max(0, min(int(offset), len(self.text)))
+        end = min(len(self.text), offset + max(0, int(deleted)))
+        inserted = inserted or ''
+        shift = inserted.count('\n') - self.text.count('\n', offset, end)
+        first = self.text.count('\n', 0, offset)
+        self.text = self.text[:offset] + inserted + self.text[end:]
+        last = first + inserted.count('\n')
+        if self._dirty is not None:
+            lo, hi = self._dirty
+            # earlier dirty lines below the edit moved with it
+            lo = lo if lo <= first else max(first, lo + shift)
+            hi = hi if hi <= first else max(first, hi + shift)
+            first, last = min(first, lo), max(last, hi)
+        self._dirty = (first, last)
+
+    def highlight(self, line_ranges=None) -> List[Tuple[int, int, List[Tuple[str, int, int, int]]]]:
+        """Lex pending edits and return [(first, end, [(tag, line, s_col, e_col)])] blocks.
+
+        The blocks cover the lines the edits changed plus the requested [first, end) line
+        ranges, merged and in order; the caller replaces every tag on those lines.
+        """
+        wanted = []
+        changed = self._flush()
+        if changed is not None:
+            wanted.append(changed)
+        n = self.line_count
+        for a, b in line_ranges or ():
+            a, b = max(0, int(a)), min(n, int(b))
+            if a < b:
+                wanted.append((a, b))
+        blocks = []
+        for a, b in sorted(wanted):
+            if blocks and a <= blocks[-1][1]:
+                blocks[-1] = (blocks[-1][0], max(blocks[-1][1], b))
             else:
-                BUILTIN_LOCAL = re.compile(r'\b\b')
-        except Exception:
-            BUILTIN_LOCAL = re.compile(r'\b\b')
+                blocks.append((a, b))
+        return [(a, b, [(tag, i, cs, ce) for i in range(a, b) for tag, cs, ce in self.line_tokens[i]])
+                for a, b in blocks]
+
+    def _flush(self) -> Optional[Tuple[int, int]]:
+        if self._dirty is None:
+            return None
+        hint, self._dirty = self._dirty, None
+        old_count = self.line_count
+        res = self.lexer.update(self.text, hint=hint)
+        if res is None:
+            return None
+        delta = len(self.lexer.lines) - old_count
+        # lines below res.end_line kept their tokens; they only moved by delta
+        self.line_tokens[res.start_line:res.end_line - delta] = self._by_line(res)
+        return res.start_line, res.end_line
+
+    def _by_line(self, res) -> List[List[Tuple[str, int, int]]]:
+        lines = self.lexer.lines
+        starts = []
+        pos = res.start_offset
+        for i in range(res.start_line, res.end_line):
+            starts.append(pos)
+            pos += len(lines[i]) + 1
+        out: List[List[Tuple[str, int, int]]] = [[] for _ in starts]
+        for tag, spans in res.tags.items():
+            for s, e in spans:
+                k = bisect_right(starts, s) - 1
+                while s < e and 0 <= k < len(out):
+                    line_end = starts[k] + len(lines[res.start_line + k])
+                    if s < line_end:
+                        out[k].append((tag, s - starts[k], min(e, line_end) - starts[k]))
+                    s = line_end + 1
+                    k += 1
+        for toks in out:
+            toks.sort(key=lambda t: t[1])
+        return out
 
-        def overlaps_protected(a: int, b: int) -> bool:
-            for ps, pe in protected_spans:
-                if not (b <= ps or a >= pe):
-                    return True
-            return False
 
-        # Numbers
-        for m in NUMBER_RE.finditer(seg):
-            s, e = m.span()
-            if not overlaps_protected(base + s, base + e):
-                rd['number'].append((base + s, base + e))
+def pack_blocks(blocks) -> List[Dict[str, Any]]:
+    """Wire form of DocumentSession.highlight() blocks (tag -> base64 int32 triples)."""
+    out = []
+    for a, b, tokens in blocks:
+        by_tag: Dict[str, List[int]] = {}
+        for tag, line, cs, ce in tokens:
+            by_tag.setdefault(tag, []).extend((line, cs, ce))
+        tags = {}
+        for tag, values in by_tag.items():
+            arr = array('i', values)
+            if sys.byteorder != 'little':
+                arr.byteswap()
+            tags[tag] = base64.b64encode(arr.tobytes()).decode('ascii')
+        out.append({"lines": [a, b], "tags": tags})
+    return out
 
-        # Decorators (line-anchored)
-        for m in DECORATOR_RE.finditer(seg):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(base + s, base + e):
-                rd['decorator'].append((base + s, base + e))
 
-        # Classes
-        for m in CLASS_RE.finditer(seg):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(base + s, base + e):
-                rd['class_name'].append((base + s, base + e))
+def unpack_blocks(packed) -> List[Tuple[int, int, Dict[str, List[Tuple[int, int, int]]]]]:
+    """Inverse of pack_blocks: [(first, end, {tag: [(line, s_col, e_col)]})]."""
+    out = []
+    for block in packed:
+        tags = {}
+        for tag, data in block.get("tags", {}).items():
+            arr = array('i')
+            arr.frombytes(base64.b64decode(data))
+            if sys.byteorder != 'little':
+                arr.byteswap()
+            it = iter(arr)
+            tags[tag] = list(zip(it, it, it))
+        a, b = block["lines"]
+        out.append((a, b, tags))
+    return out
 
-        # Attributes (a.b -> 'b')
-        for m in ATTRIBUTE_RE.finditer(seg):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(base + s, base + e):
-                rd['attribute'].append((base + s, base + e))
-
-        # Dunder names
-        for m in DUNDER_RE.finditer(seg):
-            s, e = m.span()
-            if not overlaps_protected(base + s, base + e):
-                rd['def'].append((base + s, base + e))
-
-        # Keywords & builtins
-        for m in KEYWORD_LOCAL.finditer(seg):
-            s, e = m.span()
-            if not overlaps_protected(base + s, base + e):
-                rd['keyword'].append((base + s, base + e))
-        for m in BUILTIN_LOCAL.finditer(seg):
-            s, e = m.span()
-            if not overlaps_protected(base + s, base + e):
-                rd['builtin'].append((base + s, base + e))
-
-        # self/attribute-like names
-        for m in SELFS_RE.finditer(seg):
-            s, e = m.span()
-            if not overlaps_protected(base + s, base + e):
-                rd['selfs'].append((base + s, base + e))
-
-        # local variable assignments
-        for m in VAR_ASSIGN_RE.finditer(seg):
-            try:
-                s, e = m.span(1)
-            except Exception:
-                s, e = m.span()
-            if not overlaps_protected(base + s, base + e):
-                rd['variable'].append((base + s, base + e))
 
-    except Exception:
-        # Worker should be resilient and return an empty-ish dict on failure.
-        pass
+# Sessions of this process: those served to a parent (--serve) and local fallbacks
+_sessions: Dict[str, DocumentSession] = {}
+
+
+def handle_session_request(req: Dict[str, Any]) -> Dict[str, Any]:
+    """Serve one open/edit/highlight/close request against _sessions."""
+    action = req.get("action")
+    sid = req.get("session")
+    try:
+        if action == "open":
+            _sessions[sid] = DocumentSession(req.get("text", ""), req.get("keywords") or [],
+                                             req.get("builtins") or [], req.get("preset") or None)
+            return {"ok": True, "lines": _sessions[sid].line_count}
+        if action == "close":
+            _sessions.pop(sid, None)
+            return {"ok": True}
+        doc = _sessions.get(sid)
+        if doc is None:
+            return {"ok": False, "error": "unknown session"}
+        for offset, deleted, inserted in req.get("edits") or ():
+            doc.edit(offset, deleted, inserted)
+        out: Dict[str, Any] = {"ok": True, "lines": doc.line_count}
+        if action == "highlight":
+            out["blocks"] = pack_blocks(doc.highlight(req.get("lines")))
+        return out
+    except Exception as exc:
+        return {"ok": False, "error": repr(exc)}
 
-    return rd
+
+class WorkerSession:
+    """Parent-side handle of a document open in one syntax worker.
+
+    Opening ships the text once; edit() queues (offset, deleted, inserted) deltas that the
+    next highlight() sends along. Without running servers (or if opening fails) the session
+    is served in this process with the same DocumentSession code.
+
+    highlight() returns [(first, end, {tag: [(line, s_col, e_col)]})] with 0-based lines, or
+    None if the worker went away; the caller then opens a new session with its current text.
+    """
+
+    def __init__(self, text: str, keywords: Optional[List[str]] = None,
+                 builtins: Optional[List[str]] = None, preset_id: Optional[str] = None):
+        global _next_server
+        self.id = uuid.uuid4().hex
+        self.closed = False
+        self._pending: List[Tuple[int, int, str]] = []
+        self._server: Optional[int] = None
+        req = {"action": "open", "session": self.id, "text": text, "preset": preset_id,
+               "keywords": [] if preset_id else list(keywords or []),
+               "builtins": [] if preset_id else list(builtins or [])}
+        if _server_procs:
+            with _server_index_lock:
+                idx = _next_server % len(_server_procs)
+                _next_server += 1
+            self._server = idx
+            resp = self._send(req)
+            if resp is not None and resp.get("ok"):
+                return
+            self._server = None
+        _load_syntax_from_config()
+        handle_session_request(req)
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> None:
+        self._pending.append((int(offset), int(deleted), inserted))
+
+    def highlight(self, line_ranges=None):
+        if self.closed:
+            return None
+        req = {"action": "highlight", "session": self.id, "edits": self._pending,
+               "lines": [list(r) for r in (line_ranges or ())]}
+        self._pending = []
+        resp = self._send(req) if self._server is not None else handle_session_request(req)
+        if resp is None or not resp.get("ok"):
+            self.closed = True
+            return None
+        return unpack_blocks(resp.get("blocks", []))
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        req = {"action": "close", "session": self.id}
+        if self._server is not None:
+            self._send(req)
+        else:
+            handle_session_request(req)
+
+    def _send(self, req: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        idx = self._server
+        try:
+            with _server_locks[idx]:
+                _server_stdins[idx].write(json.dumps(req) + "\n")
+                _server_stdins[idx].flush()
+                line = _server_stdouts[idx].readline()
+            return json.loads(line) if line else None
+        except Exception:
+            return None
 
 # ---- subprocess server support (multi-server) ------------------------------
 # The server mode runs when syntax_worker.py is executed as a script with --serve.
@@ -439,10 +728,17 @@ def get_worker_stderr_path(index: int) -> str:
 
 def map_slices(content: str, ranges: List[Tuple[int, int]],
                protected_spans: List[Tuple[int, int]], keywords: List[str],
-               builtins: List[str], processes: int = 1) -> List[Dict[str, Any]]:
+               builtins: List[str], processes: int = 1,
+               preset_id: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Distribute `ranges` across available worker connections and collect results.
 
+    With preset_id the requests carry only the preset id instead of the keyword/builtin
+    lists; each worker compiles the preset once and reuses it for later requests.
+
+    Each server receives only its own ranges' text (see pack_slice) and answers with packed
+    int32 arrays; the returned dicts hold absolute (s, e) pairs as before.
+
     Changes:
     - If a single full-file range was supplied but multiple workers exist,
       proactively slice that single range into N worker chunks (with small
@@ -502,17 +798,10 @@ def map_slices(content: str, ranges: List[Tuple[int, int]],
             stdout_like = _server_stdouts[idx]
             lock = _server_locks[idx]
 
-            req = {
-                "action": "map",
-                "content": content,
-                "ranges": ranges,
-                "protected_spans": protected_spans,
-                "keywords": keywords,
-                "builtins": builtins
-            }
+            req = _map_request(content, ranges, protected_spans, keywords, builtins, preset_id)
             with lock:
                 try:
-                    stdin_like.write(json.dumps(req) + "\n")
+                    stdin_like.write(req + "\n")
                     stdin_like.flush()
                     line = stdout_like.readline()
                 except Exception:
@@ -525,8 +814,7 @@ def map_slices(content: str, ranges: List[Tuple[int, int]],
                         raise RuntimeError("No response from syntax_worker server; stderr tail:\n" + "\n".join(tail[-10:]))
                 except Exception:
                     raise RuntimeError("No response from syntax_worker server")
-            resp = json.loads(line)
-            return resp.get("results", [])
+            return _map_results(line, ranges)
 
         # Multiple servers: partition ranges round-robin across servers
         assignments: Dict[int, List[Tuple[int, Tuple[int, int]]]] = {i: [] for i in range(n_servers)}
@@ -547,17 +835,10 @@ def map_slices(content: str, ranges: List[Tuple[int, int]],
             lock = _server_locks[server_idx]
             # build ranges payload in the same order assigned
             ranges_payload = [r for (_i, r) in assigned]
-            req = {
-                "action": "map",
-                "content": content,
-                "ranges": ranges_payload,
-                "protected_spans": protected_spans,
-                "keywords": keywords,
-                "builtins": builtins
-            }
+            req = _map_request(content, ranges_payload, protected_spans, keywords, builtins, preset_id)
             try:
                 with lock:
-                    stdin_like.write(json.dumps(req) + "\n")
+                    stdin_like.write(req + "\n")
                     stdin_like.flush()
                     line = stdout_like.readline()
                 if not line:
@@ -566,8 +847,7 @@ def map_slices(content: str, ranges: List[Tuple[int, int]],
                         for orig_i, _ in assigned:
                             results_by_index[orig_i] = {}
                     return
-                resp = json.loads(line)
-                res_list = resp.get("results", [])
+                res_list = _map_results(line, ranges_payload)
                 # map returned results back to original indices
                 with results_lock:
                     for (orig_i, _), rd in zip(assigned, res_list):
@@ -600,7 +880,7 @@ def map_slices(content: str, ranges: List[Tuple[int, int]],
             for i in missing:
                 s, e = ranges[i]
                 try:
-                    rd = process_slice(content, int(s), int(e), protected_spans, keywords, builtins)
+                    rd = process_slice(content, int(s), int(e), protected_spans, keywords, builtins, preset_id)
                 except Exception:
                     rd = {}
                 results_by_index[i] = rd
@@ -614,7 +894,7 @@ def map_slices(content: str, ranges: List[Tuple[int, int]],
         out = []
         _load_syntax_from_config()
         for s, e in ranges:
-            out.append(process_slice(content, s, e, protected_spans, keywords, builtins))
+            out.append(process_slice(content, s, e, protected_spans, keywords, builtins, preset_id))
         return out
 
 # ---- server main (invoked when running this file directly with --serve) -----
@@ -623,8 +903,9 @@ def _server_main():
     Worker server: create a TCP listening socket on localhost, print ready JSON with port,
     accept a single parent connection and handle JSON-line requests on that socket.
 
-    Verbose logging: write received packets and responses to both stderr and a local
-    per-worker log file so the parent can inspect worker activity.
+    Verbose logging: write received packets and responses (cut to their first few hundred
+    characters) to both stderr and a local per-worker log file so the parent can inspect
+    worker activity.
     """
     # Load syntax overrides at server start (best-effort)
     _load_syntax_from_config()
@@ -698,8 +979,8 @@ def _server_main():
             # Verbose log of received packet
             ts = datetime.datetime.utcnow().isoformat() + "Z "
             try:
-                # normalize newline visibility
-                log_line = line.rstrip('\n')
+                # normalize newline visibility; large packets are cut to their head
+                log_line = _log_excerpt(line)
                 try:
                     sys.stderr.write(ts + "RECV: " + log_line + "\n")
                     sys.stderr.flush()
@@ -741,6 +1022,7 @@ def _server_main():
                 protected_spans = req.get("protected_spans", []) or []
                 keywords = req.get("keywords", []) or []
                 builtins = req.get("builtins", []) or []
+                preset_id = req.get("preset") or None
 
                 if not keywords and KEYWORDS:
                     keywords = KEYWORDS
@@ -748,34 +1030,27 @@ def _server_main():
                     builtins = BUILTINS
 
                 results = []
-                for s, e in ranges:
-                    try:
-                        rd = process_slice(content, int(s), int(e), protected_spans, keywords, builtins)
-                    except Exception:
-                        rd = {}
-                    results.append(rd)
-                out = {"results": results}
-                outjson = json.dumps(out)
-
-                # Verbose log of response
-                try:
-                    sys.stderr.write(ts + "SEND: " + outjson + "\n")
-                    sys.stderr.flush()
-                except Exception:
-                    pass
-                if lf:
-                    try:
-                        lf.write(ts + "SEND: " + outjson + "\n")
-                        lf.flush()
-                    except Exception:
-                        pass
-
-                try:
-                    fw.write(outjson + "\n")
-                    fw.flush()
-                except Exception:
-                    # if socket write fails, break and let parent fallback
-                    break
+                slices = req.get("slices")
+                if slices is not None:
+                    # slice transport: offsets are relative to each slice's base
+                    packed = bool(req.get("packed"))
+                    for _base, text, s, e, prot in slices:
+                        try:
+                            rd = process_slice(text, int(s), int(e), prot, keywords, builtins, preset_id)
+                        except Exception:
+                            rd = {}
+                        results.append(pack_spans(rd) if packed else rd)
+                    out = {"results": results, "packed": packed}
+                else:
+                    for s, e in ranges:
+                        try:
+                            rd = process_slice(content, int(s), int(e), protected_spans, keywords, builtins, preset_id)
+                        except Exception:
+                            rd = {}
+                        results.append(rd)
+                    out = {"results": results}
+            elif action in SESSION_ACTIONS:
+                out = handle_session_request(req)
             else:
                 # ignore unknown actions but log them
                 try:
@@ -790,6 +1065,27 @@ def _server_main():
                 except Exception:
                     pass
                 continue
+            outjson = json.dumps(out)
+
+            # Verbose log of response
+            try:
+                sys.stderr.write(ts + "SEND: " + _log_excerpt(outjson) + "\n")
+                sys.stderr.flush()
+            except Exception:
+                pass
+            if lf:
+                try:
+                    lf.write(ts + "SEND: " + _log_excerpt(outjson) + "\n")
+                    lf.flush()
+                except Exception:
+                    pass
+
+            try:
+                fw.write(outjson + "\n")
+                fw.flush()
+            except Exception:
+                # if socket write fails, break and let parent fallback
+                break
     except Exception:
         # best-effort silence: worker should not crash the parent if it fails
         try:
@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import jsmini
+
+
+class TestAstCache(CleanTestCase):
+    def setUp(self):
+        super().setUp()
+        jsmini.configure_ast_cache(max_entries=64, disk_dir='')
+        jsmini.clear_ast_cache(reset_stats=True)
+
+    def tearDown(self):
+        jsmini.configure_ast_cache(max_entries=64, disk_dir='')
+        jsmini.clear_ast_cache(reset_stats=True)
+        super().tearDown()
+
+    def test_hit_returns_same_tree(self):
+        src = "var a = 1; function f(x){ return x + a; } f(2);"
+        first = jsmini.parse_cached(src)
+        second = jsmini.parse_cached(src)
+        self.assertIs(first, second)
+        self.assertEqual(first, jsmini.parse(src))
+        st = jsmini.ast_cache_stats()
+        self.assertEqual((st['hits'], st['misses'], st['entries']), (1, 1, 1))
+
+    def test_run_with_interpreter_uses_cache(self):
+        src = "var counter = (counter || 0) + 1;"
+        self.ctx = jsmini.make_context(log_fn=lambda s: None)
+        for _ in range(3):
+            jsmini.run_with_interpreter(src, self.ctx)
+        st = jsmini.ast_cache_stats()
+        self.assertEqual((st['hits'], st['misses']), (2, 1))
+
+    def test_lru_eviction(self):
+        jsmini.configure_ast_cache(max_entries=2)
+        for n in range(3):
+            jsmini.parse_cached(f"var v{n} = {n};")
+        self.assertEqual(jsmini.ast_cache_stats()['entries'], 2)
+        jsmini.parse_cached("var v0 = 0;")
+        self.assertEqual(jsmini.ast_cache_stats()['misses'], 4)
+
+    def test_syntax_errors_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(SyntaxError):
+                jsmini.parse_cached("var = ;")
+        st = jsmini.ast_cache_stats()
+        self.assertEqual((st['hits'], st['entries']), (0, 0))
+
+    def test_disk_cache_round_trip(self):
+        src = "var o = {k: [1, 2, 'x']}; o.k.length;"
+        with tempfile.TemporaryDirectory() as d:
+            jsmini.configure_ast_cache(disk_dir=d)
+            expected = jsmini.parse_cached(src)
+            self.assertEqual(len([f for f in os.listdir(d) if f.endswith('.ast')]), 1)
+            # a fresh process only has the disk copy
+            jsmini.clear_ast_cache()
+            loaded = jsmini.parse_cached(src)
+            self.assertEqual(loaded, expected)
+            st = jsmini.ast_cache_stats()
+            self.assertEqual((st['misses'], st['disk_writes'], st['disk_hits']), (1, 1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import sys
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import jsmini
+
+
+# Each snippet is run under both engines; the tree-walker is the reference.
+SNIPPETS = [
+    "var s = 0; for (var i = 0; i < 10; i++) { s += i; } console.log(s); s;",
+    "function fib(n){ return n < 2 ? n : fib(n-1) + fib(n-2); } fib(12);",
+    "var a = [1, 2, 3]; a.push(4); var m = a.map(function(x){ return x * 2; }); console.log(m[3], m.length);",
+    "var o = {x: 1, y: 'two'}; o.x++; ++o.x; o['y'] += '!'; for (var k in o) console.log(k, o[k]);",
+    "outer: for (var j = 0; j < 3; j++) { for (var k = 0; k < 3; k++) { if (k == 2) break outer; console.log(j, k); } }",
+    "try { throw 'boom'; } catch (e) { console.log('caught', e); }",
+    "switch (2) { case 1: console.log('one'); case 2: console.log('two'); case 3: console.log('three'); break; default: console.log('d'); }",
+    "function P(n){ this.n = n; } P.prototype.get = function(){ return this.n; }; var p = new P(5); console.log(p.get(), p instanceof P);",
+    "var q = 0; do { q++; if (q == 2) continue; } while (q < 5); console.log(q, ~q, -q, !q, void 0, typeof q, typeof nope);",
+    "var w = 0, n = 0; while (true) { w++; if (w > 6) break; if (w % 2) continue; n = n + w; } console.log(w, n, (1, 2), null || 'd', 0 && 1);",
+    "var c = (function(){ var count = 0; return function(){ return ++count; }; })(); c(); c(); console.log(c());",
+    "var x = 1; delete x; var obj = {a: 1}; console.log(delete obj.a, 'a' in obj, JSON.stringify({k: [1, 2]}));",
+    "setTimeout(function(){ console.log('timer', typeof setTimeout); }, 0); 'queued';",
+    # scope resolution: shadowing, use-before-declaration, implicit bindings, catch scope
+    "var x = 1; function f(){ x = 2; var y = x; { var x = 3; y = y + x; } return y; } console.log(f(), x);",
+    "function g(){ { z = 5; } return typeof z; } console.log(g(), typeof z);",
+    "function h(){ var r = typeof w; var w = 1; return r + w; } console.log(h());",
+    "function k(a, a2){ var a = a + 1; return function(){ a2 = a2 + a; return a2; }; } var kk = k(1, 10); kk(); console.log(kk());",
+    "try { throw 1; } catch (e) { var e2 = e + 1; console.log(e2, typeof e); } console.log(typeof e);",
+    "function r(n){ if (n > 0) { var t = n; return r(n - 1) + t; } return 0; } console.log(r(5));",
+    "function f(){ function g(){ w = 2; return function(){ w = w + 1; return w; }; } var h = g(); var w = 1; return [h(), w]; } console.log(f());",
+    # inline caches: own-property shadowing, intermediate prototype changes, polymorphic sites
+    "function P(){} P.prototype.m = function(){ return 'proto'; }; var o = new P(); var r = []; for (var i = 0; i < 3; i++) { r.push(o.m()); if (i == 1) o.m = function(){ return 'own'; }; } console.log(r[0], r[1], r[2]);",
+    "function A(){} A.prototype.x = 1; function B(){} B.prototype = new A(); var b = new B(); var out = []; for (var i = 0; i < 4; i++) { out.push(b.x); if (i == 0) B.prototype.x = 2; if (i == 1) delete B.prototype.x; if (i == 2) Object.assign(B.prototype, {x: 3}); } console.log(out[0], out[1], out[2], out[3]);",
+    "function get(o){ return o.k; } var ps = []; for (var i = 0; i < 6; i++) { var C = function(){}; C.prototype = {k: i}; ps.push(new C()); } var t = 0; for (var j = 0; j < 12; j++) { t = t * 2 + get(ps[j % 6]); } console.log(t, get({k: 'own'}), get({}));",
+]
+
+
+def _run(src, engine):
+    out = []
+    ctx = jsmini.make_context(log_fn=out.append, engine=engine)
+    res, interp = jsmini.run_with_interpreter(src, ctx)
+    jsmini.run_timers(ctx)
+    # console.log receives the console object as receiver; drop its repr (contains an address)
+    lines = [line.split('} ', 1)[-1] for line in out]
+    return res, lines, interp._exec_count, ctx
+
+
+class TestClosureEngine(CleanTestCase):
+    def test_matches_tree_walker(self):
+        for src in SNIPPETS:
+            with self.subTest(src=src):
+                tree_res, tree_out, tree_count, _ = _run(src, 'tree')
+                res, out, count, ctx = _run(src, 'closure')
+                self.ctx = ctx
+                self.assertEqual(repr(res), repr(tree_res))
+                self.assertEqual(out, tree_out)
+                self.assertEqual(count, tree_count)
+
+    def test_function_body_compiled_once(self):
+        self.ctx = jsmini.make_context(log_fn=lambda s: None, engine='closure')
+        jsmini.run_with_interpreter("function sq(x){ return x * x; } sq(2); sq(3);", self.ctx)
+        fn = self.ctx['_interp'].global_env.get('sq')
+        code = fn._compiled
+        self.assertIsNotNone(code)
+        jsmini.run_with_interpreter("sq(4);", self.ctx)
+        self.assertIs(fn._compiled, code)
+
+    def test_function_frames_use_slots(self):
+        self.ctx = jsmini.make_context(log_fn=lambda s: None, engine='closure')
+        jsmini.run_with_interpreter("var seen; function f(a){ var b = a + 1; seen = function(){ return b; }; return b; } f(1);", self.ctx)
+        closure_env = self.ctx['_interp'].global_env.get('seen').env
+        self.assertIsInstance(closure_env, jsmini.SlotEnv)
+        self.assertIn(2.0, closure_env.slots)
+        self.assertEqual(closure_env.get('a'), 1.0)
+
+    def test_implicit_bindings_stay_in_their_environment(self):
+        # an implicit binding of `i` in one context must not push later resolved reads of `i` to the dict path
+        other = jsmini.make_context(log_fn=lambda s: None, engine='closure')
+        jsmini.run_with_interpreter("function f(){ { i = 1; } return i; } f();", other)
+        self.ctx = jsmini.make_context(log_fn=lambda s: None, engine='closure')
+        _, interp = jsmini.run_with_interpreter(
+            "function outer(){ var i = 3; return function(){ return i + 1; }; } var get = outer();", self.ctx)
+        names = []
+        real = jsmini._dynamic_get
+
+        def counting(it, env, name):
+            names.append(name)
+            return real(it, env, name)
+        jsmini._dynamic_get = counting
+        try:
+            res = jsmini.run_in_interpreter("get(); get();", interp)
+        finally:
+            jsmini._dynamic_get = real
+        self.assertEqual(res, 4.0)
+        self.assertNotIn('i', names)
+        jsmini.run_timers_from_context(other)
+
+    def test_inline_cache_records_prototype_holder(self):
+        self.ctx = jsmini.make_context(log_fn=lambda s: None, engine='closure')
+        _, interp = jsmini.run_with_interpreter("function P(){} P.prototype.m = 7; var o = new P();", self.ctx)
+        o = interp.global_env.get('o')
+        cache = jsmini._PropCache('m')
+        self.assertEqual(cache.get(interp, o), 7.0)
+        self.assertEqual(len(cache.entries), 1)
+        self.assertIs(cache.entries[0][2], interp.global_env.get('P').prototype)
+        self.assertEqual(cache.get(interp, o), 7.0)
+        jsmini.run_in_interpreter("o.m = 8;", interp)
+        self.assertEqual(cache.get(interp, o), 8.0)
+
+    def test_engine_override_and_validation(self):
+        self.ctx = jsmini.make_context(log_fn=lambda s: None)
+        _, interp = jsmini.run_with_interpreter("var z = 1;", self.ctx, engine='closure')
+        self.assertEqual(interp._engine, 'closure')
+        with self.assertRaises(ValueError):
+            jsmini.make_context(engine='jit')
+
+
+if __name__ == '__main__':
+    unittest.main()
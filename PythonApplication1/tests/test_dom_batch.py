@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import jsmini
+
+
+class TestDomBatch(CleanTestCase):
+    def _ctx(self, host):
+        self.ctx = jsmini.make_context(log_fn=lambda s: None)
+        self.ctx['__attachHost'](host)
+        jsmini.configure_dom_batching(self.ctx, None)
+        return self.ctx
+
+    def test_one_push_per_script_and_drain(self):
+        pushes = []
+        ctx = self._ctx({'setRaw': pushes.append})
+        self.assertEqual(len(pushes), 1)  # attaching the host renders once
+        jsmini.run_with_interpreter("""
+        var ul = document.createElement('ul');
+        document.body.appendChild(ul);
+        for (var i = 0; i < 200; i++) { var li = document.createElement('li'); li.textContent = 'x'; ul.appendChild(li); }
+        setTimeout(function(){ ul.className = 'done'; ul.setAttribute('id', 'list'); }, 0);
+        """, ctx)
+        self.assertEqual(len(pushes), 2)
+        self.assertEqual(pushes[-1], '<ul>' + 'x' * 200 + '</ul>')
+        jsmini.run_timers(ctx)
+        self.assertEqual(len(pushes), 3)
+        self.assertTrue(pushes[-1].startswith('<ul id="list" class="done">'))
+        stats = jsmini.dom_batch_stats(ctx)
+        self.assertEqual(stats['flushes'], 3)
+        self.assertEqual(stats['pending'], 0)
+        self.assertGreater(stats['mutations'], 400)
+        # nothing changed: a drain does not push again
+        jsmini.run_timers(ctx)
+        self.assertEqual(len(pushes), 3)
+
+    def test_detached_changes_are_not_pushed(self):
+        pushes = []
+        ctx = self._ctx({'setRaw': pushes.append})
+        _, interp = jsmini.run_with_interpreter("""
+        var a = document.createElement('div'); a.id = 'a';
+        document.body.appendChild(a);
+        var p = document.createElement('p');
+        """, ctx)
+        self.assertEqual(pushes[-1], '<div id="a"></div>')
+        count = len(pushes)
+        jsmini.run_in_interpreter("p.textContent = 'hi'; p.className = 'x';", interp)
+        self.assertEqual(len(pushes), count)
+        jsmini.run_in_interpreter("a.appendChild(p);", interp)
+        self.assertEqual(len(pushes), count + 1)
+        self.assertEqual(pushes[-1], '<div id="a">hi</div>')
+
+    def test_frame_interval(self):
+        pushes = []
+        ctx = self._ctx({'setRaw': pushes.append})
+        jsmini.configure_dom_batching(ctx, 0)
+        jsmini.run_with_interpreter("""
+        for (var i = 0; i < 3; i++) { document.body.appendChild(document.createElement('i')); }
+        """, ctx)
+        self.assertEqual(len(pushes), 1 + 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import sys
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import jsmini
+
+
+def _ids(nodes):
+    return [getattr(n, 'id', None) or n.tagName for n in nodes]
+
+
+class TestDomIndex(CleanTestCase):
+    def setUp(self):
+        super().setUp()
+        self.doc = jsmini.make_dom_shim()
+        self.ul = self.doc['createElement']('ul')
+        self.ul.setAttribute('id', 'list')
+        self.doc['appendChild'](self.ul)
+        for i in range(4):
+            li = self.doc['createElement']('li')
+            li.id = f'li{i}'
+            li.className = 'item odd' if i % 2 else 'item'
+            self.ul.appendChild(li)
+
+    def test_lookups(self):
+        doc = self.doc
+        self.assertIs(doc['getElementById']('li2').parent, self.ul)
+        self.assertEqual(doc['querySelector']('.odd').id, 'li1')
+        self.assertEqual(doc['querySelector']('LI').id, 'li0')
+        self.assertIs(doc['querySelector']('body'), doc['body'])
+        # unmatched selectors no longer fall back to body
+        self.assertIsNone(doc['querySelector']('.missing'))
+        self.assertIsNone(doc['querySelector']('table'))
+        self.assertEqual(_ids(doc['querySelectorAll']('.item')), ['li0', 'li1', 'li2', 'li3'])
+        self.assertEqual(_ids(doc['body'].getElementsByTagName('li')), ['li0', 'li1', 'li2', 'li3'])
+
+    def test_structure_changes(self):
+        doc = self.doc
+        li0, li3 = doc['getElementById']('li0'), doc['getElementById']('li3')
+        self.ul.insertBefore(li3, li0)
+        self.assertEqual(_ids(doc['querySelectorAll']('li')), ['li3', 'li0', 'li1', 'li2'])
+        self.assertEqual(len(self.ul.children), 4)
+        self.ul.removeChild(li0)
+        self.assertIsNone(doc['getElementById']('li0'))
+        fresh = doc['createElement']('li')
+        fresh.id = 'fresh'
+        self.assertIsNone(doc['getElementById']('fresh'))
+        self.ul.replaceChild(fresh, li3)
+        self.assertEqual(_ids(doc['querySelectorAll']('li')), ['fresh', 'li1', 'li2'])
+        self.ul.innerHTML = '<li id="a" class="item">x</li><li>y<b class="item hot">z</b></li>'
+        self.assertIsNone(doc['getElementById']('li1'))
+        self.assertEqual(_ids(doc['querySelectorAll']('.item')), ['a', 'b'])
+        self.ul.textContent = 'empty'
+        self.assertEqual(list(doc['querySelectorAll']('li')), [])
+        doc['body'].removeChild(self.ul)
+        self.assertIsNone(doc['getElementById']('list'))
+
+    def test_attribute_changes(self):
+        doc = self.doc
+        li = doc['getElementById']('li2')
+        li.setAttribute('id', 'renamed')
+        self.assertIsNone(doc['getElementById']('li2'))
+        self.assertIs(doc['getElementById']('renamed'), li)
+        li.classList['add']('hot')
+        self.assertIs(doc['querySelector']('.hot'), li)
+        li.classList['toggle']('hot')
+        self.assertIsNone(doc['querySelector']('.hot'))
+        li.removeAttribute('class')
+        self.assertEqual(_ids(doc['querySelectorAll']('.item')), ['li0', 'li1', 'li3'])
+
+    def test_script_queries(self):
+        ctx = jsmini.make_context(log_fn=lambda s: None)
+        src = """
+        var box = document.createElement('div');
+        box.id = 'box';
+        document.body.appendChild(box);
+        var hits = 0;
+        for (var i = 0; i < 20; i++) { if (document.getElementById('box') === box) hits++; }
+        box.id = 'moved';
+        hits + (document.getElementById('box') ? 100 : 0);
+        """
+        res, _ = jsmini.run_with_interpreter(src, ctx)
+        self.assertEqual(res, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
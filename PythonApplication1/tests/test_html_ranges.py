@@ -0,0 +1,74 @@
+import random
+import sys
+from pathlib import Path
+import unittest
+from unittest import mock
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import functions as funcs
+
+
+def _links(n: int) -> str:
+    return '<p>' + ''.join(f'<a href="https://e.com/{i}">a{i}</a> [m{i}](https://m.com/{i}) ' for i in range(n)) + '</p>'
+
+
+def _cells(n: int) -> str:
+    return '<table>' + ''.join(f'<tr><td>{i}</td><td>x</td></tr>' for i in range(n)) + '</table>'
+
+
+class TestHtmlRanges(CleanTestCase):
+    def test_span_index_matches_linear_scan(self):
+        rnd = random.Random(7)
+        spans = [[s, s + rnd.randint(0, 30)] for s in (rnd.randint(0, 1000) for _ in range(200))]
+        index = funcs._SpanIndex(spans)
+        for _ in range(1500):
+            s = rnd.randint(-50, 1100)
+            e = s + rnd.randint(0, 40)
+            expected = any(ps < e and pe > s for ps, pe in spans)
+            self.assertEqual(index.overlaps(s, e), expected, (s, e))
+        self.assertFalse(funcs._SpanIndex().overlaps(0, 10))
+
+    def test_markdown_links_skip_code_and_anchors(self):
+        plain, meta = funcs._parse_html_and_apply(
+            '<p>see [docs](https://d.com) and <a href="https://a.com">[x](https://x.com)</a></p>'
+            '<pre><code>[raw](https://r.com)</code></pre><p>[end](https://e.com)</p>')
+        hrefs = {plain[l['start']:l['end']]: l['href'] for l in meta['links']}
+        self.assertEqual(hrefs.get('docs'), 'https://d.com')
+        self.assertEqual(hrefs.get('end'), 'https://e.com')
+        self.assertIn('[raw](https://r.com)', plain)
+        self.assertNotIn('https://x.com', hrefs.values())
+
+    def test_many_links_and_cells_keep_bookkeeping_linear(self):
+        parser_cls = funcs._SimpleHTMLToTagged
+        real_slice = parser_cls._out_slice
+        real_shift = parser_cls._shift_all_ranges_and_links
+        for build in (_links, _cells):
+            with self.subTest(page=build.__name__):
+                walked = []
+
+                def out_slice(parser, start, end):
+                    # characters walked back from the end of the output
+                    walked.append(parser.pos - start)
+                    return real_slice(parser, start, end)
+                with mock.patch.object(parser_cls, '_out_slice', autospec=True, side_effect=out_slice), \
+                        mock.patch.object(parser_cls, '_shift_all_ranges_and_links', autospec=True,
+                                          side_effect=real_shift) as shift, \
+                        mock.patch.object(funcs, '_SpanIndex', wraps=funcs._SpanIndex) as index:
+                    plain, meta = funcs._parse_html_and_apply(build(3000))
+                self.assertGreater(len(meta['tags'].get('hyperlink' if build is _links else 'td', [])), 2000)
+                # range shifting and span indexing happen once per document, not per link or cell
+                self.assertLessEqual(shift.call_count, 1)
+                self.assertLessEqual(index.call_count, 2)
+                # tail reads stay near the end of the output instead of joining all of it
+                self.assertLessEqual(max(walked, default=0), 16)
+                self.assertLessEqual(sum(walked), len(plain))
+
+
+if __name__ == '__main__':
+    unittest.main()
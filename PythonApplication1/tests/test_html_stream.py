@@ -0,0 +1,77 @@
+import random
+import sys
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import functions as funcs
+
+_SYNTHETIC = (
+    '<!DOCTYPE html>\n<html><head><title>t</title>\n<style>p > a { color: red }</style></head>\n'
+    '<body class="x">\n  <h1>Title</h1>\n'
+    + ''.join(
+        f'  <p>Para {i} with <b>bold</b>, <i>italic</i> and <a href="https://e.com/{i}">link  {i}</a>'
+        f' <a href="https://e.com/n{i}">next</a></p>\n'
+        f'  <pre><code>def f{i}():\n    return "<p>{i}</p>"\n</code></pre>\n'
+        f'  <table><tr><td>a{i}</td><td>b{i}</td></tr>\n<tr><td>c</td><td>d</td></tr></table>\n'
+        f'  <ul><li>one</li><li>two <span style="color:#ff0000">red</span></li></ul>\n'
+        f'  <script>var s = "<div>{i}</div>";</script>\n'
+        for i in range(60))
+    + '</body></html>\n'
+)
+
+
+def _stream(raw: bytes, sizes, seed: int):
+    rnd = random.Random(seed)
+    r = funcs.HTMLStreamRenderer()
+    batches, i = [], 0
+    while i < len(raw):
+        n = rnd.choice(sizes)
+        batches.append(r.feed(raw[i:i + n]))
+        i += n
+    return batches, r.close()
+
+
+class TestHTMLStreamRenderer(CleanTestCase):
+    def _check(self, raw: bytes, sizes=(1, 7, 100, 4096), seeds=range(3)):
+        expected = funcs._parse_html_and_apply(raw.decode('utf-8', errors='replace'))
+        for seed in seeds:
+            with self.subTest(seed=seed):
+                batches, result = _stream(raw, sizes, seed)
+                self.assertEqual(result, expected)
+                preview = ''.join(text for text, _tags in batches)
+                self.assertTrue(expected[0].startswith(preview))
+                for _text, tags in batches:
+                    for tag, spans in tags.items():
+                        for span in spans:
+                            self.assertLessEqual(span[1], len(preview))
+        return batches
+
+    def test_document_matches_batch_parse(self):
+        batches = self._check(_SYNTHETIC.encode('utf-8'))
+        # most of the page is shown before close()
+        self.assertGreater(sum(len(t) for t, _ in batches), 1000)
+
+    def test_fragment_without_body(self):
+        self._check(('\n\n   <div>lead</div>' + '<p>x <b>y</b></p>\n' * 200).encode('utf-8'))
+        self._check(b'  plain text only  ')
+
+    def test_multibyte_split_across_chunks(self):
+        self._check(('<body><p>héllo ☃ wörld</p>' * 100 + '</body>').encode('utf-8'), sizes=(1, 2, 3))
+
+    def test_saved_pages(self):
+        for name in ('coolview.html', 'tests/examples/demo.html'):
+            path = _project_root / name
+            if path.exists():
+                with self.subTest(page=name):
+                    self._check(path.read_bytes(), sizes=(512, 8192, 65536), seeds=range(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
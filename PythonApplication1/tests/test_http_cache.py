@@ -0,0 +1,179 @@
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import functions as funcs
+import http_cache
+
+DELAY = 0.3
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    """Serves /<name>.js after DELAY seconds; headers come from the server's table.
+
+    With server.overlap = n a request first waits (up to 10 s) until n requests
+    have been in flight at once; server.peak records the most seen.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.hits.append(self.path)
+            srv.clients.add(self.client_address)
+            srv.active += 1
+            srv.peak = max(srv.peak, srv.active)
+            srv.lock.notify_all()
+            srv.lock.wait_for(lambda: srv.peak >= srv.overlap, timeout=10)
+        try:
+            self._respond(srv)
+        finally:
+            with srv.lock:
+                srv.active -= 1
+
+    def _respond(self, srv):
+        body, headers = srv.routes[self.path]
+        if headers.get('ETag') and self.headers.get('If-None-Match') == headers['ETag']:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            return
+        time.sleep(DELAY)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/javascript; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpFetching(CleanTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _SlowHandler)
+        self.server.lock = threading.Condition()
+        self.server.active = self.server.peak = self.server.overlap = 0
+        self.server.hits = []
+        self.server.clients = set()
+        self.server.routes = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.cache_dir = tempfile.mkdtemp()
+        self.saved = dict(funcs.config['Section1'])
+        funcs.config.set('Section1', 'httpCache', 'True')
+        funcs.config.set('Section1', 'httpCacheDir', self.cache_dir)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        for k in ('httpCache', 'httpCacheDir'):
+            if k in self.saved:
+                funcs.config.set('Section1', k, self.saved[k])
+            else:
+                funcs.config.remove_option('Section1', k)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().tearDown()
+
+    def test_fetches_overlap_and_keep_script_order(self):
+        scripts = []
+        for i in range(5):
+            self.server.routes[f'/s{i}.js'] = (f'var s{i} = {i};'.encode(), {})
+            scripts.append({'src': f'{self.base}/s{i}.js', 'attrs': {}})
+        scripts.insert(2, {'inline': 'var inline = 1;', 'attrs': {}})
+        # sequential fetching would never have two requests in flight
+        self.server.overlap = 2
+        loads = funcs._prefetch_scripts(scripts, None)
+        texts = [f.result()[0] for f in loads]
+        self.assertGreaterEqual(self.server.peak, 2)
+        self.assertEqual(texts, ['var s0 = 0;', 'var s1 = 1;', 'var inline = 1;',
+                                 'var s2 = 2;', 'var s3 = 3;', 'var s4 = 4;'])
+
+    def test_run_scripts_executes_in_document_order(self):
+        # b.js needs a.js, and a.js is the slower of the two
+        self.server.routes['/a.js'] = (b'var a = 40;', {})
+        self.server.routes['/b.js'] = (b'var b = a + 2;', {})
+        results = funcs.run_scripts(
+            [{'src': 'a.js', 'attrs': {}}, {'src': 'b.js', 'attrs': {}}],
+            base_url=self.base + '/page.html', log_fn=lambda s: None, run_blocking=True)
+        self.assertEqual([r['ok'] for r in results], [True, True])
+
+    def test_cache_honors_max_age_and_etag(self):
+        self.server.routes['/fresh.js'] = (b'1', {'Cache-Control': 'max-age=600'})
+        self.server.routes['/etag.js'] = (b'2', {'Cache-Control': 'no-cache', 'ETag': '"v2"'})
+        self.server.routes['/nostore.js'] = (b'3', {'Cache-Control': 'no-store', 'ETag': '"v3"'})
+        cache = http_cache.HttpCache(self.cache_dir)
+        sources = {}
+        for name in ('fresh', 'etag', 'nostore'):
+            url = f'{self.base}/{name}.js'
+            first = http_cache.fetch(url, cache)
+            second = http_cache.fetch(url, cache)
+            self.assertEqual(first.body, second.body)
+            sources[name] = (first.source, second.source)
+        self.assertEqual(sources, {'fresh': ('network', 'cache'),
+                                   'etag': ('network', 'revalidated'),
+                                   'nostore': ('network', 'network')})
+        self.assertEqual(self.server.hits.count('/fresh.js'), 1)
+        self.assertEqual(cache.stats['stores'], 2)
+        # a fresh cache object reads the same directory
+        self.assertEqual(http_cache.fetch(f'{self.base}/fresh.js', http_cache.HttpCache(self.cache_dir)).source, 'cache')
+
+    def test_page_cache_over_pooled_connections(self):
+        self.server.routes['/page.html'] = (b'<p>page</p>', {'ETag': '"p1"'})
+        self.server.routes['/other.html'] = (b'<p>other</p>', {'Cache-Control': 'max-age=600'})
+        pool = http_cache.ConnectionPool()
+        pages = http_cache.PageCache()
+        page, other = f'{self.base}/page.html', f'{self.base}/other.html'
+        got = [
+            http_cache.fetch(page, pages, opener=pool),
+            http_cache.fetch(other, pages, opener=pool),
+            http_cache.fetch(other, pages, opener=pool),                     # fresh
+            http_cache.fetch(page, pages, opener=pool, prefer_cache=True),   # back
+            http_cache.fetch(page, pages, opener=pool, revalidate=True),     # refresh
+            http_cache.fetch(other, pages, opener=pool, revalidate=True),    # refresh, no validator
+        ]
+        self.assertEqual([g.source for g in got],
+                         ['network', 'network', 'cache', 'cache', 'revalidated', 'network'])
+        self.assertEqual([g.body for g in got[3:5]], [b'<p>page</p>'] * 2)
+        self.assertEqual(got[0].charset, 'utf-8')
+        # four requests reached the server over one kept-alive connection
+        self.assertEqual(len(self.server.hits), 4)
+        self.assertEqual((pool.connects, len(self.server.clients)), (1, 1))
+        pool.close()
+
+    def test_on_data_sees_the_body(self):
+        body = b'<p>' + b'x' * (3 * http_cache.READ_CHUNK) + b'</p>'
+        self.server.routes['/big.html'] = (body, {'Cache-Control': 'max-age=600'})
+        url = f'{self.base}/big.html'
+        pool = http_cache.ConnectionPool()
+        pages = http_cache.PageCache()
+        for opener in (None, pool, pool):   # urlopen, pooled, then a cache hit
+            chunks = []
+            got = http_cache.fetch(url, pages if opener else None, opener=opener,
+                                   on_data=lambda c, cs: chunks.append((c, cs)))
+            self.assertEqual(b''.join(c for c, _ in chunks), body)
+            self.assertEqual({cs for _, cs in chunks}, {'utf-8'})
+        self.assertEqual(got.source, 'cache')
+        self.assertEqual(len(chunks), 1)
+        pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import jsmini
+from js_builtins import JSArray, HOLE
+
+
+def _run(src, engine):
+    ctx = jsmini.make_context(log_fn=lambda s: None, engine=engine)
+    res, _ = jsmini.run_with_interpreter(src, ctx)
+    return res
+
+
+class TestJSArray(CleanTestCase):
+    def test_dict_protocol(self):
+        a = JSArray([1.0, HOLE, 'x'])
+        self.assertEqual(a['length'], 3)
+        self.assertEqual(a['0'], 1.0)
+        self.assertNotIn('1', a)
+        self.assertIsNone(a.get('1'))
+        self.assertIn('2', a)
+        self.assertNotIn('01', a)
+        self.assertEqual(a.keys(), ['__proto__', '0', '2', 'length'])
+        a['5'] = True
+        self.assertEqual(a['length'], 6)
+        self.assertEqual(a._items[3:], [HOLE, HOLE, True])
+        a['length'] = 2
+        self.assertEqual(a._items, [1.0, HOLE])
+        del a['0']
+        self.assertNotIn('0', a)
+        self.assertEqual(a['length'], 2)
+        a['tag'] = 'named'
+        self.assertEqual(dict(a.items()), {'__proto__': None, 'length': 2, 'tag': 'named'})
+
+    def test_sparse_fallback(self):
+        a = JSArray(['a'])
+        a['100000'] = 'far'
+        self.assertIsNone(a._items)
+        self.assertEqual(a['0'], 'a')
+        self.assertEqual(a['100000'], 'far')
+        self.assertEqual(list(a.elements(2)), [(0, 'a')])
+        b = JSArray([1, 2])
+        b['length'] = 1.5
+        self.assertIsNone(b._items)
+        self.assertEqual(b['length'], 1.5)
+        self.assertEqual(b['1'], 2)
+
+    def test_scripts(self):
+        snippets = [
+            ("var a = [1, , 3]; JSON.stringify(a);", "[1.0,null,3.0]"),
+            ("var a = [1, , 3]; a.length;", 3),
+            ("var a = []; a[3] = 'x'; a.length;", 4),
+            ("var a = [1, 2, 3, 4]; a.length = 2; JSON.stringify(a);", "[1.0,2.0]"),
+            ("var a = [3, 1, 2]; a.push(9); a.pop();", 9.0),
+            ("var a = [3, 1, 2]; a.push(9); a.pop(); JSON.stringify(a.map(function(x){ return x * 2; }));",
+             "[6.0,2.0,4.0]"),
+            ("JSON.stringify([1, 2, 3, 4].filter(function(x){ return x % 2 == 0; }).concat([5], 6));",
+             "[2.0,4.0,5.0,6.0]"),
+            ("var a = [1, 2, 3, 4, 5]; a.splice(1, 2, 'a'); JSON.stringify(a) + JSON.stringify(a.slice(-2));",
+             '[1.0,"a",4.0,5.0][4.0,5.0]'),
+            ("[4, 5, 6].indexOf(6) + [4, 5, 6].reduce(function(p, c){ return p + c; }, 0);", 17),
+            ("JSON.stringify(JSON.parse('[1,[2,{\"k\":[3]}],null]'));", '[1,[2,{"k":[3]}],null]'),
+            ("Object.keys({a: 1, b: 2}).length;", 2),
+            ("Array.isArray([]);", True),
+        ]
+        for engine in ('tree', 'closure'):
+            for src, expected in snippets:
+                with self.subTest(engine=engine, src=src):
+                    self.assertEqual(_run(src, engine), expected)
+
+    def test_literal_is_list_backed(self):
+        res = _run("var a = [1, 'two']; a.push(3); a;", 'closure')
+        self.assertIsInstance(res, JSArray)
+        self.assertEqual(res._items, [1.0, 'two', 3.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import large_file
+from large_file import MappedFile
+
+
+class TestMappedFile(CleanTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.lines = [f"[{i:05d}] map_cache entry {'é' if i % 7 == 0 else 'e'} value={i * 3}" for i in range(20000)]
+        self.path = os.path.join(self.tmp.name, 'server.log')
+        with open(self.path, 'w', encoding='utf-8', newline='\n') as fh:
+            fh.write('\n'.join(self.lines) + '\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        super().tearDown()
+
+    def _indexed(self, block=None):
+        mf = MappedFile(self.path)
+        old = large_file.INDEX_BLOCK
+        large_file.INDEX_BLOCK = block or old
+        try:
+            mf.start_indexing()
+            self.assertTrue(mf.done.wait(10))
+        finally:
+            large_file.INDEX_BLOCK = old
+        self.addCleanup(mf.close)
+        return mf
+
+    def test_index_matches_lines(self):
+        # small blocks: line starts come from many index steps
+        mf = self._indexed(block=4096)
+        # the empty line after the final newline counts, as in a Text widget
+        self.assertEqual(mf.line_count, len(self.lines) + 1)
+        self.assertEqual(mf.text(0, 3), '\n'.join(self.lines[:3]))
+        self.assertEqual(mf.text(19998, 20001), self.lines[19998] + '\n' + self.lines[19999] + '\n')
+        self.assertEqual(mf.line_of(mf.starts[1234] + 5), 1234)
+
+    def test_search_runs_over_the_mapping(self):
+        mf = self._indexed()
+        hit = mf.search('value=21', line=0)
+        self.assertEqual(hit, (7, self.lines[7].index('value=21'), 8))
+        # search continues after a given position and reports character columns
+        hit = mf.search('entry é', line=8)
+        self.assertEqual(hit, (14, self.lines[14].index('entry é'), 7))
+        self.assertEqual(mf.search(r'value=5999[0-9]\b', regex=True)[0], 19997)
+        self.assertEqual(mf.search('MAP_CACHE', line=19999, col=3, nocase=True), (19999, 8, 9))
+        self.assertIsNone(mf.search('MAP_CACHE', line=19999, col=9, nocase=True))
+
+    def test_lines_readable_while_indexing(self):
+        mf = MappedFile(self.path)
+        self.addCleanup(mf.close)
+        self.assertEqual(mf.line_count, 0)
+        self.assertEqual(mf.text(0, 10), '')
+        # a search past the indexed part still finds the right line
+        self.assertEqual(mf.search('[12345]')[0], 12345)
+        mf.index_all()
+        self.assertEqual(mf.text(5, 6), self.lines[5])
+
+    def test_crlf_window_has_no_trailing_cr(self):
+        crlf = os.path.join(self.tmp.name, 'windows.log')
+        with open(crlf, 'wb') as fh:
+            fh.write(b'abc\r\ndef\r\nghi\r\n')
+        mf = MappedFile(crlf)
+        self.addCleanup(mf.close)
+        mf.index_all()
+        self.assertEqual(mf.text(0, 2), 'abc\ndef')
+        self.assertEqual(mf.text(1, 2), 'def')
+        self.assertEqual(mf.text(0, 4), 'abc\ndef\nghi\n')
+        self.assertEqual(mf.search('ghi', line=1), (2, 0, 3))
+
+    def test_empty_file(self):
+        empty = os.path.join(self.tmp.name, 'empty.log')
+        open(empty, 'wb').close()
+        mf = MappedFile(empty)
+        mf.index_all()
+        self.assertEqual((mf.line_count, mf.text(0, 1), mf.search('x')), (1, '', None))
+        mf.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import random
+import sys
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import piece_table
+from piece_table import PieceTable
+
+
+def _tk_index(text, offset):
+    line = text.count('\n', 0, offset)
+    return f"{line + 1}.{offset - (text.rfind(chr(10), 0, offset) + 1)}"
+
+
+class TestPieceTable(CleanTestCase):
+    def test_random_edits_match_a_string(self):
+        rnd = random.Random(11)
+        text = ''.join(rnd.choice('ab \n') for _ in range(3000))
+        doc = PieceTable(text)
+        for step in range(600):
+            op = rnd.random()
+            at = rnd.randint(0, len(text))
+            if op < 0.5:
+                ins = ''.join(rnd.choice('xy\n') for _ in range(rnd.randint(1, 5)))
+                doc.insert(at, ins)
+                text = text[:at] + ins + text[at:]
+            elif op < 0.8:
+                end = min(len(text), at + rnd.randint(1, 40))
+                doc.delete(at, end)
+                text = text[:at] + text[end:]
+            else:
+                end = min(len(text), at + rnd.randint(0, 10))
+                doc.replace(at, end, 'R\nR')
+                text = text[:at] + 'R\nR' + text[end:]
+            self.assertEqual(len(doc), len(text))
+            if step % 25 == 0:
+                s = rnd.randint(0, len(text))
+                e = rnd.randint(s, len(text))
+                self.assertEqual(doc.get(s, e), text[s:e])
+                self.assertEqual(doc.line_count, text.count('\n') + 1)
+                for off in (0, s, e, len(text)):
+                    self.assertEqual(doc.index(off), _tk_index(text, off), off)
+                    line, col = map(int, doc.index(off).split('.'))
+                    self.assertEqual(doc.offset(line, col), off)
+        self.assertEqual(doc.text(), text)
+
+    def test_typing_coalesces_and_compacts(self):
+        doc = PieceTable('x' * 10000 + '\n' + 'y' * 10)
+        for i, ch in enumerate('hello world\n' * 30):
+            doc.insert(5000 + i, ch)
+        # one split of the opening buffer plus the typed run
+        self.assertEqual(len(doc.pieces), 3)
+        for i in range(piece_table.COMPACT_PIECES + 1):
+            doc.insert(i * 2, '#')
+        self.assertGreater(len(doc.pieces), piece_table.COMPACT_PIECES)
+        text = doc.text()
+        self.assertEqual(len(doc.pieces), 1)
+        self.assertIs(doc.text(), text)
+
+    def test_snapshot_is_frozen_and_shares_buffers(self):
+        doc = PieceTable('line one\nline two\n')
+        doc.insert(5, 'NEW ')
+        snap = doc.snapshot()
+        doc.delete(0, 9)
+        doc.insert(0, 'changed')
+        self.assertEqual(snap.text(), 'line NEW one\nline two\n')
+        self.assertEqual(snap.index(14), '2.1')
+        self.assertIs(snap.pieces[0][0], doc.pieces[-1][0])
+
+    def test_tk_indices_clamp_like_text(self):
+        doc = PieceTable('ab\ncd')
+        self.assertEqual(doc.offset(1, 99), 2)
+        self.assertEqual(doc.offset(9, 0), 5)
+        self.assertEqual(doc.offset(0, 4), 0)
+        self.assertEqual(doc.line_start(7), 3)
+        self.assertEqual(PieceTable('').index(0), '1.0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import sys
+import threading
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import functions as funcs
+import render_jobs
+
+_PAGE = (
+    '<!DOCTYPE html>\n<html><head><title>t</title></head>\n<body>\n  <h1>Title</h1>\n'
+    + ''.join(
+        f'  <p>Para {i} with <b>bold</b> and <a href="https://e.com/{i}">link {i}</a></p>\n'
+        f'  <table><tr><td>a{i}</td><td>b{i}</td></tr></table>\n'
+        f'  <pre><code>x = "<p>{i}</p>"\n</code></pre>\n'
+        for i in range(40))
+    + '</body></html>\n'
+)
+
+
+def _tags(meta):
+    return {tag: [list(span) for span in spans] for tag, spans in meta.get('tags', {}).items()}
+
+
+class _Collect:
+    def __init__(self):
+        self.done = {}
+        self.event = threading.Event()
+
+    def __call__(self, job, plain, meta):
+        self.done[job.id] = (plain, meta)
+        self.event.set()
+
+
+class TestRenderJobs(CleanTestCase):
+    def _render_with(self, processes):
+        pool = render_jobs.RenderPool(processes=processes)
+        self.addCleanup(pool.shutdown)
+        got = _Collect()
+        job = pool.submit('tab', _PAGE, got, fetch_seconds=0.25)
+        self.assertTrue(got.event.wait(60))
+        return job, got.done[job.id]
+
+    def test_thread_render_matches_parse(self):
+        plain, meta = funcs._parse_html_and_apply(_PAGE)
+        job, (plain2, meta2) = self._render_with(0)
+        self.assertEqual(plain2, plain)
+        self.assertEqual(_tags(meta2), _tags(meta))
+        self.assertEqual(meta2.get('links'), meta.get('links'))
+        for stage in ('fetch', 'queue', 'preprocess', 'parse'):
+            self.assertIn(stage, job.metrics)
+        self.assertAlmostEqual(job.metrics['fetch'], 0.25)
+
+    def test_process_render_matches_parse(self):
+        plain, meta = funcs._parse_html_and_apply(_PAGE)
+        job, (plain2, meta2) = self._render_with(1)
+        self.assertEqual(plain2, plain)
+        self.assertEqual(_tags(meta2), _tags(meta))
+        self.assertIn('transfer', job.metrics)
+
+    def test_result_round_trip(self):
+        plain, meta, timings = render_jobs.render_html(_PAGE)
+        plain2, meta2 = render_jobs.unpack_result(render_jobs.pack_result(plain, meta, timings))
+        self.assertEqual(plain2, plain)
+        self.assertEqual(_tags(meta2), _tags(meta))
+
+    def test_newer_job_cancels_older(self):
+        pool = render_jobs.RenderPool(processes=0)
+        self.addCleanup(pool.shutdown)
+        gate = threading.Event()
+        got = _Collect()
+        blocker = pool.submit('other', '<p>x</p>', lambda job, plain, meta: gate.wait(10))
+        first = pool.submit('tab', _PAGE, got)
+        second = pool.submit('tab', '<p>new</p>', got)
+        gate.set()
+        self.assertTrue(got.event.wait(60))
+        self.assertTrue(first.cancelled)
+        self.assertNotIn(first.id, got.done)
+        self.assertEqual(got.done[second.id][0].strip(), 'new')
+        self.assertTrue(pool.is_current(second))
+        self.assertFalse(blocker.cancelled)
+
+    def test_cancel_key(self):
+        pool = render_jobs.RenderPool(processes=0)
+        self.addCleanup(pool.shutdown)
+        job = pool.begin('tab')
+        self.assertTrue(pool.cancel('tab'))
+        self.assertTrue(job.cancelled)
+        self.assertFalse(pool.is_current(job))
+        self.assertFalse(pool.cancel('tab'))
+        with self.assertRaises(render_jobs.JobCancelled):
+            render_jobs.render_html(_PAGE, lambda: True)
+
+    def test_move_keeps_job_current(self):
+        pool = render_jobs.RenderPool(processes=0)
+        self.addCleanup(pool.shutdown)
+        job = pool.begin('old-tab')
+        pool.move(job, 'new-tab')
+        self.assertTrue(pool.is_current(job))
+        self.assertFalse(pool.cancel('old-tab'))
+        self.assertTrue(pool.cancel('new-tab'))
+
+    def test_summary_lists_stages_in_order(self):
+        job = render_jobs.RenderJob('tab', '', None)
+        job.record('apply', 0.004)
+        job.record('parse', 0.2)
+        self.assertEqual(job.summary(), f"render #{job.id}: parse 200 ms, apply 4 ms")
+
+
+if __name__ == '__main__':
+    unittest.main()
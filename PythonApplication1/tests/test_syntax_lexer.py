@@ -0,0 +1,222 @@
+import random
+import re
+import sys
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+from syntax_lexer import LineStateLexer, LineIndex, MasterPattern, ProtectedSpans, rules_from_regexes, LEXER_TAGS
+from syntax_lexer import nearest_gap
+
+
+REGEXES = {
+    'STRING_RE': re.compile(r'("""[\s\S]*?"""|' + r"'''[\s\S]*?'''|" + r'"[^"\n]*"|' + r"'[^'\n]*')"),
+    'COMMENT_RE': re.compile(r'#[^\n]*|/\*[\s\S]*?\*/'),
+    'NUMBER_RE': re.compile(r'\b\d+\b'),
+    'CLASS_RE': re.compile(r'\bclass[ \t]+([A-Za-z_]\w*)'),
+    'VAR_ASSIGN_RE': re.compile(r'(?m)^[ \t]*([A-Za-z_]\w*)[ \t]*='),
+    'KEYWORD_RE': re.compile(r'\b(if|else|return|class|def)\b'),
+}
+TODO_RE = re.compile(r'\bTODO\b')
+
+
+def _make_lexer():
+    return LineStateLexer(rules_from_regexes(REGEXES), todo_re=TODO_RE)
+
+
+def _positions(tags):
+    out = {t: set() for t in LEXER_TAGS}
+    for tag, ranges in tags.items():
+        for s, e in ranges:
+            out[tag].update(range(s, e))
+    return out
+
+
+class TestLineStateLexer(CleanTestCase):
+    def test_single_line_edit_relexes_one_line(self):
+        lines = ["x = %d  # note" % i for i in range(2000)]
+        text = "\n".join(lines)
+        lexer = _make_lexer()
+        lexer.reset(text)
+        lines[1000] = "x = 'edited' if y else 7"
+        res = lexer.update("\n".join(lines), hint=1000)
+        self.assertEqual((res.start_line, res.end_line), (1000, 1001))
+        self.assertEqual(res.index(res.start_offset), "1001.0")
+        self.assertEqual(res.index(res.end_offset), "1002.0")
+        self.assertEqual([res.index(s) for s, _ in res.tags['string']], ["1001.4"])
+        self.assertEqual(res.tags['keyword'], [(res.start_offset + 13, res.start_offset + 15),
+                                               (res.start_offset + 18, res.start_offset + 22)])
+        self.assertIsNone(lexer.update("\n".join(lines)))
+
+    def test_opening_block_changes_state_until_it_converges(self):
+        lines = ["a = 1", "b = 2", "c = 3", '"""doc"""', "d = 4", "e = 5"]
+        lexer = _make_lexer()
+        lexer.reset("\n".join(lines))
+        self.assertEqual(lexer.states, [None] * 6)
+        lines[1] = 'b = """2'
+        res = lexer.update("\n".join(lines), hint=1)
+        # the new string swallows lines 1..3 and the old docstring's tail opens nothing new
+        self.assertEqual(lexer.states, [None, ('string', 0, 4), ('string', 1, 4), None, None, None])
+        self.assertEqual((res.start_line, res.end_line), (1, 4))
+        # editing inside the string backs up to the line the span started on
+        lines[2] = "c = 33"
+        res = lexer.update("\n".join(lines), hint=2)
+        self.assertEqual((res.start_line, res.end_line), (1, 3))
+        self.assertEqual(lexer.states[1:3], [('string', 0, 4), ('string', 1, 4)])
+        self.assertEqual([lexer.token_start_line(i) for i in range(5)], [0, 1, 1, 1, 4])
+
+    def test_closing_an_opener_above_relexes_from_it(self):
+        lines = ['def f():', '    """', '    doc line', '    more', 'x = 1']
+        lexer = _make_lexer()
+        lexer.reset("\n".join(lines))
+        self.assertEqual(lexer.states, [None] * 5)
+        lines[3] = '    more"""'
+        res = lexer.update("\n".join(lines), hint=3)
+        self.assertEqual((res.start_line, res.end_line), (1, 4))
+        self.assertEqual(res.tags['string'], [(13, 41)])
+        self.assertEqual(lexer.states, [None, ('string', 0, 4), ('string', 1, 4), None, None])
+        # a block comment closed in the middle of a line of code
+        lines = ['a = 1', '/* open', 'b = 2', 'c = 3 * 4']
+        lexer.reset("\n".join(lines))
+        lines[3] = 'c = 3 */ 4'
+        res = lexer.update("\n".join(lines), hint=3)
+        self.assertEqual(res.start_line, 1)
+        self.assertEqual(res.tags['comment'], [(6, 28)])
+
+    def test_random_edits_match_full_lex(self):
+        # lone delimiters open spans that close far below (or never), and typing one may
+        # close an opener far above; line comments end their line so they never hide half
+        # of a block
+        tokens = ['a', 'b', '1', ' ', '=', '"s"', "'c'", '"""d\noc"""', '# c\n', '/*\n*/', '/* TODO */',
+                  '\n', '\n', 'if ', 'class ', 'TODO', 'x = ', '"""', "'''", '/*', '*/', '*']
+        rnd = random.Random(11)
+        for _ in range(120):
+            toks = [rnd.choice(tokens) for _ in range(rnd.randint(0, 80))]
+            text = ''.join(toks)
+            lexer = _make_lexer()
+            doc = _positions(lexer.lex_all(text).tags)
+            for _ in range(15):
+                k = rnd.randint(0, len(toks))
+                cut = rnd.randint(0, 3)
+                ins = [rnd.choice(tokens) for _ in range(rnd.randint(0, 3))]
+                a = len(''.join(toks[:k]))
+                b = a + len(''.join(toks[k:k + cut]))
+                toks[k:k + cut] = ins
+                text = ''.join(toks)
+                hint = (text.count('\n', 0, a), text.count('\n', 0, a + len(''.join(ins))))
+                res = lexer.update(text, hint=hint)
+                if res is None:
+                    continue
+                # replay the edit on a position-per-tag model like Text.tag_remove/tag_add do
+                shift = len(''.join(ins)) - (b - a)
+                for tag, pos in doc.items():
+                    moved = {p if p < a else p + shift for p in pos if p < a or p >= b}
+                    doc[tag] = {p for p in moved if not (res.start_offset <= p < res.end_offset)}
+                for tag, ranges in res.tags.items():
+                    for s, e in ranges:
+                        doc[tag].update(range(s, e))
+                fresh = _make_lexer()
+                expected = _positions(fresh.lex_all(text).tags)
+                self.assertEqual(doc, expected, repr(text))
+                self.assertEqual(lexer.states, fresh.states, repr(text))
+                self.assertEqual(lexer.dangling, fresh.dangling, repr(text))
+
+
+class TestMasterPattern(CleanTestCase):
+    def _scan(self, text):
+        tags = MasterPattern(rules_from_regexes(REGEXES), todo_re=TODO_RE).scan(text)
+        return {t: [text[s:e] for s, e in r] for t, r in tags.items() if r}
+
+    def test_strings_and_comments_take_precedence(self):
+        self.assertEqual(self._scan('x = "a # b" # c "d" TODO\n'), {
+            'variable': ['x'], 'string': ['"a # b"'], 'comment': ['# c "d" TODO'], 'todo': ['TODO']})
+        self.assertEqual(self._scan('if 1 /* class A */ else 2'), {
+            'keyword': ['if', 'else'], 'number': ['1', '2'], 'comment': ['/* class A */']})
+
+    def test_group_rule_keeps_surrounding_tokens(self):
+        self.assertEqual(self._scan('class Foo'), {'keyword': ['class'], 'class_name': ['Foo']})
+
+    def test_flags_stay_scoped_and_placeholders_are_dropped(self):
+        rules = [('keyword', re.compile(r'(?i)\bselect\b'), False),
+                 ('variable', re.compile(r'(?m)^(\w+):'), True),
+                 ('constant', re.compile(r'\b\b'), True),
+                 ('number', re.compile(r'\d+'), False)]
+        master = MasterPattern(rules)
+        self.assertEqual([t for t, _ in master.slots.values()], ['variable', 'keyword', 'number'])
+        tags = master.scan('SELECT a\nkey: 1 Select')
+        self.assertEqual(tags['keyword'], [(0, 6), (16, 22)])
+        self.assertEqual(tags['variable'], [(9, 12)])
+        self.assertEqual(tags['number'], [(14, 15)])
+
+    def test_protected_spans_merge(self):
+        spans = ProtectedSpans([(10, 20), (0, 5)])
+        spans.add(4, 12)
+        spans.add(30, 31)
+        self.assertEqual((spans._starts, spans._ends), ([0, 30], [20, 31]))
+        self.assertTrue(spans.overlaps(19, 25))
+        self.assertFalse(spans.overlaps(20, 30))
+
+
+class TestLineIndex(CleanTestCase):
+    def test_offsets_become_tk_indices(self):
+        text = 'ab\n\ncdef\n'
+        idx = LineIndex(text)
+        self.assertEqual(idx.starts, [0, 3, 4, 9])
+        self.assertEqual([idx.index(o) for o in (0, 2, 3, 4, 8, 9)], ['1.0', '1.2', '2.0', '3.0', '3.4', '4.0'])
+        self.assertEqual(idx.line_start(2), 4)
+        self.assertEqual(idx.line_start(99), 9)
+        # a region starting at Tk index 7.3
+        region = LineIndex(text, 7, 3)
+        self.assertEqual([region.index(o) for o in (0, 2, 3, 8)], ['7.3', '7.5', '8.0', '9.4'])
+        self.assertEqual(region.tk_ranges([(1, 4)]), ['7.4', '9.0'])
+        self.assertEqual(LineIndex(text, 7).tk_ranges([(1, 4)]), ['7.1', '9.0'])
+
+    def test_bulk_ranges_match_single_lookups(self):
+        rnd = random.Random(4)
+        text = ''.join(rnd.choice('ab \n') for _ in range(500))
+        idx = LineIndex(text)
+        ranges = sorted((s, s + rnd.randint(0, 30)) for s in (rnd.randint(0, 470) for _ in range(80)))
+        # unsorted input (a tag's ranges from several passes) works as well
+        ranges += [(300, 310), (5, 9)]
+        expected = [idx.index(o) for r in ranges for o in r]
+        self.assertEqual(idx.tk_ranges(ranges), expected)
+        for (s, e), (a, b) in zip(ranges, zip(expected[::2], expected[1::2])):
+            line, col = map(int, a.split('.'))
+            self.assertEqual(text.split('\n')[line - 1][:col], text[idx.starts[line - 1]:s])
+
+
+class TestNearestGap(CleanTestCase):
+    def test_viewport_first_then_nearest_edge(self):
+        # 1000 lines, viewport 500..540
+        self.assertEqual(nearest_gap([], 1000, 500, 540, 60), (500, 560))
+        self.assertEqual(nearest_gap([(500, 541)], 1000, 500, 540, 60), (541, 601))
+        self.assertEqual(nearest_gap([(490, 560)], 1000, 500, 540, 60), (430, 490))
+        self.assertEqual(nearest_gap([(450, 560)], 1000, 500, 540, 60), (560, 620))
+        # a partly highlighted viewport resumes inside it
+        self.assertEqual(nearest_gap([(500, 520)], 1000, 500, 540, 60), (520, 580))
+        self.assertIsNone(nearest_gap([(1, 400), (400, 1001)], 1000, 500, 540, 60))
+        self.assertIsNone(nearest_gap([], 0, 1, 1, 60))
+
+    def test_fills_every_line_once(self):
+        rnd = random.Random(6)
+        done = []
+        total = 777
+        seen = []
+        while True:
+            first = rnd.randint(1, total)
+            gap = nearest_gap(done, total, first, first + 30, 50)
+            if gap is None:
+                break
+            seen.extend(range(*gap))
+            done = sorted(done + [gap])
+        self.assertEqual(sorted(seen), list(range(1, total + 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import random
+import re
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import syntax_presets
+import syntax_worker
+from syntax_presets import PresetRegistry, word_alternation, word_regex
+
+
+PRESET = """[Syntax]
+name = Tiny
+keywords.csv = if,else,end,close,close2
+builtins.csv = mes,menu
+regex.COMMENT_RE = //[^\\n]*
+regex.STRING_RE = "[^"\\n]*"
+regex.NUMBER_RE = (
+"""
+
+
+class TestWordAlternation(CleanTestCase):
+    def test_trie_shares_prefixes(self):
+        self.assertEqual(word_alternation(['close', 'close2', 'close3', 'clear']), 'cl(?:ear|ose[23]?)')
+        self.assertEqual(word_alternation([]), '')
+        self.assertEqual(word_regex([]).pattern, r'\b\b')
+
+    def test_matches_like_the_plain_join(self):
+        rnd = random.Random(5)
+        for _ in range(40):
+            words = {''.join(rnd.choice('ab_1.') for _ in range(rnd.randint(1, 4))) for _ in range(12)}
+            text = ' '.join(''.join(rnd.choice('ab_1. ') for _ in range(rnd.randint(1, 6))) for _ in range(60))
+            plain = re.compile(r'\b(' + '|'.join(map(re.escape, sorted(words, key=len, reverse=True))) + r')\b')
+            self.assertEqual([m.span() for m in word_regex(words).finditer(text)],
+                             [m.span() for m in plain.finditer(text)], sorted(words))
+
+
+class TestPresetRegistry(CleanTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'tiny.ini')
+        with open(self.path, 'w', encoding='utf-8') as fh:
+            fh.write(PRESET)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        super().tearDown()
+
+    def test_compiled_once_per_mtime(self):
+        reg = PresetRegistry()
+        preset = reg.get(self.path)
+        self.assertEqual(preset.name, 'Tiny')
+        self.assertEqual(preset.keywords[0], ['if', 'else', 'end', 'close', 'close2'])
+        # the invalid NUMBER_RE is left out so the caller keeps its default
+        self.assertEqual(sorted(preset.regexes), ['COMMENT_RE', 'STRING_RE'])
+        self.assertIs(reg.get(self.path), preset)
+        self.assertIs(reg.get_by_id(preset.id), preset)
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        newer = reg.get(self.path)
+        self.assertIsNot(newer, preset)
+        self.assertIs(reg.get_by_id(preset.id), newer)
+        self.assertIsNone(reg.get(os.path.join(self.tmp.name, 'missing.ini')))
+
+    def test_worker_resolves_preset_id(self):
+        preset = syntax_presets.registry.get(self.path)
+        src = 'if x // close\nmes "end" end 7\n'
+        by_id = syntax_worker.process_slice(src, 0, len(src), [], [], [], preset.id)
+        by_lists = syntax_worker.process_slice(src, 0, len(src), [], preset.keywords[0], preset.builtins[0])
+        # the preset's '//' comments and strings hide 'close' and the quoted 'end'
+        self.assertEqual(by_id['keyword'], [(0, 2), (24, 27)])
+        self.assertEqual(by_id['builtin'], [(14, 17)])
+        # the module defaults only know '#' comments
+        self.assertEqual(by_lists['keyword'], [(0, 2), (8, 13), (24, 27)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import random
+import sys
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import syntax_worker
+from syntax_worker import pack_slice, pack_spans, unpack_spans, process_slice, SLICE_CONTEXT
+from syntax_worker import DocumentSession, WorkerSession, pack_blocks, unpack_blocks
+
+
+KEYWORDS = ['if', 'else', 'return', 'class', 'def', 'import']
+BUILTINS = ['len', 'print', 'range']
+
+
+def _document(seed=3, lines=400):
+    rnd = random.Random(seed)
+    parts = ['@deco', 'class Foo', 'x = 12', 'obj.attr', 'if len(y): return 0x1f',
+             '"a # b"', '# comment if', "'''doc\nstring'''", 'self.value = print(z)', '__init__']
+    return '\n'.join(' '.join(rnd.choice(parts) for _ in range(rnd.randint(1, 4))) for _ in range(lines))
+
+
+class TestSliceTransport(CleanTestCase):
+    def test_packed_spans_round_trip(self):
+        rd = {'keyword': [(100, 102), (2**31 - 5, 2**31 - 1)], 'number': []}
+        packed = pack_spans(rd, base=100)
+        self.assertEqual(unpack_spans(json.loads(json.dumps(packed)), base=100), rd)
+
+    def test_slice_matches_full_document(self):
+        content = _document()
+        # a protected span crossing each slice boundary, as for a string opened earlier
+        protected = [(1000, 1400), (3000, 3010)]
+        for s, e in [(0, 900), (900, 2000), (2000, 3005), (3005, len(content))]:
+            base, text, rs, re_, prot = pack_slice(content, s, e, protected)
+            self.assertEqual(base, max(0, s - SLICE_CONTEXT))
+            self.assertEqual(len(text), e - base)
+            self.assertTrue(all(0 <= ps <= pe <= len(text) for ps, pe in prot))
+            wire = json.loads(json.dumps(pack_spans(process_slice(text, rs, re_, prot, KEYWORDS, BUILTINS))))
+            self.assertEqual(unpack_spans(wire, base),
+                             process_slice(content, s, e, protected, KEYWORDS, BUILTINS), (s, e))
+
+    def test_request_carries_only_the_slices(self):
+        content = _document(lines=2000)
+        ranges = [(0, 2000), (len(content) - 2000, len(content))]
+        req = json.loads(syntax_worker._map_request(content, ranges, [], KEYWORDS, BUILTINS, None))
+        self.assertNotIn('content', req)
+        self.assertEqual(sum(len(sl[1]) for sl in req['slices']), 4000 + SLICE_CONTEXT)
+        resp = {'packed': True, 'results': []}
+        for _base, text, s, e, prot in req['slices']:
+            resp['results'].append(pack_spans(process_slice(text, s, e, prot, KEYWORDS, BUILTINS)))
+        self.assertEqual(syntax_worker._map_results(json.dumps(resp), ranges),
+                         [process_slice(content, s, e, [], KEYWORDS, BUILTINS) for s, e in ranges])
+
+
+class TestDocumentSession(CleanTestCase):
+    def test_random_edits_match_a_fresh_session(self):
+        pieces = ['x', ' = ', '"s"', "'''", '"""', '\n', '# c', 'if ', 'len(', ')', '.attr', '42', 'class K']
+        for seed in (8, 9, 10, 11):
+            rnd = random.Random(seed)
+            doc = DocumentSession(_document(lines=60), KEYWORDS, BUILTINS)
+            for _ in range(40):
+                for _ in range(rnd.randint(1, 3)):
+                    offset = rnd.randint(0, len(doc.text))
+                    doc.edit(offset, rnd.randint(0, 6), ''.join(rnd.choice(pieces) for _ in range(rnd.randint(0, 3))))
+                blocks = doc.highlight([(0, 3)])
+                self.assertEqual(blocks[0][0], 0)
+                fresh = DocumentSession(doc.text, KEYWORDS, BUILTINS)
+                self.assertEqual(doc.line_tokens, fresh.line_tokens, repr(doc.text))
+                for a, b, tokens in blocks:
+                    self.assertEqual(tokens, [(t, i, s, e) for i in range(a, b) for t, s, e in fresh.line_tokens[i]])
+
+    def test_closing_an_unmatched_opener(self):
+        text = 'def f():\n    """\n    doc\n    more\nx = 1\n'
+        doc = DocumentSession(text, KEYWORDS, BUILTINS)
+        doc.edit(text.index('more') + 4, 0, '"""')
+        blocks = doc.highlight()
+        self.assertEqual([(a, b) for a, b, _ in blocks], [(1, 4)])
+        self.assertEqual(doc.line_tokens[1:4], [[('string', 4, 7)], [('string', 0, 7)], [('string', 0, 11)]])
+        self.assertEqual(doc.line_tokens, DocumentSession(doc.text, KEYWORDS, BUILTINS).line_tokens)
+
+    def test_blocks_cover_edit_and_requested_lines(self):
+        doc = DocumentSession('a = 1\nb = 2\nc = 3\nd = 4\n', KEYWORDS, BUILTINS)
+        doc.edit(6, 0, 'if ')
+        self.assertEqual([(a, b) for a, b, _ in doc.highlight([(3, 9)])], [(1, 2), (3, 5)])
+        self.assertEqual(doc.text, 'a = 1\nif b = 2\nc = 3\nd = 4\n')
+        self.assertEqual(doc.highlight(), [])
+        packed = json.loads(json.dumps(pack_blocks(doc.highlight([(1, 2)]))))
+        self.assertEqual(unpack_blocks(packed), [(1, 2, {'keyword': [(1, 0, 2)], 'number': [(1, 7, 8)]})])
+
+    def test_worker_session_without_servers_runs_locally(self):
+        session = WorkerSession('x = 1\n', KEYWORDS, BUILTINS)
+        session.edit(6, 0, 'return len(x)\n')
+        # the new line plus the empty last line after it
+        self.assertEqual(session.highlight(), [(1, 3, {'keyword': [(1, 0, 6)], 'builtin': [(1, 7, 10)]})])
+        session.close()
+        self.assertNotIn(session.id, syntax_worker._sessions)
+        self.assertIsNone(session.highlight())
+
+
+if __name__ == '__main__':
+    unittest.main()
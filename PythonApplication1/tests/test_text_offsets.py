@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import functions
+from functions import TextOffsetMap
+
+
+class _TextStub:
+    """The few Text methods TextOffsetMap uses, over a plain string ('line.col' indices only)."""
+
+    def __init__(self, text, tags):
+        self.text = text
+        self.tags = tags
+        self.get_calls = 0
+
+    def _offset(self, index):
+        if index == 'end-1c':
+            return len(self.text)
+        line, col = map(int, str(index).split('.'))
+        lines = self.text.split('\n')
+        return sum(len(x) + 1 for x in lines[:line - 1]) + min(col, len(lines[line - 1]))
+
+    def index(self, index):
+        off = len(self.text) if index == 'end' else self._offset(index)
+        line = self.text.count('\n', 0, off) + 1
+        return f"{line}.{off - (self.text.rfind(chr(10), 0, off) + 1)}"
+
+    def get(self, a, b):
+        self.get_calls += 1
+        return self.text[self._offset(a):self._offset(b)]
+
+    def tag_ranges(self, tag):
+        return tuple(i for r in self.tags.get(tag, ()) for i in r)
+
+
+class TestTextOffsetMap(CleanTestCase):
+    def test_indices_map_to_offsets(self):
+        text = 'first line\n\nthird\nlast'
+        stub = _TextStub(text, {'bold': [('1.6', '3.2'), ('4.0', '4.0')], 'code': [('3.0', '4.4')]})
+        offsets = TextOffsetMap(stub)
+        # one snapshot read, no per-boundary prefix copies
+        self.assertEqual(stub.get_calls, 1)
+        self.assertEqual(offsets.tag_ranges('bold'), [[6, 14]])
+        self.assertEqual(offsets.tag_ranges('code'), [[12, 22]])
+        self.assertEqual(stub.get_calls, 1)
+        for index in ('1.0', '1.10', '2.0', '3.3', '4.4', 'end'):
+            self.assertEqual(offsets.offset(index), len(stub.get('1.0', stub.index(index))), index)
+        # columns past the end of a line clamp to it, as Tk does
+        self.assertEqual(offsets.offset('1.99'), 10)
+
+    def test_collect_all_tag_ranges(self):
+        stub = _TextStub('x = "s"\ny', {'string': [('1.4', '1.7')], 'bold': [('2.0', '2.1')]})
+        self.assertEqual(functions._collect_all_tag_ranges(stub), {'bold': [[8, 9]], 'string': [[4, 7]]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import jsmini
+from js_builtins import TimerQueue
+
+
+class TestTimerQueue(CleanTestCase):
+    def _run(self, src):
+        self.out = []
+        self.ctx = jsmini.make_context(log_fn=self.out.append)
+        _, self.interp = jsmini.run_with_interpreter(src, self.ctx)
+
+    def _lines(self):
+        # console.log receives the console object as receiver; keep only the arguments
+        return [line.split('} ', 1)[-1] for line in self.out]
+
+    def test_due_time_then_sequence_order(self):
+        self._run("""
+        setTimeout(function(){ console.log('c'); }, 30);
+        setTimeout(function(){ console.log('a'); }, 10);
+        setTimeout(function(){ console.log('b'); }, 10);
+        setTimeout(function(){ console.log('z'); });
+        """)
+        self.assertEqual(jsmini.run_timers(self.ctx), 4)
+        self.assertEqual(self._lines(), ['z', 'a', 'b', 'c'])
+        self.assertEqual(self.ctx['_timers'].now, 30)
+        self.assertEqual(jsmini.run_in_interpreter("performance.now();", self.interp), 30)
+
+    def test_microtasks_run_after_each_task(self):
+        self._run("""
+        setTimeout(function(){ console.log('t1'); queueMicrotask(function(){ console.log('m1'); }); }, 1);
+        setTimeout(function(){ console.log('t2'); }, 1);
+        queueMicrotask(function(){ console.log('m0'); });
+        """)
+        jsmini.run_timers(self.ctx)
+        self.assertEqual(self._lines(), ['m0', 't1', 'm1', 't2'])
+
+    def test_interval_rearms_and_clears(self):
+        self._run("""
+        var n = 0;
+        var iv = setInterval(function(){ n++; if (n == 3) clearInterval(iv); }, 10);
+        var t = setTimeout(function(){ console.log('cancelled'); }, 5);
+        clearTimeout(t);
+        """)
+        q = self.ctx['_timers']
+        self.assertEqual(list(q), [('__interval__', 1)])
+        # one drain runs the interval once; the re-armed entry waits for the next
+        jsmini.run_timers(self.ctx)
+        self.assertEqual(jsmini.run_in_interpreter("n;", self.interp), 1)
+        entry = q._live[1]
+        jsmini.run_timers(self.ctx, advance_ms=10)
+        self.assertEqual(jsmini.run_in_interpreter("n;", self.interp), 2)
+        self.assertIs(q._live[1], entry)
+        jsmini.run_timers(self.ctx, advance_ms=100)
+        self.assertEqual(jsmini.run_in_interpreter("n;", self.interp), 3)
+        self.assertEqual(len(q), 0)
+        self.assertEqual(q.now, 120)
+        self.assertEqual(self._lines(), [])
+
+    def test_interval_dropped_when_invoke_raises(self):
+        q = TimerQueue()
+        q.schedule(print, 10, repeat=True)
+
+        def invoke(fn, args):
+            # what run_timers_from_context re-raises on the per-function call limit
+            raise RuntimeError('call limit')
+
+        with self.assertRaises(RuntimeError):
+            q.run(invoke)
+        self.assertEqual(len(q), 0)
+        self.assertFalse(q)
+        self.assertIsNone(q.next_due())
+
+    def test_zero_delay_loop_is_clamped(self):
+        self._run("var n = 0; function spin(){ n++; setTimeout(spin, 0); } spin();")
+        jsmini.run_timers(self.ctx, advance_ms=100)
+        # the direct call, five unclamped nesting levels at t=0, then one run per 4ms
+        self.assertEqual(jsmini.run_in_interpreter("n;", self.interp), 1 + 5 + 25)
+        self.assertEqual(len(self.ctx['_timers']), 1)
+
+    def test_list_compatibility(self):
+        calls = []
+        q = TimerQueue([(calls.append, ('x',))])
+        q.append((calls.append, ('y',)))
+        self.assertEqual(len(q), 2)
+        self.assertEqual(list(q), [(calls.append, ('x',)), (calls.append, ('y',))])
+        ctx = {'_timers': [(calls.append, ('z',))]}
+        self.assertEqual(jsmini.run_timers_from_context(ctx), 1)
+        self.assertIsInstance(ctx['_timers'], TimerQueue)
+        q.run(lambda fn, args: fn(*args))
+        self.assertEqual(calls, ['z', 'x', 'y'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import itertools
+import random
+import sys
+from pathlib import Path
+import unittest
+from test_base import CleanTestCase
+
+# Add parent directory to sys.path so this test can import local modules kept separate from main code.
+_project_root = Path(__file__).resolve().parent.parent
+_project_root_str = str(_project_root)
+if _project_root_str not in sys.path:
+    sys.path.insert(0, _project_root_str)
+
+import jsmini
+
+
+# The TOKEN_RE tokenizer is the reference; the scanner must agree token for token.
+SOURCES = [
+    "var a = .5 + 1. + 1e3 + .1e-2 + 0x1F; a >>>= 2; a >>= 1; a <<= 1; b = a === 1 !== 2;",
+    "x += 1; x++; ++x; x -= 1; x--; x &&= y; x || y && !z; ~x ^ y | z & w;",
+    "/* block */ var s = 'it\\'s' + \"q\\\"d\"; // line comment\nvar t = s;",
+    "var r = /[a/]+\\/x/gi; if (/^b/.test(s)) { return a / b / c; } x = (a) / 2; y = typeof /re/;",
+    "a = b\n/foo/g; c = [/x/, {k: /y/}]; d = 4 /= 2; return /z/;",
+    "var ٣ = 1; n = 12٣;",
+    "unterminated = 1; /* never closed",
+    "",
+]
+
+
+def _both(src):
+    try:
+        ref = ('ok', jsmini._tokenize_regex(src))
+    except SyntaxError as e:
+        ref = ('err', str(e))
+    try:
+        new = ('ok', jsmini.tokenize(src))
+    except SyntaxError as e:
+        new = ('err', str(e))
+    return ref, new
+
+
+class TestTokenizer(CleanTestCase):
+    def test_matches_regex_tokenizer(self):
+        for src in SOURCES:
+            with self.subTest(src=src):
+                ref, new = _both(src)
+                self.assertEqual(new, ref)
+
+    def test_operators_longest_match(self):
+        for n in range(1, 5):
+            for ops in itertools.product('+-*/%&|^!~<>=', repeat=n):
+                src = 'a' + ''.join(ops) + 'b'
+                ref, new = _both(src)
+                self.assertEqual(new, ref, src)
+
+    def test_random_inputs(self):
+        alphabet = list('ab1.e+-*/=<>!&|"\'\\\n\t (){}[],;:?$') + ['٣', '\xa0', '/*', '*/', 'return ']
+        rnd = random.Random(4)
+        for _ in range(3000):
+            src = ''.join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 12)))
+            ref, new = _both(src)
+            self.assertEqual(new, ref, repr(src))
+
+    def test_illegal_character_message(self):
+        with self.assertRaises(SyntaxError) as cm:
+            jsmini.tokenize("var a = 1;\n@x")
+        self.assertIn("Illegal character '@' (ord=64) in input at position 11.", str(cm.exception))
+
+    def test_token_arrays(self):
+        toks = jsmini.scan_tokens("foo(foo, 'x');")
+        self.assertEqual(len(toks), 8)
+        self.assertEqual(toks[0], ('IDENT', 'foo', 0, 3))
+        self.assertEqual(toks[len(toks) - 1], ('EOF', '', 14, 14))
+        self.assertEqual(list(toks.starts), [0, 3, 4, 7, 9, 12, 13, 14])
+        self.assertIs(toks.values[0], toks.values[2])
+        self.assertEqual(toks.pairs()[1], ('PUNC', '('))
+
+    def test_stream_parse_matches_list_parse(self):
+        src = ("lbl: for (var k in o) { if (k) break lbl; } for (a.b[c] in d) {} "
+               "for (x = 1, y; x < 2; x++) {} for (\"s\" == typeof q; ;) break; var r = /a/g;")
+        expected = jsmini.Parser(jsmini.scan_tokens(src).pairs()).parse_program()
+        for chunk in (1, 2, 3, 256):
+            with self.subTest(chunk=chunk):
+                stream = jsmini.TokenStream(src, chunk=chunk)
+                self.assertEqual(jsmini.Parser(stream).parse_program(), expected)
+        self.assertEqual(jsmini.parse(src), expected)
+
+    def test_stream_window_stays_small(self):
+        src = "var total = 0; function add(a, b) { return a + b; } total = add(total, 1);\n" * 500
+        stream = jsmini.TokenStream(src, chunk=64)
+        jsmini.Parser(stream).parse_program()
+        self.assertLess(stream.peak, 200)
+        self.assertGreater(len(jsmini.scan_tokens(src)), 10000)
+
+    def test_dump_tokens_rescans_window(self):
+        src = "var a = 1;\n" * 200
+        out = jsmini.dump_tokens(src, 502, count=4)
+        self.assertTrue(out.startswith("Tokens 500..503 (total 1001):"))
+        self.assertIn("502: OP      '='  [1106:1107]", out)
+        self.assertIn("<--", out)
+
+
+if __name__ == '__main__':
+    unittest.main()